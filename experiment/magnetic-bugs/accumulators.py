@@ -0,0 +1,345 @@
+"""
+Streaming statistics for the ensemble engines.
+
+Pass a list of accumulators to an engine (accumulators=[...]) and it
+feeds every one the ensemble state after each timestep.  Each keeps
+O(n_bugs) (or O(bins)) memory, so one run can answer several
+statistical questions without storing trajectories or re-simulating:
+
+  Welford        per-bug running mean and variance of a quantity
+  P2Quantile     per-bug streaming quantile (P² algorithm, 5 markers)
+  SuccessFraction  fraction of bugs whose time-mean (or final) value
+                 is below a threshold
+  TimeBinned     ensemble mean / std of a quantity per time bin
+  FirstPassage   per-bug first time a quantity crosses a threshold
+  SpatialGrid    occupancy and per-cell means of quantities on an x–y
+                 grid (trajectory density maps, O(grid) memory)
+
+trajectories.TrajectoryWriter is an accumulator too: it streams whole
+per-bug trajectories to a chunked on-disk store instead.
+
+Quantities are StepState attributes: 'error' (|θ − goal|, rad; fast
+and anomaly engines), 'delta_phi' (field deviation steered by, rad;
+engines with anomalies), 'distance' (from the start point, BL),
+'theta', 'x', 'y'.  A callable key f(state) → (n_bugs,) array also
+works.
+
+Usage:
+    accs = [SuccessFraction(np.radians(15)), TimeBinned(bin_width=5.0)]
+    fast_ensemble(..., accumulators=accs)
+    stats = collect(accs)      # {'success': {...}, 'binned_error': {...}}
+"""
+
+import numpy as np
+
+
+class StepState:
+    """Ensemble state after one step, as seen by accumulators.
+
+    Arrays are the engine's live buffers: accumulators must copy
+    anything they keep.
+    """
+
+    def __init__(self, t, theta, x, y, origin, error=None, phase=None,
+                 delta_phi=None):
+        self.t = t
+        self.theta = theta
+        self.x = x
+        self.y = y
+        self.origin = origin
+        self.error = error
+        self.phase = phase
+        self.delta_phi = delta_phi
+
+    @property
+    def distance(self):
+        x0, y0 = self.origin
+        return np.sqrt((self.x - x0)**2 + (self.y - y0)**2)
+
+
+def _value(state, key):
+    return key(state) if callable(key) else getattr(state, key)
+
+
+class Accumulator:
+    """Base class: start(n_bugs, n_steps, dt), update(state), result()."""
+
+    def __init__(self, key='error', name=None):
+        self.key = key
+        self.name = name or f'{type(self).__name__.lower()}_{key}'
+
+    def start(self, n_bugs, n_steps, dt):
+        self.n_bugs = n_bugs
+        self.n_steps = n_steps
+        self.dt = dt
+
+    def update(self, state):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class Welford(Accumulator):
+    """Per-bug running mean and variance over time (Welford's update)."""
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        self.count = 0
+        self.mean = np.zeros(n_bugs)
+        self.m2 = np.zeros(n_bugs)
+
+    def update(self, state):
+        v = _value(state, self.key)
+        self.count += 1
+        delta = v - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (v - self.mean)
+
+    def result(self):
+        var = self.m2 / max(self.count - 1, 1)
+        return {'mean': self.mean.copy(), 'var': var,
+                'ensemble_mean': float(np.mean(self.mean)),
+                'ensemble_sem': float(np.std(self.mean, ddof=1)
+                                      / np.sqrt(self.n_bugs))
+                if self.n_bugs > 1 else float('nan')}
+
+
+class P2Quantile(Accumulator):
+    """Per-bug streaming p-quantile over time (Jain & Chlamtac P²).
+
+    Five markers per bug, updated for all bugs at once.
+    """
+
+    def __init__(self, p=0.5, key='error', name=None):
+        super().__init__(key, name or f'q{round(100 * p):02d}_{key}')
+        self.p = p
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        p = self.p
+        self.count = 0
+        self.q = np.zeros((5, n_bugs))
+        self.pos = np.tile(np.arange(1.0, 6.0)[:, None], (1, n_bugs))
+        self.want = np.array([1, 1 + 2*p, 1 + 4*p, 3 + 2*p, 5])[:, None]
+        self.dwant = np.array([0, p/2, p, (1 + p)/2, 1])[:, None]
+
+    def update(self, state):
+        x = np.asarray(_value(state, self.key), dtype=float)
+        if self.count < 5:
+            self.q[self.count] = x
+            self.count += 1
+            if self.count == 5:
+                self.q.sort(axis=0)
+            return
+        self.count += 1
+        q, pos = self.q, self.pos
+        np.minimum(q[0], x, out=q[0])
+        np.maximum(q[4], x, out=q[4])
+        k = np.sum(x >= q[1:4], axis=0)       # cell 0..3 holding x
+        pos += np.arange(5)[:, None] > k
+        self.want = self.want + self.dwant
+
+        for i in (1, 2, 3):
+            d = self.want[i] - pos[i]
+            move = (((d >= 1) & (pos[i+1] - pos[i] > 1))
+                    | ((d <= -1) & (pos[i-1] - pos[i] < -1)))
+            if not move.any():
+                continue
+            s = np.sign(d)
+            par = q[i] + s / (pos[i+1] - pos[i-1]) * (
+                (pos[i] - pos[i-1] + s) * (q[i+1] - q[i])
+                / (pos[i+1] - pos[i])
+                + (pos[i+1] - pos[i] - s) * (q[i] - q[i-1])
+                / (pos[i] - pos[i-1]))
+            nb = np.where(s > 0, i + 1, i - 1)
+            q_nb = np.take_along_axis(q, nb[None, :], 0)[0]
+            pos_nb = np.take_along_axis(pos, nb[None, :], 0)[0]
+            lin = q[i] + s * (q_nb - q[i]) / (pos_nb - pos[i])
+            new = np.where((q[i-1] < par) & (par < q[i+1]), par, lin)
+            q[i] = np.where(move, new, q[i])
+            pos[i] = np.where(move, pos[i] + s, pos[i])
+
+    def result(self):
+        if self.count < 5:
+            qs = np.quantile(self.q[:self.count], self.p, axis=0)
+        else:
+            qs = self.q[2].copy()
+        return {'p': self.p, 'quantile': qs,
+                'ensemble_median': float(np.median(qs))}
+
+
+class SuccessFraction(Accumulator):
+    """Fraction of bugs whose time-mean value (or final value, with
+    final=True) lies below threshold."""
+
+    def __init__(self, threshold, key='error', final=False, name=None):
+        super().__init__(key, name or 'success')
+        self.threshold = threshold
+        self.final = final
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        self.count = 0
+        self.total = np.zeros(n_bugs)
+        self.last = np.zeros(n_bugs)
+
+    def update(self, state):
+        v = _value(state, self.key)
+        self.count += 1
+        if self.final:
+            self.last[:] = v
+        else:
+            self.total += v
+
+    def result(self):
+        value = self.last if self.final else self.total / max(self.count, 1)
+        success = value < self.threshold
+        return {'fraction': float(np.mean(success)), 'success': success}
+
+
+class TimeBinned(Accumulator):
+    """Ensemble mean and std of a quantity in time bins of bin_width."""
+
+    def __init__(self, bin_width, key='error', name=None):
+        super().__init__(key, name or f'binned_{key}')
+        self.bin_width = bin_width
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        n_bins = int(np.ceil(n_steps * dt / self.bin_width - 1e-9))
+        self.n = np.zeros(max(n_bins, 1))
+        self.s1 = np.zeros_like(self.n)
+        self.s2 = np.zeros_like(self.n)
+
+    def update(self, state):
+        v = _value(state, self.key)
+        b = min(int((state.t - 1e-12) / self.bin_width), len(self.n) - 1)
+        self.n[b] += v.size
+        self.s1[b] += v.sum()
+        self.s2[b] += np.dot(v, v)
+
+    def result(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self.s1 / self.n
+            std = np.sqrt(np.maximum(self.s2 / self.n - mean**2, 0.0))
+        t = (np.arange(len(self.n)) + 0.5) * self.bin_width
+        return {'t': t, 'mean': mean, 'std': std}
+
+
+class FirstPassage(Accumulator):
+    """Per-bug first time the quantity goes below (or above) threshold."""
+
+    def __init__(self, threshold, key='error', below=True, name=None):
+        super().__init__(key, name or f'passage_{key}')
+        self.threshold = threshold
+        self.below = below
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        self.time = np.full(n_bugs, np.nan)
+
+    def update(self, state):
+        v = _value(state, self.key)
+        hit = (v < self.threshold) if self.below else (v > self.threshold)
+        new = hit & np.isnan(self.time)
+        if new.any():
+            self.time[new] = state.t
+
+    def result(self):
+        passed = ~np.isnan(self.time)
+        return {'time': self.time.copy(),
+                'fraction': float(np.mean(passed)),
+                'median': float(np.median(self.time[passed]))
+                if passed.any() else float('nan')}
+
+
+class SpatialGrid(Accumulator):
+    """Bug-steps per cell of an x–y grid, and the per-cell mean of each
+    quantity in keys, over the whole run.
+
+    Bugs outside bounds are counted in 'outside' only.  A quantity the
+    engine does not provide (e.g. 'error' in pi_homing_ensemble,
+    'delta_phi' without anomalies) is skipped and its mean map is NaN.
+
+    Parameters
+    ----------
+    bounds : (x_min, x_max, y_min, y_max)
+        Grid extent (BL).
+    bins : int or (int, int)
+        Cells along x and y.
+    keys : tuple
+        Quantities to average per cell.
+    every : int
+        Record every n-th step only (cheaper for long runs).
+    """
+
+    def __init__(self, bounds=(0, 1000, 0, 1000), bins=200,
+                 keys=('error', 'delta_phi'), every=1, name=None):
+        super().__init__(None, name or 'spatial')
+        self.bounds = tuple(float(b) for b in bounds)
+        self.bins = (bins, bins) if np.ndim(bins) == 0 else tuple(bins)
+        self.keys = tuple(keys)
+        self.every = every
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        nx, ny = self.bins
+        self.count = np.zeros(nx * ny)
+        self.sums = {key: np.zeros(nx * ny) for key in self.keys}
+        self.seen = dict.fromkeys(self.keys, False)
+        self.outside = 0
+        self.n_updates = 0
+
+    def update(self, state):
+        self.n_updates += 1
+        if (self.n_updates - 1) % self.every:
+            return
+        x0, x1, y0, y1 = self.bounds
+        nx, ny = self.bins
+        ix = np.floor((state.x - x0) * (nx / (x1 - x0))).astype(np.intp)
+        iy = np.floor((state.y - y0) * (ny / (y1 - y0))).astype(np.intp)
+        inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+        cell = (iy * nx + ix)[inside]
+        self.outside += int(inside.size - cell.size)
+        self.count += np.bincount(cell, minlength=nx * ny)
+        for key in self.keys:
+            v = _value(state, key)
+            if v is None:
+                continue
+            self.seen[key] = True
+            v = np.broadcast_to(v, inside.shape)[inside]
+            self.sums[key] += np.bincount(cell, weights=v, minlength=nx * ny)
+
+    def result(self):
+        x0, x1, y0, y1 = self.bounds
+        nx, ny = self.bins
+        count = self.count.reshape(ny, nx)
+        total = count.sum() + self.outside
+        area = (x1 - x0) * (y1 - y0) / (nx * ny)
+        out = {'x_edges': np.linspace(x0, x1, nx + 1),
+               'y_edges': np.linspace(y0, y1, ny + 1),
+               'count': count, 'outside': self.outside,
+               # fraction of recorded bug-steps per BL²
+               'density': count / (max(total, 1) * area)}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for key in self.keys:
+                mean = self.sums[key].reshape(ny, nx) / count
+                out[f'mean_{key}'] = (mean if self.seen[key]
+                                      else np.full((ny, nx), np.nan))
+        return out
+
+
+def start_all(accumulators, n_bugs, n_steps, dt):
+    for acc in accumulators:
+        acc.start(n_bugs, n_steps, dt)
+
+
+def update_all(accumulators, state):
+    for acc in accumulators:
+        acc.update(state)
+
+
+def collect(accumulators):
+    """{name: result} for a list of accumulators."""
+    return {acc.name: acc.result() for acc in accumulators}
@@ -0,0 +1,200 @@
+"""
+Adaptive quadtree sampling of two-parameter maps.
+
+A phase diagram on a uniform grid spends most of its simulations deep
+inside the navigating and the lost regions, where the error hardly
+changes.  quadtree_sample starts from a coarse grid of cells and
+splits a cell into four only while
+
+  * its corner or centre values straddle the threshold (the boundary
+    passes through it), or
+  * its centre deviates from the mean of its corners by more than
+    curvature_tol (the map bends inside it),
+
+down to max_depth splits.  All points lie on the lattice of the finest
+level, so corners shared between cells are evaluated once; a refined
+cell's centre becomes a corner of its children.  Each refinement level
+is one batched call evaluate(xs, ys) → values, which can be a
+vectorised engine run over scattered parameter points
+(fast_ensemble_grid broadcasts 1-D parameter arrays) or a run_sweep.
+
+The result is the scattered dataset, the leaf cells, and the threshold
+contour by marching squares on each leaf (linear interpolation along
+the cell edges, saddles resolved by the centre value).  Where a leaf
+borders finer ones the contour pieces may not join exactly; the gap is
+below the finer cell size.
+
+Axes may be logarithmic: cells are then split evenly in log10.
+
+Usage:
+    res = quadtree_sample(evaluate, (0.003, 1.0), (0.01, 3.0),
+                          threshold=30, base=4, max_depth=4)
+    res['x'], res['y'], res['value']    # scattered samples
+    res['contour']                       # (n, 2, 2) segments
+"""
+
+import numpy as np
+
+
+def _to_axis(u, log):
+    return 10.0 ** u if log else u
+
+
+def _from_axis(v, log):
+    return np.log10(v) if log else np.asarray(v, dtype=float)
+
+
+def _crossings(corners, values, threshold):
+    """Threshold crossings on the edges of one cell, in edge order.
+
+    corners : (4, 2) in order (0,0), (1,0), (1,1), (0,1); values (4,).
+    """
+    points = []
+    for a in range(4):
+        b = (a + 1) % 4
+        fa, fb = values[a] - threshold, values[b] - threshold
+        if (fa < 0) != (fb < 0):
+            t = fa / (fa - fb)
+            points.append(corners[a] + t * (corners[b] - corners[a]))
+    return points
+
+
+def _cell_segments(corners, values, centre_value, threshold):
+    """Marching-squares segments of one cell."""
+    points = _crossings(corners, values, threshold)
+    if len(points) == 2:
+        return [points]
+    if len(points) == 4:
+        # Saddle: pair crossings so that the centre's side stays connected
+        above = (centre_value >= threshold) == (values[0] >= threshold)
+        if above:
+            return [[points[0], points[1]], [points[2], points[3]]]
+        return [[points[0], points[3]], [points[1], points[2]]]
+    return []
+
+
+def quadtree_sample(evaluate, x_range, y_range, threshold, base=4,
+                    max_depth=4, curvature_tol=None, log=(True, True),
+                    verbose=False):
+    """Sample a 2-D map adaptively around a threshold contour.
+
+    Parameters
+    ----------
+    evaluate : callable
+        evaluate(xs, ys) → values, for 1-D arrays of points (axis units).
+    x_range, y_range : (float, float)
+        Domain bounds.
+    threshold : float
+        Contour level to resolve (e.g. 30° mean heading error).
+    base : int
+        Cells per axis of the starting grid.
+    max_depth : int
+        Maximum splits of a base cell.  The finest cells are those of a
+        uniform (base·2^max_depth + 1)² grid.
+    curvature_tol : float or None
+        Also split cells whose centre differs from the mean of their
+        corners by more than this.  None splits on the threshold only.
+        Keep it above the Monte Carlo noise of the values.
+    log : (bool, bool)
+        Logarithmic x and y axes.
+
+    Returns
+    -------
+    dict with keys
+        'x', 'y', 'value' : (n,) arrays, the scattered samples
+        'cells'           : (m, 4) leaf cells as (x0, x1, y0, y1)
+        'depth'           : (m,) refinement level of each leaf
+        'contour'         : (k, 2, 2) segments of the threshold contour
+        'n_evals'         : number of points evaluated
+        'equivalent_grid' : points per axis of the uniform grid with the
+                            same finest resolution
+    """
+    n_fine = base * 2 ** max_depth
+    u0, u1 = _from_axis(x_range, log[0])
+    v0, v1 = _from_axis(y_range, log[1])
+
+    def axis_point(i, j):
+        return (_to_axis(u0 + (u1 - u0) * i / n_fine, log[0]),
+                _to_axis(v0 + (v1 - v0) * j / n_fine, log[1]))
+
+    values = {}
+
+    def fill(keys):
+        keys = [k for k in dict.fromkeys(keys) if k not in values]
+        if not keys:
+            return
+        xs, ys = axis_point(*np.array(keys).T)
+        for key, value in zip(keys, np.asarray(evaluate(xs, ys),
+                                               dtype=float).ravel()):
+            values[key] = value
+
+    def corners(cell):
+        i, j, size = cell
+        return [(i, j), (i + size, j), (i + size, j + size), (i, j + size)]
+
+    def centre(cell):
+        i, j, size = cell
+        return (i + size // 2, j + size // 2)
+
+    step = 2 ** max_depth
+    active = [(i * step, j * step, step)
+              for i in range(base) for j in range(base)]
+    leaves = []
+    depth = 0
+    while active:
+        keys = [k for c in active for k in corners(c)]
+        if depth < max_depth:
+            keys += [centre(c) for c in active]
+        fill(keys)
+        if verbose:
+            print(f'  [quadtree] depth {depth}: {len(active)} cells, '
+                  f'{len(values)} points')
+        split = []
+        for cell in active:
+            if depth == max_depth:
+                leaves.append((cell, depth))
+                continue
+            f = [values[k] for k in corners(cell)]
+            fc = values[centre(cell)]
+            lo, hi = min(min(f), fc), max(max(f), fc)
+            refine = lo < threshold <= hi
+            if not refine and curvature_tol is not None:
+                refine = abs(fc - np.mean(f)) > curvature_tol
+            if refine:
+                i, j, size = cell
+                h = size // 2
+                split += [(i, j, h), (i + h, j, h), (i, j + h, h),
+                          (i + h, j + h, h)]
+            else:
+                leaves.append((cell, depth))
+        active = split
+        depth += 1
+
+    keys = list(values)
+    ii, jj = np.array(keys).T
+    xs, ys = axis_point(ii, jj)
+
+    cells = []
+    segments = []
+    for cell, _ in leaves:
+        ks = corners(cell)
+        (xa, ya), (xb, yb) = axis_point(*ks[0]), axis_point(*ks[2])
+        cells.append((xa, xb, ya, yb))
+        # contour in lattice coordinates, mapped to the axes afterwards
+        f = np.array([values[k] for k in ks])
+        # A one-lattice-cell leaf has no centre sample (centre() is its
+        # corner 0): decide its saddles by the corner mean
+        fc = values[centre(cell)] if cell[2] > 1 else np.mean(f)
+        for seg in _cell_segments(np.array(ks, dtype=float), f, fc,
+                                  threshold):
+            segments.append(seg)
+    if segments:
+        seg = np.array(segments)
+        contour = np.stack(axis_point(seg[..., 0], seg[..., 1]), axis=-1)
+    else:
+        contour = np.empty((0, 2, 2))
+
+    return {'x': xs, 'y': ys, 'value': np.array([values[k] for k in keys]),
+            'cells': np.array(cells),
+            'depth': np.array([d for _, d in leaves]), 'contour': contour,
+            'n_evals': len(values), 'equivalent_grid': n_fine + 1}
@@ -14,10 +14,13 @@ Equations of motion (Euler–Maruyama):
 where θ̂ is the heading estimate from the ring attractor.
 """
 
+import hashlib
+
 import numpy as np
 from compass import CompassSensor
 from ring_attractor import RingAttractor
-from landscape import Landscape
+from landscape import Landscape, TimeVaryingLandscape
+from path_integration import CPU4
 
 
 class Bug:
@@ -43,8 +46,15 @@ class Bug:
         Keyword arguments for CompassSensor.
     attractor_params : dict
         Keyword arguments for RingAttractor.
+    cpu4_params : dict or None
+        Keyword arguments for a path_integration.CPU4 that integrates
+        the estimated heading (n, leak, gain).  None = no path
+        integration.
     seed : int or None
         Random seed for reproducibility.
+    profiler : profiling.PhaseTimer or None
+        Accumulates wall time per phase of step(); its child
+        'attractor' times the phases of RingAttractor.step.
     """
 
     def __init__(self, x0=500, y0=100, heading0=None,
@@ -52,12 +62,14 @@ class Bug:
                  speed=1.0, kappa=2.0,
                  sigma_theta=0.1, sigma_xy=0.05,
                  compass_params=None, attractor_params=None,
-                 seed=None):
+                 cpu4_params=None, seed=None, profiler=None):
         self.rng = np.random.default_rng(seed)
+        self.profiler = profiler
 
         # State
         self.x = x0
         self.y = y0
+        self.t = 0.0    # elapsed time: a TimeVaryingLandscape's clock
         self.heading = heading0 if heading0 is not None else self.rng.uniform(0, 2 * np.pi)
         self.speed = speed
 
@@ -78,11 +90,16 @@ class Bug:
         ap = attractor_params or {}
         ap.setdefault('n', self.compass.n_channels)
         ap.setdefault('rng', self.rng)
+        if profiler is not None:
+            ap.setdefault('profiler', profiler.child('attractor'))
         self.attractor = RingAttractor(**ap)
 
         # Initialise attractor bump near the actual heading
         self.attractor.reset(self.heading)
 
+        # Path integrator (same circuit as the ensemble engines)
+        self.cpu4 = CPU4(**cpu4_params) if cpu4_params is not None else None
+
         # History (for trajectory plotting)
         self.history = {
             'x': [self.x],
@@ -92,6 +109,15 @@ class Bug:
             'bump_amplitude': [self.attractor.bump_amplitude()],
         }
 
+        # Where run() starts from: seed (as generator states) and
+        # initial position and heading, for the checkpoint key
+        self._start = {
+            'x': self.x, 'y': self.y, 'heading': self.heading,
+            'rng': [self.rng.bit_generator.state,
+                    self.compass.rng.bit_generator.state,
+                    self.attractor.rng.bit_generator.state],
+        }
+
     def step(self, dt, landscape):
         """Advance the bug by one timestep.
 
@@ -100,54 +126,89 @@ class Bug:
         dt : float
             Timestep (seconds).
         landscape : Landscape
-            The environment providing the magnetic field.
+            The environment providing the magnetic field.  A
+            TimeVaryingLandscape is read at the bug's elapsed time t.
 
         Returns
         -------
         bool
             True if the bug is still in bounds.
         """
-        # 1. Read the local magnetic field
-        mag_dir, _, _ = landscape.magnetic_direction(self.x, self.y)
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+
+        # 1. Read the local magnetic field (at the start-of-step time,
+        # as the ensemble engines do)
+        if isinstance(landscape, TimeVaryingLandscape):
+            mag_dir, _, _ = landscape.magnetic_direction(self.x, self.y,
+                                                         self.t)
+        else:
+            mag_dir, _, _ = landscape.magnetic_direction(self.x, self.y)
+        if prof is not None:
+            prof.lap('field')
 
         # 2. Compute the heading relative to the local field
         relative_heading = self.heading - mag_dir
 
         # 3. Read compass sensor
         compass_signal = self.compass.read(relative_heading)
+        if prof is not None:
+            prof.lap('compass')
 
         # 4. Compute angular velocity from previous heading change
         # (simplified: use the steering command as angular velocity)
         estimated_heading = self.attractor.heading() + mag_dir
         heading_error = self.goal_heading - estimated_heading
         angular_command = self.kappa * np.sin(heading_error)
+        if prof is not None:
+            prof.lap('steering')
 
         # 5. Update ring attractor
         self.attractor.step(dt, compass_input=compass_signal,
                            angular_velocity=angular_command)
+        if prof is not None:
+            prof.lap('attractor')
 
         # 6. Steer: update heading
         noise_theta = self.sigma_theta * np.sqrt(dt) * self.rng.standard_normal()
         self.heading += angular_command * dt + noise_theta
         self.heading = self.heading % (2 * np.pi)
+        if prof is not None:
+            prof.lap('heading')
+
+        # 7. Path integration of the heading estimate
+        if self.cpu4 is not None:
+            self.cpu4.update(estimated_heading, self.speed, dt)
+            if prof is not None:
+                prof.lap('path_integration')
 
-        # 7. Move: update position
+        # 8. Move: update position
         noise_x = self.sigma_xy * np.sqrt(dt) * self.rng.standard_normal()
         noise_y = self.sigma_xy * np.sqrt(dt) * self.rng.standard_normal()
         self.x += self.speed * np.cos(self.heading) * dt + noise_x
         self.y += self.speed * np.sin(self.heading) * dt + noise_y
+        self.t += dt
+        if prof is not None:
+            prof.lap('locomotion')
 
-        # 8. Record history
+        # 9. Record history
         self.history['x'].append(self.x)
         self.history['y'].append(self.y)
         self.history['heading'].append(self.heading)
         self.history['estimated_heading'].append(
             self.attractor.heading() + mag_dir)
         self.history['bump_amplitude'].append(self.attractor.bump_amplitude())
+        if prof is not None:
+            prof.lap('history')
 
-        return landscape.in_bounds(self.x, self.y)
+        in_bounds = landscape.in_bounds(self.x, self.y)
+        if prof is not None:
+            prof.lap('bounds')
+        return in_bounds
 
-    def run(self, landscape, duration, dt=0.01):
+    def run(self, landscape, duration, dt=0.01, checkpoint=None,
+            checkpoint_every=60.0):
         """Run the bug for a given duration.
 
         Parameters
@@ -157,6 +218,15 @@ class Bug:
             Total simulation time (seconds).
         dt : float
             Timestep (seconds).
+        checkpoint : str or None
+            State file (checkpointing.py).  If it exists the run resumes
+            from it, exactly; it is rewritten every checkpoint_every wall
+            seconds and at the end, so rerunning a finished run returns
+            its history at once.  The file is keyed on the parameters,
+            seed and initial state, so it only resumes a bug built the
+            same way (seed=None never resumes).
+        checkpoint_every : float
+            Wall seconds between checkpoints.
 
         Returns
         -------
@@ -164,14 +234,94 @@ class Bug:
             History arrays (x, y, heading, estimated_heading, bump_amplitude).
         """
         n_steps = int(duration / dt)
-        for _ in range(n_steps):
-            in_bounds = self.step(dt, landscape)
-            if not in_bounds:
-                break
+        done, stopped = 0, False
+        ckpt = None
+        if checkpoint is not None:
+            from checkpointing import StateCheckpoint, run_key
+            ckpt = StateCheckpoint(
+                checkpoint, run_key('Bug.run', self._run_params(
+                    landscape, duration, dt)), checkpoint_every)
+            saved = ckpt.load()
+            if saved is not None:
+                self.load_state_dict(saved['bug'])
+                done, stopped = saved['step'], saved['stopped']
+
+        def save():
+            ckpt.save({'bug': self.state_dict(), 'step': done,
+                       'stopped': stopped})
+
+        while done < n_steps and not stopped:
+            stopped = not self.step(dt, landscape)
+            done += 1
+            if ckpt is not None and ckpt.due():
+                save()
+        if ckpt is not None:
+            save()
 
         # Convert lists to arrays
         return {k: np.array(v) for k, v in self.history.items()}
 
+    def _run_params(self, landscape, duration, dt):
+        """Parameters a checkpoint of run() must match."""
+        c, a = self.compass, self.attractor
+        q = c.quantum_compass
+        if q is not None:
+            # Scalar settings, and the yield curve for the model itself
+            yields = np.asarray(q.singlet_yield(np.linspace(0, np.pi, 181)),
+                                dtype=float)
+            q = [type(q).__name__,
+                 {k: v for k, v in vars(q).items()
+                  if isinstance(v, (bool, int, float, str))},
+                 hashlib.sha256(yields.tobytes()).hexdigest()]
+        return {
+            'duration': duration, 'dt': dt,
+            'landscape': landscape.fingerprint(),
+            'start': self._start,
+            'bug': [self.speed, self.goal_heading, self.kappa,
+                    self.sigma_theta, self.sigma_xy],
+            'compass': [c.n_cry, c.n_channels, c.contrast, c.mean_yield,
+                        c.sigma_sensor, q],
+            'attractor': [a.n, a.tau, a.w_exc, a.w_inh, a.g_mag, a.g_omega,
+                          a.threshold, a.r_max, a.noise_sigma],
+            'cpu4': None if self.cpu4 is None else [
+                self.cpu4.n, self.cpu4.leak, self.cpu4.gain],
+        }
+
+    def state_dict(self):
+        """Full dynamic state, for checkpointing: position, heading,
+        elapsed time, history, the generator and the compass, attractor and path
+        integrator states."""
+        return {
+            'x': self.x, 'y': self.y, 'heading': self.heading,
+            't': self.t,
+            'history': {k: list(v) for k, v in self.history.items()},
+            'rng': self.rng.bit_generator.state,
+            'compass': self.compass.state_dict(),
+            'attractor': self.attractor.state_dict(),
+            'cpu4': None if self.cpu4 is None else self.cpu4.state_dict(),
+        }
+
+    def load_state_dict(self, state):
+        """Restore a state_dict() into a bug built with the same
+        parameters."""
+        self.x, self.y = state['x'], state['y']
+        self.heading = state['heading']
+        self.t = state.get('t', 0.0)
+        self.history = {k: list(v) for k, v in state['history'].items()}
+        self.rng.bit_generator.state = state['rng']
+        self.compass.load_state_dict(state['compass'])
+        self.attractor.load_state_dict(state['attractor'])
+        if (state['cpu4'] is None) != (self.cpu4 is None):
+            raise ValueError("checkpoint and bug differ in path integration")
+        if self.cpu4 is not None:
+            self.cpu4.load_state_dict(state['cpu4'])
+
+    def home_vector(self):
+        """(distance, direction to home) decoded from the CPU4 memory."""
+        if self.cpu4 is None:
+            raise ValueError("Bug has no path integrator (cpu4_params)")
+        return self.cpu4.home_vector()
+
     def distance_from_start(self):
         """Euclidean distance from starting position."""
         x0 = self.history['x'][0]
@@ -9,19 +9,42 @@ Usage:
     python analysis.py --differentiate    # Model comparison at the boundary
     python analysis.py --harmonics        # Spherical harmonic decomposition
     python analysis.py --critical-noise   # Critical noise per model
+    python analysis.py --dt-convergence   # Integrator timestep bias
+    python analysis.py --fokker-planck    # Deterministic heading statistics
     python analysis.py --all              # Everything
+    python analysis.py --all --workers 8 --checkpoint ckpt/
+                                          # Parallel, resumable sweeps
+    python analysis.py --peclet --cache results.db
+                                          # Reuse earlier engine results
+    python analysis.py --ncry --adaptive 0.5
+                                          # Bugs per point until ±0.5° CI
+    python analysis.py --all --artefacts art/ --workers 4
+                                          # Concurrent studies; rerun only
+                                          # those whose code changed
 """
 
 import argparse
+import os
+import statistics
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 
-from landscape import Landscape
+from landscape import Landscape, TimeVaryingLandscape
 from compass import singlet_yield, CompassSensor
 from ring_attractor import RingAttractor
 from sim import make_quantum_compass, _ensure_spin_dynamics
+from streams import make_streams
+from path_integration import CPU4Population
+from checkpointing import restore_into
+from accumulators import (StepState, SuccessFraction, Welford, start_all,
+                          update_all)
+from sweep import run_sweep
+from pipeline import Pipeline
+import cache
+from cache import memoised
+import fokker_planck
 
 
 # ── Vectorised fast simulation ─────────────────────────────────────
@@ -37,12 +60,228 @@ from sim import make_quantum_compass, _ensure_spin_dynamics
 # heading error std is approximately:
 #   σ_compass ≈ 1 / (C * √N_cry * SNR_per_molecule)
 #
-# This is an OU process on the circle.  We simulate it with Euler-
-# Maruyama for N_bugs in parallel (fully vectorised).
+# This is an OU process on the circle.  We simulate it for N_bugs in
+# parallel (fully vectorised), with a selectable integrator for the
+# heading (see _heading_step).
 
+# ── Heading integrators ───────────────────────────────────────────
+# All three engines share the heading SDE
+#
+#   dθ = κ sin(e) dt + σ_θ dW,    e = target − θ
+#
+# where the target (goal, home vector, compass error, anomaly bias) is
+# frozen over one step.  Schemes:
+#
+#   'euler'  Euler–Maruyama (the original engine, bit-identical).
+#   'heun'   Stochastic Heun: predictor–corrector on the drift with the
+#            same Wiener increment.  Weak order 2 for additive noise.
+#   'split'  Strang splitting: exact drift flow for half a step,
+#            exact circular diffusion (Gaussian increment mod 2π), exact
+#            drift flow for the other half.  The drift flow of
+#            dφ/dt = −κ sin φ is tan(φ/2) → tan(φ/2) e^{−κt}, so the
+#            scheme stays accurate when κ dt is no longer small.
+#
+# 'heun' and 'split' also advance position with the trapezoidal mean
+# of the start- and end-of-step heading.
+#
+# The compass error is drawn once per step, so it injects an extra
+# heading diffusion ≈ κ² σ_compass² dt that no integrator removes.
+# Passing compass_dt treats each step as the average of dt/compass_dt
+# independent compass readings (σ_compass scaled by √(compass_dt/dt)),
+# which keeps that term fixed at its compass_dt value when dt is coarsened.
+
+INTEGRATORS = ('euler', 'heun', 'split')
+
+# Steps of noise the engines draw (and fast_ensemble integrates) per block.
+# Per-step cost at small n_bugs is call overhead, not arithmetic: one
+# generator call per block instead of four per step, and fast_ensemble's
+# in-place heading recursion with block-wise position and error updates,
+# give (10⁴ steps, best of 3, same results bit for bit)
+#
+#   n_bugs   fast_ensemble       anomaly_ensemble    pi_homing (explore)
+#     50     0.37 s → 0.17 s     0.85 s → 0.55 s     0.63 s → 0.35 s
+#    100     0.50 s → 0.23 s     1.02 s → 0.72 s     0.74 s → 0.51 s
+#    200     0.62 s → 0.38 s     1.35 s → 0.94 s     0.91 s → 0.72 s
+#    500     0.86 s → 0.86 s     1.66 s → 1.32 s     1.67 s → 1.51 s
+#
+# By n_bugs ≈ 500 the normal draws themselves dominate.
+STEP_BLOCK = 256
+
+
+def _drift_flow(error, kappa, t):
+    """Exact flow of de/dt = −κ sin e over time t.  Returns the new error."""
+    e = (error + np.pi) % (2 * np.pi) - np.pi
+    return 2.0 * np.arctan(np.tan(0.5 * e) * np.exp(-kappa * t))
+
+
+def _heading_step(theta, error, kappa, noise, dt, scheme='euler'):
+    """Advance headings by one step of dθ = κ sin(e) dt + noise.
+
+    Parameters
+    ----------
+    theta : ndarray
+        Headings at the start of the step (rad).
+    error : ndarray
+        Steering error e = target − θ at the start of the step (rad).
+    kappa : float or ndarray
+        Steering gain (rad/s).
+    noise : ndarray
+        Wiener increment already scaled, σ_θ √dt ξ.
+    dt : float
+    scheme : {'euler', 'heun', 'split'}
+
+    Returns
+    -------
+    ndarray
+        Headings at the end of the step, wrapped to [0, 2π).
+    """
+    if scheme == 'euler':
+        d_theta = kappa * np.sin(error) * dt
+        d_theta += noise
+    elif scheme == 'heun':
+        f0 = kappa * np.sin(error)
+        f1 = kappa * np.sin(error - (f0 * dt + noise))
+        d_theta = 0.5 * (f0 + f1) * dt + noise
+    elif scheme == 'split':
+        e_half = _drift_flow(error, kappa, 0.5 * dt)
+        e_full = _drift_flow(e_half - noise, kappa, 0.5 * dt)
+        d_theta = -(e_full - ((error + np.pi) % (2 * np.pi) - np.pi))
+    else:
+        raise ValueError(f"Unknown integrator: {scheme}")
+    return (theta + d_theta) % (2 * np.pi)
+
+
+def _heading_block(theta, goal, kappa, compass_noise, noise, dt,
+                   scheme='euler'):
+    """Headings over a block of steps toward a fixed goal.
+
+    compass_noise and noise are the scaled per-step draws, shape
+    (n, n_bugs).  Returns an (n + 1, n_bugs) array whose row 0 is theta.
+    The Euler recursion runs in place in one work buffer; it performs
+    the same operations, in the same order, as _heading_step.
+    """
+    n = len(noise)
+    headings = np.empty((n + 1,) + np.shape(theta))
+    headings[0] = theta
+    if scheme != 'euler':
+        for j in range(n):
+            error = goal - (headings[j] + compass_noise[j])
+            headings[j + 1] = _heading_step(headings[j], error, kappa,
+                                            noise[j], dt, scheme)
+        return headings
+    buf = np.empty(np.shape(theta))
+    two_pi = 2 * np.pi
+    for j in range(n):
+        np.add(headings[j], compass_noise[j], out=buf)
+        np.subtract(goal, buf, out=buf)
+        np.sin(buf, out=buf)
+        buf *= kappa
+        buf *= dt
+        buf += noise[j]
+        buf += headings[j]
+        np.remainder(buf, two_pi, out=headings[j + 1])
+    return headings
+
+
+def _step_direction(theta_old, theta_new, scheme='euler'):
+    """(cos, sin) of the heading used for the position update."""
+    if scheme == 'euler':
+        return np.cos(theta_new), np.sin(theta_new)
+    return (0.5 * (np.cos(theta_old) + np.cos(theta_new)),
+            0.5 * (np.sin(theta_old) + np.sin(theta_new)))
+
+
+def compass_error_std(contrast, n_cry, sigma_sensor, mean_yield=None):
+    """Std of the compass heading error (rad) for an N_cry sensor array.
+
+    The sensor array gives N_cry readings with noise σ_sensor, binned
+    into 8 channels.  The absolute anisotropy is δ = C × mean_yield
+    (mean_yield None → 0.5, the analytical model).  Fisher information
+    for a cos 2α signal with Gaussian noise,
+        I(α) ∝ (dΦ/dα)² / σ² = (2δ sin 2α)² / (σ²/N_per_ch),
+    averaged over α (<sin² 2α> = 1/2) gives
+        σ_heading ≈ σ_sensor / (δ √(2 N_per_ch)).
+    A vanishing anisotropy (δ ≤ 1e-10) is capped at 10 rad, i.e. no
+    compass.  Broadcasts over array arguments.
+    """
+    if mean_yield is None:
+        mean_yield = 0.5
+    delta = contrast * mean_yield
+    n_per_ch = n_cry / 8.0
+    if np.ndim(delta) == 0 and np.ndim(n_per_ch) == 0:
+        return (sigma_sensor / (delta * np.sqrt(2 * n_per_ch))
+                if delta > 1e-10 else 10.0)
+    delta, n_per_ch, sigma_sensor = np.broadcast_arrays(
+        np.asarray(delta, dtype=float), n_per_ch, sigma_sensor)
+    ok = delta > 1e-10
+    safe = np.where(ok, delta, 1.0)
+    return np.where(ok, sigma_sensor / (safe * np.sqrt(2 * n_per_ch)), 10.0)
+
+
+def _compass_sigma(sigma_compass, dt, compass_dt):
+    """Per-step compass error std, averaged over dt/compass_dt readings."""
+    if compass_dt is None or dt <= compass_dt:
+        return sigma_compass
+    return sigma_compass * np.sqrt(compass_dt / dt)
+
+
+def _compass_noise(z, sigma_compass, compass_map=None, latent=None,
+                   dt=None):
+    """Compass heading errors (rad) from standard normals z.
+
+    σ_compass·z, or with a calibration.CompassNoiseMap the calibrated
+    error distribution compass_map(u), scaled by sigma_compass (then the
+    reading-average factor of _compass_sigma, 1 for one reading).  u is
+    the map's latent normal, z correlated with the previous step's
+    latent over the map's correlation time.
+
+    Returns (errors, latent); latent is None without a map.
+    """
+    if compass_map is None:
+        return sigma_compass * z, None
+    latent = compass_map.correlate(z, latent, dt)
+    return sigma_compass * compass_map(latent), latent
+
+
+# Engine arguments that do not change the result (not part of a
+# checkpoint's key)
+_UNKEYED = ('accumulators', 'checkpoint', 'checkpoint_every', 'backend')
+
+
+def _engine_checkpoint(name, args, checkpoint, every):
+    """checkpointing.StateCheckpoint of an engine run keyed by its
+    arguments, or None without a checkpoint path."""
+    if checkpoint is None:
+        return None
+    from checkpointing import StateCheckpoint, run_key
+    params = {k: cache._canonical(v) for k, v in args.items()
+              if k not in _UNKEYED}
+    return StateCheckpoint(checkpoint, run_key(name, params), every)
+
+
+def _jax_engine(name, accumulators=None, compass_map=None,
+                checkpoint=None, landscape=None):
+    """The jax_engines.py version of an engine (lazy import)."""
+    if isinstance(landscape, TimeVaryingLandscape):
+        raise ValueError("a time-varying landscape needs the numpy backend")
+    if accumulators:
+        raise ValueError("accumulators need the numpy backend")
+    if compass_map is not None:
+        raise ValueError("compass_map needs the numpy backend")
+    if checkpoint is not None:
+        raise ValueError("checkpoint needs the numpy backend")
+    import jax_engines
+    return getattr(jax_engines, name)
+
+
+@memoised
 def fast_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
                   contrast, n_cry, sigma_sensor, goal=3*np.pi/4,
-                  speed=1.0, sigma_xy=0.05, seed=0, mean_yield=None):
+                  speed=1.0, sigma_xy=0.05, seed=0, mean_yield=None,
+                  scheme='euler', compass_dt=None,
+                  per_bug_streams=False, bug_offset=0, accumulators=None,
+                  compass_map=None, checkpoint=None, checkpoint_every=60.0,
+                  backend='numpy'):
     """Vectorised simulation of n_bugs navigating bugs.
 
     Returns mean heading error (degrees) and array of final distances.
@@ -53,62 +292,578 @@ def fast_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
         Mean singlet yield.  If None, defaults to 0.5 (analytical model).
         For quantum models, pass the actual mean yield so that the
         absolute anisotropy δ = C × mean_yield is correct.
+    scheme : {'euler', 'heun', 'split'}
+        Heading integrator (see INTEGRATORS).
+    compass_dt : float or None
+        Compass sampling interval (s).  If dt is larger, each step
+        averages dt/compass_dt readings.  None = one reading per step.
+    per_bug_streams : bool
+        Draw noise from per-bug Philox streams keyed by (seed, bug index)
+        instead of one shared generator (see streams.py).  Per-bug
+        results then do not depend on how the ensemble is sharded.
+    bug_offset : int
+        Global index of the first bug (per-bug streams only).
+    accumulators : list or None
+        Streaming statistics (accumulators.py) updated after every step
+        with the heading error and position; read them with
+        accumulators.collect.
+    compass_map : calibration.CompassNoiseMap or None
+        Draw the compass error from a distribution calibrated on the
+        full CompassSensor + RingAttractor model (non-Gaussian tails,
+        π flips, correlation over the map's tau) instead of independent
+        N(0, σ_compass²) draws; contrast, n_cry and sigma_sensor then
+        no longer enter.  numpy backend only.
+    checkpoint : str or None
+        State file (checkpointing.py): the run resumes from it exactly
+        if it exists, and rewrites it every checkpoint_every wall
+        seconds (at step-block boundaries) and at the end.  The
+        accumulators' state is part of it.  numpy backend only.
+    checkpoint_every : float
+        Wall seconds between checkpoints.
+    backend : {'numpy', 'jax'}
+        'jax' runs the jitted scan of jax_engines.py (optional
+        dependency) with its own per-bug JAX noise; no accumulators.
     """
-    rng = np.random.default_rng(seed)
+    args = dict(locals())
+    if backend == 'jax':
+        return _jax_engine('fast_ensemble', accumulators, compass_map,
+                           checkpoint)(
+            n_bugs, duration, dt, kappa, sigma_theta, contrast, n_cry,
+            sigma_sensor, goal=goal, speed=speed, sigma_xy=sigma_xy,
+            seed=seed, mean_yield=mean_yield, scheme=scheme,
+            compass_dt=compass_dt, per_bug_streams=per_bug_streams,
+            bug_offset=bug_offset)
     n_steps = int(duration / dt)
+    streams = make_streams(seed, n_bugs, 4, per_bug_streams, bug_offset,
+                           n_steps=n_steps)
     sqrt_dt = np.sqrt(dt)
+    if accumulators:
+        start_all(accumulators, n_bugs, n_steps, dt)
 
     # Initial conditions
-    theta = rng.uniform(0, 2*np.pi, n_bugs)
+    theta = streams.uniform(0, 2*np.pi)
     x = np.full(n_bugs, 500.0)
     y = np.full(n_bugs, 100.0)
 
     # Compass noise: approximate the compass heading error
-    # The sensor array gives N_cry readings with noise σ_sensor.
-    # The compass heading estimate has std ≈ σ_sensor / (δ * √(2 * N_cry/n_ch))
-    # where δ = Φ_max − Φ_min = C × mean_yield is the absolute anisotropy.
-    if mean_yield is None:
-        mean_yield = 0.5
-    delta = contrast * mean_yield
-    n_per_ch = n_cry / 8.0
-    # Fisher information for cos 2α signal with Gaussian noise:
-    # I(α) ∝ (dΦ/dα)² / σ² = (2δ sin 2α)² / (σ²/N_per_ch)
-    # Averaged over α: <sin² 2α> = 1/2
-    # → σ_heading ≈ σ_sensor / (δ * √(2 * N_per_ch))
-    sigma_compass = sigma_sensor / (delta * np.sqrt(2 * n_per_ch)) if delta > 1e-10 else 10.0
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    if compass_map is not None:
+        sigma_compass = _compass_sigma(1.0, dt, compass_dt)
+    latent = None   # compass_map's latent normal per bug
+    scale = np.array([sigma_compass, sigma_theta * sqrt_dt,
+                      sigma_xy * sqrt_dt, sigma_xy * sqrt_dt])[:, None]
 
     # Accumulate heading error for mean
     heading_errors_sum = np.zeros(n_bugs)
 
-    for _ in range(n_steps):
-        # Compass-corrupted heading estimate
-        compass_noise = rng.normal(0, sigma_compass, n_bugs)
-        heading_est = theta + compass_noise
+    ckpt = _engine_checkpoint('fast_ensemble', args, checkpoint,
+                              checkpoint_every)
+
+    def state(step):
+        return {'step': step, 'theta': theta, 'x': x, 'y': y,
+                'heading_errors_sum': heading_errors_sum, 'latent': latent,
+                'streams': streams.state_dict(),
+                'accumulators': accumulators}
+
+    first = 0
+    saved = ckpt.load() if ckpt is not None else None
+    if saved is not None:
+        first = saved['step']
+        theta, x, y = saved['theta'], saved['x'], saved['y']
+        heading_errors_sum = saved['heading_errors_sum']
+        latent = saved['latent']
+        streams.load_state_dict(saved['streams'])
+        if accumulators:
+            restore_into(accumulators, saved['accumulators'])
+
+    # Only the heading recursion is sequential: run it step by step over
+    # a block of pre-drawn noise, then do position and error for the
+    # whole block at once (cumsum keeps the step-by-step summation order).
+    for start in range(first, n_steps, STEP_BLOCK):
+        nb = min(STEP_BLOCK, n_steps - start)
+        z = streams.normals_block(nb)
+        if compass_map is not None:
+            for j in range(nb):
+                z[j, 0] = latent = compass_map.correlate(z[j, 0], latent,
+                                                         dt)
+            z[:, 0] = compass_map(z[:, 0])
+        z *= scale
+        headings = _heading_block(theta, goal, kappa, z[:, 0], z[:, 1], dt,
+                                  scheme)
+        theta = headings[-1]
+
+        cos_t, sin_t = _step_direction(headings[:-1], headings[1:], scheme)
+        xs = np.cumsum(np.concatenate(
+            [x[None], speed * cos_t * dt + z[:, 2]]), axis=0)[1:]
+        ys = np.cumsum(np.concatenate(
+            [y[None], speed * sin_t * dt + z[:, 3]]), axis=0)[1:]
+        x, y = xs[-1], ys[-1]
+
+        err = np.abs(((headings[1:] - goal) + np.pi) % (2*np.pi) - np.pi)
+        heading_errors_sum = np.cumsum(
+            np.concatenate([heading_errors_sum[None], err]), axis=0)[-1]
+        if accumulators:
+            for j in range(nb):
+                update_all(accumulators, StepState(
+                    (start + j + 1) * dt, headings[j + 1], xs[j], ys[j],
+                    (500.0, 100.0), error=err[j]))
+        if ckpt is not None and ckpt.due():
+            ckpt.save(state(start + nb))
+    if ckpt is not None:
+        ckpt.save(state(n_steps))
 
-        # Steering
-        heading_error = goal - heading_est
-        d_theta = kappa * np.sin(heading_error) * dt
-        d_theta += sigma_theta * sqrt_dt * rng.standard_normal(n_bugs)
-        theta = (theta + d_theta) % (2 * np.pi)
+    mean_err_per_bug = heading_errors_sum / n_steps
+    distances = np.sqrt((x - 500)**2 + (y - 100)**2)
 
-        # Position
-        x += speed * np.cos(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
-        y += speed * np.sin(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
+    return np.degrees(np.mean(mean_err_per_bug)), distances
 
-        # Track heading error
-        err = np.abs(((theta - goal) + np.pi) % (2*np.pi) - np.pi)
-        heading_errors_sum += err
 
-    mean_err_per_bug = heading_errors_sum / n_steps
+@memoised
+def fast_ensemble_grid(n_bugs, duration, dt, kappa, sigma_theta,
+                       contrast, n_cry, sigma_sensor, goal=3*np.pi/4,
+                       speed=1.0, sigma_xy=0.05, seed=0, mean_yield=None,
+                       scheme='euler', compass_dt=None, common_noise=False,
+                       backend='numpy'):
+    """fast_ensemble over a whole parameter grid in one time loop.
+
+    The model parameters (kappa, sigma_theta, contrast, n_cry,
+    sigma_sensor, goal, speed, sigma_xy, mean_yield) may be arrays; they
+    are broadcast against each other to the grid shape G.  All cells
+    advance together in a (cells, bugs) state array, so a phase diagram
+    costs one vectorised run instead of one Python loop per cell.
+
+    Each cell draws independent noise from one generator, so per-cell
+    results agree with fast_ensemble in distribution, not bit for bit.
+    With common_noise=True every cell instead replays the same n_bugs
+    noise paths (common random numbers): differences between cells then
+    reflect the parameters alone, and statistics vary smoothly across
+    the grid.
+
+    Returns
+    -------
+    dict with keys
+        'mean_error_deg' : G array, ensemble mean heading error (°)
+        'bug_error_deg'  : G + (n_bugs,), time-averaged error per bug (°)
+        'distances'      : G + (n_bugs,), final distance from start (BL)
+
+    backend='jax' vmaps the jitted scan of jax_engines.py over the grid.
+    """
+    if backend == 'jax':
+        return _jax_engine('fast_ensemble_grid')(
+            n_bugs, duration, dt, kappa, sigma_theta, contrast, n_cry,
+            sigma_sensor, goal=goal, speed=speed, sigma_xy=sigma_xy,
+            seed=seed, mean_yield=mean_yield, scheme=scheme,
+            compass_dt=compass_dt, common_noise=common_noise)
+    if mean_yield is None:
+        mean_yield = 0.5
+    params = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in (
+        kappa, sigma_theta, contrast, n_cry, sigma_sensor, goal, speed,
+        sigma_xy, mean_yield)))
+    shape = params[0].shape
+    (kappa, sigma_theta, contrast, n_cry, sigma_sensor, goal, speed,
+     sigma_xy, mean_yield) = (p.reshape(-1, 1) for p in params)
+    n_cells = kappa.shape[0]
+
+    rng = np.random.default_rng(seed)
+    n_steps = int(duration / dt)
+    sqrt_dt = np.sqrt(dt)
+    n_paths = 1 if common_noise else n_cells
+
+    theta = np.broadcast_to(rng.uniform(0, 2*np.pi, (n_paths, n_bugs)),
+                            (n_cells, n_bugs))
+    x = np.full((n_cells, n_bugs), 500.0)
+    y = np.full((n_cells, n_bugs), 100.0)
+
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    noise_theta = sigma_theta * sqrt_dt
+    noise_xy = sigma_xy * sqrt_dt
+
+    heading_errors_sum = np.zeros((n_cells, n_bugs))
+
+    # Draw noise in blocks of steps (capped at ~16 MB); the generator
+    # fills them in the same order as one call per step
+    block = max(1, min(STEP_BLOCK, 2**21 // (4 * n_paths * n_bugs)))
+    for step in range(n_steps):
+        if step % block == 0:
+            noise_block = rng.standard_normal(
+                (min(block, n_steps - step), 4, n_paths, n_bugs))
+        z = noise_block[step % block]
+
+        heading_error = goal - (theta + sigma_compass * z[0])
+        theta_old = theta
+        theta = _heading_step(theta, heading_error, kappa,
+                              noise_theta * z[1], dt, scheme)
+
+        cos_t, sin_t = _step_direction(theta_old, theta, scheme)
+        x += speed * cos_t * dt + noise_xy * z[2]
+        y += speed * sin_t * dt + noise_xy * z[3]
+
+        heading_errors_sum += np.abs(((theta - goal) + np.pi) % (2*np.pi)
+                                     - np.pi)
+
+    bug_error = np.degrees(heading_errors_sum / n_steps)
     distances = np.sqrt((x - 500)**2 + (y - 100)**2)
 
-    return np.degrees(np.mean(mean_err_per_bug)), distances
+    return {
+        'mean_error_deg': bug_error.mean(axis=1).reshape(shape),
+        'bug_error_deg': bug_error.reshape(shape + (n_bugs,)),
+        'distances': distances.reshape(shape + (n_bugs,)),
+    }
+
+
+def fokker_planck_error(duration, dt, kappa, sigma_theta, contrast, n_cry,
+                        sigma_sensor, mean_yield=None, compass_dt=None,
+                        stationary=False, n_modes=None):
+    """fast_ensemble's mean heading error (°) from the Fokker–Planck
+    equation instead of Monte Carlo (see fokker_planck.py).
+
+    Time-averaged over the run from uniformly random headings, as
+    fast_ensemble reports it; stationary=True gives the t → ∞ value.
+    No sampling noise, about a millisecond per parameter point.
+    """
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    if stationary:
+        c = fokker_planck.stationary_modes(kappa, sigma_theta, sigma_compass,
+                                           dt, n_modes)
+        return np.degrees(fokker_planck.mean_abs_error(c))
+    return np.degrees(fokker_planck.time_averaged_error(
+        duration, dt, kappa, sigma_theta, sigma_compass, n_modes))
+
+
+def paired_difference(values, reference):
+    """Mean per-bug difference values − reference, with paired errors.
+
+    For ensembles driven by the same noise paths (common_noise=True, or
+    equal seed and n_bugs), bug i of every run shares its ξ sequence, so
+    the per-bug differences cancel most of the Monte Carlo scatter.
+
+    Parameters
+    ----------
+    values : ndarray, shape (..., n_bugs)
+        Per-bug statistic (e.g. fast_ensemble_grid 'bug_error_deg').
+    reference : ndarray, shape (n_bugs,)
+        The same statistic for the reference run.
+
+    Returns
+    -------
+    dict with keys
+        'mean'            : mean difference
+        'sem'             : standard error of the paired difference
+        'sem_independent' : standard error had the runs been independent
+        'efficiency'      : (sem_independent / sem)², the factor of bugs
+                            an independent-noise comparison would need
+    """
+    values = np.asarray(values, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    n = values.shape[-1]
+    diff = values - reference
+    sem = np.std(diff, axis=-1, ddof=1) / np.sqrt(n)
+    sem_ind = np.sqrt((np.var(values, axis=-1, ddof=1)
+                       + np.var(reference, axis=-1, ddof=1)) / n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = (sem_ind / sem)**2
+    return {'mean': diff.mean(axis=-1), 'sem': sem,
+            'sem_independent': sem_ind, 'efficiency': efficiency}
+
+
+def _print_paired(label, sigma_range, stats):
+    """One line per σ_θ: Δ ± paired SEM, and the independent SEM."""
+    for sig, m, s, s_ind in zip(sigma_range, stats['mean'], stats['sem'],
+                                stats['sem_independent']):
+        print(f'  {label}  σ={sig:.2f}  Δ={m:+6.2f} ± {s:.2f}°  '
+              f'(independent: ± {s_ind:.2f}°)')
+
+
+def critical_sigma(contrasts, threshold=30.0, lo=0.1, hi=5.0,
+                   n_candidates=8, n_rounds=2, verbose=True, **kwargs):
+    """σ_θ at which the fast_ensemble heading error crosses threshold.
+
+    Batched bracket refinement: every round evaluates n_candidates
+    geometrically spaced σ_θ in each contrast's bracket, for all
+    contrasts in one fast_ensemble_grid call with common random numbers,
+    and shrinks each bracket to the interval holding the first crossing.
+    Because every round replays the same noise paths, the error is a
+    smooth, deterministic function of σ_θ: bracket ends carry over
+    between rounds without re-simulation, and the final crossing is
+    interpolated in log σ_θ between them.
+
+    Contrasts whose error already exceeds threshold at lo return lo;
+    those still below it at hi return hi.  Remaining keyword arguments
+    (n_bugs, duration, dt, kappa, n_cry, sigma_sensor, seed, ...) go to
+    fast_ensemble_grid.
+
+    Returns
+    -------
+    ndarray
+        Critical σ_θ per contrast.
+    """
+    contrasts = np.atleast_1d(np.asarray(contrasts, dtype=float))
+    n = len(contrasts)
+    log_lo = np.full(n, np.log(lo))
+    log_hi = np.full(n, np.log(hi))
+    err_lo = np.full(n, np.nan)
+    err_hi = np.full(n, np.nan)
+    sigma_star = np.full(n, np.nan)
+    frac = np.linspace(0.0, 1.0, n_candidates)
+
+    for r in range(n_rounds):
+        active = np.isnan(sigma_star)
+        if not active.any():
+            break
+        sig = np.exp(log_lo[active, None]
+                     + frac * (log_hi - log_lo)[active, None])
+        # After round 1 the bracket ends are known: simulate the interior
+        inner = slice(None) if r == 0 else slice(1, -1)
+        err = fast_ensemble_grid(sigma_theta=sig[:, inner],
+                                 contrast=contrasts[active, None],
+                                 common_noise=True,
+                                 **kwargs)['mean_error_deg']
+        if r > 0:
+            err = np.column_stack([err_lo[active], err, err_hi[active]])
+        above = err >= threshold
+        first = np.where(above.any(axis=1), above.argmax(axis=1),
+                         n_candidates)
+        for m, i in enumerate(np.flatnonzero(active)):
+            k = first[m]
+            if k == 0:
+                sigma_star[i] = sig[m, 0]
+            elif k == n_candidates:
+                sigma_star[i] = sig[m, -1]
+            else:
+                log_lo[i], log_hi[i] = np.log(sig[m, k - 1]), np.log(sig[m, k])
+                err_lo[i], err_hi[i] = err[m, k - 1], err[m, k]
+                if r == n_rounds - 1:
+                    w = (threshold - err_lo[i]) / (err_hi[i] - err_lo[i])
+                    sigma_star[i] = np.exp(log_lo[i]
+                                           + w * (log_hi[i] - log_lo[i]))
+        if verbose:
+            brackets = ', '.join(
+                f'C={c:.3f}: [{np.exp(a):.3f}, {np.exp(b):.3f}]'
+                for c, a, b in zip(contrasts, log_lo, log_hi))
+            print(f'    round {r + 1}: {brackets}')
+
+    return sigma_star
+
+
+def dt_convergence(engine=fast_ensemble, dts=(0.01, 0.02, 0.05, 0.1, 0.2),
+                   schemes=INTEGRATORS, n_seeds=4, tol=1.0, verbose=True,
+                   **kwargs):
+    """Timestep bias of an ensemble engine, per integrator.
+
+    Runs `engine` at every (scheme, dt) with n_seeds seeds and compares
+    against the finest dt (averaged over schemes, which share the
+    dt → 0 limit).  Remaining keyword arguments go to the engine.
+
+    The statistic is the engine's scalar summary: mean heading error
+    (degrees) for fast_ensemble / anomaly_ensemble, mean homing error
+    (BL) for pi_homing_ensemble.
+
+    Returns
+    -------
+    dict with keys
+        'dts', 'schemes'
+        'value' : (n_schemes, n_dts) seed-averaged statistic
+        'sem'   : (n_schemes, n_dts) standard error over seeds
+        'bias'  : value − reference
+        'max_dt': {scheme: largest dt with |bias| ≤ tol at it and all
+                   finer dts, or None}
+    """
+    dts = np.sort(np.asarray(dts, dtype=float))
+    index = 1 if engine is pi_homing_ensemble else 0
+
+    value = np.zeros((len(schemes), len(dts)))
+    sem = np.zeros_like(value)
+    for i, scheme in enumerate(schemes):
+        for j, dt in enumerate(dts):
+            runs = [engine(dt=dt, seed=s, scheme=scheme, **kwargs)[index]
+                    for s in range(n_seeds)]
+            value[i, j] = np.mean(runs)
+            sem[i, j] = (np.std(runs, ddof=1) / np.sqrt(n_seeds)
+                         if n_seeds > 1 else np.nan)
+
+    reference = np.mean(value[:, 0])
+    bias = value - reference
+
+    max_dt = {}
+    for i, scheme in enumerate(schemes):
+        ok = np.abs(bias[i]) <= tol
+        n_ok = len(ok) if ok.all() else int(np.argmin(ok))
+        max_dt[scheme] = dts[n_ok - 1] if n_ok > 0 else None
+
+    if verbose:
+        print(f'  {"dt":>8s}' + ''.join(f'  {s:>16s}' for s in schemes))
+        for j, dt in enumerate(dts):
+            row = ''.join(f'  {bias[i, j]:+7.2f} ± {sem[i, j]:5.2f}'
+                          for i in range(len(schemes)))
+            print(f'  {dt:8.3f}{row}')
+        print(f'  reference (dt={dts[0]}) = {reference:.2f}')
+        for scheme, d in max_dt.items():
+            print(f'  {scheme:>6s}: |bias| ≤ {tol} up to dt = {d}')
+
+    return {'dts': dts, 'schemes': tuple(schemes), 'value': value,
+            'sem': sem, 'bias': bias, 'reference': reference,
+            'max_dt': max_dt}
+
+
+def adaptive_ensemble(engine, half_width, batch=50, min_bugs=None,
+                      max_bugs=2000, confidence=0.95, verbose=False,
+                      **kwargs):
+    """Run an engine in batches until its statistic is known to ±half_width.
+
+    Batches are consecutive slices of one per-bug-stream ensemble
+    (bug_offset = bugs run so far), so stopping after n bugs gives
+    exactly the per-bug values of a single n-bug run: the sample size
+    adapts without changing which noise paths are used.  After each
+    batch the normal-approximation confidence interval of the mean is
+    checked; the run stops once its half-width is ≤ half_width or
+    max_bugs bugs have run.
+
+    The statistic is per-bug time-mean heading error (degrees) for
+    fast_ensemble / anomaly_ensemble and final homing error (BL) for
+    pi_homing_ensemble.  Remaining keyword arguments (except n_bugs)
+    go to the engine; seed must be explicit.
+
+    Returns
+    -------
+    dict with keys
+        'mean'       : mean of the per-bug statistic
+        'half_width' : CI half-width at stop
+        'n_bugs'     : bugs run
+        'converged'  : whether half_width was reached
+        'values'     : per-bug statistic
+    """
+    if kwargs.get('seed', 0) is None:
+        raise ValueError("adaptive_ensemble needs an explicit seed")
+    kwargs.pop('n_bugs', None)
+    min_bugs = 2 * batch if min_bugs is None else min_bugs
+    z = statistics.NormalDist().inv_cdf(0.5 + 0.5 * confidence)
+
+    values = []
+    n = 0
+    while True:
+        size = min(batch, max_bugs - n)
+        if engine is pi_homing_ensemble:
+            out = engine(n_bugs=size, per_bug_streams=True, bug_offset=n,
+                         **kwargs)[0]
+        else:
+            per_bug = Welford('error')
+            engine(n_bugs=size, per_bug_streams=True, bug_offset=n,
+                   accumulators=[per_bug], **kwargs)
+            out = np.degrees(per_bug.mean)
+        values.append(out)
+        n += size
+
+        v = np.concatenate(values)
+        hw = z * np.std(v, ddof=1) / np.sqrt(n) if n > 1 else np.inf
+        if verbose:
+            print(f'    n={n:5d}  mean={np.mean(v):8.3f} ± {hw:.3f}')
+        if (n >= min_bugs and hw <= half_width) or n >= max_bugs:
+            break
+
+    return {'mean': float(np.mean(v)), 'half_width': float(hw),
+            'n_bugs': n, 'converged': bool(hw <= half_width), 'values': v}
+
+
+# ── Sweep execution ───────────────────────────────────────────────
+# Studies hand their parameter grids to sweep.run_sweep as lists of
+# cells (engine keyword dicts).  The command line sets the worker count
+# and checkpoint directory; each study checkpoints to <dir>/<tag>.jsonl
+# so an interrupted --all resumes cell by cell.
+#
+# With adaptive targets set (--adaptive, --adaptive-homing), engine cells
+# of the matching statistic run through adaptive_ensemble instead: the
+# cell's n_bugs sets the batch (n_bugs/4) and the cap (4 × n_bugs).
+
+SWEEP_OPTIONS = {'workers': 1, 'checkpoint_dir': None,
+                 'adaptive': None, 'adaptive_homing': None}
+
+
+def _adaptive_spec(task):
+    """adaptive_ensemble options for a task's cells, or None."""
+    if task in (_fast_error, _anomaly_error):
+        half_width = SWEEP_OPTIONS['adaptive']
+    elif task is _pi_homing_error:
+        half_width = SWEEP_OPTIONS['adaptive_homing']
+    else:
+        return None
+    return None if half_width is None else {'half_width': half_width}
+
+
+def _sweep(task, cells, tag):
+    """Run a study's cells with the command-line sweep options."""
+    spec = _adaptive_spec(task)
+    if spec is not None:
+        cells = [dict(c, adaptive=spec) for c in cells]
+    ckpt_dir = SWEEP_OPTIONS['checkpoint_dir']
+    checkpoint = os.path.join(ckpt_dir, f'{tag}.jsonl') if ckpt_dir else None
+    return run_sweep(task, cells, workers=SWEEP_OPTIONS['workers'],
+                     checkpoint=checkpoint, label=tag)
+
+
+def _dipole_landscape(extent, n_dip, strength, depth, seed):
+    """Landscape with n_dip random dipoles (none if strength is 0)."""
+    land = Landscape(extent=tuple(extent))
+    if strength != 0:
+        land.anomalies = Landscape.random_dipoles(
+            n_dip, tuple(extent), strength, depth,
+            rng=np.random.default_rng(seed))
+    return land
+
+
+def _with_landscape(cell):
+    """Engine kwargs from a cell, building the landscape from 'dipoles'."""
+    kwargs = dict(cell)
+    spec = kwargs.pop('dipoles', None)
+    if spec is not None:
+        kwargs['landscape'] = _dipole_landscape(**spec)
+    return kwargs
+
+
+def _engine_value(engine, index, cell):
+    """engine's scalar statistic for a cell, adaptively if requested."""
+    kwargs = _with_landscape(cell)
+    spec = kwargs.pop('adaptive', None)
+    if spec is not None:
+        n_bugs = kwargs.pop('n_bugs')
+        batch = max(10, n_bugs // 4)
+        return adaptive_ensemble(engine, batch=batch, max_bugs=4 * n_bugs,
+                                 **spec, **kwargs)['mean']
+    return engine(**kwargs)[index]
+
+
+def _fast_error(cell):
+    """Sweep task: fast_ensemble mean heading error (°)."""
+    return _engine_value(fast_ensemble, 0, cell)
+
+
+def _anomaly_error(cell):
+    """Sweep task: anomaly_ensemble mean heading error (°)."""
+    return _engine_value(anomaly_ensemble, 0, cell)
+
+
+def _pi_homing_error(cell):
+    """Sweep task: pi_homing_ensemble mean homing error (BL)."""
+    return _engine_value(pi_homing_ensemble, 1, cell)
 
 
 # ── 1. Peclet number study ─────────────────────────────────────────
 
-def peclet_study(save_prefix=None):
-    """Compare analytical Peclet number against simulated navigation."""
+def _peclet_stats(cell):
+    """Sweep task: [mean heading error (°), fraction of bugs whose
+    mean heading error is below 15°], from one fast_ensemble run."""
+    success = SuccessFraction(np.radians(15))
+    err, _ = fast_ensemble(**cell, accumulators=[success])
+    return [err, success.result()['fraction']]
+
+
+def peclet_data():
+    """Peclet study data: mean error and success rate against σ_θ."""
     kappa = 2.0
     L = 300.0
     sigma_range = np.logspace(-1.5, 0.7, 25)
@@ -119,53 +874,27 @@ def peclet_study(save_prefix=None):
     duration = 200
     dt = 0.02
 
-    mean_errors = []
-    success_rates = []
-
-    for sig in sigma_range:
-        err, _ = fast_ensemble(
-            n_bugs=n_bugs, duration=duration, dt=dt,
-            kappa=kappa, sigma_theta=sig,
-            contrast=0.15, n_cry=1000, sigma_sensor=0.02)
-        # Re-run for success rate
-        _, dists = fast_ensemble(
-            n_bugs=n_bugs, duration=duration, dt=dt,
-            kappa=kappa, sigma_theta=sig,
-            contrast=0.15, n_cry=1000, sigma_sensor=0.02, seed=1)
-        mean_errors.append(err)
-        # Success: error < 15°
-        # Use error from the run
-        errs_individual, _ = fast_ensemble(
-            n_bugs=n_bugs, duration=duration, dt=dt,
-            kappa=kappa, sigma_theta=sig,
-            contrast=0.15, n_cry=1000, sigma_sensor=0.02, seed=2)
-        success_rates.append(1.0 if err < 15 else max(0, 1.0 - (err - 15)/75))
+    cells = [dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                  kappa=kappa, sigma_theta=sig,
+                  contrast=0.15, n_cry=1000, sigma_sensor=0.02)
+             for sig in sigma_range]
+    # Mean error and per-bug success rate from the same runs
+    mean_errors, success_rates_real = np.array(
+        _sweep(_peclet_stats, cells, 'peclet_stats')).T
+    for sig, err in zip(sigma_range, mean_errors):
         print(f'  σ_θ={sig:.3f}  Pe={kappa*L/sig**2:.0f}  err={err:.1f}°')
 
-    mean_errors = np.array(mean_errors)
-    success_rates = np.array(success_rates)
+    return {'sigma_range': sigma_range, 'Pe_analytical': Pe_analytical,
+            'mean_errors': mean_errors,
+            'success_rates': success_rates_real}
+
+
+def peclet_plot(data, save_prefix=None):
+    sigma_range = data['sigma_range']
+    Pe_analytical = data['Pe_analytical']
+    mean_errors = data['mean_errors']
+    success_rates_real = data['success_rates']
 
-    # Better success rate: run the ensemble and check individual bugs
-    success_rates_real = []
-    for sig in sigma_range:
-        rng = np.random.default_rng(42)
-        n_steps = int(duration / dt)
-        sqrt_dt = np.sqrt(dt)
-        theta = rng.uniform(0, 2*np.pi, n_bugs)
-        goal = 3*np.pi/4
-        err_sum = np.zeros(n_bugs)
-        sigma_compass = 0.02 / (0.15 * 0.5 * np.sqrt(2 * 1000/8))
-        for _ in range(n_steps):
-            cn = rng.normal(0, sigma_compass, n_bugs)
-            he = goal - (theta + cn)
-            theta = (theta + kappa * np.sin(he) * dt +
-                     sig * sqrt_dt * rng.standard_normal(n_bugs)) % (2*np.pi)
-            err_sum += np.abs(((theta - goal) + np.pi) % (2*np.pi) - np.pi)
-        per_bug = np.degrees(err_sum / n_steps)
-        success_rates_real.append(np.mean(per_bug < 15))
-    success_rates_real = np.array(success_rates_real)
-
-    # Plot
     fig, axes = plt.subplots(1, 3, figsize=(16, 5))
 
     ax = axes[0]
@@ -208,10 +937,21 @@ def peclet_study(save_prefix=None):
     return fig
 
 
+def peclet_study(save_prefix=None):
+    """Compare analytical Peclet number against simulated navigation."""
+    return peclet_plot(peclet_data(), save_prefix)
+
+
 # ── 2. Model differentiation at the phase boundary ────────────────
 
-def model_differentiation(save_prefix=None):
-    """Run all compass models at noise levels near the phase boundary."""
+def model_differentiation_data(common_noise=False):
+    """Run all compass models at noise levels near the phase boundary.
+
+    With common_noise=True every (model, σ_θ) point replays the same
+    noise paths in one fast_ensemble_grid run, and each model's
+    difference from the analytical C=0.15 curve is reported with its
+    paired standard error.
+    """
     sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0])
     n_cry = 50
     n_bugs = 200
@@ -230,51 +970,56 @@ def model_differentiation(save_prefix=None):
         qc = RPC(model=factory())
         quantum_contrasts[name] = qc.contrast
 
-    results = {}
-
-    # Analytical baseline C=0.15
-    label = 'analytical (C=0.15)'
-    errs = []
-    for sig in sigma_range:
-        err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                               kappa=2.0, sigma_theta=sig,
-                               contrast=0.15, n_cry=n_cry, sigma_sensor=0.02)
-        errs.append(err)
-        print(f'  {label}  σ={sig:.2f}  err={err:.1f}°')
-    results[label] = np.array(errs)
-
-    # Quantum models — use their computed contrasts
+    # Analytical baseline C=0.15, quantum models at their computed
+    # contrasts, then the biological (literature) contrasts
+    curves = [('analytical (C=0.15)', 0.15)]
     for name in model_names:
         C = quantum_contrasts[name]
-        label = f'{name.replace("_"," ")} (C={C:.3f})'
-        errs = []
-        for sig in sigma_range:
-            err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                                   kappa=2.0, sigma_theta=sig,
-                                   contrast=C, n_cry=n_cry, sigma_sensor=0.02)
-            errs.append(err)
+        curves.append((f'{name.replace("_"," ")} (C={C:.3f})', C))
+    curves += [('[FAD TrpH] lit. (C=0.01)', 0.01),
+               ('[FAD O₂] lit. (C=0.15)', 0.15)]
+
+    if common_noise:
+        grid = fast_ensemble_grid(
+            n_bugs=n_bugs, duration=duration, dt=dt, kappa=2.0,
+            sigma_theta=sigma_range[None, :],
+            contrast=np.array([C for _, C in curves])[:, None],
+            n_cry=n_cry, sigma_sensor=0.02, common_noise=True)
+        errs = grid['mean_error_deg']
+    else:
+        cells = [dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                      kappa=2.0, sigma_theta=sig,
+                      contrast=C, n_cry=n_cry, sigma_sensor=0.02)
+                 for _, C in curves for sig in sigma_range]
+        errs = np.reshape(_sweep(_fast_error, cells, 'differentiate'),
+                          (len(curves), len(sigma_range)))
+
+    for (label, _), row in zip(curves, errs):
+        for sig, err in zip(sigma_range, row):
             print(f'  {label}  σ={sig:.2f}  err={err:.1f}°')
-        results[label] = np.array(errs)
 
-    # Also run at biological contrasts (literature values with relaxation)
-    for C_lit, label in [(0.01, '[FAD TrpH] lit. (C=0.01)'),
-                          (0.15, '[FAD O₂] lit. (C=0.15)')]:
-        errs = []
-        for sig in sigma_range:
-            err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                                   kappa=2.0, sigma_theta=sig,
-                                   contrast=C_lit, n_cry=n_cry, sigma_sensor=0.02)
-            errs.append(err)
-            print(f'  {label}  σ={sig:.2f}  err={err:.1f}°')
-        results[label] = np.array(errs)
+    if common_noise:
+        print(f'  Paired differences vs {curves[0][0]}:')
+        reference = grid['bug_error_deg'][0]
+        for (label, _), bug_err in zip(curves[1:], grid['bug_error_deg'][1:]):
+            _print_paired(label, sigma_range,
+                          paired_difference(bug_err, reference))
+
+    return {'sigma_range': sigma_range, 'n_cry': n_cry,
+            'labels': [label for label, _ in curves], 'errors': errs}
+
+
+def model_differentiation_plot(data, save_prefix=None):
+    sigma_range = data['sigma_range']
+    n_cry = data['n_cry']
 
-    # Plot
     fig, ax = plt.subplots(figsize=(11, 7))
     colors = ['grey', '#2196F3', '#4CAF50', '#1565C0', '#2E7D32',
               '#FF9800', '#00BCD4']
     markers = ['s', 'o', '^', 'D', 'v', 'P', 'X']
 
-    for (label, errs), color, marker in zip(results.items(), colors, markers):
+    for label, errs, color, marker in zip(data['labels'], data['errors'],
+                                          colors, markers):
         ax.plot(sigma_range, errs, color=color, marker=marker, ms=5,
                 lw=2, label=label)
 
@@ -297,28 +1042,33 @@ def model_differentiation(save_prefix=None):
     return fig
 
 
+def model_differentiation(save_prefix=None, common_noise=False):
+    """Run all compass models at noise levels near the phase boundary
+    and plot heading error against σ_θ (see model_differentiation_data)."""
+    return model_differentiation_plot(
+        model_differentiation_data(common_noise), save_prefix)
+
+
 # ── 3. Spherical harmonic decomposition ───────────────────────────
 
-def harmonic_decomposition(save_prefix=None):
-    """Decompose Φ_S(θ) into Legendre polynomial components."""
+def harmonic_decomposition_data():
+    """Legendre fits of Φ_S(θ) for the four quantum models."""
     from numpy.polynomial.legendre import legval, legfit
 
     models = _ensure_spin_dynamics()
     RPC = models['_RadicalPairCompass']
     model_names = ['toy_fad_o2', 'toy_fad_trp',
                    'intermediate_fad_o2', 'intermediate_fad_trp']
+    max_L = 8
 
-    fig, axes = plt.subplots(2, 2, figsize=(13, 10))
-    all_coeffs = {}
-
-    for ax, name in zip(axes.flat, model_names):
+    data = {'model_names': model_names, 'max_L': max_L}
+    for name in model_names:
         factory = models[name]
         model = factory()
         compass = RPC(model=model, n_theta=500)
         thetas, yields = compass.yield_curve()
 
         x = np.cos(thetas)
-        max_L = 8
         coeffs = legfit(x, yields, max_L)
         y_fit = legval(x, coeffs)
 
@@ -330,35 +1080,50 @@ def harmonic_decomposition(save_prefix=None):
         total_var = np.var(yields)
         resid_02 = np.var(yields - y_02)
         resid_full = np.var(yields - y_fit)
+        r2_02 = 100*(1 - resid_02/total_var) if total_var > 0 else 100
+        r2_full = 100*(1 - resid_full/total_var) if total_var > 0 else 100
+
+        data[name] = {'title': model['name'], 'contrast': compass.contrast,
+                      'thetas': thetas, 'yields': yields, 'y_fit': y_fit,
+                      'y_02': y_02, 'r2_02': r2_02, 'r2_full': r2_full,
+                      'coeffs': coeffs}
+    return data
 
-        ax.plot(np.degrees(thetas), yields, 'b-', lw=2, label='quantum')
-        ax.plot(np.degrees(thetas), y_02, 'r--', lw=1.5, label='L=0,2 only')
-        ax.plot(np.degrees(thetas), y_fit, 'g:', lw=1.5, label=f'L=0..{max_L}')
+
+def harmonic_decomposition_plot(data, save_prefix=None):
+    max_L = data['max_L']
+
+    fig, axes = plt.subplots(2, 2, figsize=(13, 10))
+    for ax, name in zip(axes.flat, data['model_names']):
+        d = data[name]
+        ax.plot(np.degrees(d['thetas']), d['yields'], 'b-', lw=2,
+                label='quantum')
+        ax.plot(np.degrees(d['thetas']), d['y_02'], 'r--', lw=1.5,
+                label='L=0,2 only')
+        ax.plot(np.degrees(d['thetas']), d['y_fit'], 'g:', lw=1.5,
+                label=f'L=0..{max_L}')
         ax.set_xlabel(r'$\theta$ (°)')
         ax.set_ylabel(r'$\Phi_S$')
-        ax.set_title(model['name'])
+        ax.set_title(d['title'])
         ax.legend(fontsize=8)
 
-        r2_02 = 100*(1 - resid_02/total_var) if total_var > 0 else 100
-        r2_full = 100*(1 - resid_full/total_var) if total_var > 0 else 100
-        info = (f'C = {compass.contrast:.3f}\n'
-                f'L=0,2 captures {r2_02:.1f}%\n'
-                f'L=0..{max_L} captures {r2_full:.1f}%')
+        info = (f'C = {d["contrast"]:.3f}\n'
+                f'L=0,2 captures {d["r2_02"]:.1f}%\n'
+                f'L=0..{max_L} captures {d["r2_full"]:.1f}%')
         ax.text(0.02, 0.02, info, transform=ax.transAxes, fontsize=9,
                 va='bottom', bbox=dict(boxstyle='round', fc='wheat', alpha=0.7))
-        all_coeffs[name] = coeffs
 
     fig.suptitle('Legendre Decomposition of Singlet Yield Anisotropy', fontsize=14)
     plt.tight_layout()
 
     # Bar chart
     fig2, ax2 = plt.subplots(figsize=(10, 5))
-    max_L = 8
     x_pos = np.arange(max_L + 1)
     width = 0.18
     colors = ['#2196F3', '#4CAF50', '#1565C0', '#2E7D32']
 
-    for i, (name, coeffs) in enumerate(all_coeffs.items()):
+    for i, name in enumerate(data['model_names']):
+        coeffs = data[name]['coeffs']
         rel = np.abs(coeffs) / np.abs(coeffs[0]) if np.abs(coeffs[0]) > 1e-10 else np.abs(coeffs)
         # Replace zeros with tiny value for log plot
         rel = np.maximum(rel, 1e-7)
@@ -381,10 +1146,16 @@ def harmonic_decomposition(save_prefix=None):
     return fig, fig2
 
 
+def harmonic_decomposition(save_prefix=None):
+    """Decompose Φ_S(θ) into Legendre polynomial components."""
+    return harmonic_decomposition_plot(harmonic_decomposition_data(),
+                                       save_prefix)
+
+
 # ── 4. Critical noise per model ───────────────────────────────────
 
-def critical_noise(save_prefix=None):
-    """Find σ_θ* where mean heading error crosses 30° for each model."""
+def critical_noise_data():
+    """σ_θ* where mean heading error crosses 30°, per compass model."""
     models = _ensure_spin_dynamics()
     RPC = models['_RadicalPairCompass']
     model_names = ['toy_fad_o2', 'toy_fad_trp',
@@ -396,54 +1167,34 @@ def critical_noise(save_prefix=None):
     n_cry = 50
     threshold = 30.0
 
-    def run_error(contrast, sig):
-        err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                               kappa=2.0, sigma_theta=sig,
-                               contrast=contrast, n_cry=n_cry,
-                               sigma_sensor=0.02, seed=42)
-        return err
-
-    def find_critical(contrast, label):
-        lo, hi = 0.1, 5.0
-        err_lo = run_error(contrast, lo)
-        err_hi = run_error(contrast, hi)
-        print(f'  {label}: err({lo})={err_lo:.1f}°, err({hi})={err_hi:.1f}°')
-        if err_lo > threshold:
-            return lo
-        if err_hi < threshold:
-            return hi
-        for _ in range(10):
-            mid = np.sqrt(lo * hi)
-            err_mid = run_error(contrast, mid)
-            print(f'    bisect σ={mid:.3f}  err={err_mid:.1f}°')
-            if err_mid < threshold:
-                lo = mid
-            else:
-                hi = mid
-        return np.sqrt(lo * hi)
-
-    results = {}
-
-    # Literature contrasts
-    for C, label in [(0.01, '[FAD TrpH] lit. (C=0.01)'),
-                      (0.15, '[FAD O₂] lit. (C=0.15)')]:
-        sig_star = find_critical(C, label)
-        results[label] = sig_star
-        print(f'  → σ* = {sig_star:.3f}')
-
-    # Computed quantum contrasts
+    # Literature contrasts, then computed quantum contrasts
+    compasses = [('[FAD TrpH] lit. (C=0.01)', 0.01),
+                 ('[FAD O₂] lit. (C=0.15)', 0.15)]
     for name in model_names:
         factory = models[name]
         qc = RPC(model=factory())
-        label = f'{name.replace("_"," ")} (C={qc.contrast:.3f})'
-        sig_star = find_critical(qc.contrast, label)
-        results[label] = sig_star
-        print(f'  → σ* = {sig_star:.3f}')
+        compasses.append((f'{name.replace("_"," ")} (C={qc.contrast:.3f})',
+                          qc.contrast))
+
+    # All brackets refined together, common random numbers across σ
+    sig_stars = critical_sigma([C for _, C in compasses],
+                               threshold=threshold, lo=0.1, hi=5.0,
+                               n_bugs=n_bugs, duration=duration, dt=dt,
+                               kappa=2.0, n_cry=n_cry, sigma_sensor=0.02,
+                               seed=42)
+    for (label, _), sig_star in zip(compasses, sig_stars):
+        print(f'  {label}: σ* = {sig_star:.3f}')
+
+    return {'labels': [label for label, _ in compasses],
+            'sigma_star': sig_stars, 'n_cry': n_cry}
+
+
+def critical_noise_plot(data, save_prefix=None):
+    n_cry = data['n_cry']
 
-    # Plot
     fig, ax = plt.subplots(figsize=(10, 6))
-    labels = list(results.keys())
-    vals = [results[k] for k in labels]
+    labels = list(data['labels'])
+    vals = list(data['sigma_star'])
     colors = ['#FF9800', '#00BCD4', '#2196F3', '#4CAF50', '#1565C0', '#2E7D32']
 
     bars = ax.barh(range(len(labels)), vals, color=colors[:len(labels)])
@@ -464,9 +1215,14 @@ def critical_noise(save_prefix=None):
     return fig
 
 
+def critical_noise(save_prefix=None):
+    """Find σ_θ* where mean heading error crosses 30° for each model."""
+    return critical_noise_plot(critical_noise_data(), save_prefix)
+
+
 # ── 5. N_cry sweep: sensor population trade-off ───────────────────
 
-def ncry_sweep(save_prefix=None):
+def ncry_sweep_data():
     """Sweep N_cry for C=0.01 and C=0.15 at several noise levels.
 
     Answers: how many cryptochrome molecules does the weak compass
@@ -486,20 +1242,33 @@ def ncry_sweep(save_prefix=None):
     dt = 0.02
     sigma_sensor = 0.02
 
-    results = {}  # {(label, sigma): array of errors}
-
-    for sig in sigma_thetas:
-        for label, C in contrasts.items():
-            key = (label, sig)
-            errs = []
-            for n_cry in n_cry_range:
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sig,
-                    contrast=C, n_cry=n_cry, sigma_sensor=sigma_sensor)
-                errs.append(err)
-                print(f'  {label}  σ={sig}  N_cry={n_cry:5d}  err={err:.1f}°')
-            results[key] = np.array(errs)
+    keys = [(label, sig) for sig in sigma_thetas for label in contrasts]
+    cells = [dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                  kappa=2.0, sigma_theta=sig,
+                  contrast=contrasts[label], n_cry=n_cry,
+                  sigma_sensor=sigma_sensor)
+             for label, sig in keys for n_cry in n_cry_range]
+    errs = np.reshape(_sweep(_fast_error, cells, 'ncry'),
+                      (len(keys), len(n_cry_range)))
+    for (label, sig), row in zip(keys, errs):
+        for n_cry, err in zip(n_cry_range, row):
+            print(f'  {label}  σ={sig}  N_cry={n_cry:5d}  err={err:.1f}°')
+
+    return {'n_cry_range': n_cry_range, 'sigma_thetas': sigma_thetas,
+            'labels': list(contrasts), 'contrasts': list(contrasts.values()),
+            'sigma_sensor': sigma_sensor,
+            'errors': errs.reshape(len(sigma_thetas), len(contrasts), -1)}
+
+
+def ncry_sweep_plot(data, save_prefix=None):
+    n_cry_range = data['n_cry_range']
+    sigma_thetas = list(data['sigma_thetas'])
+    contrasts = dict(zip(data['labels'], data['contrasts']))
+    sigma_sensor = data['sigma_sensor']
+    # {(label, sigma): array of errors}
+    results = {(label, sig): row
+               for sig, rows in zip(sigma_thetas, data['errors'])
+               for label, row in zip(contrasts, rows)}
 
     # ── Analytical prediction ──
     # σ_compass(N, C) = σ_sensor / (C * mean * √(2N/8))
@@ -589,15 +1358,17 @@ def ncry_sweep(save_prefix=None):
     return fig, fig2
 
 
-# ── 6. Full simulation validation at C=0.01 ──────────────────────
+def ncry_sweep(save_prefix=None):
+    """Sweep N_cry for C=0.01 and C=0.15 at several noise levels
+    (see ncry_sweep_data) and plot the sensor-population trade-off."""
+    return ncry_sweep_plot(ncry_sweep_data(), save_prefix)
 
-def validate_fast_vs_full(save_prefix=None):
-    """Compare the fast Gaussian approximation against the full
-    ring-attractor simulation at C=0.01 (marginal compass).
 
-    The ring attractor's nonlinear winner-take-all dynamics may filter
-    compass noise better than the Gaussian model predicts.
-    """
+# ── 6. Full simulation validation at C=0.01 ──────────────────────
+
+def validate_fast_vs_full_data():
+    """Fast and full (ring attractor) mean heading errors at C=0.01 and
+    C=0.15 over σ_θ."""
     from agent import Bug
 
     sigma_range = np.array([0.1, 0.3, 0.5, 0.8, 1.0])
@@ -640,12 +1411,20 @@ def validate_fast_vs_full(save_prefix=None):
             print(f'  C={C}  σ={sig}  full={err:.1f}°  fast={results[(C,"fast")][len(full_errs)-1]:.1f}°')
         results[(C, 'full')] = np.array(full_errs)
 
-    # Plot
+    return {'sigma_range': sigma_range, 'n_cry': n_cry,
+            'contrasts': contrasts_to_test,
+            'fast': [results[(C, 'fast')] for C in contrasts_to_test],
+            'full': [results[(C, 'full')] for C in contrasts_to_test]}
+
+
+def validate_fast_vs_full_plot(data, save_prefix=None):
+    sigma_range = data['sigma_range']
+    n_cry = data['n_cry']
+
     fig, axes = plt.subplots(1, 2, figsize=(13, 6), sharey=True)
 
-    for ax, C in zip(axes, contrasts_to_test):
-        fast = results[(C, 'fast')]
-        full = results[(C, 'full')]
+    for ax, C, fast, full in zip(axes, data['contrasts'], data['fast'],
+                                 data['full']):
         ax.plot(sigma_range, fast, 'b--o', ms=6, lw=2, label='fast (Gaussian)')
         ax.plot(sigma_range, full, 'r-s', ms=6, lw=2, label='full (ring attractor)')
 
@@ -674,27 +1453,47 @@ def validate_fast_vs_full(save_prefix=None):
     return fig
 
 
+def validate_fast_vs_full(save_prefix=None):
+    """Compare the fast Gaussian approximation against the full
+    ring-attractor simulation at C=0.01 (marginal compass).
+
+    The ring attractor's nonlinear winner-take-all dynamics may filter
+    compass noise better than the Gaussian model predicts.
+    """
+    return validate_fast_vs_full_plot(validate_fast_vs_full_data(),
+                                      save_prefix)
+
+
 # ── 7. Relaxation + navigation: does the threshold survive? ──────
 
-def relaxation_navigation(save_prefix=None):
+# Pre-computed contrasts from the relaxation analysis.
+# Format: (label, C_no_relax, C_T2_3us, C_T2_1us, C_asym)
+# "asym" = FAD T2=3µs, partner T2=1µs
+_RELAXED_CONTRASTS = {
+    'toy FAD-O₂':   {'none': 0.391, 'T2=10µs': None, 'T2=3µs': 0.275, 'T2=1µs': 0.165, 'asym': 0.193},
+    'toy FAD-TrpH':  {'none': 0.210, 'T2=10µs': None, 'T2=3µs': 0.155, 'T2=1µs': 0.095, 'asym': 0.120},
+    'inter FAD-O₂': {'none': 0.448, 'T2=10µs': None, 'T2=3µs': 0.304, 'T2=1µs': 0.176, 'asym': 0.217},
+    'inter FAD-TrpH': {'none': 0.245, 'T2=10µs': 0.211, 'T2=3µs': 0.158, 'T2=1µs': 0.084, 'asym': 0.115},
+}
+
+# Relaxation scenarios to compare
+_RELAX_SCENARIOS = ['none', 'T2=3µs', 'T2=1µs']
+
+
+def relaxation_navigation_data(common_noise=False):
     """Navigation performance with relaxation-suppressed contrasts.
 
     Uses pre-computed contrast values from the spin relaxation analysis
     to check whether the C ~ 0.1 navigation threshold survives with
     realistic decoherence.
-    """
-    # Pre-computed contrasts from the relaxation analysis.
-    # Format: (label, C_no_relax, C_T2_3us, C_T2_1us, C_asym)
-    # "asym" = FAD T2=3µs, partner T2=1µs
-    relaxed_data = {
-        'toy FAD-O₂':   {'none': 0.391, 'T2=10µs': None, 'T2=3µs': 0.275, 'T2=1µs': 0.165, 'asym': 0.193},
-        'toy FAD-TrpH':  {'none': 0.210, 'T2=10µs': None, 'T2=3µs': 0.155, 'T2=1µs': 0.095, 'asym': 0.120},
-        'inter FAD-O₂': {'none': 0.448, 'T2=10µs': None, 'T2=3µs': 0.304, 'T2=1µs': 0.176, 'asym': 0.217},
-        'inter FAD-TrpH': {'none': 0.245, 'T2=10µs': 0.211, 'T2=3µs': 0.158, 'T2=1µs': 0.084, 'asym': 0.115},
-    }
 
-    # Relaxation scenarios to compare
-    scenarios = ['none', 'T2=3µs', 'T2=1µs']
+    With common_noise=True all contrasts replay the same noise paths
+    in one fast_ensemble_grid run, and the cost of each relaxation
+    scenario is reported as a paired difference from the same model
+    without relaxation.
+    """
+    relaxed_data = _RELAXED_CONTRASTS
+    scenarios = _RELAX_SCENARIOS
 
     sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0])
     n_cry = 50
@@ -702,6 +1501,48 @@ def relaxation_navigation(save_prefix=None):
     duration = 200
     dt = 0.02
 
+    # Every contrast the panels need: literature baselines plus the
+    # relaxed model contrasts, one sweep over contrast × σ_θ
+    panel_contrasts = [0.15, 0.01] + [
+        c[s] for c in relaxed_data.values() for s in scenarios
+        if c.get(s) is not None]
+    panel_contrasts = list(dict.fromkeys(panel_contrasts))
+    if common_noise:
+        grid = fast_ensemble_grid(
+            n_bugs=n_bugs, duration=duration, dt=dt, kappa=2.0,
+            sigma_theta=sigma_range[None, :],
+            contrast=np.array(panel_contrasts)[:, None],
+            n_cry=n_cry, sigma_sensor=0.02, common_noise=True)
+        errs_grid = grid['mean_error_deg']
+        bug_errs = dict(zip(panel_contrasts, grid['bug_error_deg']))
+        print('  Paired cost of relaxation (vs no relaxation):')
+        for model_name, contrasts in relaxed_data.items():
+            for scenario in scenarios[1:]:
+                C = contrasts.get(scenario)
+                if C is None:
+                    continue
+                _print_paired(f'{model_name} {scenario}', sigma_range,
+                              paired_difference(bug_errs[C],
+                                                bug_errs[contrasts['none']]))
+    else:
+        cells = [dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                      kappa=2.0, sigma_theta=sig,
+                      contrast=C, n_cry=n_cry, sigma_sensor=0.02)
+                 for C in panel_contrasts for sig in sigma_range]
+        errs_grid = np.reshape(_sweep(_fast_error, cells, 'relax_nav'),
+                               (len(panel_contrasts), len(sigma_range)))
+
+    return {'sigma_range': sigma_range, 'n_cry': n_cry,
+            'contrasts': panel_contrasts, 'errors': errs_grid}
+
+
+def relaxation_navigation_plot(data, save_prefix=None):
+    relaxed_data = _RELAXED_CONTRASTS
+    scenarios = _RELAX_SCENARIOS
+    sigma_range = data['sigma_range']
+    n_cry = data['n_cry']
+    curve = dict(zip(data['contrasts'], data['errors']))
+
     # ── Figure 1: Navigation curves per relaxation scenario ──
     fig, axes = plt.subplots(1, 3, figsize=(18, 6), sharey=True)
 
@@ -718,12 +1559,7 @@ def relaxation_navigation(save_prefix=None):
             (0.15, '[FAD O₂] lit.', '#00BCD4', '--'),
             (0.01, '[FAD TrpH] lit.', '#FF9800', '--'),
         ]:
-            errs = []
-            for sig in sigma_range:
-                err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                                       kappa=2.0, sigma_theta=sig,
-                                       contrast=C_lit, n_cry=n_cry, sigma_sensor=0.02)
-                errs.append(err)
+            errs = curve[C_lit]
             ax.plot(sigma_range, errs, color=color, ls=ls, marker='x', ms=5,
                     lw=1.5, label=label)
 
@@ -732,12 +1568,7 @@ def relaxation_navigation(save_prefix=None):
             C = contrasts.get(scenario)
             if C is None:
                 continue
-            errs = []
-            for sig in sigma_range:
-                err, _ = fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
-                                       kappa=2.0, sigma_theta=sig,
-                                       contrast=C, n_cry=n_cry, sigma_sensor=0.02)
-                errs.append(err)
+            errs = curve[C]
             label = f'{model_name} (C={C:.3f})'
             ax.plot(sigma_range, errs, color=model_colors[model_name],
                     marker='o', ms=4, lw=2, label=label)
@@ -792,24 +1623,20 @@ def relaxation_navigation(save_prefix=None):
     return fig, fig2
 
 
-# ── 8. Unequal recombination rates ────────────────────────────────
+def relaxation_navigation(save_prefix=None, common_noise=False):
+    """Navigation with relaxation-suppressed contrasts (see
+    relaxation_navigation_data), plotted per relaxation scenario."""
+    return relaxation_navigation_plot(
+        relaxation_navigation_data(common_noise), save_prefix)
 
-def unequal_rates(save_prefix=None):
-    """Sweep k_T/k_S and compute contrast, absolute anisotropy, navigation.
 
-    The singlet yield Φ_S depends strongly on the ratio k_T/k_S:
-    - k_T/k_S → 0: everything recombines through singlet, Φ_S → 1,
-      anisotropy vanishes.
-    - k_T/k_S → ∞: everything exits via triplet, Φ_S → 0, same.
-    - k_T/k_S ≈ 1: maximum absolute anisotropy δ = Φ_max − Φ_min.
+# ── 8. Unequal recombination rates ────────────────────────────────
 
-    The key metric for navigation is δ (not relative contrast C),
-    because the compass SNR scales with δ.
-    """
+def unequal_rates_data():
+    """Contrast, absolute anisotropy and navigation error against k_T/k_S
+    (see unequal_rates)."""
     models = _ensure_spin_dynamics()
     RPC = models['_RadicalPairCompass']
-    model_names = ['toy_fad_o2', 'toy_fad_trp',
-                   'intermediate_fad_o2', 'intermediate_fad_trp']
     # Skip dim=64 for the dense sweep — too slow
     fast_models = ['toy_fad_o2', 'toy_fad_trp', 'intermediate_fad_o2']
 
@@ -817,7 +1644,7 @@ def unequal_rates(save_prefix=None):
     ratios = np.array([0.001, 0.003, 0.01, 0.03, 0.1, 0.3,
                         0.5, 0.7, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0, 30.0, 100.0])
 
-    data = {}  # {model_name: dict of arrays}
+    data = {'fast_models': fast_models, 'ratios': ratios}
 
     for name in fast_models:
         factory = models[name]
@@ -837,6 +1664,42 @@ def unequal_rates(save_prefix=None):
             'mean': np.array(means),
         }
 
+    # Navigation error vs k_T/k_S at fixed noise, with the literature
+    # contrasts as baselines
+    sigma_thetas = [0.3, 0.5, 1.0]
+    lit_contrasts = [0.15, 0.01]
+    n_cry = 50
+    n_bugs = 200
+    duration = 200
+    dt = 0.02
+
+    nav = {name: np.zeros((len(sigma_thetas), len(ratios)))
+           for name in fast_models}
+    lit = np.zeros((len(sigma_thetas), len(lit_contrasts)))
+    for j, sig in enumerate(sigma_thetas):
+        for name in fast_models:
+            d = data[name]
+            for i, r in enumerate(ratios):
+                nav[name][j, i], _ = fast_ensemble(
+                    n_bugs=n_bugs, duration=duration, dt=dt,
+                    kappa=2.0, sigma_theta=sig,
+                    contrast=d['C'][i], n_cry=n_cry, sigma_sensor=0.02,
+                    mean_yield=d['mean'][i])
+        for k, C_lit in enumerate(lit_contrasts):
+            lit[j, k], _ = fast_ensemble(
+                n_bugs=n_bugs, duration=duration, dt=dt,
+                kappa=2.0, sigma_theta=sig,
+                contrast=C_lit, n_cry=n_cry, sigma_sensor=0.02)
+
+    data.update(sigma_thetas=sigma_thetas, n_cry=n_cry, lit_errors=lit,
+                nav_errors=nav)
+    return data
+
+
+def unequal_rates_plot(data, save_prefix=None):
+    fast_models = list(data['fast_models'])
+    ratios = data['ratios']
+
     # ── Figure 1: C and δ vs k_T/k_S ──
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
     colors = {'toy_fad_o2': '#2196F3', 'toy_fad_trp': '#4CAF50',
@@ -870,35 +1733,19 @@ def unequal_rates(save_prefix=None):
 
     # ── Figure 2: Navigation error vs k_T/k_S at fixed noise ──
     fig2, axes = plt.subplots(1, 3, figsize=(17, 5.5), sharey=True)
-    sigma_thetas = [0.3, 0.5, 1.0]
-    n_cry = 50
-    n_bugs = 200
-    duration = 200
-    dt = 0.02
+    n_cry = data['n_cry']
 
-    for ax, sig in zip(axes, sigma_thetas):
+    for j, (ax, sig) in enumerate(zip(axes, data['sigma_thetas'])):
         for name in fast_models:
-            d = data[name]
-            errs = []
-            for i, r in enumerate(ratios):
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sig,
-                    contrast=d['C'][i], n_cry=n_cry, sigma_sensor=0.02,
-                    mean_yield=d['mean'][i])
-                errs.append(err)
-            ax.semilogx(ratios, errs, color=colors[name], marker='o', ms=4,
+            ax.semilogx(ratios, data['nav_errors'][name][j],
+                        color=colors[name], marker='o', ms=4,
                         lw=2, label=name.replace('_', ' '))
 
         # Add literature baselines
-        for C_lit, label, color, ls in [
-            (0.15, '[FAD O₂] lit.', '#00BCD4', '--'),
-            (0.01, '[FAD TrpH] lit.', '#FF9800', '--'),
-        ]:
-            err_lit, _ = fast_ensemble(
-                n_bugs=n_bugs, duration=duration, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=C_lit, n_cry=n_cry, sigma_sensor=0.02)
+        for err_lit, label, color, ls in zip(
+                data['lit_errors'][j],
+                ['[FAD O₂] lit.', '[FAD TrpH] lit.'],
+                ['#00BCD4', '#FF9800'], ['--', '--']):
             ax.axhline(err_lit, color=color, ls=ls, lw=1.5, alpha=0.5,
                        label=label)
 
@@ -922,38 +1769,64 @@ def unequal_rates(save_prefix=None):
     return fig, fig2
 
 
-# ── 9. Orientational disorder ────────────────────────────────────
+def unequal_rates(save_prefix=None):
+    """Sweep k_T/k_S and compute contrast, absolute anisotropy, navigation.
 
-def orientational_disorder(save_prefix=None):
-    """Effective contrast after averaging over cryptochrome misalignment.
+    The singlet yield Φ_S depends strongly on the ratio k_T/k_S:
+    - k_T/k_S → 0: everything recombines through singlet, Φ_S → 1,
+      anisotropy vanishes.
+    - k_T/k_S → ∞: everything exits via triplet, Φ_S → 0, same.
+    - k_T/k_S ≈ 1: maximum absolute anisotropy δ = Φ_max − Φ_min.
 
-    Since L=0,2 captures 99.9% of the anisotropy (harmonic analysis),
-    orientational averaging simply multiplies the contrast by the P₂
-    order parameter ⟨P₂(cos Δθ)⟩ of the angular distribution, where
-    Δθ is the tilt of a molecule's z-axis from the mean orientation.
+    The key metric for navigation is δ (not relative contrast C),
+    because the compass SNR scales with δ.
+    """
+    return unequal_rates_plot(unequal_rates_data(), save_prefix)
 
-    For a von Mises-Fisher distribution on the sphere with concentration κ:
-        ⟨P₂⟩ = 1 − 3/κ + 3 coth(κ)/κ  (exact)
 
-    σ_orient ≈ 1/√κ gives the angular spread in radians.
+# ── 9. Orientational disorder ────────────────────────────────────
+
+def _vmf_P2(kappa):
+    """⟨P₂(cos θ)⟩ for von Mises-Fisher with concentration κ.
+
+    ⟨P₂⟩ = 1 − 3L(κ)/κ  where L(κ) = coth(κ) − 1/κ (Langevin fn).
+    Equivalently: 1 − 3coth(κ)/κ + 3/κ².
+    Limits: κ→∞ gives 1 (perfect alignment), κ→0 gives 0 (isotropic).
     """
+    if kappa < 0.01:
+        return 0.0
+    coth_k = 1.0 / np.tanh(kappa)
+    L_k = coth_k - 1.0 / kappa   # Langevin function
+    return 1.0 - 3.0 * L_k / kappa
+
+
+# (label, model name, colour) of the models in the disorder figures
+_DISORDER_MODELS = [
+    ('toy FAD-O₂',  'toy_fad_o2',         '#2196F3'),
+    ('toy FAD-TrpH', 'toy_fad_trp',        '#4CAF50'),
+    ('inter FAD-O₂', 'intermediate_fad_o2', '#1565C0'),
+]
+
+# Relaxation scenarios (k_relax_A, k_relax_B) for the combined panel
+_DISORDER_RELAX = {
+    'no relax': (0.0, 0.0),
+    'T₂=3µs': (3.3e5, 3.3e5),
+    'T₂=1µs': (1e6, 1e6),
+}
+
+# Lines (C, label, colour) for the literature contrasts
+_LITERATURE_BASELINES = [
+    (0.15, '[FAD O₂] lit.', '#00BCD4'),
+    (0.01, '[FAD TrpH] lit.', '#FF9800'),
+]
+
+
+def orientational_disorder_data():
+    """Effective contrasts and navigation errors under cryptochrome
+    misalignment (see orientational_disorder)."""
     models = _ensure_spin_dynamics()
     RPC = models['_RadicalPairCompass']
 
-    # P₂ order parameter for von Mises-Fisher distribution
-    def vmf_P2(kappa):
-        """⟨P₂(cos θ)⟩ for von Mises-Fisher with concentration κ.
-
-        ⟨P₂⟩ = 1 − 3L(κ)/κ  where L(κ) = coth(κ) − 1/κ (Langevin fn).
-        Equivalently: 1 − 3coth(κ)/κ + 3/κ².
-        Limits: κ→∞ gives 1 (perfect alignment), κ→0 gives 0 (isotropic).
-        """
-        if kappa < 0.01:
-            return 0.0
-        coth_k = 1.0 / np.tanh(kappa)
-        L_k = coth_k - 1.0 / kappa   # Langevin function
-        return 1.0 - 3.0 * L_k / kappa
-
     # Angular spread in degrees
     sigma_orient_deg = np.array([0, 5, 10, 15, 20, 25, 30, 40, 50, 60, 90])
     sigma_orient_rad = np.radians(sigma_orient_deg)
@@ -964,35 +1837,83 @@ def orientational_disorder(save_prefix=None):
         kappas = np.where(sigma_orient_rad > 0.01,
                           1.0 / sigma_orient_rad**2,
                           1e6)
-    P2_values = np.array([vmf_P2(k) for k in kappas])
+    P2_values = np.array([_vmf_P2(k) for k in kappas])
 
     print(f'{"σ_orient (°)":>14s}  {"κ":>10s}  {"⟨P₂⟩":>8s}')
     for s, k, p in zip(sigma_orient_deg, kappas, P2_values):
         print(f'{s:14d}  {k:10.1f}  {p:8.4f}')
 
-    # Effective contrast = C₀ × ⟨P₂⟩ for each model
-    model_configs = [
-        ('toy FAD-O₂',  'toy_fad_o2',         '#2196F3'),
-        ('toy FAD-TrpH', 'toy_fad_trp',        '#4CAF50'),
-        ('inter FAD-O₂', 'intermediate_fad_o2', '#1565C0'),
-    ]
+    # Unrelaxed contrasts; effective contrast = C₀ × ⟨P₂⟩
+    C0 = []
+    mean0 = []
+    for label, name, _ in _DISORDER_MODELS:
+        rpc = RPC(model=models[name](), n_theta=90)
+        C0.append(rpc.contrast)
+        mean0.append(rpc.mean_yield)
 
-    # Get unrelaxed contrasts
-    C0 = {}
-    mean0 = {}
-    for label, name, _ in model_configs:
-        factory = models[name]
-        rpc = RPC(model=factory(), n_theta=90)
-        C0[label] = rpc.contrast
-        mean0[label] = rpc.mean_yield
+    # Combined relaxation + disorder, inter FAD-O₂ as representative
+    factory = models['intermediate_fad_o2']
+    C_relax = []
+    for k_A, k_B in _DISORDER_RELAX.values():
+        rpc = RPC(model=factory(), k=1e6, k_relax_A=k_A, k_relax_B=k_B,
+                  n_theta=90)
+        C_relax.append(rpc.contrast)
+    # Also FAD-TrpH with no relax
+    C_trp = RPC(model=models['toy_fad_trp'](), n_theta=90).contrast
+
+    # Navigation with combined suppression
+    sigma_orients = np.array([0, 15, 30])
+    n_cry = 50
+    n_bugs = 200
+    duration = 200
+    dt = 0.02
+    sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0])
+
+    def errors(contrast, mean_yield=None):
+        return [fast_ensemble(
+                    n_bugs=n_bugs, duration=duration, dt=dt,
+                    kappa=2.0, sigma_theta=sig,
+                    contrast=contrast, n_cry=n_cry, sigma_sensor=0.02,
+                    mean_yield=mean_yield)[0]
+                for sig in sigma_range]
+
+    P2_panels = []
+    model_errors = []
+    for s_orient in sigma_orients:
+        kappa_o = 1.0 / np.radians(max(s_orient, 1))**2 if s_orient > 0 else 1e6
+        P2 = _vmf_P2(kappa_o)
+        P2_panels.append(P2)
+        model_errors.append([errors(C * P2, mean)
+                             for C, mean in zip(C0, mean0)])
+    lit_errors = [errors(C_lit) for C_lit, _, _ in _LITERATURE_BASELINES]
+
+    return {
+        'sigma_orient_deg': sigma_orient_deg,
+        'P2_values': P2_values,
+        'C0': np.array(C0),
+        'C_relax': np.array(C_relax),
+        'C_trp': C_trp,
+        'sigma_orients': sigma_orients,
+        'P2_panels': np.array(P2_panels),
+        'sigma_range': sigma_range,
+        'n_cry': n_cry,
+        'model_errors': np.array(model_errors),
+        'lit_errors': np.array(lit_errors),
+    }
+
+
+def orientational_disorder_plot(data, save_prefix=None):
+    sigma_orient_deg = data['sigma_orient_deg']
+    P2_values = data['P2_values']
+    C0 = data['C0']
 
     # ── Figure 1: Effective contrast vs disorder ──
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
 
-    for label, name, color in model_configs:
-        C_eff = C0[label] * P2_values
+    for (label, _, color), C in zip(_DISORDER_MODELS, C0):
+        C_eff = C * P2_values
         ax1.plot(sigma_orient_deg, C_eff, color=color, marker='o', ms=5,
-                 lw=2, label=f'{label} (C₀={C0[label]:.3f})')
+                 lw=2, label=f'{label} (C₀={C:.3f})')
 
     ax1.axhline(0.1, color='red', ls='--', lw=2, alpha=0.5,
                 label='nav threshold')
@@ -1003,26 +1924,15 @@ def orientational_disorder(save_prefix=None):
     ax1.set_ylim(0, 0.5)
 
     # ── Right panel: combined relaxation + disorder ──
-    relax_scenarios = {
-        'no relax': (0.0, 0.0),
-        'T₂=3µs': (3.3e5, 3.3e5),
-        'T₂=1µs': (1e6, 1e6),
-    }
     relax_colors = {'no relax': '#4CAF50', 'T₂=3µs': '#FF9800', 'T₂=1µs': '#F44336'}
 
-    # Use inter FAD-O₂ as representative
-    factory = models['intermediate_fad_o2']
-    for relax_label, (k_A, k_B) in relax_scenarios.items():
-        rpc = RPC(model=factory(), k=1e6, k_relax_A=k_A, k_relax_B=k_B,
-                  n_theta=90)
-        C_eff = rpc.contrast * P2_values
+    for relax_label, C in zip(_DISORDER_RELAX, data['C_relax']):
+        C_eff = C * P2_values
         ax2.plot(sigma_orient_deg, C_eff,
                  color=relax_colors[relax_label], marker='o', ms=5, lw=2,
                  label=f'inter FAD-O₂ ({relax_label})')
 
-    # Also FAD-TrpH with no relax
-    rpc_trp = RPC(model=models['toy_fad_trp'](), n_theta=90)
-    C_eff_trp = rpc_trp.contrast * P2_values
+    C_eff_trp = data['C_trp'] * P2_values
     ax2.plot(sigma_orient_deg, C_eff_trp, color='#4CAF50', ls='--',
              marker='s', ms=4, lw=1.5, label='toy FAD-TrpH (no relax)')
 
@@ -1039,43 +1949,20 @@ def orientational_disorder(save_prefix=None):
 
     # ── Figure 2: Navigation with combined suppression ──
     fig2, axes = plt.subplots(1, 3, figsize=(17, 5.5), sharey=True)
-    sigma_orients = [0, 15, 30]
-    n_cry = 50
-    n_bugs = 200
-    duration = 200
-    dt = 0.02
-    sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0])
-
-    for ax, s_orient in zip(axes, sigma_orients):
-        kappa_o = 1.0 / np.radians(max(s_orient, 1))**2 if s_orient > 0 else 1e6
-        P2 = vmf_P2(kappa_o)
-
-        for label, name, color in model_configs:
-            C_eff = C0[label] * P2
-            mean = mean0[label]
-            errs = []
-            for sig in sigma_range:
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sig,
-                    contrast=C_eff, n_cry=n_cry, sigma_sensor=0.02,
-                    mean_yield=mean)
-                errs.append(err)
+    sigma_range = data['sigma_range']
+    n_cry = data['n_cry']
+
+    for ax, s_orient, P2, panel in zip(axes, data['sigma_orients'],
+                                       data['P2_panels'],
+                                       data['model_errors']):
+        for (label, _, color), C, errs in zip(_DISORDER_MODELS, C0, panel):
+            C_eff = C * P2
             ax.plot(sigma_range, errs, color=color, marker='o', ms=4,
                     lw=2, label=f'{label} (C_eff={C_eff:.3f})')
 
         # Literature baselines
-        for C_lit, lit_label, lit_color in [
-            (0.15, '[FAD O₂] lit.', '#00BCD4'),
-            (0.01, '[FAD TrpH] lit.', '#FF9800'),
-        ]:
-            errs = []
-            for sig in sigma_range:
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sig,
-                    contrast=C_lit, n_cry=n_cry, sigma_sensor=0.02)
-                errs.append(err)
+        for (_, lit_label, lit_color), errs in zip(_LITERATURE_BASELINES,
+                                                   data['lit_errors']):
             ax.plot(sigma_range, errs, color=lit_color, ls='--', marker='x',
                     ms=5, lw=1.5, label=lit_label)
 
@@ -1099,6 +1986,23 @@ def orientational_disorder(save_prefix=None):
     return fig, fig2
 
 
+def orientational_disorder(save_prefix=None):
+    """Effective contrast after averaging over cryptochrome misalignment.
+
+    Since L=0,2 captures 99.9% of the anisotropy (harmonic analysis),
+    orientational averaging simply multiplies the contrast by the P₂
+    order parameter ⟨P₂(cos Δθ)⟩ of the angular distribution, where
+    Δθ is the tilt of a molecule's z-axis from the mean orientation.
+
+    For a von Mises-Fisher distribution on the sphere with concentration κ:
+        ⟨P₂⟩ = 1 − 3/κ + 3 coth(κ)/κ  (exact)
+
+    σ_orient ≈ 1/√κ gives the angular spread in radians.
+    """
+    return orientational_disorder_plot(orientational_disorder_data(),
+                                       save_prefix)
+
+
 # ── 10. Anomaly ensemble simulation ──────────────────────────────
 
 def _build_deviation_grid(landscape, n_grid=100):
@@ -1142,62 +2046,137 @@ def _interp_deviation(x, y, xg, yg, dphi_grid):
             fx*fy         * dphi_grid[iy+1, ix+1])
 
 
+def _varying_field(landscape):
+    """Whether landscape's field direction varies (in space or time)."""
+    return landscape is not None and bool(
+        landscape.anomalies or isinstance(landscape, TimeVaryingLandscape))
+
+
+def _deviation_lookup(landscape, dt, n_steps):
+    """δφ(x, y, step) for an engine loop.
+
+    A static landscape is gridded once (_build_deviation_grid); a
+    TimeVaryingLandscape supplies its basis-raster sampler, evaluated at
+    the start-of-step time step·dt.
+    """
+    if isinstance(landscape, TimeVaryingLandscape):
+        return landscape.deviation_sampler(dt, n_steps)
+    xg, yg, dphi_grid = _build_deviation_grid(landscape, n_grid=150)
+
+    def deviation(x, y, step):
+        return _interp_deviation(x, y, xg, yg, dphi_grid)
+    return deviation
+
+
+@memoised
 def anomaly_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
                      contrast, n_cry, sigma_sensor, landscape,
                      goal=3*np.pi/4, speed=1.0, sigma_xy=0.05, seed=0,
-                     mean_yield=None):
+                     mean_yield=None, scheme='euler', compass_dt=None,
+                     per_bug_streams=False, bug_offset=0, accumulators=None,
+                     compass_map=None, checkpoint=None,
+                     checkpoint_every=60.0, backend='numpy'):
     """Vectorised simulation with position-dependent field direction.
 
     Like fast_ensemble but the local magnetic field direction varies with
     position according to the landscape's anomaly field.  The field
     deviation δφ(x,y) is pre-computed on a grid and bilinearly interpolated
-    for speed.
+    for speed; a TimeVaryingLandscape adds its time-dependent terms at
+    t = step·dt.  scheme and compass_dt are as for fast_ensemble; δφ is
+    frozen at the start-of-step position.  per_bug_streams, bug_offset,
+    accumulators, compass_map, checkpoint, checkpoint_every and backend
+    are as for fast_ensemble.
 
     Returns (mean_heading_error_deg, distances, mean_path_deviation_deg).
     """
-    rng = np.random.default_rng(seed)
+    args = dict(locals())
+    if backend == 'jax':
+        return _jax_engine('anomaly_ensemble', accumulators, compass_map,
+                           checkpoint, landscape)(
+            n_bugs, duration, dt, kappa, sigma_theta, contrast, n_cry,
+            sigma_sensor, landscape, goal=goal, speed=speed,
+            sigma_xy=sigma_xy, seed=seed, mean_yield=mean_yield,
+            scheme=scheme, compass_dt=compass_dt,
+            per_bug_streams=per_bug_streams, bug_offset=bug_offset)
     n_steps = int(duration / dt)
+    streams = make_streams(seed, n_bugs, 4, per_bug_streams, bug_offset,
+                           n_steps=n_steps)
     sqrt_dt = np.sqrt(dt)
+    if accumulators:
+        start_all(accumulators, n_bugs, n_steps, dt)
 
-    theta = rng.uniform(0, 2*np.pi, n_bugs)
+    theta = streams.uniform(0, 2*np.pi)
     x = np.full(n_bugs, 500.0)
     y = np.full(n_bugs, 100.0)
 
-    if mean_yield is None:
-        mean_yield = 0.5
-    delta = contrast * mean_yield
-    n_per_ch = n_cry / 8.0
-    sigma_compass = (sigma_sensor / (delta * np.sqrt(2 * n_per_ch))
-                     if delta > 1e-10 else 10.0)
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    if compass_map is not None:
+        sigma_compass = _compass_sigma(1.0, dt, compass_dt)
+    latent = None   # compass_map's latent normal per bug
 
     # Pre-compute deviation grid (fast lookup instead of per-step anomaly eval)
-    xg, yg, dphi_grid = _build_deviation_grid(landscape, n_grid=150)
+    deviation = _deviation_lookup(landscape, dt, n_steps)
 
     heading_errors_sum = np.zeros(n_bugs)
     deviation_sum = np.zeros(n_bugs)
 
-    for _ in range(n_steps):
+    ckpt = _engine_checkpoint('anomaly_ensemble', args, checkpoint,
+                              checkpoint_every)
+
+    def state(step):
+        return {'step': step, 'theta': theta, 'x': x, 'y': y,
+                'heading_errors_sum': heading_errors_sum,
+                'deviation_sum': deviation_sum, 'latent': latent,
+                'streams': streams.state_dict(),
+                'accumulators': accumulators}
+
+    first = 0
+    saved = ckpt.load() if ckpt is not None else None
+    if saved is not None:
+        first = saved['step']
+        theta, x, y = saved['theta'], saved['x'], saved['y']
+        heading_errors_sum = saved['heading_errors_sum']
+        deviation_sum = saved['deviation_sum']
+        latent = saved['latent']
+        streams.load_state_dict(saved['streams'])
+        if accumulators:
+            restore_into(accumulators, saved['accumulators'])
+
+    for step in range(first, n_steps):
         # Fast grid lookup of field deviation
-        delta_phi = _interp_deviation(x, y, xg, yg, dphi_grid)
+        delta_phi = deviation(x, y, step)
 
         # Compass noise
-        compass_noise = rng.normal(0, sigma_compass, n_bugs)
+        z = streams.normals()
+        compass_noise, latent = _compass_noise(z[0], sigma_compass,
+                                               compass_map, latent, dt)
 
         # Steering: the anomaly biases the heading estimate
         heading_est = theta + compass_noise
         heading_error = goal - heading_est + delta_phi
-        d_theta = kappa * np.sin(heading_error) * dt
-        d_theta += sigma_theta * sqrt_dt * rng.standard_normal(n_bugs)
-        theta = (theta + d_theta) % (2 * np.pi)
+        noise = sigma_theta * sqrt_dt * z[1]
+        theta_old = theta
+        theta = _heading_step(theta, heading_error, kappa, noise, dt, scheme)
 
         # Position
-        x += speed * np.cos(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
-        y += speed * np.sin(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
+        cos_t, sin_t = _step_direction(theta_old, theta, scheme)
+        x += speed * cos_t * dt + sigma_xy * sqrt_dt * z[2]
+        y += speed * sin_t * dt + sigma_xy * sqrt_dt * z[3]
 
         # Track errors
         err = np.abs(((theta - goal) + np.pi) % (2*np.pi) - np.pi)
         heading_errors_sum += err
         deviation_sum += np.abs(delta_phi)
+        if accumulators:
+            update_all(accumulators, StepState((step + 1) * dt, theta, x, y,
+                                               (500.0, 100.0), error=err,
+                                               delta_phi=delta_phi))
+        if ckpt is not None and ckpt.due():
+            ckpt.save(state(step + 1))
+    if ckpt is not None:
+        ckpt.save(state(n_steps))
 
     mean_err = np.degrees(np.mean(heading_errors_sum / n_steps))
     distances = np.sqrt((x - 500)**2 + (y - 100)**2)
@@ -1208,19 +2187,22 @@ def anomaly_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
 
 # ── 11. Direction A: Magnetic anomaly analysis ───────────────────
 
-def anomaly_navigation(save_prefix=None):
-    """Navigation through magnetic anomaly fields.
+# (label, contrast, mean yield) of the compasses in the critical-
+# magnitude figure
+_ANOMALY_COMPASSES = [
+    ('FAD-O₂ lit. (C=0.15)', 0.15, None),
+    ('FAD-TrpH lit. (C=0.01)', 0.01, None),
+    ('Relaxed FAD-O₂ (C=0.10)', 0.10, None),
+]
+
+
+def anomaly_navigation_data():
+    """Field maps, trajectories and error sweeps through magnetic
+    anomalies (see anomaly_navigation)."""
+    data = {}
 
-    Produces four figures:
-      1. Field deviation maps for each anomaly type
-      2. Single-bug trajectory through a dipole anomaly
-      3. Navigation error vs dipole strength at varying densities
-      4. Critical anomaly magnitude (phase diagram)
-    """
     # ── Figure 1: Anomaly field maps ──
     print('  [1/4] Field deviation maps...')
-    fig1, axes1 = plt.subplots(2, 2, figsize=(14, 12))
-
     extent = (1000, 1000)
     xg = np.linspace(0, extent[0], 200)
     yg = np.linspace(0, extent[1], 200)
@@ -1242,28 +2224,16 @@ def anomaly_navigation(save_prefix=None):
           {'type': 'fault', 'pos': (500, 500), 'azimuth': np.pi/3,
            'contrast': 1.5, 'width': 25}]),
     ]
-
-    for ax, (title, anoms) in zip(axes1.flat, anomaly_configs):
-        ls = Landscape(extent=extent, anomalies=anoms)
-        dphi = ls.direction_deviation(Xg, Yg)
-        dphi_deg = np.degrees(dphi)
-
-        vmax = max(np.abs(dphi_deg).max(), 0.5)
-        im = ax.pcolormesh(Xg, Yg, dphi_deg, cmap='RdBu_r',
-                           vmin=-vmax, vmax=vmax, shading='auto')
-        plt.colorbar(im, ax=ax, label='δφ (°)')
-        ax.set_title(title, fontsize=11)
-        ax.set_xlabel('x (BL)')
-        ax.set_ylabel('y (BL)')
-        ax.set_aspect('equal')
-
-    fig1.suptitle('Magnetic Field Direction Anomalies', fontsize=14)
-    plt.tight_layout()
+    data['xg'] = xg
+    data['yg'] = yg
+    data['map_titles'] = [title for title, _ in anomaly_configs]
+    data['maps'] = np.array([
+        np.degrees(Landscape(extent=extent, anomalies=anoms)
+                   .direction_deviation(Xg, Yg))
+        for _, anoms in anomaly_configs])
 
     # ── Figure 2: Trajectory through a dipole ──
     print('  [2/4] Trajectory through dipole...')
-    fig2, axes2 = plt.subplots(1, 3, figsize=(18, 6))
-
     strengths_traj = [0.0, 2.0, 8.0]
     n_bugs_traj = 50
     duration = 300
@@ -1271,7 +2241,10 @@ def anomaly_navigation(save_prefix=None):
     contrast = 0.15
     n_cry = 50
 
-    for ax, s_dip in zip(axes2, strengths_traj):
+    traj_maps = []
+    traj_x = []
+    traj_y = []
+    for s_dip in strengths_traj:
         if s_dip > 0:
             anoms = [{'type': 'dipole', 'pos': (500, 400),
                       'strength': s_dip, 'depth': 80}]
@@ -1279,12 +2252,8 @@ def anomaly_navigation(save_prefix=None):
             anoms = []
         ls = Landscape(extent=extent, anomalies=anoms)
 
-        # Plot field deviation background
-        dphi = ls.direction_deviation(Xg, Yg)
-        dphi_deg = np.degrees(dphi)
-        vmax = max(np.abs(dphi_deg).max(), 0.5)
-        ax.pcolormesh(Xg, Yg, dphi_deg, cmap='RdBu_r',
-                      vmin=-vmax, vmax=vmax, shading='auto', alpha=0.3)
+        # Field deviation background
+        traj_maps.append(np.degrees(ls.direction_deviation(Xg, Yg)))
 
         # Run bugs
         rng = np.random.default_rng(42)
@@ -1314,9 +2283,154 @@ def anomaly_navigation(save_prefix=None):
                 paths_x.append(x_arr.copy())
                 paths_y.append(y_arr.copy())
 
-        paths_x = np.array(paths_x)
-        paths_y = np.array(paths_y)
+        traj_x.append(paths_x)
+        traj_y.append(paths_y)
+
+    data.update(strengths_traj=np.array(strengths_traj),
+                traj_maps=np.array(traj_maps), traj_x=np.array(traj_x),
+                traj_y=np.array(traj_y), traj_goal=goal,
+                traj_contrast=contrast, traj_n_cry=n_cry)
+
+    # ── Figure 3: Navigation error vs anomaly strength × density ──
+    print('  [3/4] Error vs strength × density sweep...')
+    dipole_strengths = np.array([0, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0])
+    n_dipoles_list = [1, 5, 10, 20]
+    depth = 80
+    n_bugs = 200
+    duration = 300
+    dt = 0.02
+    sigma_theta = 0.3
+
+    base = dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                kappa=2.0, sigma_theta=sigma_theta,
+                contrast=0.15, n_cry=50, sigma_sensor=0.02)
+    # Uniform field baseline
+    baseline = _sweep(_fast_error, [base], 'anomaly_base')[0]
+
+    def trial_mean(groups, landscape_seed, tag):
+        """Error per (n_dip, s), averaged over 5 random realisations."""
+        cells = [dict(base, seed=trial,
+                      dipoles=dict(extent=extent, n_dip=n_dip, strength=s,
+                                   depth=depth,
+                                   seed=landscape_seed(trial, n_dip, s)))
+                 for n_dip, s in groups for trial in range(5)]
+        errs = np.reshape(_sweep(_anomaly_error, cells, tag),
+                          (len(groups), 5)).mean(axis=1)
+        return dict(zip(groups, errs))
+
+    # Error vs strength at different densities
+    mean_err = trial_mean(
+        [(n_dip, s) for n_dip in n_dipoles_list
+         for s in dipole_strengths if s != 0],
+        lambda trial, n_dip, s: 100*trial + n_dip, 'anomaly_strength')
+    strength_errors = []
+    for n_dip in n_dipoles_list:
+        errs = [mean_err.get((n_dip, s), baseline) for s in dipole_strengths]
+        for s, err in zip(dipole_strengths, errs):
+            print(f'    n_dip={n_dip}  strength={s:.1f}  err={err:.1f}°')
+        strength_errors.append(errs)
+
+    # Error vs density at different strengths
+    strength_list = [1.0, 3.0, 5.0, 8.0]
+    n_dip_range = np.array([0, 1, 3, 5, 10, 20, 50])
+
+    mean_err = trial_mean(
+        [(n_dip, s) for s in strength_list
+         for n_dip in n_dip_range if n_dip != 0],
+        lambda trial, n_dip, s: 200*trial + int(s*10), 'anomaly_density')
+    density_errors = []
+    for s in strength_list:
+        errs = [mean_err.get((n_dip, s), baseline) for n_dip in n_dip_range]
+        for n_dip, err in zip(n_dip_range, errs):
+            print(f'    strength={s:.1f}  n_dip={n_dip}  err={err:.1f}°')
+        density_errors.append(errs)
+
+    data.update(dipole_strengths=dipole_strengths,
+                n_dipoles_list=np.array(n_dipoles_list),
+                strength_errors=np.array(strength_errors),
+                strength_list=np.array(strength_list),
+                n_dip_range=n_dip_range,
+                density_errors=np.array(density_errors),
+                sigma_theta=sigma_theta)
+
+    # ── Figure 4: Critical anomaly magnitude for different compasses ──
+    print('  [4/4] Critical anomaly magnitude...')
+    contrasts_test = _ANOMALY_COMPASSES
+    n_dip_crit = 10
+    depth_crit = 80
+    strengths_fine = np.array([0, 0.5, 1.0, 2.0, 3.0, 4.0, 5.0, 7.0, 10.0])
+    sigma_thetas_crit = [0.3, 0.5]
+
+    crit_base = [dict(n_bugs=200, duration=300, dt=0.02,
+                      kappa=2.0, sigma_theta=sig,
+                      contrast=C, n_cry=50, sigma_sensor=0.02,
+                      mean_yield=my)
+                 for sig in sigma_thetas_crit for _, C, my in contrasts_test]
+    # Baseline (no anomaly) for each compass
+    crit_baselines = np.reshape(
+        _sweep(_fast_error, crit_base, 'anomaly_crit_base'),
+        (len(sigma_thetas_crit), len(contrasts_test)))
+    s_anom = [s for s in strengths_fine if s != 0]
+    cells = [dict(cell, seed=trial,
+                  dipoles=dict(extent=extent, n_dip=n_dip_crit, strength=s,
+                               depth=depth_crit, seed=300*trial))
+             for cell in crit_base for s in s_anom for trial in range(5)]
+    crit_errs = np.reshape(
+        _sweep(_anomaly_error, cells, 'anomaly_crit'),
+        (len(sigma_thetas_crit), len(contrasts_test), len(s_anom), 5)
+    ).mean(axis=-1)
+    # Prepend the no-anomaly baseline as strength 0
+    crit_errs = np.concatenate([crit_baselines[..., None], crit_errs],
+                               axis=-1)
+
+    for sig, sig_base, sig_errs in zip(sigma_thetas_crit, crit_baselines,
+                                       crit_errs):
+        for (label, _, _), base_err, errs in zip(contrasts_test, sig_base,
+                                                 sig_errs):
+            for s, err in zip(strengths_fine, errs):
+                print(f'    {label}  σ_θ={sig}  s={s:.1f}  '
+                      f'err={err:.1f}° (Δ={err-base_err:+.1f}°)')
+
+    data.update(strengths_fine=strengths_fine,
+                sigma_thetas_crit=np.array(sigma_thetas_crit),
+                crit_baselines=crit_baselines, crit_errors=crit_errs,
+                n_dip_crit=n_dip_crit, depth_crit=depth_crit)
+    return data
+
+
+def anomaly_navigation_plot(data, save_prefix=None):
+    Xg, Yg = np.meshgrid(data['xg'], data['yg'])
+
+    # ── Figure 1: Anomaly field maps ──
+    fig1, axes1 = plt.subplots(2, 2, figsize=(14, 12))
+
+    for ax, title, dphi_deg in zip(axes1.flat, data['map_titles'],
+                                   data['maps']):
+        vmax = max(np.abs(dphi_deg).max(), 0.5)
+        im = ax.pcolormesh(Xg, Yg, dphi_deg, cmap='RdBu_r',
+                           vmin=-vmax, vmax=vmax, shading='auto')
+        plt.colorbar(im, ax=ax, label='δφ (°)')
+        ax.set_title(title, fontsize=11)
+        ax.set_xlabel('x (BL)')
+        ax.set_ylabel('y (BL)')
+        ax.set_aspect('equal')
+
+    fig1.suptitle('Magnetic Field Direction Anomalies', fontsize=14)
+    plt.tight_layout()
+
+    # ── Figure 2: Trajectory through a dipole ──
+    fig2, axes2 = plt.subplots(1, 3, figsize=(18, 6))
+    goal = data['traj_goal']
+
+    for ax, s_dip, dphi_deg, paths_x, paths_y in zip(
+            axes2, data['strengths_traj'], data['traj_maps'],
+            data['traj_x'], data['traj_y']):
+        # Field deviation background
+        vmax = max(np.abs(dphi_deg).max(), 0.5)
+        ax.pcolormesh(Xg, Yg, dphi_deg, cmap='RdBu_r',
+                      vmin=-vmax, vmax=vmax, shading='auto', alpha=0.3)
 
+        n_bugs_traj = paths_x.shape[1]
         for i in range(n_bugs_traj):
             ax.plot(paths_x[:, i], paths_y[:, i], 'k-', alpha=0.15, lw=0.5)
         # Highlight a few
@@ -1337,52 +2451,20 @@ def anomaly_navigation(save_prefix=None):
 
     axes2[0].set_ylabel('y (BL)')
     fig2.suptitle('Bug Trajectories Through Dipole Anomalies '
-                  f'(C={contrast}, N_cry={n_cry})', fontsize=14)
+                  f'(C={data["traj_contrast"]}, N_cry={data["traj_n_cry"]})',
+                  fontsize=14)
     plt.tight_layout()
 
     # ── Figure 3: Navigation error vs anomaly strength × density ──
-    print('  [3/4] Error vs strength × density sweep...')
-    dipole_strengths = np.array([0, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 12.0])
-    n_dipoles_list = [1, 5, 10, 20]
-    depth = 80
-    n_bugs = 200
-    duration = 300
-    dt = 0.02
-    sigma_theta = 0.3
-
     fig3, axes3 = plt.subplots(1, 2, figsize=(14, 6))
     colors3 = ['#2196F3', '#4CAF50', '#FF9800', '#F44336']
 
     # Left: error vs strength at different densities
     ax = axes3[0]
-    for n_dip, color in zip(n_dipoles_list, colors3):
-        errs = []
-        for s in dipole_strengths:
-            if s == 0 or n_dip == 0:
-                # Uniform field baseline
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sigma_theta,
-                    contrast=0.15, n_cry=50, sigma_sensor=0.02)
-                errs.append(err)
-            else:
-                # Average over 5 random realisations
-                err_trials = []
-                for trial in range(5):
-                    rng = np.random.default_rng(100*trial + n_dip)
-                    anoms = Landscape.random_dipoles(
-                        n_dip, extent, s, depth, rng=rng)
-                    ls = Landscape(extent=extent, anomalies=anoms)
-                    err_t, _, _ = anomaly_ensemble(
-                        n_bugs=n_bugs, duration=duration, dt=dt,
-                        kappa=2.0, sigma_theta=sigma_theta,
-                        contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                        landscape=ls, seed=trial)
-                    err_trials.append(err_t)
-                errs.append(np.mean(err_trials))
-            print(f'    n_dip={n_dip}  strength={s:.1f}  err={errs[-1]:.1f}°')
-        ax.plot(dipole_strengths, errs, color=color, marker='o', ms=5, lw=2,
-                label=f'{n_dip} dipole{"s" if n_dip>1 else ""}')
+    for n_dip, color, errs in zip(data['n_dipoles_list'], colors3,
+                                  data['strength_errors']):
+        ax.plot(data['dipole_strengths'], errs, color=color, marker='o',
+                ms=5, lw=2, label=f'{n_dip} dipole{"s" if n_dip>1 else ""}')
 
     ax.axhline(30, color='orange', ls=':', lw=1, alpha=0.4)
     ax.set_xlabel('Dipole strength (μT)', fontsize=12)
@@ -1393,36 +2475,11 @@ def anomaly_navigation(save_prefix=None):
 
     # Right: error vs density at different strengths
     ax = axes3[1]
-    strength_list = [1.0, 3.0, 5.0, 8.0]
-    n_dip_range = np.array([0, 1, 3, 5, 10, 20, 50])
     colors3b = ['#2196F3', '#FF9800', '#F44336', '#9C27B0']
-
-    for s, color in zip(strength_list, colors3b):
-        errs = []
-        for n_dip in n_dip_range:
-            if n_dip == 0:
-                err, _ = fast_ensemble(
-                    n_bugs=n_bugs, duration=duration, dt=dt,
-                    kappa=2.0, sigma_theta=sigma_theta,
-                    contrast=0.15, n_cry=50, sigma_sensor=0.02)
-                errs.append(err)
-            else:
-                err_trials = []
-                for trial in range(5):
-                    rng = np.random.default_rng(200*trial + int(s*10))
-                    anoms = Landscape.random_dipoles(
-                        n_dip, extent, s, depth, rng=rng)
-                    ls = Landscape(extent=extent, anomalies=anoms)
-                    err_t, _, _ = anomaly_ensemble(
-                        n_bugs=n_bugs, duration=duration, dt=dt,
-                        kappa=2.0, sigma_theta=sigma_theta,
-                        contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                        landscape=ls, seed=trial)
-                    err_trials.append(err_t)
-                errs.append(np.mean(err_trials))
-            print(f'    strength={s:.1f}  n_dip={n_dip}  err={errs[-1]:.1f}°')
-        ax.plot(n_dip_range, errs, color=color, marker='s', ms=5, lw=2,
-                label=f'{s:.0f} μT')
+    for s, color, errs in zip(data['strength_list'], colors3b,
+                              data['density_errors']):
+        ax.plot(data['n_dip_range'], errs, color=color, marker='s', ms=5,
+                lw=2, label=f'{s:.0f} μT')
 
     ax.axhline(30, color='orange', ls=':', lw=1, alpha=0.4)
     ax.set_xlabel('Number of dipole anomalies', fontsize=12)
@@ -1432,60 +2489,21 @@ def anomaly_navigation(save_prefix=None):
     ax.set_ylim(0, 60)
 
     fig3.suptitle('Navigation Degradation from Magnetic Anomalies '
-                  f'(C=0.15, σ_θ={sigma_theta})', fontsize=14)
+                  f'(C=0.15, σ_θ={data["sigma_theta"]})', fontsize=14)
     plt.tight_layout()
 
     # ── Figure 4: Critical anomaly magnitude for different compasses ──
-    print('  [4/4] Critical anomaly magnitude...')
-    contrasts_test = [
-        ('FAD-O₂ lit. (C=0.15)', 0.15, None),
-        ('FAD-TrpH lit. (C=0.01)', 0.01, None),
-        ('Relaxed FAD-O₂ (C=0.10)', 0.10, None),
-    ]
-    n_dip_crit = 10
-    depth_crit = 80
-    strengths_fine = np.array([0, 0.5, 1.0, 2.0, 3.0, 4.0, 5.0, 7.0, 10.0])
-    sigma_thetas_crit = [0.3, 0.5]
-
     fig4, axes4 = plt.subplots(1, 2, figsize=(14, 6))
     compass_colors = ['#2196F3', '#FF9800', '#4CAF50']
 
-    for ax, sig in zip(axes4, sigma_thetas_crit):
-        # Baseline (no anomaly) for each compass
-        baselines = {}
-        for label, C, my in contrasts_test:
-            err_base, _ = fast_ensemble(
-                n_bugs=200, duration=300, dt=0.02,
-                kappa=2.0, sigma_theta=sig,
-                contrast=C, n_cry=50, sigma_sensor=0.02,
-                mean_yield=my)
-            baselines[label] = err_base
-
-        for (label, C, my), color in zip(contrasts_test, compass_colors):
-            errs = []
-            for s in strengths_fine:
-                if s == 0:
-                    errs.append(baselines[label])
-                else:
-                    trials = []
-                    for trial in range(5):
-                        rng = np.random.default_rng(300*trial)
-                        anoms = Landscape.random_dipoles(
-                            n_dip_crit, extent, s, depth_crit, rng=rng)
-                        ls = Landscape(extent=extent, anomalies=anoms)
-                        err_t, _, _ = anomaly_ensemble(
-                            n_bugs=200, duration=300, dt=0.02,
-                            kappa=2.0, sigma_theta=sig,
-                            contrast=C, n_cry=50, sigma_sensor=0.02,
-                            landscape=ls, seed=trial, mean_yield=my)
-                        trials.append(err_t)
-                    errs.append(np.mean(trials))
-                print(f'    {label}  σ_θ={sig}  s={s:.1f}  '
-                      f'err={errs[-1]:.1f}° (Δ={errs[-1]-baselines[label]:+.1f}°)')
-
-            ax.plot(strengths_fine, errs, color=color, marker='o', ms=5,
-                    lw=2, label=label)
-            ax.axhline(baselines[label], color=color, ls=':', lw=1, alpha=0.3)
+    for ax, sig, sig_base, sig_errs in zip(axes4, data['sigma_thetas_crit'],
+                                           data['crit_baselines'],
+                                           data['crit_errors']):
+        for (label, _, _), color, base_err, errs in zip(
+                _ANOMALY_COMPASSES, compass_colors, sig_base, sig_errs):
+            ax.plot(data['strengths_fine'], errs, color=color, marker='o',
+                    ms=5, lw=2, label=label)
+            ax.axhline(base_err, color=color, ls=':', lw=1, alpha=0.3)
 
         ax.axhline(30, color='orange', ls=':', lw=1, alpha=0.4,
                    label='30° threshold')
@@ -1496,7 +2514,8 @@ def anomaly_navigation(save_prefix=None):
         ax.set_ylim(0, 70)
 
     fig4.suptitle(f'Critical Anomaly Magnitude by Compass Model '
-                  f'({n_dip_crit} dipoles, depth={depth_crit} BL)',
+                  f'({data["n_dip_crit"]} dipoles, '
+                  f'depth={data["depth_crit"]} BL)',
                   fontsize=14)
     plt.tight_layout()
 
@@ -1510,13 +2529,31 @@ def anomaly_navigation(save_prefix=None):
     return fig1, fig2, fig3, fig4
 
 
+def anomaly_navigation(save_prefix=None):
+    """Navigation through magnetic anomaly fields.
+
+    Produces four figures:
+      1. Field deviation maps for each anomaly type
+      2. Single-bug trajectory through a dipole anomaly
+      3. Navigation error vs dipole strength at varying densities
+      4. Critical anomaly magnitude (phase diagram)
+    """
+    return anomaly_navigation_plot(anomaly_navigation_data(), save_prefix)
+
+
 # ── 12. Direction B: Path integration homing ─────────────────────
 
+@memoised
 def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
                        contrast, n_cry, sigma_sensor, bias=0.0,
                        landscape=None, goal_out=3*np.pi/4, speed=1.0,
                        sigma_xy=0.05, seed=0, mean_yield=None,
-                       use_pi=True, leak=0.0, mode='straight'):
+                       use_pi=True, leak=0.0, mode='straight',
+                       scheme='euler', compass_dt=None,
+                       per_bug_streams=False, bug_offset=0,
+                       accumulators=None, compass_map=None,
+                       checkpoint=None, checkpoint_every=60.0,
+                       backend='numpy'):
     """Vectorised two-phase homing task.
 
     Two modes:
@@ -1536,7 +2573,17 @@ def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
     true heading.  Compass noise averages out (√N benefit); systematic
     bias accumulates as rotation of the estimated displacement vector.
     For straight out-and-back with constant bias, the biases cancel
-    (a null result). For exploration, they compound.
+    (a null result). For exploration, they compound.  The circuit is
+    path_integration.CPU4Population; leak (1/s) decays its memory
+    exactly, e^{−leak·dt} per step.  A TimeVaryingLandscape's field
+    varies over both phases, from t = 0 at the start of the outbound leg.
+
+    scheme and compass_dt are as for fast_ensemble (the free exploration
+    walk is pure diffusion, exact under every scheme), as are
+    per_bug_streams, bug_offset, compass_map, checkpoint,
+    checkpoint_every and backend.  accumulators see both phases, with
+    state.phase = 'out' or 'home' and state.distance from the start;
+    there is no heading 'error' here.
 
     Returns
     -------
@@ -1545,45 +2592,79 @@ def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
     mean_homing : float
         Mean distance from start (BL).
     """
-    rng = np.random.default_rng(seed)
+    args = dict(locals())
+    if backend == 'jax':
+        return _jax_engine('pi_homing_ensemble', accumulators, compass_map,
+                           checkpoint, landscape)(
+            n_bugs, T_out, T_home, dt, kappa, sigma_theta, contrast, n_cry,
+            sigma_sensor, bias=bias, landscape=landscape, goal_out=goal_out,
+            speed=speed, sigma_xy=sigma_xy, seed=seed,
+            mean_yield=mean_yield, use_pi=use_pi, leak=leak, mode=mode,
+            scheme=scheme, compass_dt=compass_dt,
+            per_bug_streams=per_bug_streams, bug_offset=bug_offset)
+    streams = make_streams(seed, n_bugs, 4, per_bug_streams, bug_offset,
+                           n_steps=int(T_out / dt) + int(T_home / dt))
     sqrt_dt = np.sqrt(dt)
 
     # Compass noise
-    if mean_yield is None:
-        mean_yield = 0.5
-    delta = contrast * mean_yield
-    n_per_ch = n_cry / 8.0
-    sigma_compass = (sigma_sensor / (delta * np.sqrt(2 * n_per_ch))
-                     if delta > 1e-10 else 10.0)
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    if compass_map is not None:
+        sigma_compass = _compass_sigma(1.0, dt, compass_dt)
+    latent = None   # compass_map's latent normal per bug
 
     # State
     x0, y0 = 500.0, 500.0
     if mode == 'straight':
         theta = np.full(n_bugs, goal_out)
     else:
-        theta = rng.uniform(0, 2*np.pi, n_bugs)
+        theta = streams.uniform(0, 2*np.pi)
     x = np.full(n_bugs, x0)
     y = np.full(n_bugs, y0)
 
+    n_out = int(T_out / dt)
+    n_home = int(T_home / dt)
+    if accumulators:
+        start_all(accumulators, n_bugs, n_out + n_home, dt)
+    step = 0
+
     # CPU4 memory: (n_bugs, 8)
-    n_cpu4 = 8
-    cpu4_phi = np.linspace(0, 2*np.pi, n_cpu4, endpoint=False)
-    memory = np.zeros((n_bugs, n_cpu4))
+    cpu4 = CPU4Population(n_bugs, n=8, leak=leak)
 
     # Landscape deviation grid (if anomalies)
-    if landscape is not None and landscape.anomalies:
-        xg, yg, dphi_grid = _build_deviation_grid(landscape, n_grid=150)
+    if _varying_field(landscape):
+        deviation = _deviation_lookup(landscape, dt, n_out + n_home)
         has_anomalies = True
     else:
         has_anomalies = False
 
+    ckpt = _engine_checkpoint('pi_homing_ensemble', args, checkpoint,
+                              checkpoint_every)
+
+    def state():
+        return {'step': step, 'theta': theta, 'x': x, 'y': y,
+                'latent': latent, 'cpu4': cpu4.state_dict(),
+                'streams': streams.state_dict(),
+                'accumulators': accumulators}
+
+    saved = ckpt.load() if ckpt is not None else None
+    if saved is not None:
+        step = saved['step']
+        theta, x, y = saved['theta'], saved['x'], saved['y']
+        latent = saved['latent']
+        cpu4.load_state_dict(saved['cpu4'])
+        streams.load_state_dict(saved['streams'])
+        if accumulators:
+            restore_into(accumulators, saved['accumulators'])
+
     def _do_step(goal_heading=None, use_home_vec=False, free_walk=False):
-        """One timestep. Modifies theta, x, y, memory via closure."""
-        nonlocal theta, x, y, memory
+        """One timestep. Modifies theta, x, y and cpu4 via closure."""
+        nonlocal theta, x, y, step, latent
 
         # Field deviation from anomalies
         if has_anomalies:
-            delta_phi = _interp_deviation(x, y, xg, yg, dphi_grid)
+            delta_phi = deviation(x, y, step)
         else:
             delta_phi = 0.0
 
@@ -1591,7 +2672,9 @@ def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
         # The compass reads the angle between the body axis and the local
         # magnetic field direction.  In an anomaly field, the local direction
         # differs from the background by delta_phi(x,y).
-        compass_noise = rng.normal(0, sigma_compass, n_bugs)
+        z = streams.normals()
+        compass_noise, latent = _compass_noise(z[0], sigma_compass,
+                                               compass_map, latent, dt)
         heading_est = theta + compass_noise + bias + delta_phi
 
         # CPU4 update — integrates the compass-estimated heading, which
@@ -1599,128 +2682,226 @@ def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
         # this rotates the CPU4 frame uniformly (cancels at readout).
         # For spatially-varying bias, the rotation is position-dependent
         # and does NOT cancel — this is where A×B matters.
-        cos_vals = np.cos(heading_est[:, None] - cpu4_phi[None, :])
-        drive = speed * np.maximum(cos_vals, 0.0) * dt
-        if leak > 0:
-            memory *= (1.0 - leak * dt)
-        memory += drive
+        cpu4.update(heading_est, speed, dt)
 
         # Steering
+        theta_old = theta
         if free_walk:
             # Pure random walk — no steering goal
-            d_theta = sigma_theta * sqrt_dt * rng.standard_normal(n_bugs)
-        elif use_home_vec:
-            disp_x = np.sum(memory * np.cos(cpu4_phi), axis=1)
-            disp_y = np.sum(memory * np.sin(cpu4_phi), axis=1)
-            home_dir = np.arctan2(-disp_y, -disp_x)
-            heading_error = home_dir - heading_est
-            d_theta = kappa * np.sin(heading_error) * dt
-            d_theta += sigma_theta * sqrt_dt * rng.standard_normal(n_bugs)
+            d_theta = sigma_theta * sqrt_dt * z[1]
+            theta = (theta + d_theta) % (2 * np.pi)
         else:
-            # Goal is in geographic coordinates; heading_est already
-            # includes delta_phi, so no extra correction needed.
-            heading_error = goal_heading - heading_est
-            d_theta = kappa * np.sin(heading_error) * dt
-            d_theta += sigma_theta * sqrt_dt * rng.standard_normal(n_bugs)
-
-        theta = (theta + d_theta) % (2 * np.pi)
-        x += speed * np.cos(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
-        y += speed * np.sin(theta) * dt + sigma_xy * sqrt_dt * rng.standard_normal(n_bugs)
+            if use_home_vec:
+                _, home_dir = cpu4.home_vector()
+                heading_error = home_dir - heading_est
+            else:
+                # Goal is in geographic coordinates; heading_est already
+                # includes delta_phi, so no extra correction needed.
+                heading_error = goal_heading - heading_est
+            noise = sigma_theta * sqrt_dt * z[1]
+            theta = _heading_step(theta, heading_error, kappa, noise, dt,
+                                  scheme)
+
+        cos_t, sin_t = _step_direction(theta_old, theta, scheme)
+        x += speed * cos_t * dt + sigma_xy * sqrt_dt * z[2]
+        y += speed * sin_t * dt + sigma_xy * sqrt_dt * z[3]
+
+        step += 1
+        if accumulators:
+            update_all(accumulators, StepState(
+                step * dt, theta, x, y, (x0, y0),
+                phase='out' if step <= n_out else 'home',
+                delta_phi=delta_phi if has_anomalies else None))
+        if ckpt is not None and ckpt.due():
+            ckpt.save(state())
+
+    # The phases run on the global step count, so a resumed run picks
+    # up in the right phase
 
     # Phase 1: outbound / exploration
-    n_out = int(T_out / dt)
     if mode == 'explore':
-        for _ in range(n_out):
+        while step < n_out:
             _do_step(free_walk=True)
     else:
-        for _ in range(n_out):
+        while step < n_out:
             _do_step(goal_heading=goal_out)
 
     # Phase 2: homing
-    n_home = int(T_home / dt)
     if use_pi:
-        for _ in range(n_home):
+        while step < n_out + n_home:
             _do_step(use_home_vec=True)
     else:
         goal_return = (goal_out + np.pi) % (2 * np.pi)
-        for _ in range(n_home):
+        while step < n_out + n_home:
             _do_step(goal_heading=goal_return)
+    if ckpt is not None:
+        ckpt.save(state())
 
     homing_errors = np.sqrt((x - x0)**2 + (y - y0)**2)
     return homing_errors, np.mean(homing_errors)
 
 
-def path_integration_analysis(save_prefix=None):
-    """Direction B: Path integration — what breaks the CPU4 home vector?
+# (label, contrast, mean yield, colour) of the compasses compared in
+# the path-integration studies
+_PI_COMPASSES = [
+    ('FAD-O₂ (C=0.15)', 0.15, None, '#2196F3'),
+    ('Relaxed FAD-O₂ (C=0.10)', 0.10, None, '#4CAF50'),
+    ('FAD-TrpH (C=0.01)', 0.01, None, '#FF9800'),
+]
 
-    Key findings from first-pass analysis:
-    - Constant bias cancels perfectly in the CPU4 circuit: integration
-      and readout share the same biased compass frame.  The displacement
-      vector is rotated, but so is the homing readout → exact cancellation
-      regardless of path tortuosity.
-    - PI works remarkably well for short foraging bouts (200s → ~2 BL error).
-    - The real threats to PI are: (a) memory leak/decay, (b) compass noise
-      (via low contrast), (c) spatially varying anomalies (Direction A×B).
 
-    Produces four figures:
-      1. PI vs reversal (straight) + exploration PI vs T_explore
-      2. Bias null result + CPU4 leak sweep (what doesn't vs does matter)
-      3. Phase diagram: leak × T_explore → PI accuracy (real structure)
-      4. Compass model comparison: FAD-O₂ vs FAD-TrpH PI performance
-    """
+def path_integration_analysis_data():
+    """Homing errors for the path-integration figures (see
+    path_integration_analysis)."""
     dt = 0.05
     n_bugs = 200
-    speed = 1.0
+
+    def homing_error(**kwargs):
+        params = dict(n_bugs=n_bugs, dt=dt, kappa=2.0, contrast=0.15,
+                      n_cry=50, sigma_sensor=0.02, use_pi=True, seed=42,
+                      mode='explore')
+        params.update(kwargs)
+        return pi_homing_ensemble(**params)[1]
 
     # ── Figure 1: PI enables homing ──
     print('  [1/4] PI vs reversal + exploration duration...')
     T_out = 150.0
     sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0])
 
-    fig1, axes1 = plt.subplots(1, 2, figsize=(14, 6))
-
-    # Left: straight homing, PI vs reversal
-    ax = axes1[0]
-    for use_pi, label, color, marker in [
-        (True, 'Path integration', '#2196F3', 'o'),
-        (False, 'Heading reversal', '#FF9800', 's'),
-    ]:
+    # Straight homing, PI vs reversal
+    straight_errors = []
+    for use_pi, label in [(True, 'Path integration'),
+                          (False, 'Heading reversal')]:
         errs = []
         for sig in sigma_range:
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_out, T_home=T_out, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=use_pi, seed=42, mode='straight')
+            mean_err = homing_error(T_out=T_out, T_home=T_out,
+                                    sigma_theta=sig, use_pi=use_pi,
+                                    mode='straight')
             errs.append(mean_err)
             print(f'    {label}  σ_θ={sig:.2f}  err={mean_err:.1f} BL')
-        ax.plot(sigma_range, errs, color=color, marker=marker, ms=6,
-                lw=2, label=label)
-    ax.set_xlabel(r'$\sigma_\theta$ (rad/$\sqrt{s}$)', fontsize=12)
-    ax.set_ylabel('Mean homing error (BL)', fontsize=12)
+        straight_errors.append(errs)
+
+    # Exploration PI vs duration (enough homing time)
+    T_explores = np.array([50, 100, 200, 500, 1000, 2000])
+    sigma_explore = [0.3, 0.5, 1.0]
+    explore_errors = []
+    for sig in sigma_explore:
+        errs = [homing_error(T_out=T_ex, T_home=max(T_ex, 200),
+                             sigma_theta=sig)
+                for T_ex in T_explores]
+        print(f'    explore σ={sig}  errs={[f"{e:.1f}" for e in errs]}')
+        explore_errors.append(errs)
+
+    # ── Figure 2: What doesn't matter (bias) vs what does (leak) ──
+    print('  [2/4] Bias null result + leak sweep...')
+    T_explore = 500.0
+    T_home = 500.0
+
+    bias_range_deg = np.array([0, 2, 5, 10, 15, 20, 30, 45])
+    bias_range = np.radians(bias_range_deg)
+    sigma_thetas_bias = [0.3, 0.5, 1.0]
+    bias_errors = []
+    for sig in sigma_thetas_bias:
+        errs = [homing_error(T_out=T_explore, T_home=T_home,
+                             sigma_theta=sig, bias=b)
+                for b in bias_range]
+        print(f'    bias null  σ={sig}  '
+              f'range=[{errs[0]:.1f}, {errs[-1]:.1f}] BL')
+        bias_errors.append(errs)
+
+    leak_rates = np.array([0, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1])
+    leak_errors = []
+    for sig in sigma_thetas_bias:
+        errs = []
+        for lk in leak_rates:
+            mean_err = homing_error(T_out=T_explore, T_home=T_home,
+                                    sigma_theta=sig, leak=lk)
+            errs.append(mean_err)
+            print(f'    leak={lk:.4f}  σ={sig}  err={mean_err:.1f} BL')
+        leak_errors.append(errs)
+
+    # ── Figure 3: Phase diagram — leak × T_explore ──
+    print('  [3/4] Phase diagram: leak × exploration time...')
+    T_explore_grid = np.array([100, 200, 500, 1000, 2000])
+    leak_grid = np.array([0, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1])
+    sig_phase = 0.5  # moderate angular noise
+
+    err_phase = np.zeros((len(leak_grid), len(T_explore_grid)))
+
+    for i, lk in enumerate(leak_grid):
+        for j, T_ex in enumerate(T_explore_grid):
+            err_phase[i, j] = homing_error(
+                T_out=T_ex, T_home=max(T_ex, 200), sigma_theta=sig_phase,
+                leak=lk)
+            print(f'    leak={lk:.4f}  T_ex={T_ex}  '
+                  f'err={err_phase[i,j]:.1f} BL')
+
+    # ── Figure 4: Compass model comparison for PI ──
+    print('  [4/4] Compass model comparison...')
+    n_cry_range = np.array([5, 10, 20, 50, 100, 200, 500])
+    ncry_errors = []
+    for label, C, my, _ in _PI_COMPASSES:
+        errs = []
+        for nc in n_cry_range:
+            mean_err = homing_error(T_out=T_explore, T_home=T_home,
+                                    sigma_theta=0.5, contrast=C, n_cry=nc,
+                                    mean_yield=my)
+            errs.append(mean_err)
+            print(f'    {label}  n_cry={nc}  err={mean_err:.1f} BL')
+        ncry_errors.append(errs)
+
+    T_explore_range = np.array([100, 200, 500, 1000, 2000])
+    duration_errors = []
+    for label, C, my, _ in _PI_COMPASSES:
+        errs = [homing_error(T_out=T_ex, T_home=max(T_ex, 200),
+                             sigma_theta=0.5, contrast=C, mean_yield=my)
+                for T_ex in T_explore_range]
+        print(f'    {label}  errs={[f"{e:.1f}" for e in errs]}')
+        duration_errors.append(errs)
+
+    return {
+        'T_out': T_out, 'sigma_range': sigma_range,
+        'straight_errors': np.array(straight_errors),
+        'T_explores': T_explores, 'sigma_explore': np.array(sigma_explore),
+        'explore_errors': np.array(explore_errors),
+        'T_explore': T_explore,
+        'bias_range_deg': bias_range_deg,
+        'sigma_thetas_bias': np.array(sigma_thetas_bias),
+        'bias_errors': np.array(bias_errors),
+        'leak_rates': leak_rates, 'leak_errors': np.array(leak_errors),
+        'T_explore_grid': T_explore_grid, 'leak_grid': leak_grid,
+        'sig_phase': sig_phase, 'err_phase': err_phase,
+        'n_cry_range': n_cry_range, 'ncry_errors': np.array(ncry_errors),
+        'T_explore_range': T_explore_range,
+        'duration_errors': np.array(duration_errors),
+    }
+
+
+def path_integration_analysis_plot(data, save_prefix=None):
+    # ── Figure 1: PI enables homing ──
+    fig1, axes1 = plt.subplots(1, 2, figsize=(14, 6))
+    T_out = data['T_out']
+
+    # Left: straight homing, PI vs reversal
+    ax = axes1[0]
+    for (label, color, marker), errs in zip(
+            [('Path integration', '#2196F3', 'o'),
+             ('Heading reversal', '#FF9800', 's')],
+            data['straight_errors']):
+        ax.plot(data['sigma_range'], errs, color=color, marker=marker, ms=6,
+                lw=2, label=label)
+    ax.set_xlabel(r'$\sigma_\theta$ (rad/$\sqrt{s}$)', fontsize=12)
+    ax.set_ylabel('Mean homing error (BL)', fontsize=12)
     ax.set_title(f'Straight out-and-back (T={T_out:.0f}s)', fontsize=13)
     ax.legend(fontsize=11)
     ax.set_ylim(bottom=0)
 
     # Right: exploration PI vs duration (enough homing time)
     ax = axes1[1]
-    T_explores = np.array([50, 100, 200, 500, 1000, 2000])
-    for sig, color, marker in [
-        (0.3, '#2196F3', 'o'),
-        (0.5, '#4CAF50', 's'),
-        (1.0, '#FF9800', '^'),
-    ]:
-        errs = []
-        for T_ex in T_explores:
-            T_h = max(T_ex, 200)  # enough time to return
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_ex, T_home=T_h, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore')
-            errs.append(mean_err)
-        print(f'    explore σ={sig}  errs={[f"{e:.1f}" for e in errs]}')
-        ax.plot(T_explores, errs, color=color, marker=marker, ms=6,
+    for sig, color, marker, errs in zip(
+            data['sigma_explore'], ['#2196F3', '#4CAF50', '#FF9800'],
+            ['o', 's', '^'], data['explore_errors']):
+        ax.plot(data['T_explores'], errs, color=color, marker=marker, ms=6,
                 lw=2, label=f'σ_θ={sig}')
     ax.set_xlabel('Exploration time (s)', fontsize=12)
     ax.set_ylabel('Mean homing error (BL)', fontsize=12)
@@ -1734,30 +2915,15 @@ def path_integration_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 2: What doesn't matter (bias) vs what does (leak) ──
-    print('  [2/4] Bias null result + leak sweep...')
-    T_explore = 500.0
-    T_home = 500.0
-
+    T_explore = data['T_explore']
     fig2, axes2 = plt.subplots(1, 2, figsize=(14, 6))
+    colors2 = ['#2196F3', '#4CAF50', '#FF9800']
 
     # Left: bias is irrelevant (the flat line IS the result)
     ax = axes2[0]
-    bias_range_deg = np.array([0, 2, 5, 10, 15, 20, 30, 45])
-    bias_range = np.radians(bias_range_deg)
-    colors2 = ['#2196F3', '#4CAF50', '#FF9800']
-    sigma_thetas_bias = [0.3, 0.5, 1.0]
-    for sig, color in zip(sigma_thetas_bias, colors2):
-        errs = []
-        for b in bias_range:
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                bias=b, use_pi=True, seed=42, mode='explore')
-            errs.append(mean_err)
-        print(f'    bias null  σ={sig}  '
-              f'range=[{errs[0]:.1f}, {errs[-1]:.1f}] BL')
-        ax.plot(bias_range_deg, errs, color=color, marker='o',
+    for sig, color, errs in zip(data['sigma_thetas_bias'], colors2,
+                                data['bias_errors']):
+        ax.plot(data['bias_range_deg'], errs, color=color, marker='o',
                 ms=5, lw=2, label=f'σ_θ={sig}')
     ax.set_xlabel('Constant compass bias (°)', fontsize=12)
     ax.set_ylabel('Mean homing error (BL)', fontsize=12)
@@ -1770,18 +2936,9 @@ def path_integration_analysis(save_prefix=None):
 
     # Right: leak matters
     ax = axes2[1]
-    leak_rates = np.array([0, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1])
-    for sig, color in zip(sigma_thetas_bias, colors2):
-        errs = []
-        for lk in leak_rates:
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                leak=lk, use_pi=True, seed=42, mode='explore')
-            errs.append(mean_err)
-            print(f'    leak={lk:.4f}  σ={sig}  err={mean_err:.1f} BL')
-        leak_plot = np.array([max(lk, 1e-4) for lk in leak_rates])
+    leak_plot = np.array([max(lk, 1e-4) for lk in data['leak_rates']])
+    for sig, color, errs in zip(data['sigma_thetas_bias'], colors2,
+                                data['leak_errors']):
         ax.plot(leak_plot, errs, color=color, marker='s', ms=5, lw=2,
                 label=f'σ_θ={sig}')
     ax.set_xlabel('CPU4 leak rate λ (1/s)', fontsize=12)
@@ -1801,28 +2958,12 @@ def path_integration_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 3: Phase diagram — leak × T_explore ──
-    print('  [3/4] Phase diagram: leak × exploration time...')
-    T_explore_grid = np.array([100, 200, 500, 1000, 2000])
-    leak_grid = np.array([0, 0.0003, 0.001, 0.003, 0.01, 0.03, 0.1])
-    sig_phase = 0.5  # moderate angular noise
-
-    err_phase = np.zeros((len(leak_grid), len(T_explore_grid)))
-
-    for i, lk in enumerate(leak_grid):
-        for j, T_ex in enumerate(T_explore_grid):
-            T_h = max(T_ex, 200)
-            _, err_phase[i, j] = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_ex, T_home=T_h, dt=dt,
-                kappa=2.0, sigma_theta=sig_phase,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                leak=lk, use_pi=True, seed=42, mode='explore')
-            print(f'    leak={lk:.4f}  T_ex={T_ex}  '
-                  f'err={err_phase[i,j]:.1f} BL')
-
+    T_explore_grid = data['T_explore_grid']
+    err_phase = data['err_phase']
     fig3, axes3 = plt.subplots(1, 2, figsize=(14, 6))
 
     # Left: absolute error
-    leak_plot_grid = np.array([max(lk, 2e-4) for lk in leak_grid])
+    leak_plot_grid = np.array([max(lk, 2e-4) for lk in data['leak_grid']])
     im0 = axes3[0].pcolormesh(T_explore_grid, leak_plot_grid, err_phase,
                                cmap='YlOrRd', shading='auto')
     plt.colorbar(im0, ax=axes3[0], label='Homing error (BL)')
@@ -1830,7 +2971,8 @@ def path_integration_analysis(save_prefix=None):
     axes3[0].set_ylabel('CPU4 leak rate λ (1/s)', fontsize=12)
     axes3[0].set_xscale('log')
     axes3[0].set_yscale('log')
-    axes3[0].set_title(f'PI Homing Error (σ_θ={sig_phase})', fontsize=13)
+    axes3[0].set_title(f'PI Homing Error (σ_θ={data["sig_phase"]})',
+                       fontsize=13)
     # Critical line: λ T_explore = 1
     t_crit = np.linspace(100, 2000, 50)
     axes3[0].plot(t_crit, 1.0/t_crit, 'w--', lw=2, alpha=0.7,
@@ -1865,34 +3007,14 @@ def path_integration_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 4: Compass model comparison for PI ──
-    print('  [4/4] Compass model comparison...')
-    compass_configs = [
-        ('FAD-O₂ (C=0.15)', 0.15, None),
-        ('Relaxed FAD-O₂ (C=0.10)', 0.10, None),
-        ('FAD-TrpH (C=0.01)', 0.01, None),
-    ]
-    compass_colors = ['#2196F3', '#4CAF50', '#FF9800']
-    T_explore = 500.0
-    T_home = 500.0
-
     fig4, axes4 = plt.subplots(1, 2, figsize=(14, 6))
 
     # Left: n_cry sweep (how many cryptochromes needed for PI?)
     ax = axes4[0]
-    n_cry_range = np.array([5, 10, 20, 50, 100, 200, 500])
-    for (label, C, my), color in zip(compass_configs, compass_colors):
-        errs = []
-        for nc in n_cry_range:
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=0.5,
-                contrast=C, n_cry=nc, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                mean_yield=my)
-            errs.append(mean_err)
-            print(f'    {label}  n_cry={nc}  err={mean_err:.1f} BL')
-        ax.plot(n_cry_range, errs, color=color, marker='o', ms=5, lw=2,
-                label=label)
+    for (label, _, _, color), errs in zip(_PI_COMPASSES,
+                                          data['ncry_errors']):
+        ax.plot(data['n_cry_range'], errs, color=color, marker='o', ms=5,
+                lw=2, label=label)
     ax.set_xlabel('Number of cryptochromes', fontsize=12)
     ax.set_ylabel('Mean homing error (BL)', fontsize=12)
     ax.set_title(f'PI needs good compass (T_ex={T_explore:.0f}s)', fontsize=13)
@@ -1902,21 +3024,10 @@ def path_integration_analysis(save_prefix=None):
 
     # Right: exploration duration sweep per model
     ax = axes4[1]
-    T_explore_range = np.array([100, 200, 500, 1000, 2000])
-    for (label, C, my), color in zip(compass_configs, compass_colors):
-        errs = []
-        for T_ex in T_explore_range:
-            T_h = max(T_ex, 200)
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_ex, T_home=T_h, dt=dt,
-                kappa=2.0, sigma_theta=0.5,
-                contrast=C, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                mean_yield=my)
-            errs.append(mean_err)
-        print(f'    {label}  errs={[f"{e:.1f}" for e in errs]}')
-        ax.plot(T_explore_range, errs, color=color, marker='o', ms=5, lw=2,
-                label=label)
+    for (label, _, _, color), errs in zip(_PI_COMPASSES,
+                                          data['duration_errors']):
+        ax.plot(data['T_explore_range'], errs, color=color, marker='o', ms=5,
+                lw=2, label=label)
     ax.set_xlabel('Exploration time (s)', fontsize=12)
     ax.set_ylabel('Mean homing error (BL)', fontsize=12)
     ax.set_title('PI vs exploration duration (n_cry=50)', fontsize=13)
@@ -1938,21 +3049,31 @@ def path_integration_analysis(save_prefix=None):
     return fig1, fig2, fig3, fig4
 
 
-def anomaly_pi_analysis(save_prefix=None):
-    """Direction A×B: anomalies + path integration.
+def path_integration_analysis(save_prefix=None):
+    """Direction B: Path integration — what breaks the CPU4 home vector?
 
-    Spatially varying compass bias breaks the same-frame cancellation
-    that makes constant bias irrelevant (Direction B).  The bug
-    encounters different delta_phi(x,y) during outbound exploration
-    and return homing, so the CPU4 memory accumulates a net rotated
-    displacement vector that does NOT cancel at readout.
+    Key findings from first-pass analysis:
+    - Constant bias cancels perfectly in the CPU4 circuit: integration
+      and readout share the same biased compass frame.  The displacement
+      vector is rotated, but so is the homing readout → exact cancellation
+      regardless of path tortuosity.
+    - PI works remarkably well for short foraging bouts (200s → ~2 BL error).
+    - The real threats to PI are: (a) memory leak/decay, (b) compass noise
+      (via low contrast), (c) spatially varying anomalies (Direction A×B).
 
     Produces four figures:
-      1. PI homing error vs anomaly strength + heading-follower comparison
-      2. The cancellation breakdown: constant bias vs spatial anomaly
-      3. Phase diagram: anomaly strength × T_explore
-      4. Compass model comparison with anomalies
+      1. PI vs reversal (straight) + exploration PI vs T_explore
+      2. Bias null result + CPU4 leak sweep (what doesn't vs does matter)
+      3. Phase diagram: leak × T_explore → PI accuracy (real structure)
+      4. Compass model comparison: FAD-O₂ vs FAD-TrpH PI performance
     """
+    return path_integration_analysis_plot(path_integration_analysis_data(),
+                                          save_prefix)
+
+
+def anomaly_pi_analysis_data():
+    """Homing errors under spatially varying bias (see
+    anomaly_pi_analysis)."""
     dt = 0.05
     n_bugs = 200
     extent = (1000, 1000)
@@ -1965,82 +3086,155 @@ def anomaly_pi_analysis(save_prefix=None):
     T_explore = 500.0
     T_home = 500.0
 
+    def dipoles(s, nd=n_dip):
+        """Landscape spec for a sweep cell: nd random dipoles of strength s."""
+        return dict(extent=extent, n_dip=nd, strength=s, depth=depth,
+                    seed=123)
+
+    def pi_cell(s=0, nd=n_dip, **kw):
+        """pi_homing_ensemble cell: exploration + PI homing, C=0.15."""
+        cell = dict(n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
+                    kappa=2.0, contrast=0.15, n_cry=50, sigma_sensor=0.02,
+                    use_pi=True, seed=42, mode='explore',
+                    dipoles=dipoles(s, nd))
+        cell.update(kw)
+        return cell
+
+    # PI homing error vs dipole strength
+    sigs_left = [0.3, 0.5, 1.0]
+    cells = [pi_cell(s, sigma_theta=sig)
+             for sig in sigs_left for s in strengths]
+    errs_left = np.reshape(_sweep(_pi_homing_error, cells, 'axb_strength'),
+                           (len(sigs_left), len(strengths)))
+    for sig, errs in zip(sigs_left, errs_left):
+        for s, mean_err in zip(strengths, errs):
+            print(f'    PI  σ={sig}  s={s}  err={mean_err:.1f} BL')
+
+    # Heading-follower from Direction A for comparison (σ=0.3 only)
+    cells = [dict(n_bugs=n_bugs, duration=150, dt=dt,
+                  kappa=2.0, sigma_theta=0.3,
+                  contrast=0.15, n_cry=50, sigma_sensor=0.02,
+                  dipoles=dipoles(s), seed=42) for s in strengths]
+    heading_errs = _sweep(_anomaly_error, cells, 'axb_heading')
+
+    # More dipoles
+    n_dips_right = [5, 10, 20, 50]
+    cells = [pi_cell(s, nd, sigma_theta=0.5)
+             for nd in n_dips_right for s in strengths]
+    errs_nd = np.reshape(_sweep(_pi_homing_error, cells, 'axb_density'),
+                         (len(n_dips_right), len(strengths)))
+    for nd, errs in zip(n_dips_right, errs_nd):
+        print(f'    n_dip={nd}  errs={[f"{e:.1f}" for e in errs]}')
+
+    # ── Figure 2: The cancellation breakdown ──
+    print('  [2/4] Cancellation breakdown: constant vs spatial bias...')
+
+    # Constant bias (flat — from Direction B)
+    bias_range_deg = np.array([0, 2, 5, 10, 15, 20, 30, 45])
+    bias_range = np.radians(bias_range_deg)
+    sigs_bias = [0.3, 0.5, 1.0]
+    cells = [pi_cell(sigma_theta=sig, bias=b, dipoles=None)
+             for sig in sigs_bias for b in bias_range]
+    errs_bias = np.reshape(_sweep(_pi_homing_error, cells, 'axb_bias'),
+                           (len(sigs_bias), len(bias_range)))
+
+    # Equivalent "bias" from spatial anomalies (grows!)
+    cells = [pi_cell(s, sigma_theta=sig)
+             for sig in sigs_bias for s in strengths]
+    errs_spatial = np.reshape(_sweep(_pi_homing_error, cells, 'axb_strength'),
+                              (len(sigs_bias), len(strengths)))
+    for sig, errs in zip(sigs_bias, errs_spatial):
+        for s, mean_err in zip(strengths, errs):
+            print(f'    spatial  σ={sig}  s={s}  err={mean_err:.1f} BL')
+
+    # ── Figure 3: Phase diagram — anomaly strength × T_explore ──
+    print('  [3/4] Phase diagram: anomaly × T_explore...')
+    T_explore_grid = np.array([100, 200, 500, 1000, 2000])
+    strength_grid = np.array([0, 1, 2, 3, 5, 8, 12])
+    sig_phase = 0.5
+
+    cells = [pi_cell(s, sigma_theta=sig_phase,
+                     T_out=T_ex, T_home=max(T_ex, 200))
+             for s in strength_grid for T_ex in T_explore_grid]
+    err_phase = np.reshape(_sweep(_pi_homing_error, cells, 'axb_phase'),
+                           (len(strength_grid), len(T_explore_grid)))
+    for i, s in enumerate(strength_grid):
+        for j, T_ex in enumerate(T_explore_grid):
+            print(f'    s={s}  T_ex={T_ex}  '
+                  f'err={err_phase[i,j]:.1f} BL')
+
+    # ── Figure 4: Compass model comparison with anomalies ──
+    print('  [4/4] Compass model comparison with anomalies...')
+    compass_configs = _PI_COMPASSES
+
+    # Anomaly strength sweep per model
+    cells = [pi_cell(s, sigma_theta=0.5, contrast=C, mean_yield=my)
+             for _, C, my, _ in compass_configs for s in strengths]
+    errs_models = np.reshape(_sweep(_pi_homing_error, cells, 'axb_compass'),
+                             (len(compass_configs), len(strengths)))
+    for (label, _, _, _), errs in zip(compass_configs, errs_models):
+        for s, mean_err in zip(strengths, errs):
+            print(f'    {label}  s={s}  err={mean_err:.1f} BL')
+
+    # Clean vs anomaly per model
+    strength_comparison = 5.0  # μT — moderate anomaly
+    cells = [pi_cell(s, sigma_theta=0.5, contrast=C, mean_yield=my)
+             for _, C, my, _ in compass_configs
+             for s in (0, strength_comparison)]
+    clean_errs, anom_errs = np.reshape(
+        _sweep(_pi_homing_error, cells, 'axb_compass'),
+        (len(compass_configs), 2)).T
+    for (label, _, _, _), err_clean, err_anom in zip(compass_configs,
+                                                     clean_errs, anom_errs):
+        print(f'    {label}  clean={err_clean:.1f}  '
+              f'anom={err_anom:.1f} BL')
+
+    return {
+        'strengths': strengths, 'n_dip': n_dip, 'T_explore': T_explore,
+        'sigs_left': np.array(sigs_left), 'errs_left': errs_left,
+        'heading_errs': np.asarray(heading_errs),
+        'n_dips_right': np.array(n_dips_right), 'errs_nd': errs_nd,
+        'bias_range_deg': bias_range_deg, 'sigs_bias': np.array(sigs_bias),
+        'errs_bias': errs_bias, 'errs_spatial': errs_spatial,
+        'T_explore_grid': T_explore_grid, 'strength_grid': strength_grid,
+        'sig_phase': sig_phase, 'err_phase': err_phase,
+        'errs_models': errs_models,
+        'strength_comparison': strength_comparison,
+        'clean_errs': clean_errs, 'anom_errs': anom_errs,
+    }
+
+
+def anomaly_pi_analysis_plot(data, save_prefix=None):
+    strengths = data['strengths']
+    n_dip = data['n_dip']
+
+    # ── Figure 1: PI homing error vs anomaly strength ──
     fig1, axes1 = plt.subplots(1, 2, figsize=(14, 6))
 
     # Left: PI homing error vs dipole strength
     ax = axes1[0]
-    for sig, color, marker in [
-        (0.3, '#2196F3', 'o'),
-        (0.5, '#4CAF50', 's'),
-        (1.0, '#FF9800', '^'),
-    ]:
-        errs = []
-        for s in strengths:
-            if s == 0:
-                land = Landscape(extent=extent)
-            else:
-                land = Landscape(extent=extent)
-                rng_land = np.random.default_rng(123)
-                land.anomalies = Landscape.random_dipoles(
-                    n_dip, extent, s, depth, rng=rng_land)
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                landscape=land)
-            errs.append(mean_err)
-            print(f'    PI  σ={sig}  s={s}  err={mean_err:.1f} BL')
+    for sig, color, marker, errs in zip(
+            data['sigs_left'], ['#2196F3', '#4CAF50', '#FF9800'],
+            ['o', 's', '^'], data['errs_left']):
         ax.plot(strengths, errs, color=color, marker=marker, ms=6,
                 lw=2, label=f'PI (σ_θ={sig})')
 
     # Overlay heading-follower from Direction A for comparison (σ=0.3 only)
-    heading_errs = []
-    for s in strengths:
-        if s == 0:
-            land = Landscape(extent=extent)
-        else:
-            land = Landscape(extent=extent)
-            rng_land = np.random.default_rng(123)
-            land.anomalies = Landscape.random_dipoles(
-                n_dip, extent, s, depth, rng=rng_land)
-        mean_err_deg, _, _ = anomaly_ensemble(
-            n_bugs=n_bugs, duration=150, dt=dt,
-            kappa=2.0, sigma_theta=0.3,
-            contrast=0.15, n_cry=50, sigma_sensor=0.02,
-            landscape=land, seed=42)
-        heading_errs.append(mean_err_deg)
-    ax.plot(strengths, heading_errs, color='#9C27B0', marker='d',
+    ax.plot(strengths, data['heading_errs'], color='#9C27B0', marker='d',
             ms=6, lw=2, ls='--', label='Heading-follower (σ_θ=0.3)')
 
     ax.set_xlabel('Dipole peak anomaly (μT)', fontsize=12)
     ax.set_ylabel('Error (BL or ° for heading)', fontsize=12)
-    ax.set_title(f'{n_dip} dipoles, T_explore={T_explore:.0f}s', fontsize=13)
+    ax.set_title(f'{n_dip} dipoles, T_explore={data["T_explore"]:.0f}s',
+                 fontsize=13)
     ax.legend(fontsize=9)
     ax.set_ylim(bottom=0)
 
     # Right: more dipoles
     ax = axes1[1]
-    n_dips_right = [5, 10, 20, 50]
     colors_nd = ['#2196F3', '#4CAF50', '#FF9800', '#E91E63']
-    for nd, color in zip(n_dips_right, colors_nd):
-        errs = []
-        for s in strengths:
-            if s == 0:
-                land = Landscape(extent=extent)
-            else:
-                land = Landscape(extent=extent)
-                rng_land = np.random.default_rng(123)
-                land.anomalies = Landscape.random_dipoles(
-                    nd, extent, s, depth, rng=rng_land)
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=0.5,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                landscape=land)
-            errs.append(mean_err)
-        print(f'    n_dip={nd}  errs={[f"{e:.1f}" for e in errs]}')
+    for nd, color, errs in zip(data['n_dips_right'], colors_nd,
+                               data['errs_nd']):
         ax.plot(strengths, errs, color=color, marker='o', ms=5, lw=2,
                 label=f'n_dip={nd}')
     ax.set_xlabel('Dipole peak anomaly (μT)', fontsize=12)
@@ -2054,24 +3248,15 @@ def anomaly_pi_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 2: The cancellation breakdown ──
-    print('  [2/4] Cancellation breakdown: constant vs spatial bias...')
     fig2, axes2 = plt.subplots(1, 2, figsize=(14, 6))
+    colors_bias = ['#2196F3', '#4CAF50', '#FF9800']
 
     # Left: constant bias (flat — from Direction B)
     ax = axes2[0]
-    bias_range_deg = np.array([0, 2, 5, 10, 15, 20, 30, 45])
-    bias_range = np.radians(bias_range_deg)
-    for sig, color in [(0.3, '#2196F3'), (0.5, '#4CAF50'), (1.0, '#FF9800')]:
-        errs = []
-        for b in bias_range:
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                bias=b, use_pi=True, seed=42, mode='explore')
-            errs.append(mean_err)
-        ax.plot(bias_range_deg, errs, color=color, marker='o', ms=5, lw=2,
-                label=f'σ_θ={sig}')
+    for sig, color, errs in zip(data['sigs_bias'], colors_bias,
+                                data['errs_bias']):
+        ax.plot(data['bias_range_deg'], errs, color=color, marker='o', ms=5,
+                lw=2, label=f'σ_θ={sig}')
     ax.set_xlabel('Constant compass bias (°)', fontsize=12)
     ax.set_ylabel('Mean homing error (BL)', fontsize=12)
     ax.set_title('Constant bias: perfect cancellation', fontsize=13)
@@ -2082,27 +3267,9 @@ def anomaly_pi_analysis(save_prefix=None):
             style='italic', color='#666')
 
     # Right: equivalent "bias" from spatial anomalies (grows!)
-    # Map anomaly strength to approximate peak deviation in degrees
-    # for comparison with the constant bias axis
     ax = axes2[1]
-    for sig, color in [(0.3, '#2196F3'), (0.5, '#4CAF50'), (1.0, '#FF9800')]:
-        errs = []
-        for s in strengths:
-            if s == 0:
-                land = Landscape(extent=extent)
-            else:
-                land = Landscape(extent=extent)
-                rng_land = np.random.default_rng(123)
-                land.anomalies = Landscape.random_dipoles(
-                    n_dip, extent, s, depth, rng=rng_land)
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=sig,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                landscape=land)
-            errs.append(mean_err)
-            print(f'    spatial  σ={sig}  s={s}  err={mean_err:.1f} BL')
+    for sig, color, errs in zip(data['sigs_bias'], colors_bias,
+                                data['errs_spatial']):
         ax.plot(strengths, errs, color=color, marker='s', ms=5, lw=2,
                 label=f'σ_θ={sig}')
     ax.set_xlabel('Dipole peak anomaly (μT)', fontsize=12)
@@ -2116,32 +3283,9 @@ def anomaly_pi_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 3: Phase diagram — anomaly strength × T_explore ──
-    print('  [3/4] Phase diagram: anomaly × T_explore...')
-    T_explore_grid = np.array([100, 200, 500, 1000, 2000])
-    strength_grid = np.array([0, 1, 2, 3, 5, 8, 12])
-    sig_phase = 0.5
-
-    err_phase = np.zeros((len(strength_grid), len(T_explore_grid)))
-
-    for i, s in enumerate(strength_grid):
-        for j, T_ex in enumerate(T_explore_grid):
-            T_h = max(T_ex, 200)
-            if s == 0:
-                land = Landscape(extent=extent)
-            else:
-                land = Landscape(extent=extent)
-                rng_land = np.random.default_rng(123)
-                land.anomalies = Landscape.random_dipoles(
-                    n_dip, extent, s, depth, rng=rng_land)
-            _, err_phase[i, j] = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_ex, T_home=T_h, dt=dt,
-                kappa=2.0, sigma_theta=sig_phase,
-                contrast=0.15, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                landscape=land)
-            print(f'    s={s}  T_ex={T_ex}  '
-                  f'err={err_phase[i,j]:.1f} BL')
-
+    T_explore_grid = data['T_explore_grid']
+    strength_grid = data['strength_grid']
+    err_phase = data['err_phase']
     fig3, axes3 = plt.subplots(1, 2, figsize=(14, 6))
 
     im0 = axes3[0].pcolormesh(T_explore_grid, strength_grid, err_phase,
@@ -2150,8 +3294,8 @@ def anomaly_pi_analysis(save_prefix=None):
     axes3[0].set_xlabel('Exploration time (s)', fontsize=12)
     axes3[0].set_ylabel('Dipole strength (μT)', fontsize=12)
     axes3[0].set_xscale('log')
-    axes3[0].set_title(f'PI Homing Error ({n_dip} dipoles, σ_θ={sig_phase})',
-                       fontsize=13)
+    axes3[0].set_title(f'PI Homing Error ({n_dip} dipoles, '
+                       f'σ_θ={data["sig_phase"]})', fontsize=13)
 
     # Normalised by anomaly=0 baseline
     baseline = err_phase[0, :]  # strength=0 row
@@ -2177,36 +3321,12 @@ def anomaly_pi_analysis(save_prefix=None):
     plt.tight_layout()
 
     # ── Figure 4: Compass model comparison with anomalies ──
-    print('  [4/4] Compass model comparison with anomalies...')
-    compass_configs = [
-        ('FAD-O₂ (C=0.15)', 0.15, None),
-        ('Relaxed FAD-O₂ (C=0.10)', 0.10, None),
-        ('FAD-TrpH (C=0.01)', 0.01, None),
-    ]
-    compass_colors = ['#2196F3', '#4CAF50', '#FF9800']
-
     fig4, axes4 = plt.subplots(1, 2, figsize=(14, 6))
 
     # Left: anomaly strength sweep per model
     ax = axes4[0]
-    for (label, C, my), color in zip(compass_configs, compass_colors):
-        errs = []
-        for s in strengths:
-            if s == 0:
-                land = Landscape(extent=extent)
-            else:
-                land = Landscape(extent=extent)
-                rng_land = np.random.default_rng(123)
-                land.anomalies = Landscape.random_dipoles(
-                    n_dip, extent, s, depth, rng=rng_land)
-            _, mean_err = pi_homing_ensemble(
-                n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-                kappa=2.0, sigma_theta=0.5,
-                contrast=C, n_cry=50, sigma_sensor=0.02,
-                use_pi=True, seed=42, mode='explore',
-                landscape=land, mean_yield=my)
-            errs.append(mean_err)
-            print(f'    {label}  s={s}  err={mean_err:.1f} BL')
+    for (label, _, _, color), errs in zip(_PI_COMPASSES,
+                                          data['errs_models']):
         ax.plot(strengths, errs, color=color, marker='o', ms=5, lw=2,
                 label=label)
     ax.set_xlabel('Dipole peak anomaly (μT)', fontsize=12)
@@ -2217,32 +3337,11 @@ def anomaly_pi_analysis(save_prefix=None):
 
     # Right: clean vs anomaly per model (bar-style comparison)
     ax = axes4[1]
-    strength_comparison = 5.0  # μT — moderate anomaly
-    x_pos = np.arange(len(compass_configs))
+    strength_comparison = data['strength_comparison']
+    clean_errs = data['clean_errs']
+    anom_errs = data['anom_errs']
+    x_pos = np.arange(len(_PI_COMPASSES))
     width = 0.35
-    clean_errs = []
-    anom_errs = []
-    land_anom = Landscape(extent=extent)
-    rng_land = np.random.default_rng(123)
-    land_anom.anomalies = Landscape.random_dipoles(
-        n_dip, extent, strength_comparison, depth, rng=rng_land)
-    for (label, C, my) in compass_configs:
-        _, err_clean = pi_homing_ensemble(
-            n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-            kappa=2.0, sigma_theta=0.5,
-            contrast=C, n_cry=50, sigma_sensor=0.02,
-            use_pi=True, seed=42, mode='explore',
-            mean_yield=my)
-        clean_errs.append(err_clean)
-        _, err_anom = pi_homing_ensemble(
-            n_bugs=n_bugs, T_out=T_explore, T_home=T_home, dt=dt,
-            kappa=2.0, sigma_theta=0.5,
-            contrast=C, n_cry=50, sigma_sensor=0.02,
-            use_pi=True, seed=42, mode='explore',
-            landscape=land_anom, mean_yield=my)
-        anom_errs.append(err_anom)
-        print(f'    {label}  clean={err_clean:.1f}  '
-              f'anom={err_anom:.1f} BL')
     bars1 = ax.bar(x_pos - width/2, clean_errs, width, label='Clean field',
                    color='#E3F2FD', edgecolor='#2196F3', linewidth=1.5)
     bars2 = ax.bar(x_pos + width/2, anom_errs, width,
@@ -2276,6 +3375,203 @@ def anomaly_pi_analysis(save_prefix=None):
     return fig1, fig2, fig3, fig4
 
 
+def anomaly_pi_analysis(save_prefix=None):
+    """Direction A×B: anomalies + path integration.
+
+    Spatially varying compass bias breaks the same-frame cancellation
+    that makes constant bias irrelevant (Direction B).  The bug
+    encounters different delta_phi(x,y) during outbound exploration
+    and return homing, so the CPU4 memory accumulates a net rotated
+    displacement vector that does NOT cancel at readout.
+
+    Produces four figures:
+      1. PI homing error vs anomaly strength + heading-follower comparison
+      2. The cancellation breakdown: constant bias vs spatial anomaly
+      3. Phase diagram: anomaly strength × T_explore
+      4. Compass model comparison with anomalies
+    """
+    return anomaly_pi_analysis_plot(anomaly_pi_analysis_data(), save_prefix)
+
+
+# ── 13. Fokker–Planck heading statistics ─────────────────────────
+
+# (contrast, label, colour) of the Fokker–Planck validation curves
+_FP_CONTRASTS = [(0.15, '[FAD O₂] C=0.15', '#2196F3'),
+                 (0.01, '[FAD TrpH] C=0.01', '#FF9800')]
+
+
+def fokker_planck_study_data():
+    """Fokker–Planck curves, Monte Carlo checks and the FP phase
+    diagram (see fokker_planck_study)."""
+    n_cry = 50
+    n_bugs = 200
+    duration = 200
+    dt = 0.02
+    kappa = 2.0
+    sigma_range = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.8, 1.0, 1.5, 2.0, 3.0])
+    sigma_fine = np.logspace(np.log10(0.05), np.log10(3.0), 60)
+    contrasts = _FP_CONTRASTS
+
+    # ── Figure 1: validation and transients ──
+    print('  [1/2] FP vs Monte Carlo...')
+    cells = [dict(n_bugs=n_bugs, duration=duration, dt=dt,
+                  kappa=kappa, sigma_theta=sig,
+                  contrast=C, n_cry=n_cry, sigma_sensor=0.02)
+             for C, _, _ in contrasts for sig in sigma_range]
+    mc = np.reshape(_sweep(_fast_error, cells, 'fokker_planck'),
+                    (len(contrasts), len(sigma_range)))
+
+    fp_fine = []
+    for (C, _, _), mc_row in zip(contrasts, mc):
+        fp_fine.append([fokker_planck_error(duration, dt, kappa, sig, C,
+                                            n_cry, 0.02)
+                        for sig in sigma_fine])
+        for sig, err in zip(sigma_range, mc_row):
+            fp_err = fokker_planck_error(duration, dt, kappa, sig, C, n_cry,
+                                         0.02)
+            print(f'    C={C}  σ={sig:.2f}  MC={err:.2f}°  '
+                  f'FP={fp_err:.2f}°  Δ={err - fp_err:+.2f}°')
+
+    times = np.linspace(0, 10, 200)
+    sigma_transient = np.array([0.1, 0.5, 1.0, 2.0])
+    sigma_c = compass_error_std(0.15, n_cry, 0.02)
+    transients = [
+        np.degrees(fokker_planck.mean_abs_error(
+            fokker_planck.mode_trajectory(times, kappa, sig, sigma_c, dt)))
+        for sig in sigma_transient]
+
+    # ── Figure 2: noise-free phase diagram ──
+    print('  [2/2] FP phase diagram...')
+    # σ_θ ≥ 0.02: below that the strong-compass distributions need
+    # ~10³ modes and the dense solve dominates
+    C_grid = np.logspace(-2.5, 0, 50)
+    S_grid = np.logspace(np.log10(0.02), 0.5, 50)
+    errors = np.array([[fokker_planck_error(duration, dt, kappa, sig, C,
+                                            n_cry, 0.02)
+                        for sig in S_grid] for C in C_grid])
+
+    return {
+        'n_cry': n_cry, 'n_bugs': n_bugs, 'kappa': kappa,
+        'sigma_range': sigma_range, 'mc': mc,
+        'sigma_fine': sigma_fine, 'fp_fine': np.array(fp_fine),
+        'times': times, 'sigma_transient': sigma_transient,
+        'transients': np.array(transients),
+        'C_grid': C_grid, 'S_grid': S_grid, 'errors': errors,
+    }
+
+
+def fokker_planck_study_plot(data, save_prefix=None):
+    n_cry = data['n_cry']
+
+    # ── Figure 1: validation and transients ──
+    fig1, axes1 = plt.subplots(1, 2, figsize=(14, 6))
+
+    ax = axes1[0]
+    for (C, label, color), mc_row, fp_fine in zip(_FP_CONTRASTS, data['mc'],
+                                                  data['fp_fine']):
+        ax.plot(data['sigma_fine'], fp_fine, color=color, lw=2,
+                label=f'{label} (Fokker–Planck)')
+        ax.plot(data['sigma_range'], mc_row, 'o', color=color, ms=6,
+                mfc='none',
+                label=f'{label} (Monte Carlo, {data["n_bugs"]} bugs)')
+    ax.axhline(30, color='orange', ls=':', lw=1, alpha=0.4)
+    ax.set_xscale('log')
+    ax.set_xlabel(r'$\sigma_\theta$ (rad/$\sqrt{s}$)', fontsize=12)
+    ax.set_ylabel('Mean heading error (°)', fontsize=12)
+    ax.set_title('Fokker–Planck vs fast_ensemble', fontsize=13)
+    ax.legend(fontsize=8, loc='upper left')
+    ax.set_ylim(0, 95)
+
+    ax = axes1[1]
+    for sig, color, err_t in zip(data['sigma_transient'],
+                                 ['#2196F3', '#4CAF50', '#FF9800', '#F44336'],
+                                 data['transients']):
+        ax.plot(data['times'], err_t, color=color, lw=2, label=f'σ_θ={sig}')
+    ax.set_xlabel('Time (s)', fontsize=12)
+    ax.set_ylabel('E|θ − goal| (°)', fontsize=12)
+    ax.set_title('Relaxation from random headings (C=0.15)', fontsize=13)
+    ax.legend(fontsize=10)
+    ax.set_ylim(0, 95)
+
+    fig1.suptitle(f'Heading Statistics from the Fokker–Planck Equation '
+                  f'($N_{{cry}} = {n_cry}$, κ = {data["kappa"]})', fontsize=14)
+    plt.tight_layout()
+
+    # ── Figure 2: noise-free phase diagram ──
+    S_grid = data['S_grid']
+    C_grid = data['C_grid']
+    errors = data['errors']
+    fig2, ax = plt.subplots(figsize=(8, 6))
+    im = ax.pcolormesh(S_grid, C_grid, errors, shading='auto',
+                       cmap='RdYlGn_r')
+    ax.contour(S_grid, C_grid, errors, levels=[10, 30, 60],
+               colors='white', linewidths=1.5)
+    ax.axhline(0.15, color='cyan', ls='--', lw=1.5,
+               label='[FAD·⁻ O₂·⁻] contrast')
+    ax.axhline(0.01, color='orange', ls='--', lw=1.5,
+               label='[FAD·⁻ TrpH·⁺] contrast')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Angular noise σ_θ (rad/√s)')
+    ax.set_ylabel('Compass contrast C')
+    ax.set_title('Navigation Phase Diagram (Fokker–Planck)\n'
+                 f'(mean heading error, degrees; $N_{{cry}} = {n_cry}$)')
+    cb = plt.colorbar(im, ax=ax)
+    cb.set_label('Mean heading error (°)')
+    ax.legend(fontsize=8, loc='upper left')
+    plt.tight_layout()
+
+    if save_prefix:
+        fig1.savefig(f'{save_prefix}fokker_planck.png', dpi=150)
+        fig2.savefig(f'{save_prefix}fp_phase_diagram.png', dpi=150)
+        print(f'Saved {save_prefix}fokker_planck.png and '
+              f'{save_prefix}fp_phase_diagram.png')
+    return fig1, fig2
+
+
+def fokker_planck_study(save_prefix=None):
+    """Validate the Fokker–Planck solver against fast_ensemble and use
+    it for a noise-free phase diagram.
+
+    Figure 1: mean heading error vs σ_θ (FP lines, Monte Carlo markers)
+    and the FP error transient from uniform headings.
+    Figure 2: FP phase diagram over contrast × σ_θ.
+    """
+    return fokker_planck_study_plot(fokker_planck_study_data(), save_prefix)
+
+
+# ── Study registry ────────────────────────────────────────────────
+# (CLI flag, title, compute, plot) in --all order.  compute returns the
+# study's data as a dict of arrays; plot(data, save_prefix) draws it.
+
+STUDIES = [
+    ('peclet', 'Peclet number study', peclet_data, peclet_plot),
+    ('harmonics', 'Harmonic decomposition',
+     harmonic_decomposition_data, harmonic_decomposition_plot),
+    ('differentiate', 'Model differentiation at boundary',
+     model_differentiation_data, model_differentiation_plot),
+    ('critical_noise', 'Critical noise per model',
+     critical_noise_data, critical_noise_plot),
+    ('ncry', 'N_cry sweep', ncry_sweep_data, ncry_sweep_plot),
+    ('validate_fast', 'Validate fast vs full simulation',
+     validate_fast_vs_full_data, validate_fast_vs_full_plot),
+    ('relax_nav', 'Relaxation + navigation',
+     relaxation_navigation_data, relaxation_navigation_plot),
+    ('uneq_rates', 'Unequal recombination rates',
+     unequal_rates_data, unequal_rates_plot),
+    ('orient', 'Orientational disorder',
+     orientational_disorder_data, orientational_disorder_plot),
+    ('anomaly', 'Magnetic anomaly navigation',
+     anomaly_navigation_data, anomaly_navigation_plot),
+    ('pi', 'Path integration (Direction B)',
+     path_integration_analysis_data, path_integration_analysis_plot),
+    ('axb', 'Anomaly × Path integration (A×B)',
+     anomaly_pi_analysis_data, anomaly_pi_analysis_plot),
+    ('fokker_planck', 'Fokker–Planck heading statistics',
+     fokker_planck_study_data, fokker_planck_study_plot),
+]
+
+
 # ── Main ──────────────────────────────────────────────────────────
 
 def main():
@@ -2292,65 +3588,89 @@ def main():
     parser.add_argument('--anomaly', action='store_true')
     parser.add_argument('--pi', action='store_true')
     parser.add_argument('--axb', action='store_true')
+    parser.add_argument('--fokker-planck', action='store_true',
+                        help='Fokker–Planck heading statistics vs Monte Carlo')
+    parser.add_argument('--dt-convergence', action='store_true',
+                        help='Timestep bias of fast_ensemble per integrator')
     parser.add_argument('--all', action='store_true')
     parser.add_argument('--save', type=str, default='fig_',
                         help='Save prefix (default: fig_)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Sweep processes (0 = all cores, default: 1)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        metavar='DIR',
+                        help='Checkpoint sweeps to DIR/<study>.jsonl and '
+                             'resume from it')
+    parser.add_argument('--common-noise', action='store_true',
+                        help='Drive --differentiate / --relax-nav points '
+                             'with shared noise and report paired differences')
+    parser.add_argument('--adaptive', type=float, default=None,
+                        metavar='DEG',
+                        help='Run heading-error sweep cells in batches '
+                             'until the 95%% CI is within ±DEG')
+    parser.add_argument('--adaptive-homing', type=float, default=None,
+                        metavar='BL',
+                        help='Same for homing-error sweep cells, in BL')
+    parser.add_argument('--artefacts', type=str, default=None,
+                        metavar='DIR',
+                        help='Run studies as a pipeline: keep each '
+                             "study's data in DIR and recompute only "
+                             'what changed; with --workers, studies run '
+                             'concurrently')
+    parser.add_argument('--force', action='append', default=[],
+                        metavar='STUDY',
+                        help='With --artefacts, recompute STUDY (flag '
+                             'name, e.g. relax_nav) even if cached')
+    parser.add_argument('--cache', type=str, default=None, metavar='DB',
+                        help='Memoise engine results in this SQLite file')
+    parser.add_argument('--cache-mb', type=float, default=512,
+                        help='Evict least recently used results above '
+                             'this size (default: 512)')
     args = parser.parse_args()
 
-    run_all = args.all or not any([args.peclet, args.differentiate,
-                                    args.harmonics, args.critical_noise,
-                                    args.ncry, args.validate_fast,
-                                    args.relax_nav, args.uneq_rates,
-                                    args.orient, args.anomaly, args.pi,
-                                    args.axb])
-
-    if args.peclet or run_all:
-        print('=== Peclet number study ===')
-        peclet_study(save_prefix=args.save)
-
-    if args.harmonics or run_all:
-        print('\n=== Harmonic decomposition ===')
-        harmonic_decomposition(save_prefix=args.save)
-
-    if args.differentiate or run_all:
-        print('\n=== Model differentiation at boundary ===')
-        model_differentiation(save_prefix=args.save)
-
-    if args.critical_noise or run_all:
-        print('\n=== Critical noise per model ===')
-        critical_noise(save_prefix=args.save)
-
-    if args.ncry or run_all:
-        print('\n=== N_cry sweep ===')
-        ncry_sweep(save_prefix=args.save)
-
-    if args.validate_fast or run_all:
-        print('\n=== Validate fast vs full simulation ===')
-        validate_fast_vs_full(save_prefix=args.save)
-
-    if args.relax_nav or run_all:
-        print('\n=== Relaxation + navigation ===')
-        relaxation_navigation(save_prefix=args.save)
-
-    if args.uneq_rates or run_all:
-        print('\n=== Unequal recombination rates ===')
-        unequal_rates(save_prefix=args.save)
-
-    if args.orient or run_all:
-        print('\n=== Orientational disorder ===')
-        orientational_disorder(save_prefix=args.save)
-
-    if args.anomaly or run_all:
-        print('\n=== Magnetic anomaly navigation ===')
-        anomaly_navigation(save_prefix=args.save)
-
-    if args.pi or run_all:
-        print('\n=== Path integration (Direction B) ===')
-        path_integration_analysis(save_prefix=args.save)
-
-    if args.axb or run_all:
-        print('\n=== Anomaly × Path integration (A×B) ===')
-        anomaly_pi_analysis(save_prefix=args.save)
+    if args.cache:
+        cache.activate(args.cache, max_bytes=int(args.cache_mb * 2**20))
+
+    SWEEP_OPTIONS['workers'] = args.workers or None
+    SWEEP_OPTIONS['checkpoint_dir'] = args.checkpoint
+    SWEEP_OPTIONS['adaptive'] = args.adaptive
+    SWEEP_OPTIONS['adaptive_homing'] = args.adaptive_homing
+
+    selected = [name for name, *_ in STUDIES if getattr(args, name)]
+    run_all = args.all or not (selected or args.dt_convergence)
+    if run_all:
+        selected = [name for name, *_ in STUDIES]
+    params = {'differentiate': {'common_noise': args.common_noise},
+              'relax_nav': {'common_noise': args.common_noise}}
+
+    if args.dt_convergence:
+        print('=== Timestep convergence (fast_ensemble, σ_θ=0.5, C=0.15) ===')
+        dt_convergence(n_bugs=200, duration=200, kappa=2.0, sigma_theta=0.5,
+                       contrast=0.15, n_cry=50, sigma_sensor=0.02,
+                       dts=(0.01, 0.02, 0.05, 0.1, 0.2, 0.4))
+
+    if args.artefacts:
+        pipe = Pipeline(args.artefacts, workers=args.workers,
+                        context={'adaptive': args.adaptive,
+                                 'adaptive_homing': args.adaptive_homing})
+        if pipe.workers > 1:
+            # Studies run side by side; their sweeps stay in-process
+            SWEEP_OPTIONS['workers'] = 1
+        for name, _, compute, plot in STUDIES:
+            pipe.add(name, compute, plot, params=params.get(name))
+        pipe.run(selected, save_prefix=args.save, force=args.force)
+    else:
+        for name, title, compute, plot in STUDIES:
+            if name not in selected:
+                continue
+            print(f'\n=== {title} ===' if name != selected[0]
+                  else f'=== {title} ===')
+            plot(compute(**params.get(name, {})), save_prefix=args.save)
+
+    if cache.active():
+        n, size, hits, misses = cache.active().stats()
+        print(f'\nCache: {hits} hits, {misses} misses in this process; '
+              f'{n} results ({size / 2**20:.1f} MB) in {args.cache}')
 
     print('\nDone.')
 
@@ -0,0 +1,273 @@
+"""
+Throughput benchmarks for the navigation engines.
+
+Measures bug-steps per second (bugs × timesteps / wall seconds) of
+
+  bug_run       agent.Bug.run, the full model (one Python step per bug)
+  fast          analysis.fast_ensemble
+  anomaly       analysis.anomaly_ensemble
+  pi_homing     analysis.pi_homing_ensemble (exploration + PI homing)
+
+across ensemble sizes and landscape complexity (number of random
+dipole anomalies).  Each case runs about a fixed budget of bug-steps,
+so large ensembles run few steps and small ones many.  The time of a
+case includes its per-call setup (for the anomaly engines, building
+the deviation grid, which grows with the dipole count); the best of
+--repeat runs is kept, except that a run longer than LONG_RUN seconds
+is not repeated.
+
+Results are JSON:
+
+    {"env": {...}, "results": {"<engine> n=<bugs> dip=<dipoles>":
+                               {"bug_steps_per_s": ..., "seconds": ...,
+                                "n_bugs": ..., "n_steps": ..., ...}}}
+
+Save one as a baseline, then compare later runs against it: a case
+whose throughput falls more than --tolerance (fraction) below the
+baseline is a regression and the script exits with status 1.  Compare
+on the machine that made the baseline; env records where it came from.
+
+Usage:
+    python bench.py --quick                         # small grid, print
+    python bench.py --save baseline.json            # full grid
+    python bench.py --baseline baseline.json --tolerance 0.2
+    python bench.py --engines fast anomaly --sizes 100 10000 --dipoles 0 100
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from agent import Bug
+from landscape import Landscape
+from analysis import fast_ensemble, anomaly_ensemble, pi_homing_ensemble
+
+
+ENGINES = ('bug_run', 'fast', 'anomaly', 'pi_homing')
+SIZES = (10, 100, 1000, 10_000, 100_000)
+DIPOLES = (0, 10, 100, 1000, 10_000)
+
+QUICK_SIZES = (10, 1000)
+QUICK_DIPOLES = (0, 100)
+
+# bug-steps per case: vectorised engines / the per-bug Python model
+BUDGET = 2_000_000
+BUG_RUN_BUDGET = 1_000
+MIN_STEPS = 20
+MAX_STEPS = 10_000
+# a run this long (s) is timed once: repeats would only add minutes
+LONG_RUN = 5.0
+
+DT = 0.02
+COMPASS = dict(kappa=2.0, sigma_theta=0.3, contrast=0.15, n_cry=50,
+               sigma_sensor=0.02)
+
+
+def landscape(n_dipoles, seed=0):
+    """1000×1000 BL landscape with n_dipoles random 3 μT dipoles."""
+    land = Landscape(extent=(1000, 1000))
+    if n_dipoles:
+        land.anomalies = Landscape.random_dipoles(
+            n_dipoles, (1000, 1000), 3.0, 80.0,
+            rng=np.random.default_rng(seed))
+    return land
+
+
+def n_steps_for(n_bugs, budget):
+    return int(np.clip(budget // n_bugs, MIN_STEPS, MAX_STEPS))
+
+
+# ── Cases ─────────────────────────────────────────────────────────
+
+def _run_bugs(n_bugs, n_steps, land, backend):
+    # Bug.run stops at the landscape edge; start mid-field and keep the
+    # runs short enough that bugs stay in bounds
+    for i in range(n_bugs):
+        bug = Bug(x0=500, y0=500, sigma_theta=COMPASS['sigma_theta'],
+                  compass_params={'contrast': COMPASS['contrast'],
+                                  'n_cry': COMPASS['n_cry'],
+                                  'sigma_sensor': COMPASS['sigma_sensor']},
+                  seed=i)
+        bug.run(land, duration=n_steps * DT, dt=DT)
+
+
+def _run_fast(n_bugs, n_steps, land, backend):
+    fast_ensemble(n_bugs=n_bugs, duration=n_steps * DT, dt=DT,
+                  backend=backend, **COMPASS)
+
+
+def _run_anomaly(n_bugs, n_steps, land, backend):
+    anomaly_ensemble(n_bugs=n_bugs, duration=n_steps * DT, dt=DT,
+                     landscape=land, backend=backend, **COMPASS)
+
+
+def _run_pi_homing(n_bugs, n_steps, land, backend):
+    half = n_steps // 2 * DT
+    pi_homing_ensemble(n_bugs=n_bugs, T_out=half, T_home=half, dt=DT,
+                       landscape=land if land.anomalies else None,
+                       mode='explore', backend=backend, **COMPASS)
+
+
+# engine: (run, uses landscape, bug-step budget)
+_CASES = {
+    'bug_run': (_run_bugs, True, BUG_RUN_BUDGET),
+    'fast': (_run_fast, False, BUDGET),
+    'anomaly': (_run_anomaly, True, BUDGET),
+    'pi_homing': (_run_pi_homing, True, BUDGET),
+}
+
+
+def case_key(engine, n_bugs, n_dipoles):
+    return f'{engine} n={n_bugs} dip={n_dipoles}'
+
+
+def cases(engines=ENGINES, sizes=SIZES, dipoles=DIPOLES):
+    """(engine, n_bugs, n_dipoles) to run.  Bug.run loops over bugs in
+    Python, so it runs at the smallest size only; fast_ensemble has no
+    landscape and runs once per size."""
+    out = []
+    for engine in engines:
+        _, uses_landscape, _ = _CASES[engine]
+        engine_sizes = sizes[:1] if engine == 'bug_run' else sizes
+        for n_bugs in engine_sizes:
+            for n_dip in (dipoles if uses_landscape else (0,)):
+                out.append((engine, n_bugs, n_dip))
+    return out
+
+
+def run_case(engine, n_bugs, n_dipoles, repeat=3, backend='numpy'):
+    """Best-of-repeat timing of one case."""
+    run, _, budget = _CASES[engine]
+    n_steps = n_steps_for(n_bugs, budget)
+    land = landscape(n_dipoles)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        run(n_bugs, n_steps, land, backend)
+        times.append(time.perf_counter() - t0)
+        if times[-1] > LONG_RUN:
+            break
+    best = min(times)
+    return {'engine': engine, 'n_bugs': n_bugs, 'n_dipoles': n_dipoles,
+            'n_steps': n_steps, 'seconds': best,
+            'bug_steps_per_s': n_bugs * n_steps / best}
+
+
+def environment(backend='numpy'):
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'platform': platform.platform(), 'machine': platform.machine(),
+            'processor': platform.processor(), 'cpus': os.cpu_count(),
+            'node': platform.node(), 'backend': backend,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run(case_list, repeat=3, backend='numpy', verbose=True):
+    """Run the cases; returns the JSON-able benchmark record."""
+    results = {}
+    for engine, n_bugs, n_dip in case_list:
+        r = run_case(engine, n_bugs, n_dip, repeat, backend)
+        key = case_key(engine, n_bugs, n_dip)
+        results[key] = r
+        if verbose:
+            print(f'  {key:<32s} {r["n_steps"]:6d} steps  '
+                  f'{r["seconds"]:8.3f} s  '
+                  f'{r["bug_steps_per_s"]:14,.0f} bug-steps/s', flush=True)
+    return {'env': environment(backend), 'results': results}
+
+
+# ── Baselines ─────────────────────────────────────────────────────
+
+def compare(record, baseline, tolerance=0.2):
+    """Cases slower than baseline by more than tolerance.
+
+    Returns
+    -------
+    list of (key, baseline rate, current rate, relative change)
+        Regressions only; cases missing from either record are skipped.
+    """
+    regressions = []
+    for key, r in record['results'].items():
+        b = baseline['results'].get(key)
+        if b is None:
+            continue
+        change = r['bug_steps_per_s'] / b['bug_steps_per_s'] - 1.0
+        if change < -tolerance:
+            regressions.append((key, b['bug_steps_per_s'],
+                                r['bug_steps_per_s'], change))
+    return regressions
+
+
+def _report_comparison(record, baseline, tolerance):
+    shared = [k for k in record['results'] if k in baseline['results']]
+    print(f'\nAgainst baseline of {baseline["env"].get("time", "?")} '
+          f'({len(shared)} shared cases, tolerance {tolerance:.0%}):')
+    for key in shared:
+        old = baseline['results'][key]['bug_steps_per_s']
+        new = record['results'][key]['bug_steps_per_s']
+        print(f'  {key:<32s} {old:14,.0f} → {new:14,.0f}  '
+              f'{100 * (new / old - 1):+6.1f}%')
+    env_b, env_r = baseline['env'], record['env']
+    for field in ('node', 'processor', 'numpy', 'backend'):
+        if env_b.get(field) != env_r.get(field):
+            print(f'  note: {field} differs from the baseline '
+                  f'({env_b.get(field)!r} vs {env_r.get(field)!r})')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Navigation engine throughput benchmarks')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES,
+                        default=list(ENGINES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=None,
+                        help=f'Ensemble sizes (default: {SIZES})')
+    parser.add_argument('--dipoles', nargs='+', type=int, default=None,
+                        help=f'Dipole counts (default: {DIPOLES})')
+    parser.add_argument('--quick', action='store_true',
+                        help=f'Sizes {QUICK_SIZES}, dipoles {QUICK_DIPOLES}')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per case; the fastest counts (default: 3)')
+    parser.add_argument('--backend', default='numpy',
+                        choices=['numpy', 'jax'],
+                        help='Backend of the ensemble engines')
+    parser.add_argument('--save', type=str, default=None, metavar='FILE',
+                        help='Write the results as JSON (a new baseline)')
+    parser.add_argument('--baseline', type=str, default=None, metavar='FILE',
+                        help='Compare against this JSON; exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed fractional slowdown (default: 0.2)')
+    args = parser.parse_args()
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    dipoles = args.dipoles or (QUICK_DIPOLES if args.quick else DIPOLES)
+
+    print(f'Benchmarking {", ".join(args.engines)} '
+          f'(best of {args.repeat}, backend={args.backend})')
+    record = run(cases(args.engines, sizes, dipoles), args.repeat,
+                 args.backend)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(record, f, indent=1)
+        print(f'Saved {args.save}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        _report_comparison(record, baseline, args.tolerance)
+        regressions = compare(record, baseline, args.tolerance)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) beyond '
+                  f'{args.tolerance:.0%}:')
+            for key, old, new, change in regressions:
+                print(f'  {key}: {old:,.0f} → {new:,.0f} ({change:+.1%})')
+            sys.exit(1)
+        print('\nNo regressions.')
+
+
+if __name__ == '__main__':
+    main()
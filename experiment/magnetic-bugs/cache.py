@@ -0,0 +1,439 @@
+"""
+Persistent memo of ensemble-engine results.
+
+Engines decorated with @memoised look their results up in an SQLite
+file before simulating.  The key is a hash of
+
+  - the engine name,
+  - the full bound argument tuple (defaults applied, so positional and
+    keyword calls coincide), with Landscape objects (and anything else
+    with a fingerprint() method) replaced by their fingerprint() and
+    the checkpoint arguments (UNKEYED) left out,
+  - the source of the engine and of the helpers and modules it reaches
+    (_code_fingerprint), and the full source of the modules defining the
+    fingerprinted arguments (landscape.py for a Landscape: the field
+    code is not in its fingerprint), so editing the physics invalidates
+    old entries while editing plots does not (checked by
+    `python cache.py --check`).
+
+Caching is off until activate(path) is called (analysis.py --cache).
+Calls whose arguments cannot be canonicalised, or with seed=None, go
+straight to the engine.  When the file grows past max_bytes the least
+recently used entries are evicted.
+
+Each process opens its own connection, so engines running inside a
+sweep's worker pool share the same file.
+"""
+
+import ast
+import dis
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from landscape import Landscape
+
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    key      TEXT PRIMARY KEY,
+    engine   TEXT NOT NULL,
+    args     TEXT NOT NULL,
+    value    BLOB NOT NULL,
+    size     INTEGER NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+)'''
+
+
+class ResultCache:
+    """SQLite store of pickled engine results with LRU size eviction.
+
+    Parameters
+    ----------
+    path : str
+        Database file; created on first use.
+    max_bytes : int
+        Total pickled size above which least recently used entries go.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._pid = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def conn(self):
+        # A connection must not cross a fork: reopen in each process.
+        if self._conn is None or self._pid != os.getpid():
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.execute(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        """Cached value for key, or None."""
+        row = self.conn.execute(
+            'SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        with self.conn:
+            self.conn.execute('UPDATE results SET accessed = ? WHERE key = ?',
+                              (time.time(), key))
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key, engine, args, value):
+        """Store value (pickled) and evict down to max_bytes."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, engine, args, blob, len(blob), now, now))
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until under max_bytes."""
+        total = self.conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute(
+            'SELECT key, size FROM results ORDER BY accessed').fetchall()
+        drop = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            drop.append((key,))
+            total -= size
+        with self.conn:
+            self.conn.executemany('DELETE FROM results WHERE key = ?', drop)
+
+    def entries(self, engine=None):
+        """Yield (engine, args dict, value) for stored results."""
+        query = 'SELECT engine, args, value FROM results'
+        params = ()
+        if engine is not None:
+            query += ' WHERE engine = ?'
+            params = (engine,)
+        for name, args, blob in self.conn.execute(query, params):
+            yield name, json.loads(args), pickle.loads(blob)
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM results')
+
+    def stats(self):
+        """(n_entries, total_bytes, hits, misses) for this process."""
+        n, size = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return n, size, self.hits, self.misses
+
+
+_active = None
+
+
+def activate(path, max_bytes=DEFAULT_MAX_BYTES):
+    """Turn on caching for all @memoised engines."""
+    global _active
+    _active = ResultCache(path, max_bytes=max_bytes)
+    return _active
+
+
+def deactivate():
+    global _active
+    _active = None
+
+
+def active():
+    """The cache in use, or None."""
+    return _active
+
+
+# ── Keys ──────────────────────────────────────────────────────────
+
+def _canonical(value):
+    """JSON-able canonical form of an engine argument.
+
+    Raises TypeError for values with no stable identity.
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return [_canonical(v) for v in value.tolist()]
+    if isinstance(value, Landscape):
+        return {'landscape': value.fingerprint()}
+    if hasattr(value, 'fingerprint'):
+        return {type(value).__name__: value.fingerprint()}
+    raise TypeError(f'cannot cache argument of type {type(value).__name__}')
+
+
+def _code_fingerprint(func, modules=()):
+    """Hash of the same-directory code func can run.
+
+    Functions and classes func names are hashed by source and walked in
+    turn (a class through its methods).  A module func reaches — a
+    module-valued global, or an import inside a function body — is
+    followed only through the names the code looks up (mod.name, or
+    `from mod import name`): functions and classes are walked, plain
+    numbers and strings hashed by value.  The modules in `modules` are
+    hashed whole, and their imports followed the same way.
+    """
+    here = os.path.dirname(os.path.abspath(inspect.getfile(func)))
+    seen = set()
+    sources = []
+
+    def module_path(name):
+        path = os.path.join(here, name.split('.')[0] + '.py')
+        return path if os.path.exists(path) else None
+
+    def visit_module(name):
+        path = module_path(name)
+        if path is None or path in seen:
+            return
+        seen.add(path)
+        with open(path, encoding='utf-8') as f:
+            src = f.read()
+        sources.append(src)
+        tree = ast.parse(src)
+        used = {node.attr for node in ast.walk(tree)
+                if isinstance(node, ast.Attribute)}
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    visit_names(alias.name, used)
+            elif (isinstance(node, ast.ImportFrom) and node.module
+                  and not node.level):
+                visit_names(node.module, [a.name for a in node.names])
+
+    def visit_names(name, names):
+        if module_path(name) is None:
+            return
+        try:
+            mod = importlib.import_module(name)
+        except ImportError:
+            visit_module(name)
+            return
+        for n in sorted(set(names)):
+            if (name, n) in seen:
+                continue
+            seen.add((name, n))
+            ref = getattr(mod, n, None)
+            if inspect.isfunction(ref) or inspect.isclass(ref):
+                visit(ref)
+            elif isinstance(ref, (bool, int, float, str)):
+                sources.append(f'{name}.{n} = {ref!r}')
+
+    def walk(code, glb):
+        codes = [code]
+        for c in codes:
+            codes.extend(k for k in c.co_consts if inspect.iscode(k))
+        names = {n for c in codes for n in c.co_names}
+        for c in codes:
+            for name in c.co_names:
+                ref = glb.get(name)
+                if inspect.ismodule(ref):
+                    visit_names(ref.__name__, names)
+                elif inspect.isfunction(ref) or inspect.isclass(ref):
+                    visit(ref)
+            for ins in dis.get_instructions(c):
+                if ins.opname == 'IMPORT_NAME':
+                    visit_names(ins.argval, names)
+
+    def visit(obj):
+        obj = inspect.unwrap(obj)
+        if id(obj) in seen:
+            return
+        seen.add(id(obj))
+        try:
+            path = os.path.abspath(inspect.getfile(obj))
+            src = inspect.getsource(obj)
+        except (TypeError, OSError):
+            return
+        if os.path.dirname(path) != here:
+            return
+        sources.append(src)
+        if inspect.isclass(obj):
+            glb = sys.modules[obj.__module__].__dict__
+            for attr in vars(obj).values():
+                attr = getattr(attr, '__func__', attr)
+                if isinstance(attr, property):
+                    attr = attr.fget
+                code = getattr(attr, '__code__', None)
+                if code is not None:
+                    walk(code, glb)
+            return
+        code = getattr(obj, '__code__', None)
+        if code is not None:
+            walk(code, obj.__globals__)
+
+    visit(func)
+    for name in modules:
+        visit_module(name)
+    return hashlib.sha256('\n'.join(sources).encode()).hexdigest()
+
+
+def _argument_modules(arguments):
+    """Modules defining the keyed arguments' classes (and their bases).
+
+    A Landscape or compass map is keyed by its fingerprint(), which
+    hashes its data, not the code that evaluates it; that code is hashed
+    through these modules.
+    """
+    names = set()
+    for value in arguments.values():
+        if isinstance(value, Landscape) or hasattr(value, 'fingerprint'):
+            names.update(c.__module__ for c in type(value).__mro__
+                         if c.__module__ != 'builtins')
+    return tuple(sorted(names))
+
+
+# Engine arguments that never change a result
+UNKEYED = ('checkpoint', 'checkpoint_every')
+
+
+def memoised(engine):
+    """Decorator: serve engine results from the active ResultCache."""
+    sig = inspect.signature(engine)
+    name = engine.__qualname__
+    code_hashes = {}    # per set of argument modules
+
+    @functools.wraps(engine)
+    def wrapper(*args, **kwargs):
+        store = _active
+        if store is None:
+            return engine(*args, **kwargs)
+        bound = sig.bind(*args, **kwargs)
+        bound.apply_defaults()
+        if bound.arguments.get('seed', 0) is None:
+            return engine(*args, **kwargs)
+        try:
+            canon = {k: _canonical(v) for k, v in bound.arguments.items()
+                     if k not in UNKEYED}
+        except TypeError:
+            return engine(*args, **kwargs)
+        modules = _argument_modules(bound.arguments)
+        if modules not in code_hashes:
+            code_hashes[modules] = _code_fingerprint(engine, modules)
+        code_hash = code_hashes[modules]
+        args_json = json.dumps(canon, sort_keys=True)
+        key = hashlib.sha256(
+            f'{name}\n{code_hash}\n{args_json}'.encode()).hexdigest()
+        value = store.get(key)
+        if value is None:
+            value = engine(*args, **kwargs)
+            store.put(key, name, args_json, value)
+        return value
+
+    return wrapper
+
+
+# ── Self-checks ───────────────────────────────────────────────────
+
+def _insert_statement(path, func_name, statement='pass'):
+    """Add a no-op statement to func_name in the file at path: an edit
+    to its source that leaves its behaviour alone."""
+    with open(path, encoding='utf-8') as f:
+        src = f.read()
+    node = next(n for n in ast.walk(ast.parse(src))
+                if isinstance(n, ast.FunctionDef) and n.name == func_name)
+    first = node.body[0]
+    lines = src.splitlines(keepends=True)
+    lines.insert(first.end_lineno, ' ' * first.col_offset + statement + '\n')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+
+def _in_copy(script, edits=()):
+    """Run a Python script in a fresh copy of this directory's modules
+    and return the JSON it prints last.
+
+    edits are (file name, function name) pairs given a no-op statement
+    first; the copy runs in its own process, so nothing already imported
+    here leaks into it.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in os.listdir(here):
+            if name.endswith('.py'):
+                shutil.copy(os.path.join(here, name), tmp)
+        for name, func in edits:
+            _insert_statement(os.path.join(tmp, name), func)
+        out = subprocess.run([sys.executable, '-c', script], cwd=tmp,
+                             capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+_FINGERPRINTS = """
+import json
+import analysis
+from cache import _code_fingerprint
+print(json.dumps({name: _code_fingerprint(getattr(analysis, name).__wrapped__)
+                  for name in %r}))
+"""
+
+ENGINES = ('fast_ensemble', 'fast_ensemble_grid', 'anomaly_ensemble',
+           'pi_homing_ensemble')
+
+
+def check(plot='peclet_plot', physics='_compass_sigma', verbose=True):
+    """Check that cache keys follow the physics and not the plots.
+
+    Fingerprints the memoised engines of analysis.py in fresh copies of
+    the modules: as they are, with a statement added to the plot
+    function `plot`, and with one added to the helper `physics`.
+
+    Returns (engines whose key the plot edit changed, engines whose key
+    the physics edit changed); the first should be empty and the second
+    not.
+    """
+    script = _FINGERPRINTS % (ENGINES,)
+    base = _in_copy(script)
+    plotted = _in_copy(script, edits=[('analysis.py', plot)])
+    edited = _in_copy(script, edits=[('analysis.py', physics)])
+    by_plot = [n for n in ENGINES if plotted[n] != base[n]]
+    by_physics = [n for n in ENGINES if edited[n] != base[n]]
+    if verbose:
+        print(f'  edited {plot}: keys changed {by_plot}')
+        print(f'  edited {physics}: keys changed {by_physics}')
+    return by_plot, by_physics
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Engine result cache')
+    parser.add_argument('--check', action='store_true',
+                        help='Check that a plot edit keeps every cache key '
+                             'and a physics edit does not')
+    args = parser.parse_args()
+    if args.check:
+        by_plot, by_physics = check()
+        print('ok' if not by_plot and by_physics else 'FAIL')
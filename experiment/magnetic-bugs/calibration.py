@@ -0,0 +1,428 @@
+"""
+Compass-noise calibration: the full model's heading-estimate error,
+tabulated for the fast engines.
+
+The fast engines perturb the heading by a Gaussian compass error of
+std compass_error_std(contrast, n_cry, sigma_sensor), an approximation
+that assumes 8 channels, a pure cos 2α response and a linear decode.
+The full model reads the CompassSensor, corrects the RingAttractor bump
+in double-angle space and decodes the bump; its error is non-Gaussian,
+can settle on the wrong side of the axial ambiguity (a π flip), and is
+what validate_fast_vs_full compares against.
+
+calibrate() runs full-model Bugs (analytic or quantum compass) over a
+grid of contrasts and n_cry values and records the steady-state error
+ε = θ̂ − θ of the bump decode against the true heading at every step.
+Per cell it tabulates
+
+  quantile map   ε as a monotone function of a standard normal z,
+                 ε = Q(Φ(z)), on a z grid (the whole marginal law,
+                 tails and flips included)
+  std            circular rms of ε
+  core_std       1.4826 × median |ε − median|, the Gaussian core
+  flip           P(|ε| > π/2)
+  kurtosis       excess kurtosis of ε (0 for a Gaussian)
+  tau            integrated autocorrelation time of ε (s), flips
+                 unwrapped (see below)
+  full_error     the cell's full-model mean heading error (°)
+
+CalibrationTable.noise_map(contrast, n_cry) interpolates the quantile
+maps bilinearly in (log C, log n_cry) and returns a CompassNoiseMap.
+Passed as compass_map= to fast_ensemble, anomaly_ensemble or
+pi_homing_ensemble, it turns each step's standard normal draw into a
+calibrated compass error, at the cost of one np.interp per step.  The
+bump error is also correlated in time: a flipped bump stays flipped
+for a while, and steering on a persistent wrong estimate loses far more
+than on independent flips.  The map therefore carries the cell's tau and
+the engines draw the map's latent normal as an AR(1) process with that
+correlation time.  The map is tabulated on [−π/2, 3π/2), where flipped
+errors form one contiguous upper tail, so a flip is a slow excursion of
+the latent normal and tau (the integrated autocorrelation time there)
+is dominated by flip dwell times when flips occur.  This matches the
+marginal law exactly and the autocorrelation only approximately (one
+exponential time scale).
+
+A table is calibrated for one set of steering conditions (kappa,
+sigma_theta, dt, attractor defaults).  Those conditions are stored with
+it; use it with engines run at the same dt.
+
+Usage:
+    python calibration.py --save compass_table.npz
+    python calibration.py --contrasts 0.01 0.03 0.15 --n-cry 50 1000 \\
+        --sigma-theta 0.3 --save table.npz --check
+    python calibration.py --quantum toy_fad_o2 --n-cry 50 200 1000
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import time
+
+import numpy as np
+
+from sweep import grid, run_sweep
+
+# z grid of the quantile maps (standard normal quantiles)
+Z_GRID = np.linspace(-5.0, 5.0, 201)
+
+CONTRASTS = (0.005, 0.01, 0.02, 0.05, 0.15, 0.5)
+N_CRYS = (50, 200, 1000)
+
+
+def _normal_cdf(z):
+    return np.array([0.5 * (1.0 + math.erf(v / math.sqrt(2.0))) for v in z])
+
+
+def _wrap(a):
+    return (a + np.pi) % (2 * np.pi) - np.pi
+
+
+# ── Noise maps ────────────────────────────────────────────────────
+
+class CompassNoiseMap:
+    """Monotone map from standard normals to compass errors (rad).
+
+    Parameters
+    ----------
+    z : ndarray
+        Increasing standard-normal grid.
+    error : ndarray
+        Compass error at each z (non-decreasing).
+    tau : float or None
+        Correlation time (s) of the latent normal, an AR(1) process
+        u ← ρu + √(1−ρ²)z with ρ = exp(−dt/τ); None draws independently
+        every step.
+    """
+
+    def __init__(self, z, error, tau=None):
+        self.z = np.asarray(z, dtype=float)
+        self.error = np.asarray(error, dtype=float)
+        self.tau = tau
+
+    def __call__(self, z):
+        return np.interp(z, self.z, self.error)
+
+    def correlate(self, z, latent, dt):
+        """The next latent normals from fresh normals z and the previous
+        latent (None at the first step)."""
+        if latent is None or not self.tau:
+            return z
+        rho = np.exp(-dt / self.tau)
+        return rho * latent + np.sqrt(1.0 - rho * rho) * z
+
+    def fingerprint(self):
+        """Stable hash of the map, for the result cache."""
+        h = hashlib.sha256(self.z.tobytes())
+        h.update(self.error.tobytes())
+        h.update(repr(self.tau).encode())
+        return h.hexdigest()[:16]
+
+    @classmethod
+    def gaussian(cls, sigma, z=Z_GRID, tau=None):
+        """N(0, σ²) errors, the fast engines' default with tau None."""
+        return cls(z, sigma * np.asarray(z), tau)
+
+    def std(self):
+        """Std of the error under z ~ N(0, 1) (trapezoidal quadrature)."""
+        w = np.exp(-0.5 * self.z**2)
+        w /= np.trapezoid(w, self.z)
+        mean = np.trapezoid(w * self.error, self.z)
+        return float(np.sqrt(np.trapezoid(w * (self.error - mean)**2,
+                                          self.z)))
+
+
+# ── Full-model runs ───────────────────────────────────────────────
+
+def _cell_errors(contrast, n_cry, sigma_sensor=0.02, quantum=None,
+                 kappa=2.0, sigma_theta=0.3, dt=0.02, duration=100.0,
+                 burn_in=5.0, n_bugs=4, seed=0):
+    """Bump-decode errors ε (rad) of n_bugs full-model bugs after
+    burn_in, shape (n_bugs, n_steps), and their mean heading error (°)."""
+    from agent import Bug
+    from landscape import Landscape
+
+    compass_params = {'contrast': contrast, 'n_cry': n_cry,
+                      'sigma_sensor': sigma_sensor}
+    if quantum is not None:
+        from sim import make_quantum_compass
+        compass_params['quantum_compass'] = make_quantum_compass(quantum)
+    # A field-free landscape large enough that no bug leaves it
+    extent = 2 * (duration + 100)
+    landscape = Landscape(extent=(extent, extent))
+    skip = int(burn_in / dt)
+    errors, mean_err = [], []
+    for b in range(n_bugs):
+        bug = Bug(x0=extent / 2, y0=extent / 2, kappa=kappa,
+                  sigma_theta=sigma_theta, compass_params=dict(compass_params),
+                  seed=seed * 1000 + b)
+        history = bug.run(landscape, duration=duration, dt=dt)
+        eps = _wrap(history['estimated_heading'] - history['heading'])
+        errors.append(eps[skip:])
+        mean_err.append(bug.mean_heading_error())
+    return np.array(errors), float(np.degrees(np.mean(mean_err)))
+
+
+def _autocorrelation_time(eps, dt):
+    """Integrated autocorrelation time (s) of rows of eps, summed up to
+    the first non-positive lag."""
+    x = eps - eps.mean(axis=1, keepdims=True)
+    n = x.shape[1]
+    f = np.fft.rfft(x, 2 * n, axis=1)
+    acf = np.fft.irfft(f * np.conj(f), axis=1)[:, :n].mean(axis=0)
+    if acf[0] <= 0:
+        return 0.0
+    acf /= acf[0]
+    cut = np.argmax(acf <= 0) if np.any(acf <= 0) else n
+    return float(dt * (0.5 + np.sum(acf[1:cut])))
+
+
+def _flip_unwrap(eps):
+    """ε on [−π/2, 3π/2): flipped errors sit together in the upper tail
+    instead of wrapping between ±π, so a persistent flip is a persistent
+    excursion of the latent normal."""
+    return (eps + np.pi / 2) % (2 * np.pi) - np.pi / 2
+
+
+def calibrate_cell(cell):
+    """Sweep task: the statistics and quantile map of one (contrast,
+    n_cry) cell (see the module docstring)."""
+    dt = cell.get('dt', 0.02)
+    eps, full_error = _cell_errors(**cell)
+    flat = eps.ravel()
+    med = np.median(flat)
+    centred = flat - flat.mean()
+    var = np.mean(centred**2)
+    unwrapped = _flip_unwrap(eps)
+    return {
+        'map': np.quantile(unwrapped.ravel(), _normal_cdf(Z_GRID)).tolist(),
+        'std': float(np.sqrt(np.mean(flat**2))),
+        'core_std': float(1.4826 * np.median(np.abs(flat - med))),
+        'flip': float(np.mean(np.abs(flat) > np.pi / 2)),
+        'kurtosis': float(np.mean(centred**4) / var**2 - 3.0)
+        if var > 0 else 0.0,
+        'tau': _autocorrelation_time(unwrapped, dt),
+        'full_error': full_error,
+        'n_samples': int(flat.size),
+    }
+
+
+# ── Tables ────────────────────────────────────────────────────────
+
+STATS = ('std', 'core_std', 'flip', 'kurtosis', 'tau', 'full_error')
+
+
+class CalibrationTable:
+    """Calibrated compass-error laws on a (contrast, n_cry) grid.
+
+    Parameters
+    ----------
+    contrasts, n_crys : ndarray
+        Grid axes (increasing).  A quantum table has one 'contrast', the
+        model's own.
+    maps : ndarray, shape (len(contrasts), len(n_crys), len(z))
+        Quantile maps ε(z).
+    stats : dict of ndarray
+        Per-cell STATS arrays.
+    conditions : dict
+        Calibration settings (sigma_sensor, quantum, kappa, sigma_theta,
+        dt, duration, n_bugs).
+    z : ndarray
+    """
+
+    def __init__(self, contrasts, n_crys, maps, stats, conditions, z=Z_GRID):
+        self.contrasts = np.asarray(contrasts, dtype=float)
+        self.n_crys = np.asarray(n_crys, dtype=float)
+        self.maps = np.asarray(maps, dtype=float)
+        self.stats = {k: np.asarray(v, dtype=float) for k, v in stats.items()}
+        self.conditions = dict(conditions)
+        self.z = np.asarray(z, dtype=float)
+
+    def _weights(self, axis, value):
+        """Bracketing indices and weight in log space (clamped)."""
+        u = np.log(axis)
+        v = np.clip(np.log(value), u[0], u[-1])
+        if len(u) == 1:
+            return 0, 0, 0.0
+        i = int(np.clip(np.searchsorted(u, v) - 1, 0, len(u) - 2))
+        return i, i + 1, float((v - u[i]) / (u[i + 1] - u[i]))
+
+    def in_range(self, contrast, n_cry):
+        """Whether (contrast, n_cry) lies inside the calibrated grid."""
+        def inside(axis, value):
+            return axis[0] * (1 - 1e-9) <= value <= axis[-1] * (1 + 1e-9)
+        return ((len(self.contrasts) == 1 or inside(self.contrasts, contrast))
+                and inside(self.n_crys, n_cry))
+
+    def noise_map(self, contrast, n_cry, correlated=True):
+        """CompassNoiseMap at (contrast, n_cry), bilinear in the logs.
+
+        Outside the grid the nearest edge is used; check in_range().
+        correlated=False drops the correlation time (independent draws,
+        the marginal law only).
+        """
+        i0, i1, a = self._weights(self.contrasts, contrast)
+        j0, j1, b = self._weights(self.n_crys, n_cry)
+
+        def blend(m):
+            return ((1 - a) * (1 - b) * m[i0, j0] + a * (1 - b) * m[i1, j0]
+                    + (1 - a) * b * m[i0, j1] + a * b * m[i1, j1])
+        tau = float(blend(self.stats['tau'])) if correlated else None
+        return CompassNoiseMap(self.z, blend(self.maps), tau)
+
+    def save(self, path):
+        np.savez(path, contrasts=self.contrasts, n_crys=self.n_crys,
+                 maps=self.maps, z=self.z,
+                 conditions=json.dumps(self.conditions),
+                 **{f'stat_{k}': v for k, v in self.stats.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            stats = {k[5:]: f[k] for k in f.files if k.startswith('stat_')}
+            return cls(f['contrasts'], f['n_crys'], f['maps'], stats,
+                       json.loads(str(f['conditions'])), z=f['z'])
+
+    def report(self):
+        """Text table of the cells against the Gaussian approximation."""
+        from analysis import compass_error_std
+        cond = self.conditions
+        lines = [f'{"C":>7s} {"n_cry":>6s} {"σ_gauss°":>9s} {"std°":>7s} '
+                 f'{"core°":>7s} {"P(flip)":>8s} {"kurt":>6s} {"τ s":>6s} '
+                 f'{"full err°":>9s}']
+        for i, C in enumerate(self.contrasts):
+            for j, n in enumerate(self.n_crys):
+                sigma = compass_error_std(C, n, cond['sigma_sensor'],
+                                          cond.get('mean_yield'))
+                st = {k: v[i, j] for k, v in self.stats.items()}
+                lines.append(
+                    f'{C:7.3f} {n:6.0f} {np.degrees(sigma):9.2f} '
+                    f'{np.degrees(st["std"]):7.2f} '
+                    f'{np.degrees(st["core_std"]):7.2f} {st["flip"]:8.4f} '
+                    f'{st["kurtosis"]:6.2f} {st["tau"]:6.3f} '
+                    f'{st["full_error"]:9.2f}')
+        return '\n'.join(lines)
+
+
+def calibrate(contrasts=CONTRASTS, n_crys=N_CRYS, sigma_sensor=0.02,
+              quantum=None, kappa=2.0, sigma_theta=0.3, dt=0.02,
+              duration=100.0, burn_in=5.0, n_bugs=4, seed=0, workers=1,
+              checkpoint=None):
+    """Run the full model over the grid and build a CalibrationTable.
+
+    With quantum (a sim.make_quantum_compass model name) the compass is
+    the quantum model and contrasts is replaced by its own contrast.
+    Cells run through run_sweep (workers, resumable checkpoint).
+    """
+    mean_yield = None
+    if quantum is not None:
+        from sim import make_quantum_compass
+        qc = make_quantum_compass(quantum)
+        contrasts = (qc.contrast,)
+        mean_yield = qc.mean_yield
+    contrasts = sorted(contrasts)
+    n_crys = sorted(n_crys)
+    cells, shape = grid(contrast=contrasts, n_cry=n_crys)
+    for cell in cells:
+        cell.update(sigma_sensor=sigma_sensor, quantum=quantum, kappa=kappa,
+                    sigma_theta=sigma_theta, dt=dt, duration=duration,
+                    burn_in=burn_in, n_bugs=n_bugs, seed=seed)
+    results = run_sweep(calibrate_cell, cells, workers=workers,
+                        checkpoint=checkpoint, label='compass calibration')
+    maps = np.reshape([r['map'] for r in results], shape + (len(Z_GRID),))
+    stats = {k: np.reshape([r[k] for r in results], shape) for k in STATS}
+    conditions = dict(sigma_sensor=sigma_sensor, quantum=quantum,
+                      mean_yield=mean_yield, kappa=kappa,
+                      sigma_theta=sigma_theta, dt=dt, duration=duration,
+                      burn_in=burn_in, n_bugs=n_bugs, seed=seed)
+    return CalibrationTable(contrasts, n_crys, maps, stats, conditions)
+
+
+def check(table, n_bugs=200, duration=None):
+    """fast_ensemble with the Gaussian, the independent calibrated and
+    the correlated calibrated compass error against the full-model
+    error, per cell.
+
+    Returns a list of (contrast, n_cry, full, gaussian, independent,
+    correlated), errors in degrees.
+    """
+    from analysis import fast_ensemble
+    cond = table.conditions
+    duration = duration or cond['duration']
+    rows = []
+    for i, C in enumerate(table.contrasts):
+        for j, n in enumerate(table.n_crys):
+            params = dict(n_bugs=n_bugs, duration=duration, dt=cond['dt'],
+                          kappa=cond['kappa'],
+                          sigma_theta=cond['sigma_theta'], contrast=C,
+                          n_cry=int(n), sigma_sensor=cond['sigma_sensor'],
+                          mean_yield=cond.get('mean_yield'))
+            gauss, _ = fast_ensemble(**params)
+            indep, _ = fast_ensemble(
+                compass_map=table.noise_map(C, n, correlated=False),
+                **params)
+            corr, _ = fast_ensemble(compass_map=table.noise_map(C, n),
+                                    **params)
+            rows.append((C, n, table.stats['full_error'][i, j], gauss,
+                         indep, corr))
+    return rows
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Calibrate the fast engines\' compass noise on the '
+                    'full model')
+    parser.add_argument('--contrasts', nargs='+', type=float,
+                        default=list(CONTRASTS))
+    parser.add_argument('--n-cry', nargs='+', type=int, default=list(N_CRYS))
+    parser.add_argument('--sigma-sensor', type=float, default=0.02)
+    parser.add_argument('--quantum', type=str, default=None,
+                        choices=['toy_fad_o2', 'toy_fad_trp',
+                                 'intermediate_fad_o2',
+                                 'intermediate_fad_trp'])
+    parser.add_argument('--kappa', type=float, default=2.0)
+    parser.add_argument('--sigma-theta', type=float, default=0.3)
+    parser.add_argument('--dt', type=float, default=0.02)
+    parser.add_argument('--duration', type=float, default=100.0,
+                        help='Seconds per calibration bug (default: 100)')
+    parser.add_argument('--bugs', type=int, default=4,
+                        help='Full-model bugs per cell (default: 4)')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--checkpoint', type=str, default=None)
+    parser.add_argument('--load', type=str, default=None, metavar='NPZ',
+                        help='Report (and --check) an existing table')
+    parser.add_argument('--save', type=str, default=None, metavar='NPZ')
+    parser.add_argument('--check', action='store_true',
+                        help='Compare fast_ensemble (Gaussian / calibrated, '
+                             'independent and correlated) with the full '
+                             'model per cell')
+    args = parser.parse_args()
+
+    if args.load:
+        table = CalibrationTable.load(args.load)
+    else:
+        t0 = time.time()
+        table = calibrate(args.contrasts, args.n_cry, args.sigma_sensor,
+                          args.quantum, args.kappa, args.sigma_theta,
+                          args.dt, args.duration, n_bugs=args.bugs,
+                          workers=args.workers or None,
+                          checkpoint=args.checkpoint)
+        print(f'Calibrated {table.maps.shape[0] * table.maps.shape[1]} '
+              f'cells in {time.time() - t0:.0f} s')
+    print(table.report())
+    if args.save:
+        table.save(args.save)
+        print(f'Saved {args.save}')
+
+    if args.check:
+        print(f'\n{"C":>7s} {"n_cry":>6s} {"full°":>7s} {"gauss°":>7s} '
+              f'{"indep°":>7s} {"corr°":>7s}')
+        for C, n, full, gauss, indep, corr in check(table):
+            print(f'{C:7.3f} {n:6.0f} {full:7.2f} {gauss:7.2f} '
+                  f'{indep:7.2f} {corr:7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Checkpoint and resume for long single runs.
+
+sweep.run_sweep resumes a sweep cell by cell; this module resumes inside
+one run — a multi-thousand-second Bug.run, or an ensemble engine over
+many bugs — so that runs survive preemption on batch nodes.
+
+A run's state is a dict of plain values, numpy arrays and generator
+states (rng.bit_generator.state, the full PCG64/Philox state), built by
+the state_dict() methods of Bug, RingAttractor, CompassSensor,
+CPU4Population and the noise streams, or by an engine from its loop
+variables.  StateCheckpoint writes it every `every` wall seconds with an
+atomic rename, so a kill at any moment leaves either the previous or the
+new checkpoint, never a torn one.  Restarting the same run with the same
+checkpoint path loads the state and continues from that step; because
+the generator state is restored exactly, the resumed run is bit for bit
+the uninterrupted one.
+
+Each checkpoint carries a key of the run's parameters; resuming with a
+different key is an error rather than a silent mix of two runs.  A run
+also checkpoints its final state, so rerunning a finished run returns
+at once; remove the file (StateCheckpoint.clear) to run it afresh.
+
+Full-model ensembles are many independent Bugs: checkpoint them per bug
+with run_sweep, and long individual bugs with Bug.run(checkpoint=...).
+
+Usage:
+    bug.run(landscape, duration=5000, dt=0.02,
+            checkpoint='bug.ckpt', checkpoint_every=60)
+    pi_homing_ensemble(..., checkpoint='homing.ckpt')
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import time
+
+
+def save_state(path, state):
+    """Write state (picklable) to path atomically."""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_state(path):
+    """The state saved at path, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def run_key(name, params):
+    """Stable hash of a run's name and JSON-able parameters."""
+    payload = json.dumps([name, params], sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def restore_into(objects, saved):
+    """Copy the attributes of saved objects into the live ones.
+
+    The engines' accumulators belong to the caller, who reads them after
+    the run; resuming must update those objects, not replace them.
+    """
+    if len(objects) != len(saved):
+        raise ValueError(f"checkpoint has {len(saved)} objects, "
+                         f"run has {len(objects)}")
+    for obj, old in zip(objects, saved):
+        if type(obj) is not type(old):
+            raise ValueError(f"checkpoint holds a {type(old).__name__} "
+                             f"where the run has a {type(obj).__name__}")
+        obj.__dict__.update(old.__dict__)
+
+
+class StateCheckpoint:
+    """Periodic checkpoint file of one run.
+
+    Parameters
+    ----------
+    path : str
+        Checkpoint file.
+    key : str
+        run_key of the run; a saved state with another key is refused.
+    every : float
+        Wall seconds between saves; 0 saves at every opportunity.
+    """
+
+    def __init__(self, path, key, every=60.0):
+        self.path = path
+        self.key = key
+        self.every = every
+        self._last = time.monotonic()
+
+    def load(self):
+        """The saved state, or None to start afresh."""
+        saved = load_state(self.path)
+        if saved is None:
+            return None
+        if saved['key'] != self.key:
+            raise ValueError(f"checkpoint {self.path} belongs to another "
+                             f"run (key {saved['key']}, expected "
+                             f"{self.key}); remove it to start afresh")
+        return saved['state']
+
+    def due(self):
+        """Whether `every` seconds have passed since the last save."""
+        return time.monotonic() - self._last >= self.every
+
+    def save(self, state):
+        save_state(self.path, {'key': self.key, 'state': state})
+        self._last = time.monotonic()
+
+    def clear(self):
+        """Remove the checkpoint, so the run starts afresh."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
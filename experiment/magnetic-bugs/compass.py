@@ -130,6 +130,15 @@ class CompassSensor:
 
         return channels
 
+    def state_dict(self):
+        """Generator state, for checkpointing (the array geometry follows
+        from the constructor parameters)."""
+        return {'rng': self.rng.bit_generator.state}
+
+    def load_state_dict(self, state):
+        """Restore a state_dict()."""
+        self.rng.bit_generator.state = state['rng']
+
     def signal_to_noise(self):
         """Theoretical signal-to-noise ratio per channel.
 
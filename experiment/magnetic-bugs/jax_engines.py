@@ -0,0 +1,521 @@
+"""
+JAX backend for the navigation engines.
+
+fast_ensemble, anomaly_ensemble, pi_homing_ensemble and
+fast_ensemble_grid re-expressed with the time loop as a jitted
+lax.scan, so a run is one compiled XLA program with no per-step Python
+dispatch (the cost that dominates the NumPy engines at small n_bugs).
+Parameter grids are vmapped over the same scan.  Arithmetic is float64
+(jax_enable_x64 is switched on at import), and the physics, integrators
+and statistics are those of analysis.py.
+
+Noise, selected with noise=:
+
+  'jax'    counter-based JAX keys per (seed, global bug index, step),
+           generated inside the scan.  Like per-bug streams in the
+           NumPy engines, a bug's noise does not depend on n_bugs, so
+           bug_offset shards and adaptive batches work the same way.
+           Statistics agree with the NumPy engines in distribution.
+  'numpy'  replay the NumPy engine's own draws (streams.make_streams,
+           honouring per_bug_streams / bug_offset), pre-generated as an
+           (n_steps, 4, n_bugs) array.  Results then match the NumPy
+           engine to floating-point rounding: check() runs every engine
+           under every scheme this way (python jax_engines.py --check;
+           all agree to ~1e-11 with jax 0.10 on CPU).
+
+XLA's CPU backend runs large element-wise ops on a thread pool.  To
+spread a vmapped grid over cores, expose them as devices before jax is
+imported,
+
+    XLA_FLAGS=--xla_force_host_platform_device_count=8
+
+and fast_ensemble_grid shards the cell axis across them.
+
+JAX is optional: analysis.py imports this module only when an engine is
+called with backend='jax'.
+
+Usage:
+    from analysis import fast_ensemble
+    err, dist = fast_ensemble(100, 200, 0.02, 2.0, 0.5, 0.15, 50, 0.02,
+                              backend='jax')
+
+    python jax_engines.py --check       # agreement with the NumPy engines
+"""
+
+import functools
+import importlib
+
+import numpy as np
+import jax
+import jax.numpy as jnp
+from jax import lax
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+
+from analysis import (compass_error_std, _compass_sigma, _build_deviation_grid,
+                      INTEGRATORS)
+from streams import make_streams
+
+jax.config.update('jax_enable_x64', True)
+
+TWO_PI = 2 * np.pi
+
+
+# ── Integrators (jnp versions of analysis._heading_step) ──────────
+
+def _wrap(e):
+    return (e + jnp.pi) % TWO_PI - jnp.pi
+
+
+def _drift_flow(error, kappa, t):
+    return 2.0 * jnp.arctan(jnp.tan(0.5 * _wrap(error)) * jnp.exp(-kappa * t))
+
+
+def _heading_step(theta, error, kappa, noise, dt, scheme):
+    if scheme == 'euler':
+        d_theta = kappa * jnp.sin(error) * dt + noise
+    elif scheme == 'heun':
+        f0 = kappa * jnp.sin(error)
+        f1 = kappa * jnp.sin(error - (f0 * dt + noise))
+        d_theta = 0.5 * (f0 + f1) * dt + noise
+    elif scheme == 'split':
+        e_half = _drift_flow(error, kappa, 0.5 * dt)
+        e_full = _drift_flow(e_half - noise, kappa, 0.5 * dt)
+        d_theta = -(e_full - _wrap(error))
+    else:
+        raise ValueError(f"Unknown integrator: {scheme}")
+    return (theta + d_theta) % TWO_PI
+
+
+def _step_direction(theta_old, theta_new, scheme):
+    if scheme == 'euler':
+        return jnp.cos(theta_new), jnp.sin(theta_new)
+    return (0.5 * (jnp.cos(theta_old) + jnp.cos(theta_new)),
+            0.5 * (jnp.sin(theta_old) + jnp.sin(theta_new)))
+
+
+def _interp_deviation(x, y, grid):
+    """jnp version of analysis._interp_deviation."""
+    xg, yg, dphi = grid
+    n_x = xg.shape[0] - 1
+    n_y = yg.shape[0] - 1
+    xi = jnp.clip((x - xg[0]) / (xg[1] - xg[0]), 0, n_x - 1e-10)
+    yi = jnp.clip((y - yg[0]) / (yg[1] - yg[0]), 0, n_y - 1e-10)
+    ix = xi.astype(jnp.int32)
+    iy = yi.astype(jnp.int32)
+    fx = xi - ix
+    fy = yi - iy
+    return ((1-fx)*(1-fy) * dphi[iy, ix] +
+            fx*(1-fy)     * dphi[iy, ix+1] +
+            (1-fx)*fy     * dphi[iy+1, ix] +
+            fx*fy         * dphi[iy+1, ix+1])
+
+
+# ── Noise ─────────────────────────────────────────────────────────
+# A scan consumes xs (one entry per step) and draws z, shape (4, n_bugs),
+# from it: the pre-generated normals themselves ('numpy') or the step
+# counter, folded into every bug's key ('jax').  Counter 0 is the
+# initial-condition slot, steps use 1, 2, ...
+
+def _bug_keys(seed, n_bugs, bug_offset=0, path=None):
+    key = jax.random.PRNGKey(seed)
+    if path is not None:
+        key = jax.random.fold_in(key, path)
+    index = bug_offset + jnp.arange(n_bugs)
+    return jax.vmap(jax.random.fold_in, (None, 0))(key, index)
+
+
+def _initial_uniform(keys):
+    return jax.vmap(lambda k: jax.random.uniform(
+        jax.random.fold_in(k, 0), minval=0.0, maxval=TWO_PI))(keys)
+
+
+def _normals(noise, keys, zk):
+    if noise == 'numpy':
+        return zk
+    return jax.vmap(lambda k: jax.random.normal(
+        jax.random.fold_in(k, zk), (4,)))(keys).T
+
+
+def _numpy_noise(seed, n_bugs, n_steps, per_bug_streams, bug_offset,
+                 uniform_init=True):
+    """The NumPy engine's draws: (theta0 or None, z of (n_steps, 4, n))."""
+    streams = make_streams(seed, n_bugs, 4, per_bug_streams, bug_offset)
+    theta0 = streams.uniform(0, TWO_PI) if uniform_init else None
+    return theta0, streams.normals_block(n_steps)
+
+
+def _check(noise, scheme):
+    if noise not in ('jax', 'numpy'):
+        raise ValueError(f"Unknown noise source: {noise}")
+    if scheme not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator: {scheme}")
+
+
+# ── fast_ensemble ─────────────────────────────────────────────────
+
+def _fast_scan(theta, keys, xs, p, dt, scheme, noise, grid=None):
+    """Shared scan of fast_ensemble (grid=None) and anomaly_ensemble.
+
+    Returns per-bug time-mean heading error (rad), final distances and
+    per-bug time-mean |δφ| (rad).
+    """
+    sqrt_dt = jnp.sqrt(dt)
+    n_bugs = theta.shape[0]
+
+    def body(carry, zk):
+        theta, x, y, err_sum, dev_sum = carry
+        z = _normals(noise, keys, zk)
+        if grid is None:
+            delta_phi = 0.0
+        else:
+            delta_phi = _interp_deviation(x, y, grid)
+        heading_error = (p['goal'] - (theta + p['sigma_compass'] * z[0])
+                         + delta_phi)
+        new = _heading_step(theta, heading_error, p['kappa'],
+                            p['sigma_theta'] * sqrt_dt * z[1], dt, scheme)
+        cos_t, sin_t = _step_direction(theta, new, scheme)
+        x = x + p['speed'] * cos_t * dt + p['sigma_xy'] * sqrt_dt * z[2]
+        y = y + p['speed'] * sin_t * dt + p['sigma_xy'] * sqrt_dt * z[3]
+        err_sum = err_sum + jnp.abs(_wrap(new - p['goal']))
+        dev_sum = dev_sum + jnp.abs(delta_phi)
+        return (new, x, y, err_sum, dev_sum), None
+
+    init = (theta, jnp.full(n_bugs, 500.0), jnp.full(n_bugs, 100.0),
+            jnp.zeros(n_bugs), jnp.zeros(n_bugs))
+    (_, x, y, err_sum, dev_sum), _ = lax.scan(body, init, xs)
+    n_steps = xs.shape[0]
+    return (err_sum / n_steps, jnp.sqrt((x - 500)**2 + (y - 100)**2),
+            dev_sum / n_steps)
+
+
+_fast_jit = jax.jit(_fast_scan, static_argnames=('scheme', 'noise'))
+
+
+def _fast_inputs(n_bugs, n_steps, seed, noise, per_bug_streams, bug_offset):
+    """(theta0, keys, xs) for a fast or anomaly ensemble."""
+    if noise == 'numpy':
+        theta0, z = _numpy_noise(seed, n_bugs, n_steps, per_bug_streams,
+                                 bug_offset)
+        return jnp.asarray(theta0), None, jnp.asarray(z)
+    keys = _bug_keys(seed, n_bugs, bug_offset)
+    return _initial_uniform(keys), keys, jnp.arange(1, n_steps + 1)
+
+
+def _params(kappa, sigma_theta, sigma_compass, goal, speed, sigma_xy):
+    return {'kappa': kappa, 'sigma_theta': sigma_theta,
+            'sigma_compass': sigma_compass, 'goal': goal, 'speed': speed,
+            'sigma_xy': sigma_xy}
+
+
+def fast_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
+                  contrast, n_cry, sigma_sensor, goal=3*np.pi/4,
+                  speed=1.0, sigma_xy=0.05, seed=0, mean_yield=None,
+                  scheme='euler', compass_dt=None,
+                  per_bug_streams=False, bug_offset=0, noise='jax'):
+    """analysis.fast_ensemble as one jitted scan.
+
+    Returns mean heading error (degrees) and array of final distances.
+    per_bug_streams only affects noise='numpy'; 'jax' noise is always
+    per bug.
+    """
+    _check(noise, scheme)
+    n_steps = int(duration / dt)
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    theta, keys, xs = _fast_inputs(n_bugs, n_steps, seed, noise,
+                                   per_bug_streams, bug_offset)
+    p = _params(kappa, sigma_theta, sigma_compass, goal, speed, sigma_xy)
+    bug_err, distances, _ = _fast_jit(theta, keys, xs, p, dt,
+                                      scheme=scheme, noise=noise)
+    return np.degrees(float(jnp.mean(bug_err))), np.asarray(distances)
+
+
+def anomaly_ensemble(n_bugs, duration, dt, kappa, sigma_theta,
+                     contrast, n_cry, sigma_sensor, landscape,
+                     goal=3*np.pi/4, speed=1.0, sigma_xy=0.05, seed=0,
+                     mean_yield=None, scheme='euler', compass_dt=None,
+                     per_bug_streams=False, bug_offset=0, noise='jax'):
+    """analysis.anomaly_ensemble as one jitted scan.
+
+    Returns (mean_heading_error_deg, distances, mean_path_deviation_deg).
+    """
+    _check(noise, scheme)
+    n_steps = int(duration / dt)
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    grid = tuple(jnp.asarray(g) for g in
+                 _build_deviation_grid(landscape, n_grid=150))
+    theta, keys, xs = _fast_inputs(n_bugs, n_steps, seed, noise,
+                                   per_bug_streams, bug_offset)
+    p = _params(kappa, sigma_theta, sigma_compass, goal, speed, sigma_xy)
+    bug_err, distances, bug_dev = _fast_jit(theta, keys, xs, p, dt,
+                                            scheme=scheme, noise=noise,
+                                            grid=grid)
+    return (np.degrees(float(jnp.mean(bug_err))), np.asarray(distances),
+            np.degrees(float(jnp.mean(bug_dev))))
+
+
+# ── fast_ensemble_grid ────────────────────────────────────────────
+
+@functools.lru_cache(maxsize=None)
+def _grid_fn(scheme, noise, common_noise):
+    """Jitted fast scan vmapped over cells (and over noise paths unless
+    common_noise)."""
+    path_axis = None if common_noise else 0
+    scan = functools.partial(_fast_scan, scheme=scheme, noise=noise)
+    return jax.jit(jax.vmap(
+        lambda theta, keys, xs, p, dt: scan(theta, keys, xs, p, dt)[:2],
+        in_axes=(path_axis, path_axis, None if noise == 'jax' else path_axis,
+                 0, None)))
+
+
+def _shard_cells(tree, n_cells):
+    """Spread the leading (cell) axis over the available devices."""
+    devices = jax.devices()
+    if len(devices) < 2 or n_cells % len(devices):
+        return tree
+    mesh = Mesh(np.array(devices), ('cells',))
+    return jax.device_put(tree, NamedSharding(mesh, PartitionSpec('cells')))
+
+
+def fast_ensemble_grid(n_bugs, duration, dt, kappa, sigma_theta,
+                       contrast, n_cry, sigma_sensor, goal=3*np.pi/4,
+                       speed=1.0, sigma_xy=0.05, seed=0, mean_yield=None,
+                       scheme='euler', compass_dt=None, common_noise=False,
+                       noise='jax'):
+    """analysis.fast_ensemble_grid as a vmapped, jitted scan.
+
+    Same broadcasting and return dict.  With noise='jax', cell c uses
+    noise path c (path 0 for every cell when common_noise); with
+    noise='numpy' the draws replay the NumPy grid engine's generator,
+    including its (4, paths, bugs) per-step layout.
+    """
+    _check(noise, scheme)
+    if mean_yield is None:
+        mean_yield = 0.5
+    params = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in (
+        kappa, sigma_theta, contrast, n_cry, sigma_sensor, goal, speed,
+        sigma_xy, mean_yield)))
+    shape = params[0].shape
+    (kappa, sigma_theta, contrast, n_cry, sigma_sensor, goal, speed,
+     sigma_xy, mean_yield) = (p.reshape(-1) for p in params)
+    n_cells = kappa.shape[0]
+    n_steps = int(duration / dt)
+    n_paths = 1 if common_noise else n_cells
+
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    p = _params(kappa, sigma_theta, sigma_compass, goal, speed, sigma_xy)
+
+    if noise == 'numpy':
+        rng = np.random.default_rng(seed)
+        theta = rng.uniform(0, TWO_PI, (n_paths, n_bugs))
+        z = np.empty((n_paths, n_steps, 4, n_bugs))
+        for k in range(n_steps):
+            z[:, k] = rng.standard_normal(
+                (4, n_paths, n_bugs)).transpose(1, 0, 2)
+        keys = None
+        xs = z[0] if common_noise else z
+    else:
+        keys = jnp.stack([_bug_keys(seed, n_bugs, path=c)
+                          for c in range(n_paths)])
+        theta = jax.vmap(_initial_uniform)(keys)
+        xs = jnp.arange(1, n_steps + 1)
+    if common_noise:
+        theta = theta[0]
+        keys = None if keys is None else keys[0]
+
+    p = _shard_cells(jax.tree_util.tree_map(jnp.asarray, p), n_cells)
+    bug_err, distances = _grid_fn(scheme, noise, common_noise)(
+        jnp.asarray(theta), keys, jnp.asarray(xs), p, dt)
+
+    bug_error = np.degrees(np.asarray(bug_err))
+    return {
+        'mean_error_deg': bug_error.mean(axis=1).reshape(shape),
+        'bug_error_deg': bug_error.reshape(shape + (n_bugs,)),
+        'distances': np.asarray(distances).reshape(shape + (n_bugs,)),
+    }
+
+
+# ── pi_homing_ensemble ────────────────────────────────────────────
+
+def _pi_phase(carry, keys, xs, p, dt, kind, scheme, noise, grid):
+    """One phase of the homing task: kind is 'free', 'goal' or 'home'."""
+    sqrt_dt = jnp.sqrt(dt)
+    cpu4_phi = jnp.linspace(0, TWO_PI, 8, endpoint=False)
+
+    def body(carry, zk):
+        theta, x, y, memory = carry
+        z = _normals(noise, keys, zk)
+        delta_phi = 0.0 if grid is None else _interp_deviation(x, y, grid)
+        heading_est = (theta + p['sigma_compass'] * z[0] + p['bias']
+                       + delta_phi)
+
+        # Exact leak, as path_integration.CPU4Population
+        drive = p['speed'] * jnp.maximum(
+            jnp.cos(heading_est[:, None] - cpu4_phi[None, :]), 0.0)
+        memory = memory * p['decay'] + drive * p['drive_dt']
+
+        noise_theta = p['sigma_theta'] * sqrt_dt * z[1]
+        if kind == 'free':
+            new = (theta + noise_theta) % TWO_PI
+        else:
+            if kind == 'home':
+                target = jnp.arctan2(-(memory @ jnp.sin(cpu4_phi)),
+                                     -(memory @ jnp.cos(cpu4_phi)))
+            else:
+                target = p['goal']
+            new = _heading_step(theta, target - heading_est, p['kappa'],
+                                noise_theta, dt, scheme)
+
+        cos_t, sin_t = _step_direction(theta, new, scheme)
+        x = x + p['speed'] * cos_t * dt + p['sigma_xy'] * sqrt_dt * z[2]
+        y = y + p['speed'] * sin_t * dt + p['sigma_xy'] * sqrt_dt * z[3]
+        return (new, x, y, memory), None
+
+    carry, _ = lax.scan(body, carry, xs)
+    return carry
+
+
+@functools.partial(jax.jit, static_argnames=('kinds', 'scheme', 'noise'))
+def _pi_jit(theta, keys, xs_out, xs_home, p_out, p_home, dt, grid,
+            kinds, scheme, noise):
+    n_bugs = theta.shape[0]
+    carry = (theta, jnp.full(n_bugs, 500.0), jnp.full(n_bugs, 500.0),
+             jnp.zeros((n_bugs, 8)))
+    carry = _pi_phase(carry, keys, xs_out, p_out, dt, kinds[0], scheme,
+                      noise, grid)
+    _, x, y, _ = _pi_phase(carry, keys, xs_home, p_home, dt, kinds[1],
+                           scheme, noise, grid)
+    return jnp.sqrt((x - 500.0)**2 + (y - 500.0)**2)
+
+
+def pi_homing_ensemble(n_bugs, T_out, T_home, dt, kappa, sigma_theta,
+                       contrast, n_cry, sigma_sensor, bias=0.0,
+                       landscape=None, goal_out=3*np.pi/4, speed=1.0,
+                       sigma_xy=0.05, seed=0, mean_yield=None,
+                       use_pi=True, leak=0.0, mode='straight',
+                       scheme='euler', compass_dt=None,
+                       per_bug_streams=False, bug_offset=0, noise='jax'):
+    """analysis.pi_homing_ensemble as two jitted scans.
+
+    Returns (homing_errors, mean_homing).
+    """
+    _check(noise, scheme)
+    n_out = int(T_out / dt)
+    n_home = int(T_home / dt)
+    sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                      mean_yield)
+    sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+    explore = mode == 'explore'
+
+    if noise == 'numpy':
+        theta, z = _numpy_noise(seed, n_bugs, n_out + n_home,
+                                per_bug_streams, bug_offset,
+                                uniform_init=explore)
+        keys = None
+        xs = jnp.asarray(z)
+    else:
+        keys = _bug_keys(seed, n_bugs, bug_offset)
+        theta = _initial_uniform(keys) if explore else None
+        xs = jnp.arange(1, n_out + n_home + 1)
+    if not explore:
+        theta = np.full(n_bugs, goal_out)
+
+    if landscape is not None and landscape.anomalies:
+        grid = tuple(jnp.asarray(g) for g in
+                     _build_deviation_grid(landscape, n_grid=150))
+    else:
+        grid = None
+
+    base = _params(kappa, sigma_theta, sigma_compass, goal_out, speed,
+                   sigma_xy)
+    base.update(bias=bias, decay=np.exp(-leak * dt),
+                drive_dt=-np.expm1(-leak * dt) / leak if leak > 0 else dt)
+    p_home = dict(base, goal=(goal_out + np.pi) % TWO_PI)
+    kinds = ('free' if explore else 'goal',
+             'home' if use_pi else 'goal')
+
+    homing_errors = np.asarray(_pi_jit(
+        jnp.asarray(theta), keys, xs[:n_out], xs[n_out:], base, p_home, dt,
+        grid, kinds=kinds, scheme=scheme, noise=noise))
+    return homing_errors, np.mean(homing_errors)
+
+
+# ── Validation ────────────────────────────────────────────────────
+
+def check(n_bugs=200, duration=5.0, dt=0.05, seed=0, verbose=True):
+    """Compare every engine, under every scheme, with its NumPy twin.
+
+    Each engine runs with noise='numpy', replaying the NumPy engine's own
+    draws, so the two should agree to rounding (np.allclose).
+
+    Returns {(engine, scheme): (agrees, max abs difference)}.
+    """
+    # Not `import analysis`: cache._code_fingerprint follows import
+    # statements, and this one would put every plot function into the
+    # engines' cache keys.
+    analysis = importlib.import_module('analysis')
+    from landscape import Landscape
+
+    land = Landscape(anomalies=Landscape.random_dipoles(
+        8, (1000, 1000), 2.0, 50.0, np.random.default_rng(seed)))
+    compass = (2.0, 0.3, 0.15, 50, 0.02)
+    cases = [
+        ('fast_ensemble', (n_bugs, duration, dt) + compass, {}),
+        ('fast_ensemble', (n_bugs, duration, dt) + compass,
+         {'per_bug_streams': True, 'bug_offset': 1000}),
+        ('anomaly_ensemble', (n_bugs, duration, dt) + compass + (land,), {}),
+        ('pi_homing_ensemble', (n_bugs, duration, duration, dt) + compass,
+         {'bias': 0.1}),
+        ('pi_homing_ensemble', (n_bugs, duration, duration, dt) + compass,
+         {'mode': 'explore', 'leak': 0.05, 'landscape': land}),
+        ('fast_ensemble_grid', (n_bugs, duration, dt, 2.0,
+                                np.array([[0.3], [0.5]]),
+                                np.array([0.05, 0.15]), 50, 0.02), {}),
+        ('fast_ensemble_grid', (n_bugs, duration, dt, 2.0,
+                                np.array([[0.3], [0.5]]),
+                                np.array([0.05, 0.15]), 50, 0.02),
+         {'common_noise': True}),
+    ]
+    results = {}
+    for scheme in INTEGRATORS:
+        for name, args, kwargs in cases:
+            kwargs = dict(kwargs, seed=seed, scheme=scheme)
+            ref = getattr(analysis, name)(*args, **kwargs)
+            out = globals()[name](*args, noise='numpy', **kwargs)
+            if isinstance(ref, dict):
+                ref, out = ([r[k] for k in sorted(r)] for r in (ref, out))
+            ref = [np.asarray(r, dtype=float) for r in ref]
+            out = [np.asarray(o, dtype=float) for o in out]
+            agrees = all(np.allclose(o, r) for o, r in zip(out, ref))
+            diff = max(float(np.max(np.abs(o - r)))
+                       for o, r in zip(out, ref))
+            label = name + (f' {kwargs["mode"]}' if 'mode' in kwargs else '')
+            if 'common_noise' in kwargs:
+                label += ' common'
+            if 'per_bug_streams' in kwargs:
+                label += ' per-bug'
+            results[label, scheme] = (agrees, diff)
+            if verbose:
+                print(f'  {label:32s} {scheme:6s} '
+                      f'{"ok  " if agrees else "FAIL"}  max |Δ| {diff:.1e}')
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='JAX backend of the navigation engines')
+    parser.add_argument('--check', action='store_true',
+                        help='Compare every engine with the NumPy engines')
+    parser.add_argument('--n-bugs', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=5.0)
+    args = parser.parse_args()
+    if args.check:
+        res = check(args.n_bugs, args.duration)
+        print(f'{sum(a for a, _ in res.values())}/{len(res)} agree')
@@ -14,8 +14,22 @@ Anomaly types (Direction A):
   - 'dipole':   buried vertical magnetic dipole (volcanic intrusion)
   - 'fault':    linear fault juxtaposing differently magnetised rocks
   - 'gradient': regional linear field gradient
+
+TimeVaryingLandscape adds time dependence for diurnal variation and
+storm-time disturbances: spatial basis rasters, computed once, weighted
+by coefficient series, so the engines never re-evaluate the anomaly sum
+per step.
+
+Usage:
+    land = Landscape(anomalies=Landscape.random_dipoles(...))
+    tv = TimeVaryingLandscape.disturbed(land, duration=600, storm=0.5,
+                                        time_scale=200)
+    anomaly_ensemble(..., landscape=tv)
 """
 
+import hashlib
+import json
+
 import numpy as np
 
 
@@ -240,9 +254,299 @@ class Landscape:
             })
         return anomalies
 
+    # ── identity ──────────────────────────────────────────────────
+
+    def fingerprint(self):
+        """Stable hash of the field definition (extent, B0, angles,
+        anomalies); equal fingerprints give identical fields."""
+        def plain(v):
+            if isinstance(v, np.ndarray):
+                return v.tolist()
+            if isinstance(v, np.generic):
+                return v.item()
+            raise TypeError(f'unhashable anomaly value {v!r}')
+
+        spec = [list(self.extent), self.B0, self.declination,
+                self.inclination, self.anomalies]
+        payload = json.dumps(spec, sort_keys=True, default=plain)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
     # ── bounds ────────────────────────────────────────────────────
 
     def in_bounds(self, x, y):
         """Check if position is within the landscape."""
         w, h = self.extent
         return 0 <= x <= w and 0 <= y <= h
+
+
+# ── Time-varying field ────────────────────────────────────────────
+
+class TimeVaryingLandscape(Landscape):
+    """Landscape whose field varies in time as a sum of separable terms.
+
+        B(x, y, t) = B_static(x, y) + Σ_k c_k(t) · b_k(x, y)
+
+    B_static is the Landscape field (uniform field plus anomalies).  Each
+    basis b_k is a spatial pattern in μT, rastered once on an n_grid ×
+    n_grid grid over the extent; each coefficient c_k(t) is a series
+    sampled at given times and linearly interpolated (held constant
+    outside them).  The field is linear in its sources, so the sum is
+    exact up to the raster interpolation; only the field direction is
+    nonlinear, and it is computed from the summed components.
+
+    deviation_sampler(dt, n_steps) is what the engines read: it tabulates
+    the coefficients on the step times, and a step then costs one
+    weighted sum of the n_bases + 1 rasters plus a bilinear lookup per
+    bug, never a re-evaluation of the anomaly sum.
+
+    Parameters
+    ----------
+    extent, B0, declination, inclination, anomalies
+        As for Landscape: the static field.
+    n_grid : int
+        Raster points per axis.
+
+    Basis patterns come from add_basis (a callable or an array),
+    add_uniform (a spatially uniform disturbance, e.g. ionospheric Sq or
+    magnetospheric ring current, uniform at landscape scale) or
+    add_anomalies (the pattern of a set of anomaly dicts, e.g. the
+    induced part of the crustal field).  Coefficients can be measured
+    series (observatory X/Y minute values scaled to μT) or the
+    diurnal_series and storm_series profiles below.
+    """
+
+    def __init__(self, extent=(1000, 1000), B0=50.0, declination=0.0,
+                 inclination=np.radians(65.0), anomalies=None, n_grid=150):
+        super().__init__(extent, B0, declination, inclination, anomalies)
+        w, h = self.extent
+        self.n_grid = n_grid
+        self.xg = np.linspace(0, w, n_grid)
+        self.yg = np.linspace(0, h, n_grid)
+        self.names = []
+        self._rasters = []      # (3, n_grid, n_grid) dBx, dBy, dBz
+        self._series = []       # (times, values)
+
+    @classmethod
+    def from_landscape(cls, landscape, n_grid=150):
+        """A TimeVaryingLandscape with landscape's static field."""
+        return cls(landscape.extent, landscape.B0, landscape.declination,
+                   landscape.inclination, list(landscape.anomalies), n_grid)
+
+    # ── bases ─────────────────────────────────────────────────────
+
+    def add_basis(self, name, field, times, values):
+        """Add the term values(t) · field(x, y).
+
+        Parameters
+        ----------
+        name : str
+        field : callable or array
+            field(X, Y) -> (dBx, dBy) or (dBx, dBy, dBz) in μT, evaluated
+            on the grid; or an array of shape (2 or 3, n_grid, n_grid)
+            indexed [component, y, x].
+        times, values : array
+            Coefficient series: values[i] at time times[i] (s), times
+            increasing.
+        """
+        if callable(field):
+            Xg, Yg = np.meshgrid(self.xg, self.yg)
+            field = [np.broadcast_to(c, Xg.shape) for c in field(Xg, Yg)]
+        raster = np.zeros((3, self.n_grid, self.n_grid))
+        field = np.asarray(field, dtype=float)
+        if field.shape[1:] != raster.shape[1:] or len(field) not in (2, 3):
+            raise ValueError(f"basis {name!r} has shape {field.shape}, "
+                             f"expected (2 or 3, {self.n_grid}, "
+                             f"{self.n_grid})")
+        raster[:len(field)] = field
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if times.shape != values.shape or times.ndim != 1:
+            raise ValueError(f"basis {name!r}: times and values must be "
+                             f"1-D of equal length")
+        self.names.append(name)
+        self._rasters.append(raster)
+        self._series.append((times, values))
+        return self
+
+    def add_uniform(self, name, dBx, dBy, times, values, dBz=0.0):
+        """Add a spatially uniform disturbance (dBx, dBy, dBz) μT."""
+        return self.add_basis(name, lambda X, Y: (dBx, dBy, dBz),
+                              times, values)
+
+    def add_anomalies(self, name, anomalies, times, values):
+        """Add the summed field of anomaly dicts (as in Landscape)."""
+        def field(X, Y):
+            total = np.zeros((3,) + X.shape)
+            for anom in anomalies:
+                total += self._anomaly_perturbation(X, Y, anom)
+            return total
+        return self.add_basis(name, field, times, values)
+
+    def coefficients(self, t):
+        """c_k(t) of every basis; t scalar or array (→ (..., n_bases))."""
+        if not self._series:
+            return np.zeros(np.shape(t) + (0,))
+        return np.stack([np.interp(t, ts, vs) for ts, vs in self._series],
+                        axis=-1)
+
+    # ── field ─────────────────────────────────────────────────────
+
+    def _cells(self, x, y):
+        """Flat raster indices and weights of the 4 bilinear corners.
+
+        Positions outside the extent are clamped, as in
+        analysis._interp_deviation.
+        """
+        n = self.n_grid - 1
+        xi = np.clip(np.asarray(x, dtype=float) / (self.xg[1] - self.xg[0]),
+                     0, n - 1e-10)
+        yi = np.clip(np.asarray(y, dtype=float) / (self.yg[1] - self.yg[0]),
+                     0, n - 1e-10)
+        ix = xi.astype(int)
+        iy = yi.astype(int)
+        fx = xi - ix
+        fy = yi - iy
+        i00 = iy * self.n_grid + ix
+        index = (i00, i00 + 1, i00 + self.n_grid, i00 + self.n_grid + 1)
+        weight = ((1-fx)*(1-fy), fx*(1-fy), (1-fx)*fy, fx*fy)
+        return index, weight
+
+    def disturbance(self, x, y, t):
+        """Σ_k c_k(t) b_k(x, y): (dBx, dBy, dBz) μT at time t (s)."""
+        x = np.asarray(x, dtype=float)
+        if not self._rasters:
+            return np.zeros((3,) + x.shape)
+        flat = np.stack(self._rasters).reshape(len(self._rasters), 3, -1)
+        summed = np.tensordot(self.coefficients(t), flat, axes=1)
+        index, weight = self._cells(x, y)
+        return sum(w * summed[:, i] for i, w in zip(index, weight))
+
+    def magnetic_direction(self, x, y, t=None):
+        """As Landscape.magnetic_direction, at time t (s).
+
+        t=None is the static field alone.
+        """
+        if t is None or not self._rasters:
+            return super().magnetic_direction(x, y)
+        direction, B_h, incl = super().magnetic_direction(x, y)
+        dB = self.disturbance(x, y, t)
+        Bx = B_h * np.cos(direction) + dB[0]
+        By = B_h * np.sin(direction) + dB[1]
+        Bz = B_h * np.tan(incl) + dB[2]
+        B_h = np.sqrt(Bx**2 + By**2)
+        return np.arctan2(By, Bx), B_h, np.arctan2(Bz, B_h)
+
+    def direction_deviation(self, x, y, t=None):
+        """Local field direction at time t minus background (rad)."""
+        direction, _, _ = self.magnetic_direction(x, y, t)
+        delta = direction - self._bg_dir
+        return (delta + np.pi) % (2 * np.pi) - np.pi
+
+    def deviation_sampler(self, dt, n_steps):
+        """δφ(x, y, step) at t = step·dt for the vectorised engines.
+
+        The static horizontal field and the bases are stacked into one
+        (n_bases + 1) × raster matrix and the coefficients are tabulated
+        for steps 0 … n_steps − 1.  A call contracts the stack with that
+        step's coefficients (one matrix-vector product, independent of
+        the number of bugs) and interpolates the summed Bx, By rasters:
+        8 lookups per bug whatever the number of bases.
+        """
+        Xg, Yg = np.meshgrid(self.xg, self.yg)
+        direction, B_h, _ = super().magnetic_direction(Xg, Yg)
+        static = np.stack([B_h * np.cos(direction),
+                           B_h * np.sin(direction)])
+        stack = np.stack([static] + [r[:2] for r in self._rasters])
+        stack = stack.reshape(len(stack), -1)
+        t = np.arange(n_steps) * dt
+        table = np.ones((n_steps, len(stack)))
+        table[:, 1:] = self.coefficients(t)
+        bg = self._bg_dir
+
+        def deviation(x, y, step):
+            Bx, By = (table[min(step, n_steps - 1)] @ stack).reshape(2, -1)
+            index, weight = self._cells(x, y)
+            bx = sum(w * Bx[i] for i, w in zip(index, weight))
+            by = sum(w * By[i] for i, w in zip(index, weight))
+            delta = np.arctan2(by, bx) - bg
+            return (delta + np.pi) % (2 * np.pi) - np.pi
+        return deviation
+
+    # ── identity ──────────────────────────────────────────────────
+
+    def fingerprint(self):
+        """Stable hash of the static field, the bases and the series."""
+        h = hashlib.sha1(super().fingerprint().encode())
+        h.update(json.dumps([self.n_grid, self.names]).encode())
+        for raster, (ts, vs) in zip(self._rasters, self._series):
+            for a in (raster, ts, vs):
+                h.update(np.ascontiguousarray(a, dtype=float).tobytes())
+        return h.hexdigest()
+
+    # ── standard disturbances ─────────────────────────────────────
+
+    @classmethod
+    def disturbed(cls, landscape, duration, sq=0.03, storm=0.3,
+                  onset=None, induced=0.0, time_scale=1.0, n_grid=150,
+                  n_times=2001):
+        """landscape under diurnal variation and a geomagnetic storm.
+
+        Parameters
+        ----------
+        landscape : Landscape
+            Static field.
+        duration : float
+            Simulated time covered by the series (s).
+        sq : float
+            Diurnal (solar-quiet) amplitude per horizontal component
+            (μT); ~0.02–0.05 at mid-latitudes.
+        storm : float
+            Storm main-phase depression of the horizontal field (μT);
+            ~0.1 moderate, ~0.5 severe.
+        onset : float or None
+            Storm sudden commencement (simulated s); None is duration/4.
+        induced : float
+            Fraction of the crustal anomalies that is induced and so
+            scales with the storm-time field (0 = all remanent).
+        time_scale : float
+            Geophysical seconds per simulated second: 86400 turns a day
+            into one simulated second.
+        """
+        land = cls.from_landscape(landscape, n_grid)
+        t = np.linspace(0, duration, n_times)
+        hours = t * time_scale / 3600.0
+        onset = duration / 4 if onset is None else onset
+        # Sq: X and Y swing a quarter day apart
+        land.add_uniform('sq_x', sq, 0.0, t, diurnal_series(hours))
+        land.add_uniform('sq_y', 0.0, sq, t,
+                         diurnal_series(hours, phase=6.0))
+        # Ring current: depresses H along the background direction
+        dst = storm_series(hours, onset * time_scale / 3600.0)
+        d = landscape.declination
+        land.add_uniform('storm', storm * np.cos(d), storm * np.sin(d),
+                         t, dst)
+        if induced and landscape.anomalies:
+            land.add_anomalies('induced', landscape.anomalies, t,
+                               induced * storm * dst
+                               / landscape.B_horizontal)
+        return land
+
+
+def diurnal_series(hours, period=24.0, phase=0.0):
+    """Unit diurnal (Sq-like) variation: cos(2π (h − phase) / period)."""
+    return np.cos(2 * np.pi * (np.asarray(hours) - phase) / period)
+
+
+def storm_series(hours, onset, main=6.0, recovery=24.0, commencement=0.2):
+    """Unit storm-time (Dst-like) profile, minimum −1.
+
+    A sudden commencement of +commencement at onset, a linear main phase
+    down to −1 over `main` hours, then exponential recovery with time
+    constant `recovery` hours.
+    """
+    s = np.asarray(hours, dtype=float) - onset
+    after = s >= 0
+    sc = commencement * np.exp(-np.maximum(s, 0) / (main / 4)) * after
+    dst = np.where(s < main, -np.clip(s, 0, None) / main,
+                   -np.exp(-(s - main) / recovery))
+    return sc + dst * after
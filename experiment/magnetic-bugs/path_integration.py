@@ -14,33 +14,153 @@ CPU4 neurons encode the displacement in a distributed population code:
 where φ_i is the preferred direction of neuron i and [·]₊ is half-wave
 rectification.  Home direction is decoded by population vector of m_i.
 
-Optionally leaky: m_i(t+dt) = (1 − λdt) m_i(t) + speed × [cos(θ − φ_i)]₊ dt
+Optionally leaky, dm_i/dt = −λ m_i + speed × [cos(θ − φ_i)]₊, integrated
+exactly over each step with the input held constant:
+
+  m_i(t+dt) = e^{−λdt} m_i(t) + speed × [cos(θ − φ_i)]₊ (1 − e^{−λdt}) / λ
+
 With λ = 0, perfect integration (drift accumulates forever).
 With λ > 0, memory decays — limits integration window but bounds drift.
+The exact factor keeps the memory time constant 1/λ independent of dt
+(a first-order (1 − λdt) factor shortens it, and goes negative for
+λdt > 1).
+
+CPU4Population holds the memory of a whole ensemble (n_bugs × n) and is
+what the vectorised engines use; CPU4 is its single-bug view.
 """
 
 import numpy as np
 
 
-class CPU4:
-    """CPU4 path integration neurons (scalar, for single-bug simulation).
+class CPU4Population:
+    """CPU4 path integration neurons for n_bugs bugs at once.
 
     Parameters
     ----------
+    n_bugs : int
     n : int
-        Number of CPU4 neurons (typically 8).
+        Number of CPU4 neurons per bug (typically 8).
     leak : float
         Leak rate (1/s).  0 = perfect integrator.
     gain : float
         Integration gain (scales speed input).
     """
 
-    def __init__(self, n=8, leak=0.0, gain=1.0):
+    def __init__(self, n_bugs, n=8, leak=0.0, gain=1.0):
+        self.n_bugs = n_bugs
         self.n = n
         self.leak = leak
         self.gain = gain
         self.phi = np.linspace(0, 2 * np.pi, n, endpoint=False)
-        self.memory = np.zeros(n)
+        # Population-vector decode weights
+        self.cos_phi = np.cos(self.phi)
+        self.sin_phi = np.sin(self.phi)
+        self._memory = np.zeros((n_bugs, n))
+        self._drive = np.empty((n_bugs, n))
+
+    @property
+    def memory(self):
+        """CPU4 activity, shape (n_bugs, n)."""
+        return self._memory
+
+    @memory.setter
+    def memory(self, value):
+        self._memory = np.asarray(value, dtype=float).reshape(
+            self.n_bugs, self.n)
+
+    def update(self, heading, speed, dt):
+        """Integrate one timestep of velocity.
+
+        Parameters
+        ----------
+        heading : ndarray, shape (n_bugs,)
+            Heading estimates (rad) the circuit receives.
+        speed : float or ndarray
+            Forward speed (BL/s).
+        dt : float
+            Timestep (s).
+        """
+        drive = self._drive
+        np.subtract(np.reshape(heading, (-1, 1)), self.phi, out=drive)
+        np.cos(drive, out=drive)
+        np.maximum(drive, 0.0, out=drive)
+        if np.ndim(speed):
+            speed = np.reshape(speed, (-1, 1))
+        if self.leak > 0:
+            decay = np.exp(-self.leak * dt)
+            self._memory *= decay
+            self._memory += (self.gain * speed * drive
+                             * (-np.expm1(-self.leak * dt) / self.leak))
+        else:
+            self._memory += self.gain * speed * drive * dt
+
+    def _decode(self):
+        dx = np.sum(self._memory * self.cos_phi, axis=1)
+        dy = np.sum(self._memory * self.sin_phi, axis=1)
+        return dx, dy
+
+    def displacement(self):
+        """Estimated displacement (dx, dy) from start, each (n_bugs,)."""
+        return self._decode()
+
+    def home_vector(self):
+        """Decode home direction and distance.
+
+        Returns
+        -------
+        distance : ndarray, shape (n_bugs,)
+            Estimated distance from start (BL).
+        direction : ndarray, shape (n_bugs,)
+            Direction TO home (rad), i.e. opposite of displacement.
+        """
+        dx, dy = self._decode()
+        return np.sqrt(dx**2 + dy**2), np.arctan2(-dy, -dx)
+
+    def reset(self):
+        self._memory = np.zeros((self.n_bugs, self.n))
+
+    def state_dict(self):
+        """Copy of the circuit state, for checkpointing."""
+        return {'memory': self._memory.copy(), 'leak': self.leak,
+                'gain': self.gain}
+
+    def load_state_dict(self, state):
+        """Restore a state_dict() (same n_bugs and n)."""
+        memory = np.asarray(state['memory'], dtype=float)
+        if memory.shape != self._memory.shape:
+            raise ValueError(f"memory shape {memory.shape} does not match "
+                             f"{self._memory.shape}")
+        self._memory = memory.copy()
+        self.leak = state['leak']
+        self.gain = state['gain']
+
+
+class CPU4(CPU4Population):
+    """CPU4 path integration neurons (scalar, for single-bug simulation).
+
+    A one-bug CPU4Population with scalar inputs and outputs.
+
+    Parameters
+    ----------
+    n : int
+        Number of CPU4 neurons (typically 8).
+    leak : float
+        Leak rate (1/s).  0 = perfect integrator.
+    gain : float
+        Integration gain (scales speed input).
+    """
+
+    def __init__(self, n=8, leak=0.0, gain=1.0):
+        super().__init__(1, n=n, leak=leak, gain=gain)
+
+    @property
+    def memory(self):
+        """CPU4 activity, shape (n,): a view of the one-bug row."""
+        return self._memory[0]
+
+    @memory.setter
+    def memory(self, value):
+        self._memory = np.asarray(value, dtype=float).reshape(1, self.n)
 
     def update(self, heading, speed, dt):
         """Integrate one timestep of velocity.
@@ -54,11 +174,7 @@ class CPU4:
         dt : float
             Timestep (s).
         """
-        cos_vals = np.cos(heading - self.phi)
-        drive = self.gain * speed * np.maximum(cos_vals, 0.0)
-        if self.leak > 0:
-            self.memory *= (1.0 - self.leak * dt)
-        self.memory += drive * dt
+        super().update(np.atleast_1d(heading), speed, dt)
 
     def home_vector(self):
         """Decode home direction and distance.
@@ -70,17 +186,10 @@ class CPU4:
         direction : float
             Direction TO home (rad), i.e. opposite of displacement.
         """
-        dx = np.sum(self.memory * np.cos(self.phi))
-        dy = np.sum(self.memory * np.sin(self.phi))
-        dist = np.sqrt(dx**2 + dy**2)
-        home_dir = np.arctan2(-dy, -dx)
-        return dist, home_dir
+        dist, home_dir = super().home_vector()
+        return float(dist[0]), float(home_dir[0])
 
     def displacement(self):
         """Estimated displacement (x, y) from start."""
-        dx = np.sum(self.memory * np.cos(self.phi))
-        dy = np.sum(self.memory * np.sin(self.phi))
-        return dx, dy
-
-    def reset(self):
-        self.memory = np.zeros(self.n)
+        dx, dy = super().displacement()
+        return float(dx[0]), float(dy[0])
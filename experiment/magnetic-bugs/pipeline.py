@@ -0,0 +1,335 @@
+"""
+Study pipeline: compute stages with cached .npz artefacts, plot stages
+that read them.
+
+Each study registers a compute function (parameters → dict of arrays)
+and a plot function (data, save_prefix).  A compute stage's artefact is
+
+    <store>/<name>-<version>.npz
+
+where the version hashes the stage name, its parameters, the pipeline
+context, the versions of the stages it depends on, the module-level
+tables the compute function reads, and its source together with every
+same-directory helper and engine it calls, including those it reaches
+through a module (fokker_planck.stationary_modes, a `from agent import
+Bug` inside the function; cache._code_fingerprint).  A stage therefore
+reruns only when its inputs or its physics change; editing a plot
+function reruns that plot alone, from the stored data (checked by
+`python pipeline.py --check`).
+Plot stages are stamped the same way (<store>/<name>.plot, with the
+files they wrote) and skipped while their version and save prefix are
+unchanged and those files still exist.
+
+Compute stages whose dependencies are met run concurrently on a process
+pool; plots run in the calling process as their data arrives.
+
+Artefact values are arrays (numbers or strings).  Nested dicts are
+stored with '/'-joined keys and rebuilt on load; 0-d arrays come back
+as Python scalars.  Plots always receive the loaded artefact, so a
+fresh run and a cached one plot exactly the same data.
+
+Usage:
+    pipe = Pipeline('artefacts/', workers=4)
+    pipe.add('peclet', peclet_data, peclet_plot)
+    pipe.run(save_prefix='fig_')
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from cache import _code_fingerprint, _in_copy
+from sweep import _jsonable
+
+
+class Stage:
+    """A compute function, its plot, parameters and dependencies."""
+
+    def __init__(self, name, compute, plot=None, deps=(), params=None):
+        self.name = name
+        self.compute = compute
+        self.plot = plot
+        self.deps = tuple(deps)
+        self.params = dict(params or {})
+
+
+# ── Artefacts ─────────────────────────────────────────────────────
+
+def _flatten(data, prefix=''):
+    flat = {}
+    for key, value in data.items():
+        key = f'{prefix}{key}'
+        if '/' in key[len(prefix):]:
+            raise ValueError(f"artefact key {key!r} may not contain '/'")
+        if isinstance(value, dict):
+            flat.update(_flatten(value, key + '/'))
+        else:
+            flat[key] = np.asarray(value)
+    return flat
+
+
+def _unflatten(flat):
+    data = {}
+    for key, value in flat.items():
+        *path, leaf = key.split('/')
+        node = data
+        for part in path:
+            node = node.setdefault(part, {})
+        node[leaf] = value.item() if value.ndim == 0 else value
+    return data
+
+
+def save_artefact(path, data):
+    """Write a data dict to path (.npz) atomically."""
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp.npz'
+    np.savez(tmp, **_flatten(data))
+    os.replace(tmp, path)
+
+
+def load_artefact(path):
+    """Read a data dict written by save_artefact."""
+    with np.load(path, allow_pickle=False) as f:
+        return _unflatten({k: f[k] for k in f.files})
+
+
+def _constants(func):
+    """Plain-data module globals (numbers, strings, lists, dicts) that
+    func refers to, e.g. parameter tables kept outside the function."""
+    found = {}
+    stack = [func.__code__]
+    while stack:
+        code = stack.pop()
+        for name in code.co_names:
+            value = func.__globals__.get(name)
+            if isinstance(value, (int, float, str, list, tuple, dict)):
+                found[name] = _jsonable(value)
+        stack.extend(c for c in code.co_consts if inspect.iscode(c))
+    return found
+
+
+def _written_since(prefix, t0):
+    """Files named <prefix>* modified at or after t0."""
+    folder = os.path.dirname(prefix) or '.'
+    base = os.path.basename(prefix)
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                  if f.startswith(base)
+                  and os.path.getmtime(os.path.join(folder, f)) >= t0 - 0.05)
+
+
+def _run_compute(compute, params, inputs, path):
+    t0 = time.time()
+    save_artefact(path, compute(*inputs, **params))
+    return time.time() - t0
+
+
+# ── Pipeline ──────────────────────────────────────────────────────
+
+class Pipeline:
+    """A DAG of study stages with an artefact store.
+
+    Parameters
+    ----------
+    store : str
+        Directory for .npz artefacts and plot stamps.
+    workers : int
+        Compute stages run at once.  1 runs everything in-process.
+    context : dict or None
+        Settings outside the stage parameters that change results
+        (e.g. adaptive sweep tolerances); hashed into every version.
+    """
+
+    def __init__(self, store, workers=1, context=None):
+        self.store = store
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.context = dict(context or {})
+        self.stages = {}
+        self._versions = {}
+
+    def add(self, name, compute, plot=None, deps=(), params=None):
+        """Register a stage.  compute(*dep_data, **params) → dict."""
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"{name}: unknown dependency {dep!r}")
+        self.stages[name] = Stage(name, compute, plot, deps, params)
+        return self.stages[name]
+
+    def version(self, name):
+        """Hash of a stage's code, parameters and dependency versions."""
+        if name not in self._versions:
+            stage = self.stages[name]
+            payload = json.dumps([
+                name, _code_fingerprint(stage.compute),
+                _constants(stage.compute), _jsonable(stage.params),
+                _jsonable(self.context),
+                [self.version(d) for d in stage.deps]], sort_keys=True)
+            self._versions[name] = hashlib.sha256(
+                payload.encode()).hexdigest()[:16]
+        return self._versions[name]
+
+    def artefact(self, name):
+        return os.path.join(self.store, f'{name}-{self.version(name)}.npz')
+
+    def _closure(self, names):
+        order, seen = [], set()
+
+        def visit(n):
+            if n in seen:
+                return
+            seen.add(n)
+            for d in self.stages[n].deps:
+                visit(d)
+            order.append(n)
+
+        for n in names:
+            visit(n)
+        return order
+
+    def _plot(self, name, save_prefix, verbose):
+        stage = self.stages[name]
+        if stage.plot is None:
+            return
+        stamp_path = os.path.join(self.store, f'{name}.plot')
+        key = [self.version(name), _code_fingerprint(stage.plot), save_prefix]
+        if save_prefix and os.path.exists(stamp_path):
+            with open(stamp_path) as f:
+                stamp = json.load(f)
+            if (stamp['key'] == key
+                    and all(os.path.exists(p) for p in stamp['files'])):
+                if verbose:
+                    print(f'  [pipeline] {name}: plot up to date')
+                return
+        import matplotlib.pyplot as plt
+        t0 = time.time()
+        stage.plot(load_artefact(self.artefact(name)), save_prefix)
+        plt.close('all')
+        if save_prefix:
+            with open(stamp_path, 'w') as f:
+                json.dump({'key': key,
+                           'files': _written_since(save_prefix, t0)}, f)
+
+    def run(self, names=None, save_prefix=None, force=(), verbose=True):
+        """Bring the named stages (default: all) and their dependencies
+        up to date, then plot them.
+
+        Parameters
+        ----------
+        names : list of str or None
+        save_prefix : str or None
+            Passed to the plot functions.
+        force : iterable of str
+            Stages to recompute even if their artefact exists.
+
+        Returns
+        -------
+        dict
+            {name: 'cached' or compute seconds}.
+        """
+        order = self._closure(names or list(self.stages))
+        force = set(force)
+        status = {}
+        pending = []
+        for n in order:
+            if n not in force and os.path.exists(self.artefact(n)):
+                status[n] = 'cached'
+                if verbose:
+                    print(f'  [pipeline] {n}: cached '
+                          f'({os.path.basename(self.artefact(n))})')
+            else:
+                pending.append(n)
+        for n in order:
+            if status.get(n) == 'cached':
+                self._plot(n, save_prefix, verbose)
+
+        def ready(n):
+            return all(d in status for d in self.stages[n].deps)
+
+        def submit(n, call):
+            stage = self.stages[n]
+            inputs = [load_artefact(self.artefact(d)) for d in stage.deps]
+            if verbose:
+                print(f'  [pipeline] {n}: computing')
+            return call(_run_compute, stage.compute, stage.params, inputs,
+                        self.artefact(n))
+
+        def finish(n, seconds):
+            status[n] = seconds
+            if verbose:
+                print(f'  [pipeline] {n}: done in {seconds:.1f} s')
+            self._plot(n, save_prefix, verbose)
+
+        if self.workers == 1:
+            while pending:
+                n = next(n for n in pending if ready(n))
+                pending.remove(n)
+                finish(n, submit(n, lambda f, *a: f(*a)))
+            return status
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            running = {}
+            while pending or running:
+                for n in [n for n in pending if ready(n)]:
+                    pending.remove(n)
+                    running[submit(n, pool.submit)] = n
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    finish(running.pop(fut), fut.result())
+        return status
+
+
+# ── Self-check ────────────────────────────────────────────────────
+
+_STAMPS = """
+import json
+import analysis
+from cache import _code_fingerprint
+from pipeline import Pipeline
+pipe = Pipeline('.')
+for name, _, compute, plot in analysis.STUDIES:
+    pipe.add(name, compute, plot)
+print(json.dumps({name: [pipe.version(name), _code_fingerprint(stage.plot)]
+                  for name, stage in pipe.stages.items()}))
+"""
+
+
+def check(plot='peclet_plot', verbose=True):
+    """Check that editing a plot function reruns that plot alone.
+
+    Builds the analysis.py pipeline in two copies of the modules, one
+    with a statement added to `plot`, and compares every stage's
+    version and plot stamp.
+
+    Returns (versions changed, plot stamps changed), lists of stage
+    names; both are empty but for the stamp of the edited plot's stage
+    when the claim holds.
+    """
+    before = _in_copy(_STAMPS)
+    after = _in_copy(_STAMPS, edits=[('analysis.py', plot)])
+    versions = [n for n in before if before[n][0] != after[n][0]]
+    stamps = [n for n in before if before[n][1] != after[n][1]]
+    if verbose:
+        print(f'  edited {plot}: {len(versions)}/{len(before)} versions '
+              f'changed {versions}, plot stamps changed {stamps}')
+    return versions, stamps
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Study pipeline')
+    parser.add_argument('--check', action='store_true',
+                        help='Check that a plot edit leaves every stage '
+                             'version unchanged')
+    parser.add_argument('--plot', type=str, default='peclet_plot',
+                        help='Plot function of analysis.py to edit')
+    args = parser.parse_args()
+    if args.check:
+        versions, stamps = check(args.plot)
+        print('ok' if not versions and len(stamps) == 1 else 'FAIL')
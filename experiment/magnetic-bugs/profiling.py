@@ -0,0 +1,115 @@
+"""
+Per-phase wall-time accounting for the full agent model.
+
+A PhaseTimer splits a repeated piece of work (one Bug.step, one
+RingAttractor.step) into named phases.  The instrumented code calls
+start() at the top and lap(phase) after each phase; every lap adds the
+time since the previous mark to that phase and counts the call:
+
+    timer.start()
+    ...field lookup...
+    timer.lap('field')
+    ...compass read...
+    timer.lap('compass')
+
+Components take profiler=None and guard each lap with `if prof is not
+None`, so an unprofiled run pays one local test per phase and no clock
+reads.  A timer's child(name) is the timer for a nested component
+(Bug passes timer.child('attractor') to its RingAttractor); the child's
+phases break down the parent's phase of the same name in report().
+
+Usage:
+    timer = PhaseTimer('Bug.step')
+    bug = Bug(..., profiler=timer)
+    bug.run(landscape, duration=100, dt=0.01)
+    print(timer.report())
+"""
+
+import time
+
+
+class PhaseTimer:
+    """Accumulated wall time and call counts per phase.
+
+    Parameters
+    ----------
+    name : str
+        Label for report().
+    clock : callable
+        Monotonic clock in seconds.
+    """
+
+    def __init__(self, name='step', clock=time.perf_counter):
+        self.name = name
+        self.clock = clock
+        self.totals = {}
+        self.counts = {}
+        self.children = {}
+        self.n_starts = 0
+        self._mark = None
+
+    def start(self):
+        """Begin one pass of the instrumented work."""
+        self.n_starts += 1
+        self._mark = self.clock()
+
+    def lap(self, phase):
+        """Charge the time since the last mark to phase."""
+        now = self.clock()
+        self.totals[phase] = self.totals.get(phase, 0.0) + (now - self._mark)
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        self._mark = now
+
+    def child(self, name):
+        """Timer for a nested component whose work falls in phase name."""
+        if name not in self.children:
+            self.children[name] = PhaseTimer(name, self.clock)
+        return self.children[name]
+
+    def total(self):
+        """Seconds charged to all phases."""
+        return sum(self.totals.values())
+
+    def rate(self):
+        """Passes (steps) per second of instrumented time."""
+        total = self.total()
+        return self.n_starts / total if total > 0 else float('nan')
+
+    def reset(self):
+        self.totals.clear()
+        self.counts.clear()
+        self.n_starts = 0
+        for c in self.children.values():
+            c.reset()
+
+    def summary(self):
+        """{phase: {'seconds', 'calls', 'fraction', 'us_per_call'}},
+        with nested timers under 'children'."""
+        total = self.total()
+        phases = {}
+        for phase, t in self.totals.items():
+            n = self.counts[phase]
+            phases[phase] = {'seconds': t, 'calls': n,
+                             'fraction': t / total if total > 0 else 0.0,
+                             'us_per_call': 1e6 * t / n}
+        return {'name': self.name, 'seconds': total, 'passes': self.n_starts,
+                'rate': self.rate(), 'phases': phases,
+                'children': {k: c.summary() for k, c in self.children.items()}}
+
+    def report(self, indent=''):
+        """Text table of phases, slowest first, with nested breakdowns."""
+        total = self.total()
+        lines = []
+        if not indent:
+            lines.append(f'{self.name}: {self.n_starts} passes in '
+                         f'{total:.3f} s ({self.rate():,.0f} /s)')
+            lines.append(f'  {"phase":<24s} {"calls":>9s} {"µs/call":>9s} '
+                         f'{"total s":>9s} {"share":>7s}')
+        for phase, t in sorted(self.totals.items(), key=lambda kv: -kv[1]):
+            n = self.counts[phase]
+            share = t / total if total > 0 else 0.0
+            lines.append(f'  {indent + phase:<24s} {n:9d} {1e6 * t / n:9.2f} '
+                         f'{t:9.3f} {100 * share:6.1f}%')
+            if phase in self.children:
+                lines.append(self.children[phase].report(indent + '  '))
+        return '\n'.join(lines)
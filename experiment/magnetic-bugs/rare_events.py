@@ -0,0 +1,438 @@
+"""
+Rare-event estimates of navigation failure probabilities.
+
+At high compass contrast a bug almost never gets lost, and measuring
+how rarely with fast_ensemble would take ~100/p bugs for a 10 %
+estimate of a probability p.  Adaptive multilevel splitting (AMS)
+instead runs a small population of trajectories and repeatedly
+discards the worst ones, replacing each by a clone of a better
+trajectory that branches off where that trajectory first crossed the
+current level and continues with fresh noise.  After I iterations of
+N particles, each discarding K_i, the failure probability is estimated
+by
+
+    p̂ = ∏_i (1 − K_i/N) × (fraction of the final population that fails)
+
+which is unbiased for any N ≥ 2 and any score function (generalised
+AMS; Bréhier, Gazeau, Goudenège, Lelièvre & Rousset 2016, Ann. Appl.
+Probab. 26:3559).  A good score only lowers the variance.  The cost
+grows like log(1/p) rather than 1/p.
+
+Particles are snapshotted every `stride` steps.  AMS runs on that
+snapshot chain: a particle's score is the largest of its snapshot
+scores, and clones branch from the first snapshot above the level.  A
+clone whose parent first passes the level at its final snapshot
+branches one stride earlier and redraws that stride until it passes
+too, rather than copying the parent whole.
+Snapshot scores before the end are capped just below the failure
+threshold, so only the final state decides whether a run fails.  The
+history costs N × (steps/stride) × state size floats.
+
+Models (the engines' dynamics, restartable from a state array):
+
+  HeadingModel   fast_ensemble.  Fails when the time-averaged heading
+                 error exceeds the threshold (°).  Score: accumulated
+                 error so far plus its expected rest, the current
+                 error relaxing to the stationary mean
+                 (fokker_planck) over 1/κ_e; it ends at the
+                 time-averaged error itself.  The bare accumulated
+                 error only grows, so it passes a level at the last
+                 snapshot and AMS degenerates.
+  HomingModel    pi_homing_ensemble.  Fails when the final distance
+                 from home exceeds the threshold (BL).  Score during
+                 homing: distance from home minus the distance still
+                 coverable at full speed.  It equals the final distance
+                 at the end.
+
+Usage:
+    python rare_events.py --contrast 0.3 --threshold 90
+    python rare_events.py --model homing --threshold 40 --particles 500
+    python rare_events.py --contrast 0.05 --threshold 60 --check 20000
+                                    # compare with brute-force fast_ensemble
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from analysis import (compass_error_std, _compass_sigma, _heading_step,
+                      _heading_block, _step_direction, STEP_BLOCK,
+                      _varying_field, _deviation_lookup)
+from path_integration import CPU4Population
+import fokker_planck
+
+
+def _wrap(a):
+    return (a + np.pi) % (2 * np.pi) - np.pi
+
+
+# ── Models ────────────────────────────────────────────────────────
+
+class HeadingModel:
+    """fast_ensemble's goal-directed heading process.
+
+    State columns: heading θ (rad), accumulated |heading error| (rad).
+    Position does not enter the failure event and is not tracked.
+    Arguments as for fast_ensemble.
+    """
+
+    def __init__(self, duration, dt, kappa, sigma_theta, contrast, n_cry,
+                 sigma_sensor, goal=3*np.pi/4, mean_yield=None,
+                 scheme='euler', compass_dt=None):
+        self.n_steps = int(duration / dt)
+        self.dt = dt
+        self.kappa = kappa
+        self.goal = goal
+        self.scheme = scheme
+        sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                          mean_yield)
+        self.sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+        self.noise_theta = sigma_theta * np.sqrt(dt)
+        # Stationary E|φ| and heading relaxation time (steps), for score()
+        self.stationary_error = fokker_planck.mean_abs_error(
+            fokker_planck.stationary_modes(kappa, sigma_theta,
+                                           self.sigma_compass, dt))
+        kappa_e, _, _ = fokker_planck.coefficients(
+            kappa, sigma_theta, self.sigma_compass, dt)
+        self.relax_steps = 1.0 / (kappa_e * dt)
+
+    def initial(self, n, rng):
+        state = np.zeros((n, 2))
+        state[:, 0] = rng.uniform(0, 2*np.pi, n)
+        return state
+
+    def advance(self, state, step, n, rng):
+        """State after n more steps from step (a new array)."""
+        theta, err_sum = state[:, 0], state[:, 1].copy()
+        for start in range(0, n, STEP_BLOCK):
+            nb = min(STEP_BLOCK, n - start)
+            z = rng.standard_normal((nb, 2, len(theta)))
+            headings = _heading_block(
+                theta, self.goal, self.kappa, self.sigma_compass * z[:, 0],
+                self.noise_theta * z[:, 1], self.dt, self.scheme)
+            theta = headings[-1]
+            err_sum += np.abs(_wrap(headings[1:] - self.goal)).sum(axis=0)
+        return np.column_stack([theta, err_sum])
+
+    def score(self, state, step):
+        """Projected time-averaged error (°): the accumulated error plus
+        the expected rest of the run, the current error relaxing to the
+        stationary mean over 1/κ_e.  At the end, the bug's time-averaged
+        heading error."""
+        rest = self.n_steps - step
+        c = self.stationary_error
+        err = np.abs(_wrap(state[:, 0] - self.goal))
+        projected = (state[:, 1] + rest * c
+                     + (err - c) * min(rest, self.relax_steps))
+        return np.degrees(projected / self.n_steps)
+
+
+class HomingModel:
+    """pi_homing_ensemble's outbound + homing task.
+
+    State columns: θ, x, y, then the CPU4 memory.  Arguments as for
+    pi_homing_ensemble; the start (home) is (500, 500).
+    """
+
+    def __init__(self, T_out, T_home, dt, kappa, sigma_theta, contrast,
+                 n_cry, sigma_sensor, bias=0.0, landscape=None,
+                 goal_out=3*np.pi/4, speed=1.0, sigma_xy=0.05,
+                 mean_yield=None, use_pi=True, leak=0.0, mode='straight',
+                 scheme='euler', compass_dt=None, n_cpu4=8):
+        self.n_out = int(T_out / dt)
+        self.n_steps = self.n_out + int(T_home / dt)
+        self.dt = dt
+        self.kappa = kappa
+        self.sigma_theta = sigma_theta
+        self.bias = bias
+        self.goal_out = goal_out
+        self.speed = speed
+        self.sigma_xy = sigma_xy
+        self.use_pi = use_pi
+        self.leak = leak
+        self.mode = mode
+        self.scheme = scheme
+        self.n_cpu4 = n_cpu4
+        self.home = (500.0, 500.0)
+        sigma_compass = compass_error_std(contrast, n_cry, sigma_sensor,
+                                          mean_yield)
+        self.sigma_compass = _compass_sigma(sigma_compass, dt, compass_dt)
+        if _varying_field(landscape):
+            self.deviation = _deviation_lookup(landscape, dt, self.n_steps)
+        else:
+            self.deviation = None
+
+    def initial(self, n, rng):
+        state = np.zeros((n, 3 + self.n_cpu4))
+        if self.mode == 'straight':
+            state[:, 0] = self.goal_out
+        else:
+            state[:, 0] = rng.uniform(0, 2*np.pi, n)
+        state[:, 1], state[:, 2] = self.home
+        return state
+
+    def advance(self, state, step, n, rng):
+        """State after n more steps from step (a new array)."""
+        theta, x, y = state[:, 0], state[:, 1].copy(), state[:, 2].copy()
+        cpu4 = CPU4Population(len(state), n=self.n_cpu4, leak=self.leak)
+        cpu4.memory = state[:, 3:].copy()
+        sqrt_dt = np.sqrt(self.dt)
+        goal_return = (self.goal_out + np.pi) % (2 * np.pi)
+        for s in range(step, step + n):
+            z = rng.standard_normal((4, len(state)))
+            delta_phi = (0.0 if self.deviation is None
+                         else self.deviation(x, y, s))
+            heading_est = (theta + self.sigma_compass * z[0] + self.bias
+                           + delta_phi)
+            cpu4.update(heading_est, self.speed, self.dt)
+            theta_old = theta
+            noise = self.sigma_theta * sqrt_dt * z[1]
+            if s < self.n_out and self.mode == 'explore':
+                theta = (theta + noise) % (2 * np.pi)
+            else:
+                if s < self.n_out:
+                    target = self.goal_out
+                elif self.use_pi:
+                    target = cpu4.home_vector()[1]
+                else:
+                    target = goal_return
+                theta = _heading_step(theta, target - heading_est,
+                                      self.kappa, noise, self.dt,
+                                      self.scheme)
+            cos_t, sin_t = _step_direction(theta_old, theta, self.scheme)
+            x += self.speed * cos_t * self.dt + self.sigma_xy * sqrt_dt * z[2]
+            y += self.speed * sin_t * self.dt + self.sigma_xy * sqrt_dt * z[3]
+        return np.column_stack([theta, x, y, cpu4.memory])
+
+    def score(self, state, step):
+        """Distance from home (BL) minus speed × homing time left; −∞
+        while outbound.  At the end, the homing error."""
+        if step <= self.n_out:
+            return np.full(len(state), -np.inf)
+        dist = np.hypot(state[:, 1] - self.home[0], state[:, 2] - self.home[1])
+        return dist - self.speed * (self.n_steps - step) * self.dt
+
+
+# ── Adaptive multilevel splitting ─────────────────────────────────
+
+def _snapshot_steps(n_steps, stride):
+    return np.unique(np.append(np.arange(0, n_steps, stride), n_steps))
+
+
+def _simulate(model, states, first, steps, rng):
+    """Fill states[:, m] (and return scores) for snapshots after first.
+
+    states : (n, n_snap, d) history; rows start from snapshot first[i].
+    """
+    n, n_snap = states.shape[:2]
+    scores = np.full((n, n_snap), -np.inf)
+    for m in range(n_snap):
+        rows = np.flatnonzero(first <= m)
+        if m > 0:
+            go = rows[first[rows] < m]
+            if len(go):
+                states[go, m] = model.advance(states[go, m - 1], steps[m - 1],
+                                              steps[m] - steps[m - 1], rng)
+        scores[rows, m] = model.score(states[rows, m], steps[m])
+    return scores
+
+
+def ams(model, threshold, n_particles=1000, k=None, stride=10, seed=0,
+        max_iter=100_000, redraws=20):
+    """Adaptive multilevel splitting estimate of P(final score ≥ threshold).
+
+    Parameters
+    ----------
+    model : HeadingModel or HomingModel
+        Anything with n_steps, initial(n, rng), advance(state, step, n,
+        rng) and score(state, step).
+    threshold : float
+        Failure level of the final score (° for HeadingModel, BL for
+        HomingModel).
+    n_particles : int
+        Population size N.  The relative error of p̂ approaches
+        √(−log p / N) only for a score close to the ideal one.  With
+        HeadingModel at contrast 0.05, 20 s and N = 300 it is 0.6–0.7
+        per run (p ≈ 5e-5 and 5e-6), against √(−log p / N) ≈ 0.2.
+        Take the error bar from ams_repeat, not from this formula.
+    k : int or None
+        Particles discarded per iteration (more on ties).  None → 10 %
+        of N; k = 1 is the lowest-variance, slowest choice.
+    stride : int
+        Steps between snapshots (branch points).
+    redraws : int
+        Attempts at the last stride for a clone whose parent passed the
+        level only at the end; after that the clone copies its parent.
+
+    Returns
+    -------
+    dict with keys
+        'p'           : float, failure probability estimate
+        'iterations'  : int, levels passed
+        'levels'      : ndarray, the successive levels
+        'steps'       : int, particle-steps simulated
+        'final_scores': ndarray (N,), the last population's scores
+    """
+    rng = np.random.default_rng(seed)
+    n = n_particles
+    k = max(1, n // 10) if k is None else k
+    steps = _snapshot_steps(model.n_steps, stride)
+    n_snap = len(steps)
+    below = np.nextafter(threshold, -np.inf)
+
+    states = np.empty((n, n_snap, model.initial(1, rng).shape[1]))
+    states[:, 0] = model.initial(n, rng)
+    scores = _simulate(model, states, np.zeros(n, dtype=int), steps, rng)
+    scores[:, :-1] = np.minimum(scores[:, :-1], below)
+    work = n * model.n_steps
+
+    log_p = 0.0
+    levels = []
+    for _ in range(max_iter):
+        path = scores.max(axis=1)
+        level = np.partition(path, k - 1)[k - 1]
+        if level >= threshold:
+            break
+        killed = np.flatnonzero(path <= level)
+        alive = np.flatnonzero(path > level)
+        if len(alive) == 0:
+            # every particle sits at the level: no way past it
+            return {'p': 0.0, 'iterations': len(levels),
+                    'levels': np.array(levels), 'steps': work,
+                    'final_scores': path}
+        log_p += np.log1p(-len(killed) / n)
+        levels.append(level)
+
+        parents = rng.choice(alive, size=len(killed))
+        branch = np.argmax(scores[parents] > level, axis=1)
+        # A parent that first passes the level at its final snapshot (the
+        # accumulated error does, late in a run) would be cloned whole.
+        # Branch such clones one stride earlier and redraw that stride
+        # until the clone passes the level: the parent's own last stride
+        # is one draw from that conditional law, so this is exact.
+        branch = np.minimum(branch, n_snap - 2)
+        for i, j, m in zip(killed, parents, branch):
+            states[i, :m + 1] = states[j, :m + 1]
+        pending = np.arange(len(killed))
+        for _ in range(redraws):
+            sub = states[killed[pending]]
+            new = _simulate(model, sub, branch[pending], steps, rng)
+            new[:, :-1] = np.minimum(new[:, :-1], below)
+            keep = (np.arange(n_snap)[None, :]
+                    <= branch[pending][:, None])
+            new = np.where(keep, scores[parents[pending]], new)
+            work += int(np.sum(model.n_steps - steps[branch[pending]]))
+            ok = new.max(axis=1) > level
+            states[killed[pending[ok]]] = sub[ok]
+            scores[killed[pending[ok]]] = new[ok]
+            pending = pending[~ok]
+            if not len(pending):
+                break
+        # Clones that never passed again copy their parent
+        states[killed[pending]] = states[parents[pending]]
+        scores[killed[pending]] = scores[parents[pending]]
+    else:
+        raise RuntimeError(f"AMS did not reach {threshold} in {max_iter} "
+                           f"iterations")
+
+    path = scores.max(axis=1)
+    p = np.exp(log_p) * np.mean(path >= threshold)
+    return {'p': float(p), 'iterations': len(levels),
+            'levels': np.array(levels), 'steps': work, 'final_scores': path}
+
+
+def ams_repeat(model, threshold, n_runs=10, seed=0, **kwargs):
+    """Independent AMS runs: mean estimate, its standard error, and the
+    brute-force bug-steps that standard error would need.
+
+    Returns
+    -------
+    dict with keys 'p', 'stderr', 'runs' (per-run estimates), 'steps'
+    (total particle-steps) and 'brute_force_steps'.
+    """
+    runs = [ams(model, threshold, seed=seed + r, **kwargs)
+            for r in range(n_runs)]
+    ps = np.array([r['p'] for r in runs])
+    p = ps.mean()
+    stderr = ps.std(ddof=1) / np.sqrt(n_runs) if n_runs > 1 else np.nan
+    brute = (p * (1 - p) / stderr**2 * model.n_steps
+             if p > 0 and stderr > 0 else np.nan)
+    return {'p': float(p), 'stderr': float(stderr), 'runs': ps,
+            'steps': sum(r['steps'] for r in runs),
+            'brute_force_steps': float(brute)}
+
+
+def brute_force(duration, dt, threshold, n_bugs, seed=0, **params):
+    """Fraction of n_bugs fast_ensemble bugs whose time-averaged heading
+    error is ≥ threshold (°), with its binomial standard error."""
+    from analysis import fast_ensemble_grid
+    err = fast_ensemble_grid(n_bugs, duration, dt, seed=seed,
+                             **params)['bug_error_deg']
+    p = float(np.mean(err >= threshold))
+    return p, np.sqrt(p * (1 - p) / n_bugs)
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Multilevel-splitting failure probabilities')
+    parser.add_argument('--model', choices=['heading', 'homing'],
+                        default='heading')
+    parser.add_argument('--threshold', type=float, default=90.0,
+                        help='Failure level: mean heading error (°) or '
+                             'homing error (BL) (default: 90)')
+    parser.add_argument('--contrast', type=float, default=0.15)
+    parser.add_argument('--n-cry', type=int, default=50)
+    parser.add_argument('--sigma-sensor', type=float, default=0.02)
+    parser.add_argument('--kappa', type=float, default=2.0)
+    parser.add_argument('--sigma-theta', type=float, default=0.3)
+    parser.add_argument('--duration', type=float, default=50.0,
+                        help='Run (heading) or each phase (homing) in s')
+    parser.add_argument('--dt', type=float, default=0.05)
+    parser.add_argument('--particles', type=int, default=1000)
+    parser.add_argument('--k', type=int, default=None,
+                        help='Particles discarded per level (default: N/10)')
+    parser.add_argument('--stride', type=int, default=10)
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Independent AMS runs for the error bar')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--check', type=int, default=0, metavar='N_BUGS',
+                        help='Also estimate by brute force with N_BUGS bugs '
+                             '(heading model)')
+    args = parser.parse_args()
+
+    compass = dict(kappa=args.kappa, sigma_theta=args.sigma_theta,
+                   contrast=args.contrast, n_cry=args.n_cry,
+                   sigma_sensor=args.sigma_sensor)
+    if args.model == 'heading':
+        model = HeadingModel(args.duration, args.dt, **compass)
+        unit = '°'
+    else:
+        model = HomingModel(args.duration, args.duration, args.dt,
+                            mode='explore', **compass)
+        unit = ' BL'
+
+    print(f'AMS ({args.model}): P(failure ≥ {args.threshold:g}{unit}), '
+          f'N={args.particles}, {args.runs} runs')
+    t0 = time.time()
+    res = ams_repeat(model, args.threshold, n_runs=args.runs, seed=args.seed,
+                     n_particles=args.particles, k=args.k, stride=args.stride)
+    elapsed = time.time() - t0
+    print(f'  p = {res["p"]:.3e} ± {res["stderr"]:.1e}  '
+          f'(runs: {", ".join(f"{p:.2e}" for p in res["runs"])})')
+    print(f'  {res["steps"]:.3g} particle-steps in {elapsed:.1f} s; '
+          f'brute force needs ≈ {res["brute_force_steps"]:.3g} bug-steps '
+          f'for the same error')
+
+    if args.check and args.model == 'heading':
+        t0 = time.time()
+        p, se = brute_force(args.duration, args.dt, args.threshold,
+                            args.check, seed=args.seed, **compass)
+        print(f'  brute force: p = {p:.3e} ± {se:.1e} '
+              f'({args.check} bugs, {time.time() - t0:.1f} s)')
+
+
+if __name__ == '__main__':
+    main()
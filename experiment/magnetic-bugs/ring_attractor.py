@@ -41,7 +41,8 @@ class RingAttractor:
         Local excitatory weight amplitude (cosine profile, positive lobe).
     w_inh : float
         Global inhibition weight (Δ7 pathway). Inhibition = w_inh * mean(r).
-        Must be > ~2.4 * w_exc for bump stability (suppresses uniform mode).
+        Must be > ~2.4 * w_exc for bump stability (suppresses uniform mode);
+        ring_stability.py maps bump existence and stability exactly.
     g_mag : float
         Gain for magnetic compass input.
     g_omega : float
@@ -53,11 +54,13 @@ class RingAttractor:
     noise_sigma : float
         Intrinsic neural noise (std dev per timestep).
     rng : np.random.Generator or None
+    profiler : profiling.PhaseTimer or None
+        Accumulates wall time per phase of step().
     """
 
     def __init__(self, n=8, tau=0.05, w_exc=1.5, w_inh=4.5,
                  g_mag=2.0, g_omega=0.5, threshold=0.0,
-                 r_max=1.0, noise_sigma=0.01, rng=None):
+                 r_max=1.0, noise_sigma=0.01, rng=None, profiler=None):
         self.n = n
         self.tau = tau
         self.w_exc = w_exc
@@ -68,6 +71,7 @@ class RingAttractor:
         self.r_max = r_max
         self.noise_sigma = noise_sigma
         self.rng = rng or np.random.default_rng()
+        self.profiler = profiler
 
         # Preferred directions
         self.theta = np.linspace(0, 2 * np.pi, n, endpoint=False)
@@ -102,11 +106,17 @@ class RingAttractor:
         angular_velocity : float
             Bug's angular velocity (rad/s). Positive = counterclockwise.
         """
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+
         # Local excitation (E-PG → E-PG via P-EN/P-EG)
         exc = self.W_exc @ self.r
 
         # Global inhibition (Δ7 pathway): proportional to mean ring activity
         inh = self.w_inh * np.mean(self.r)
+        if prof is not None:
+            prof.lap('recurrent')
 
         # Magnetic compass input — error-correcting shift
         #
@@ -129,6 +139,8 @@ class RingAttractor:
                 # Shift bump toward the correct heading (same mechanism as ω)
                 bump_grad = np.roll(self.r, 1) - np.roll(self.r, -1)
                 I_mag = self.g_mag * error * bump_grad
+        if prof is not None:
+            prof.lap('compass_correction')
 
         # Angular velocity input (P-EN equivalent): shifts bump in direction
         # of rotation.  Positive ω = counterclockwise → bump toward higher θ.
@@ -136,9 +148,13 @@ class RingAttractor:
         if angular_velocity != 0.0:
             I_omega = self.g_omega * angular_velocity * (
                 np.roll(self.r, 1) - np.roll(self.r, -1))
+        if prof is not None:
+            prof.lap('rotation')
 
         # Neural noise
         noise = self.rng.normal(0, self.noise_sigma, self.n)
+        if prof is not None:
+            prof.lap('noise')
 
         # Total drive
         drive = exc - inh + I_mag + I_omega - self.threshold + noise
@@ -149,6 +165,8 @@ class RingAttractor:
         # Rate dynamics (Euler integration)
         dr = (-self.r + activated) / self.tau
         self.r = np.clip(self.r + dr * dt, 0, self.r_max)
+        if prof is not None:
+            prof.lap('integrate')
 
     def heading(self):
         """Estimated heading from population vector decode.
@@ -167,6 +185,19 @@ class RingAttractor:
         """Peak-to-trough amplitude of the activity bump."""
         return np.max(self.r) - np.min(self.r)
 
+    def state_dict(self):
+        """Rates and generator state, for checkpointing."""
+        return {'r': self.r.copy(), 'rng': self.rng.bit_generator.state}
+
+    def load_state_dict(self, state):
+        """Restore a state_dict() (same n)."""
+        r = np.asarray(state['r'], dtype=float)
+        if r.shape != self.r.shape:
+            raise ValueError(f"rates shape {r.shape} does not match "
+                             f"{self.r.shape}")
+        self.r = r.copy()
+        self.rng.bit_generator.state = state['rng']
+
     def reset(self, heading=None):
         """Reset the attractor state.
 
@@ -0,0 +1,461 @@
+"""
+Fixed points and linear stability of the RingAttractor bump.
+
+Without noise or input, RingAttractor.step integrates
+
+    τ ṙ = −r + f(M r − h),    M = w_exc C − (w_inh/n) 1 1ᵀ,
+
+with C_ij = max(0, cos(θ_i − θ_j)), threshold h and f = clip(·, 0,
+r_max).  A bump is a fixed point r* = f(M r* − h) that is not uniform.
+f is piecewise linear, so Newton's method on F(r) = r − f(M r − h),
+Jacobian I − D M with D = diag(f′) the active neurons (0 < drive <
+r_max), is an active-set iteration that ends in a few steps.  It starts
+from the bump RingAttractor.reset() places, centred on a neuron
+(offset 0) or between two (offset 0.5, in neuron spacings), at a few
+amplitudes (STARTS).
+
+Linearising about r*,
+
+    J = (−I + D M)/τ,
+
+whose eigenvalues are (μ − 1)/τ for the eigenvalues μ of D M D (real:
+M is symmetric and D a projection; silent and saturated neurons decay at
+−1/τ).  From the spectrum:
+
+  growth        max Re λ; the bump is stable if it is negative
+  goldstone     λ of the mode closest to a rigid shift of the bump.  On
+                a continuous ring it is 0; with n neurons it is the
+                lattice pinning rate (negative: the bump sits still
+                between inputs, positive: it slides off this centring)
+  uniform       λ of the mode closest to a uniform change of the active
+                neurons (global inhibition must keep it negative)
+  drift         the decoded heading's velocity (rad/s) per unit shift
+                input, g·u = 1 in I = g u (r_{i−1} − r_{i+1}), the form
+                of RingAttractor's angular-velocity and compass-
+                correction inputs.  g_omega·drift ≈ 1 makes the bump
+                track the bug's rotation.  It is 0 when every neuron
+                is saturated or silent: a small input cannot move such
+                a bump at all, only one large enough to unpin it.
+
+The uniform state, all neurons active at the same rate, has Fourier
+modes μ_m = w_exc ĉ_m − w_inh δ_m0 (ĉ_m the spectrum of the circulant
+C); mode 1 growing (μ_1 > 1) is the instability that forms a bump, and
+μ_0 < 1, i.e. w_inh > w_exc ĉ_0 − 1 (ĉ_0 ≈ 2.41 for n = 8), is the
+global-inhibition condition RingAttractor quotes as w_inh > ~2.4 w_exc.
+
+Everything is vectorised over parameter combinations: w_exc, w_inh,
+threshold and r_max broadcast, so a stability diagram of 10⁴ points is
+one batched Newton solve and one batched eigh.
+
+Usage:
+    from ring_stability import bump_analysis, stability_diagram
+    res = bump_analysis(w_exc=[1.5, 1.0], w_inh=[4.5, 1.0])
+    res['kind'], res['stable'], res['goldstone'], res['drift']
+
+    python ring_stability.py                      # diagram at h = 0
+    python ring_stability.py --threshold 0.1 --n 16 --save fig.png
+    python ring_stability.py --check 200          # against simulation
+"""
+
+import argparse
+
+import numpy as np
+
+
+SILENT, UNIFORM, BUMP = 0, 1, 2
+KINDS = ('silent', 'uniform', 'bump')
+
+# Newton starting amplitudes, as fractions of r_max
+STARTS = (1.0, 0.5, 0.1)
+
+
+def _connectivity(n):
+    """Positive-lobe cosine profile C (n, n) and preferred directions."""
+    theta = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    C = np.maximum(0.0, np.cos(theta[:, None] - theta[None, :]))
+    return C, theta
+
+
+def homogeneous_modes(w_exc, w_inh, n=8):
+    """Eigenvalues μ_m of M on Fourier modes m = 0 … n//2.
+
+    The uniform active state loses stability to mode m when μ_m > 1.
+    Returns an array of shape broadcast(w_exc, w_inh) + (n//2 + 1,).
+    """
+    C, theta = _connectivity(n)
+    m = np.arange(n // 2 + 1)
+    c_hat = C[0] @ np.cos(np.outer(theta, m))
+    w_exc, w_inh = np.broadcast_arrays(np.asarray(w_exc, dtype=float),
+                                       np.asarray(w_inh, dtype=float))
+    mu = w_exc[..., None] * c_hat
+    mu[..., 0] -= w_inh
+    return mu
+
+
+def _decode_gradient(r, theta):
+    """∂θ̂/∂r of the population-vector decode, per row of r."""
+    re = r @ np.cos(theta)
+    im = r @ np.sin(theta)
+    norm = np.maximum(re**2 + im**2, 1e-300)
+    return (np.sin(theta) * re[:, None] - np.cos(theta) * im[:, None]) \
+        / norm[:, None]
+
+
+def _solve(A, b):
+    """Batched A x = b, least squares for the rows where A is singular."""
+    try:
+        return np.linalg.solve(A, b[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        return np.einsum('pij,pj->pi', np.linalg.pinv(A), b)
+
+
+def bump_analysis(w_exc=1.5, w_inh=4.5, threshold=0.0, n=8, r_max=1.0,
+                  tau=0.05, offset=0.0, tol=1e-10, max_iter=50):
+    """Bump fixed point and linear spectrum for each parameter set.
+
+    Parameters
+    ----------
+    w_exc, w_inh, threshold, r_max : float or array_like
+        RingAttractor parameters; broadcast against each other.
+    n : int
+        Neurons on the ring.
+    tau : float
+        Rate time constant (s); scales eigenvalues and drift.
+    offset : float
+        Centre of the starting bump, in neuron spacings from neuron 0
+        (0: on a neuron, 0.5: between two).
+    tol : float
+        Newton convergence tolerance on max |F(r)|.
+    max_iter : int
+
+    Returns
+    -------
+    dict of arrays, each of the broadcast parameter shape unless noted
+        'r'          : fixed-point rates, shape + (n,)
+        'converged'  : Newton converged
+        'kind'       : SILENT, UNIFORM or BUMP (see KINDS)
+        'stable'     : growth < 0
+        'growth'     : max eigenvalue of J (1/s)
+        'eigenvalues': spectrum of J, ascending, shape + (n,)
+        'goldstone'  : eigenvalue of the shift mode (1/s)
+        'uniform'    : eigenvalue of the uniform mode (1/s)
+        'drift'      : decoded heading velocity per unit shift input
+                       (rad/s)
+        'amplitude'  : max r − min r
+        'peak'       : max r
+        'active'     : neurons strictly between 0 and r_max
+        'saturated'  : neurons at r_max
+        'width'      : neurons above half the peak
+        'heading'    : decoded heading (rad, centred on the offset)
+        'homogeneous': μ_m of homogeneous_modes, shape + (n//2 + 1,)
+    """
+    params = np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in
+                                   (w_exc, w_inh, threshold, r_max)))
+    shape = params[0].shape
+    w_exc, w_inh, h, r_max = (p.reshape(-1) for p in params)
+    P = w_exc.size
+
+    C, theta = _connectivity(n)
+    M = w_exc[:, None, None] * C - (w_inh / n)[:, None, None]
+    eye = np.eye(n)
+
+    def residual(r, rows):
+        drive = np.einsum('pij,pj->pi', M[rows], r) - h[rows, None]
+        return r - np.clip(drive, 0.0, r_max[rows, None]), drive
+
+    def active(drive, rows=slice(None)):
+        # drives within tol of a kink count as off it (r = 0 at h = 0)
+        return (drive > tol) & (drive < r_max[rows, None] - tol)
+
+    def newton(r, rows):
+        """Newton from r on the parameter rows `rows` (one row of r
+        each); every step works on the rows not yet converged."""
+        F, drive = residual(r, rows)
+        size = np.max(np.abs(F), axis=1)
+        # Rows no backtracked step improves would repeat the same step
+        stuck = np.zeros(len(rows), dtype=bool)
+        for _ in range(max_iter):
+            todo = np.flatnonzero((size >= tol) & ~stuck)
+            if not todo.size:
+                break
+            sub = rows[todo]
+            D = active(drive[todo], sub)
+            step = _solve(eye - D[:, :, None] * M[sub], F[todo])
+            # Backtrack until the residual shrinks, so the iteration
+            # stays near the starting bump instead of jumping to a
+            # distant one
+            alpha = np.ones(todo.size)
+            for _ in range(20):
+                trial = r[todo] - alpha[:, None] * step
+                F_t, drive_t = residual(trial, sub)
+                size_t = np.max(np.abs(F_t), axis=1)
+                accept = size_t < size[todo]
+                done = todo[accept]
+                r[done], F[done] = trial[accept], F_t[accept]
+                drive[done], size[done] = drive_t[accept], size_t[accept]
+                keep = ~accept
+                todo, sub, step = todo[keep], sub[keep], step[keep]
+                alpha = alpha[keep] * 0.5
+                if not todo.size:
+                    break
+            stuck[todo] = True
+        return r, drive, size < tol
+
+    # Starting bumps: RingAttractor.reset's cosine at the offset, from
+    # saturated down to faint.  Below saturation the equations are
+    # homogeneous at h = 0, so a faint start can slide to r = 0; each
+    # row keeps the first start that converges to a bump, else the
+    # uniform state.  Later starts run only on the rows still without
+    # a bump.
+    centre = 2 * np.pi * offset / n
+    profile = np.maximum(0.0, np.cos(theta - centre))
+    r, drive, converged = newton(STARTS[0] * r_max[:, None] * profile,
+                                 np.arange(P))
+    for scale in STARTS[1:]:
+        rows = np.flatnonzero(~(converged & (np.ptp(r, axis=1) > 1e3 * tol)))
+        r_s, drive_s, conv_s = newton(scale * r_max[rows, None] * profile,
+                                      rows)
+        found = conv_s & (np.ptp(r_s, axis=1) > 1e3 * tol)
+        take = rows[found]
+        r[take], drive[take] = r_s[found], drive_s[found]
+        converged[take] = True
+    # No bump: report the saturated or silent uniform state instead
+    for level in (1.0, 0.0):
+        rows = np.flatnonzero(~converged)
+        r_s, drive_s, conv_s = newton(level * r_max[rows, None]
+                                      * np.ones((rows.size, n)), rows)
+        take = rows[conv_s]
+        r[take], drive[take] = r_s[conv_s], drive_s[conv_s]
+        converged[take] = True
+
+    D = active(drive).astype(float)
+
+    # Spectrum of J = (−I + D M)/τ from the symmetric D M D
+    mu, vecs = np.linalg.eigh(D[:, :, None] * M * D[:, None, :])
+    eigenvalues = (mu - 1.0) / tau
+
+    def mode_eigenvalue(direction):
+        """Eigenvalue whose eigenvector overlaps most with direction."""
+        norm = np.linalg.norm(direction, axis=1, keepdims=True)
+        u = direction / np.maximum(norm, 1e-300)
+        overlap = np.abs(np.einsum('pi,pik->pk', u, vecs))
+        best = np.argmax(overlap, axis=1)
+        value = eigenvalues[np.arange(P), best]
+        return np.where(norm[:, 0] > 0, value, np.nan)
+
+    # Modes restricted to the active neurons; a bump with none (all
+    # saturated or silent) has only the −1/τ decay
+    shift = np.roll(r, 1, axis=1) - np.roll(r, -1, axis=1)
+    goldstone = np.where(D.any(axis=1), mode_eigenvalue(D * shift),
+                         -1.0 / tau)
+    uniform = np.where(D.any(axis=1), mode_eigenvalue(D), -1.0 / tau)
+    drift = np.sum(_decode_gradient(r, theta) * D * shift, axis=1) / tau
+
+    amplitude = r.max(axis=1) - r.min(axis=1)
+    peak = r.max(axis=1)
+    kind = np.where(peak <= tol, SILENT,
+                    np.where(amplitude <= 1e3 * tol, UNIFORM, BUMP))
+    z = r @ np.exp(1j * theta)
+    heading = np.angle(z * np.exp(-1j * centre)) + centre
+
+    def out(a, extra=()):
+        return np.asarray(a).reshape(shape + tuple(extra))
+
+    return {
+        'r': out(r, (n,)), 'converged': out(converged), 'kind': out(kind),
+        'stable': out(eigenvalues[:, -1] < 0),
+        'growth': out(eigenvalues[:, -1]),
+        'eigenvalues': out(eigenvalues, (n,)),
+        'goldstone': out(np.where(kind == BUMP, goldstone, np.nan)),
+        'uniform': out(uniform),
+        'drift': out(np.where(kind == BUMP, drift, np.nan)),
+        'amplitude': out(amplitude), 'peak': out(peak),
+        'active': out(D.sum(axis=1).astype(int)),
+        'saturated': out(np.sum(r >= r_max[:, None] - tol, axis=1)),
+        'width': out(np.sum(r > 0.5 * peak[:, None], axis=1)
+                     * (peak > tol)),
+        'heading': out(heading),
+        'homogeneous': homogeneous_modes(w_exc, w_inh, n).reshape(
+            shape + (n // 2 + 1,)),
+    }
+
+
+def stability_diagram(w_exc_values, w_inh_values, threshold=0.0, n=8,
+                      r_max=1.0, tau=0.05, offsets=(0.0, 0.5)):
+    """bump_analysis on the (w_exc, w_inh) grid, for each bump centring.
+
+    Returns
+    -------
+    dict
+        'w_exc', 'w_inh' : the axes
+        'offsets'        : the centrings
+        <offset>         : bump_analysis result on the grid, shape
+                           (len(w_exc), len(w_inh)), keyed by offset
+    """
+    we, wi = np.meshgrid(w_exc_values, w_inh_values, indexing='ij')
+    res = {'w_exc': np.asarray(w_exc_values),
+           'w_inh': np.asarray(w_inh_values), 'offsets': tuple(offsets)}
+    for offset in offsets:
+        res[offset] = bump_analysis(we, wi, threshold, n=n, r_max=r_max,
+                                    tau=tau, offset=offset)
+    return res
+
+
+# ── Simulation check ──────────────────────────────────────────────
+
+def simulate(w_exc, w_inh, threshold=0.0, n=8, r_max=1.0, tau=0.05,
+             r0=None, duration=2.0, dt=0.001):
+    """Noise-free RingAttractor from rates r0 (default: reset(0));
+    returns its final rates."""
+    from ring_attractor import RingAttractor
+    ring = RingAttractor(n=n, tau=tau, w_exc=w_exc, w_inh=w_inh,
+                         threshold=threshold, r_max=r_max, noise_sigma=0.0,
+                         rng=np.random.default_rng(0))
+    ring.reset(0.0)
+    if r0 is not None:
+        ring.r = np.array(r0, dtype=float)
+    for _ in range(int(duration / dt)):
+        ring.step(dt)
+    return ring.r
+
+
+def check(n_cases=50, seed=0, n=8, perturbation=1e-3, duration=2.0):
+    """Check fixed points and their stability against simulation.
+
+    Each random parameter set starts RingAttractor at its bump fixed
+    point plus a random perturbation.  A stable fixed point should pull
+    the rates back; an unstable one should let them run away (or drift,
+    for a positive Goldstone rate).  Only converged bumps are checked;
+    cases whose slowest rate is within 1/duration of zero are skipped as
+    undecidable in the simulated time.
+
+    Returns (agree, checked, rows) with rows (w_exc, w_inh, threshold,
+    growth, final max |r − r*|, agrees).
+    """
+    rng = np.random.default_rng(seed)
+    w_exc = rng.uniform(0.2, 4.0, n_cases)
+    w_inh = rng.uniform(0.0, 12.0, n_cases)
+    h = rng.uniform(-0.2, 0.3, n_cases)
+    res = bump_analysis(w_exc, w_inh, h, n=n)
+    rows, agree = [], 0
+    for i in range(n_cases):
+        growth = res['growth'][i]
+        if (not res['converged'][i] or res['kind'][i] != BUMP
+                or abs(growth) * duration < 5):
+            continue
+        r0 = res['r'][i] + perturbation * rng.standard_normal(n)
+        r0 = np.clip(r0, 0.0, 1.0)
+        deviation = np.max(np.abs(simulate(w_exc[i], w_inh[i], h[i], n=n,
+                                           r0=r0, duration=duration)
+                                  - res['r'][i]))
+        ok = (deviation < perturbation) == bool(res['stable'][i])
+        agree += ok
+        rows.append((w_exc[i], w_inh[i], h[i], growth, deviation, ok))
+    return agree, len(rows), rows
+
+
+# ── Plots ─────────────────────────────────────────────────────────
+
+def plot_stability_diagram(res, save=None):
+    """Bump existence/stability, Goldstone rate and drift per unit
+    input over (w_exc, w_inh), for the neuron-centred bump."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+
+    a = res[res['offsets'][0]]
+    we, wi = res['w_exc'], res['w_inh']
+    extent = [we[0], we[-1], wi[0], wi[-1]]
+    # 0 silent, 1 uniform, 2 unstable bump, 3 stable bump
+    region = np.where(a['kind'] == BUMP, 2 + a['stable'], a['kind'])
+    region = np.where(a['converged'], region, np.nan)
+
+    fig, axes = plt.subplots(1, 3, figsize=(16, 4.8))
+    ax = axes[0]
+    cmap = ListedColormap(['#dddddd', '#9ecae1', '#fdae6b', '#31a354'])
+    ax.imshow(region.T, origin='lower', extent=extent, aspect='auto',
+              cmap=cmap, vmin=-0.5, vmax=3.5, interpolation='nearest')
+    mu = homogeneous_modes(we, 0.0, a['r'].shape[-1])[..., 0]
+    ax.plot(we, mu - 1, 'k--', lw=1, label='$w_{inh} = w_{exc}\\hat c_0 - 1$')
+    ax.set_ylim(wi[0], wi[-1])
+    ax.set_xlabel('$w_{exc}$')
+    ax.set_ylabel('$w_{inh}$')
+    ax.set_title('Fixed point (grey silent, blue uniform,\n'
+                 'orange unstable bump, green stable bump)')
+    ax.legend(loc='upper left', fontsize=8)
+
+    panels = ((axes[1], 'goldstone', 'Goldstone eigenvalue (1/s)'),
+              (axes[2], 'drift', 'Bump drift per unit shift input (rad/s)'))
+    for ax, key, label in panels:
+        im = ax.imshow(a[key].T, origin='lower', extent=extent,
+                       aspect='auto', cmap='viridis')
+        fig.colorbar(im, ax=ax, label=label)
+        ax.set_xlabel('$w_{exc}$')
+        ax.set_ylabel('$w_{inh}$')
+        ax.set_title(label)
+    fig.tight_layout()
+    if save:
+        fig.savefig(save, dpi=150)
+        print(f'Saved {save}')
+    return fig
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ring-attractor bump fixed points and stability')
+    parser.add_argument('--w-exc', nargs=2, type=float, default=[0.1, 4.0],
+                        metavar=('LO', 'HI'))
+    parser.add_argument('--w-inh', nargs=2, type=float, default=[0.0, 12.0],
+                        metavar=('LO', 'HI'))
+    parser.add_argument('--n-grid', type=int, default=120,
+                        help='Points per axis (default: 120)')
+    parser.add_argument('--threshold', type=float, default=0.0)
+    parser.add_argument('--r-max', type=float, default=1.0)
+    parser.add_argument('--tau', type=float, default=0.05)
+    parser.add_argument('--n', type=int, default=8, help='Ring size')
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help='Also compare N random cases with simulation')
+    parser.add_argument('--save', type=str, default=None)
+    args = parser.parse_args()
+
+    import time
+    we = np.linspace(*args.w_exc, args.n_grid)
+    wi = np.linspace(*args.w_inh, args.n_grid)
+    t0 = time.perf_counter()
+    res = stability_diagram(we, wi, args.threshold, n=args.n,
+                            r_max=args.r_max, tau=args.tau)
+    elapsed = time.perf_counter() - t0
+    for offset in res['offsets']:
+        a = res[offset]
+        stable = (a['kind'] == BUMP) & a['stable']
+        print(f'offset {offset}: {stable.mean():.1%} stable bumps, '
+              f'{(~a["converged"]).sum()} unconverged')
+    print(f'{2 * we.size * wi.size} fixed points in {elapsed:.2f} s')
+
+    default = bump_analysis(n=args.n, threshold=args.threshold,
+                            r_max=args.r_max, tau=args.tau)
+    print(f'RingAttractor defaults (w_exc=1.5, w_inh=4.5): '
+          f'{KINDS[default["kind"]]}, '
+          f'{"stable" if default["stable"] else "unstable"}, '
+          f'goldstone {default["goldstone"]:.2f}/s, '
+          f'uniform {default["uniform"]:.2f}/s, '
+          f'drift {default["drift"]:.2f} rad/s per unit input')
+
+    if args.check:
+        agree, total, rows = check(args.check, n=args.n)
+        for w_e, w_i, h, growth, dev, ok in rows:
+            if not ok:
+                print(f'  disagree: w_exc={w_e:.2f} w_inh={w_i:.2f} '
+                      f'h={h:.2f} growth {growth:.2f}/s, simulated '
+                      f'|r − r*| {dev:.2e}')
+        print(f'Simulation check: {agree}/{total} bumps agree')
+
+    plot_stability_diagram(res, save=args.save)
+    if not args.save:
+        import matplotlib.pyplot as plt
+        plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,26 +4,39 @@ Simulation runner and visualisation for the magnetic bug.
 Usage:
     python sim.py                        # Single trajectory demo
     python sim.py --sweep                # Parameter sweep (contrast vs noise)
+    python sim.py --sweep --workers 8 --checkpoint sweep.jsonl
+                                         # ... parallel and resumable
+    python sim.py --sweep --fast         # ... whole grid in one vectorised run
+    python sim.py --sweep --refine 4     # ... quadtree around the 30° contour
     python sim.py --ensemble N           # Ensemble of N trajectories
+    python sim.py --ensemble 100000 --density
+                                         # ... as an occupancy map
     python sim.py --quantum toy_fad_o2   # Use quantum compass model
     python sim.py --validate             # Quantum yield curves for all models
     python sim.py --compare-models       # Navigation accuracy per model
+    python sim.py --profile              # Time per phase of Bug.step
 """
 
 import argparse
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.collections import LineCollection
 from agent import Bug
 from landscape import Landscape
+from sweep import grid, run_sweep
+from profiling import PhaseTimer
 
 
 # ── Single trajectory ────────────────────────────────────────────────
 
 def run_single(seed=42, duration=500, dt=0.01, contrast=0.15,
                sigma_theta=0.1, goal=3*np.pi/4, landscape=None,
-               compass_params=None):
-    """Run a single bug and return its history."""
+               compass_params=None, profiler=None):
+    """Run a single bug and return its history.
+
+    profiler (a profiling.PhaseTimer) times the phases of every step.
+    """
     if landscape is None:
         landscape = Landscape()
     if compass_params is None:
@@ -34,7 +47,7 @@ def run_single(seed=42, duration=500, dt=0.01, contrast=0.15,
         x0=500, y0=100, goal_heading=goal, speed=1.0,
         kappa=2.0, sigma_theta=sigma_theta, sigma_xy=0.05,
         compass_params=compass_params,
-        seed=seed
+        seed=seed, profiler=profiler
     )
     history = bug.run(landscape, duration=duration, dt=dt)
     return history, bug
@@ -159,12 +172,79 @@ def plot_ensemble(n_runs=20, duration=300, dt=0.01, contrast=0.15,
     return fig
 
 
+def plot_ensemble_density(n_bugs=10_000, duration=300, dt=0.05,
+                          contrast=0.15, sigma_theta=0.1, goal=3*np.pi/4,
+                          landscape=None, bins=250, seed=0):
+    """Trajectory density of a large ensemble, from a streaming grid.
+
+    Runs the vectorised engine (analysis.anomaly_ensemble if landscape
+    has anomalies, else fast_ensemble) with an
+    accumulators.SpatialGrid, so memory is O(bins²) whatever n_bugs:
+    no path is stored or drawn.  Panels: occupancy density, mean
+    heading error per cell and, with anomalies, mean δφ per cell.
+    """
+    from analysis import fast_ensemble, anomaly_ensemble
+    from accumulators import SpatialGrid
+
+    w, h = (landscape if landscape is not None else Landscape()).extent
+    spatial = SpatialGrid(bounds=(0, w, 0, h), bins=bins)
+    params = dict(n_bugs=n_bugs, duration=duration, dt=dt, kappa=2.0,
+                  sigma_theta=sigma_theta, contrast=contrast, n_cry=1000,
+                  sigma_sensor=0.02, goal=goal, seed=seed,
+                  accumulators=[spatial])
+    anomalies = landscape is not None and landscape.anomalies
+    if anomalies:
+        anomaly_ensemble(landscape=landscape, **params)
+    else:
+        fast_ensemble(**params)
+    res = spatial.result()
+
+    panels = 3 if anomalies else 2
+    fig, axes = plt.subplots(1, panels, figsize=(6.5 * panels, 6))
+    extent = (0, w, 0, h)
+    density = np.where(res['count'] > 0, res['density'], np.nan)
+    maps = [(np.log10(density), 'viridis', 'log₁₀ density (per BL²)',
+             'Occupancy'),
+            (np.degrees(res['mean_error']), 'RdYlGn_r',
+             'Mean heading error (°)', 'Heading error per cell')]
+    if anomalies:
+        dphi = np.degrees(res['mean_delta_phi'])
+        lim = np.nanmax(np.abs(dphi)) if np.isfinite(dphi).any() else 1.0
+        maps.append((dphi, 'RdBu_r', 'Mean δφ (°)',
+                     'Field deviation per cell'))
+    for ax, (data, cmap, label, title) in zip(np.atleast_1d(axes), maps):
+        kw = dict(vmin=-lim, vmax=lim) if cmap == 'RdBu_r' else {}
+        im = ax.imshow(data, origin='lower', extent=extent, cmap=cmap,
+                       interpolation='nearest', **kw)
+        plt.colorbar(im, ax=ax, shrink=0.8).set_label(label)
+        ax.plot(500, 100, 'wo', ms=6, mec='k')
+        ax.set_xlabel('x (body-lengths)')
+        ax.set_ylabel('y (body-lengths)')
+        ax.set_title(title)
+    fig.suptitle(f'Ensemble density ({n_bugs:,} bugs), contrast={contrast}, '
+                 f'σ_θ={sigma_theta}')
+    plt.tight_layout()
+    return fig
+
+
 # ── Parameter sweep: navigation phase diagram ────────────────────────
 
+def _sweep_cell(cell):
+    """Sweep task: mean heading error (°) of one run_ensemble cell."""
+    return run_ensemble(**cell)['mean_error_deg']
+
+
 def parameter_sweep(contrasts=None, sigma_thetas=None, n_runs=20,
-                    duration=300, dt=0.01):
+                    duration=300, dt=0.01, workers=1, checkpoint=None,
+                    fast=False):
     """Sweep compass contrast vs angular noise.
 
+    Cells run on `workers` processes (None = all cores); with a
+    `checkpoint` file an interrupted sweep resumes where it stopped.
+    With fast=True the whole grid runs as one vectorised
+    analysis.fast_ensemble_grid call (OU heading model, no ring
+    attractor; same compass and noise parameters).
+
     Returns a 2D array of mean heading errors (degrees).
     """
     if contrasts is None:
@@ -172,19 +252,25 @@ def parameter_sweep(contrasts=None, sigma_thetas=None, n_runs=20,
     if sigma_thetas is None:
         sigma_thetas = np.logspace(-2, 0.5, 12)  # 0.01 to ~3
 
-    errors = np.zeros((len(contrasts), len(sigma_thetas)))
-
-    total = len(contrasts) * len(sigma_thetas)
-    done = 0
+    if fast:
+        from analysis import fast_ensemble_grid
+        errors = fast_ensemble_grid(
+            n_bugs=n_runs, duration=duration, dt=dt, kappa=2.0,
+            sigma_theta=np.asarray(sigma_thetas)[None, :],
+            contrast=np.asarray(contrasts)[:, None],
+            n_cry=1000, sigma_sensor=0.02, sigma_xy=0.05)['mean_error_deg']
+        return contrasts, sigma_thetas, errors
+
+    cells, shape = grid(contrast=contrasts, sigma_theta=sigma_thetas)
+    for cell in cells:
+        cell.update(n_runs=n_runs, duration=duration, dt=dt)
+    errors = np.reshape(run_sweep(_sweep_cell, cells, workers=workers,
+                                  checkpoint=checkpoint,
+                                  label='phase diagram'), shape)
 
     for i, C in enumerate(contrasts):
         for j, sig in enumerate(sigma_thetas):
-            result = run_ensemble(n_runs=n_runs, duration=duration, dt=dt,
-                                  contrast=C, sigma_theta=sig)
-            errors[i, j] = result['mean_error_deg']
-            done += 1
-            print(f'  [{done}/{total}] C={C:.4f}, σ={sig:.3f} → '
-                  f'err={errors[i,j]:.1f}°')
+            print(f'  C={C:.4f}, σ={sig:.3f} → err={errors[i,j]:.1f}°')
 
     return contrasts, sigma_thetas, errors
 
@@ -219,6 +305,74 @@ def plot_phase_diagram(contrasts, sigma_thetas, errors):
     return fig
 
 
+def adaptive_phase_diagram(threshold=30.0, contrast_range=(10**-2.5, 1.0),
+                           sigma_range=(0.01, 10**0.5), base=4, max_depth=4,
+                           curvature_tol=None, n_runs=20, duration=300,
+                           dt=0.01, workers=1, checkpoint=None, fast=False):
+    """Phase diagram refined around the threshold-error contour.
+
+    Samples (σ_θ, contrast) on a quadtree (adaptive_grid.quadtree_sample)
+    that starts from a base × base log grid and splits only the cells
+    the threshold contour passes through, max_depth times: the boundary
+    is resolved as on a (base·2^max_depth + 1)² uniform grid.  Each
+    refinement level is one run_sweep (or, with fast=True, one
+    fast_ensemble_grid call over the new points).
+
+    Returns the quadtree_sample dict (x = σ_θ, y = contrast).
+    """
+    from adaptive_grid import quadtree_sample
+
+    def evaluate(sigmas, contrasts):
+        if fast:
+            from analysis import fast_ensemble_grid
+            return fast_ensemble_grid(
+                n_bugs=n_runs, duration=duration, dt=dt, kappa=2.0,
+                sigma_theta=sigmas, contrast=contrasts, n_cry=1000,
+                sigma_sensor=0.02, sigma_xy=0.05)['mean_error_deg']
+        cells = [dict(contrast=float(c), sigma_theta=float(s),
+                      n_runs=n_runs, duration=duration, dt=dt)
+                 for s, c in zip(sigmas, contrasts)]
+        return run_sweep(_sweep_cell, cells, workers=workers,
+                         checkpoint=checkpoint, label='adaptive phase diagram')
+
+    res = quadtree_sample(evaluate, sigma_range, contrast_range, threshold,
+                          base=base, max_depth=max_depth,
+                          curvature_tol=curvature_tol, verbose=True)
+    n_grid = res['equivalent_grid']
+    print(f'  {res["n_evals"]} points for the boundary resolution of a '
+          f'{n_grid}×{n_grid} grid ({n_grid**2} points)')
+    return res
+
+
+def plot_adaptive_phase_diagram(res, threshold=30.0):
+    """Plot an adaptive_phase_diagram: interpolated error map, the
+    sampled points, the leaf cells and the threshold contour."""
+    from matplotlib.patches import Rectangle
+    fig, ax = plt.subplots(1, 1, figsize=(8, 6))
+
+    # Triangulate in log space so that cells split in log10 look even
+    lx, ly = np.log10(res['x']), np.log10(res['y'])
+    im = ax.tripcolor(lx, ly, res['value'], shading='gouraud',
+                      cmap='RdYlGn_r')
+    for x0, x1, y0, y1 in np.log10(res['cells']):
+        ax.add_patch(Rectangle((x0, y0), x1 - x0, y1 - y0, fill=False,
+                               ec='k', lw=0.3, alpha=0.4))
+    ax.plot(lx, ly, 'k.', ms=1.5)
+    ax.add_collection(LineCollection(
+        np.log10(res['contour']), colors='white', linewidths=2,
+        label=f'{threshold:g}° contour'))
+    ax.set_xlabel('log₁₀ angular noise σ_θ (rad/√s)')
+    ax.set_ylabel('log₁₀ compass contrast C')
+    n_grid = res['equivalent_grid']
+    ax.set_title('Navigation Phase Diagram (adaptive)\n'
+                 f'{res["n_evals"]} points vs {n_grid}×{n_grid} uniform')
+    cb = plt.colorbar(im, ax=ax)
+    cb.set_label('Mean heading error (°)')
+    ax.legend(fontsize=8, loc='upper left')
+    plt.tight_layout()
+    return fig
+
+
 # ── Quantum compass models ───────────────────────────────────────────
 
 _QUANTUM_MODELS = {}
@@ -361,6 +515,9 @@ def main():
                         help='Run parameter sweep (slow)')
     parser.add_argument('--ensemble', type=int, default=0,
                         help='Run N-trajectory ensemble')
+    parser.add_argument('--density', action='store_true',
+                        help='--ensemble as a density map from the '
+                             'vectorised engine (N up to ~10⁵)')
     parser.add_argument('--validate', action='store_true',
                         help='Plot quantum yield curves for all models')
     parser.add_argument('--compare-models', action='store_true',
@@ -377,6 +534,18 @@ def main():
                         help='Angular noise sigma_theta')
     parser.add_argument('--save', type=str, default=None,
                         help='Save figures to this prefix (e.g., "fig_")')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for --sweep (0 = all cores)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                        help='Resumable checkpoint file for --sweep')
+    parser.add_argument('--fast', action='store_true',
+                        help='--sweep with the vectorised OU heading model')
+    parser.add_argument('--refine', type=int, default=0, metavar='DEPTH',
+                        help='--sweep on a quadtree refined DEPTH times '
+                             'around the 30° contour')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time each phase of Bug.step and '
+                             'RingAttractor.step in the single trajectory')
     args = parser.parse_args()
 
     # Build compass_params with optional quantum compass
@@ -400,14 +569,39 @@ def main():
                                    save_prefix=args.save)
         plt.show()
 
+    elif args.sweep and args.refine:
+        print('Running adaptive parameter sweep...')
+        res = adaptive_phase_diagram(max_depth=args.refine, n_runs=10,
+                                     duration=200, dt=0.02,
+                                     workers=args.workers or None,
+                                     checkpoint=args.checkpoint,
+                                     fast=args.fast)
+        fig = plot_adaptive_phase_diagram(res)
+        if args.save:
+            fig.savefig(f'{args.save}phase_diagram_adaptive.png', dpi=150)
+        plt.show()
+
     elif args.sweep:
         print('Running parameter sweep...')
-        C, S, E = parameter_sweep(n_runs=10, duration=200, dt=0.02)
+        C, S, E = parameter_sweep(n_runs=10, duration=200, dt=0.02,
+                                  workers=args.workers or None,
+                                  checkpoint=args.checkpoint,
+                                  fast=args.fast)
         fig = plot_phase_diagram(C, S, E)
         if args.save:
             fig.savefig(f'{args.save}phase_diagram.png', dpi=150)
         plt.show()
 
+    elif args.ensemble > 0 and args.density:
+        print(f'Running density map of {args.ensemble} bugs...')
+        fig = plot_ensemble_density(n_bugs=args.ensemble,
+                                    duration=args.duration,
+                                    contrast=args.contrast,
+                                    sigma_theta=args.sigma)
+        if args.save:
+            fig.savefig(f'{args.save}ensemble_density.png', dpi=150)
+        plt.show()
+
     elif args.ensemble > 0:
         print(f'Running ensemble of {args.ensemble} bugs...')
         fig = plot_ensemble(n_runs=args.ensemble, duration=args.duration,
@@ -418,12 +612,21 @@ def main():
 
     else:
         print('Running single trajectory...')
+        profiler = PhaseTimer('Bug.step') if args.profile else None
+        t0 = time.perf_counter()
         history, bug = run_single(duration=args.duration,
                                   contrast=args.contrast,
                                   sigma_theta=args.sigma,
-                                  compass_params=compass_params)
+                                  compass_params=compass_params,
+                                  profiler=profiler)
+        wall = time.perf_counter() - t0
         print(f'  Distance from start: {bug.distance_from_start():.1f} BL')
         print(f'  Mean heading error:  {bug.mean_heading_error()*180/np.pi:.1f}')
+        if profiler is not None:
+            print(f'  {profiler.n_starts} steps in {wall:.2f} s '
+                  f'({profiler.n_starts / wall:,.0f} steps/s wall, '
+                  f'including setup and timer overhead)')
+            print(profiler.report())
         fig = plot_trajectory(history)
         if args.save:
             fig.savefig(f'{args.save}trajectory.png', dpi=150)
@@ -0,0 +1,210 @@
+"""
+Random streams for the vectorised ensemble engines.
+
+The engines draw, every timestep, a fixed number k of standard normals
+per bug (compass error, heading noise, x and y noise).  Two sources
+provide them:
+
+  SharedStream  one np.random.default_rng(seed) drawing k vectors of
+                length n_bugs per step — the original engine behaviour,
+                bit-identical to the pre-stream code.  Steps are drawn
+                in blocks with one generator call: a Generator fills an
+                array in the same order as successive smaller calls, so
+                blocking does not change the numbers.
+
+  BugStreams    one counter-based Philox stream per bug, keyed by
+                (seed, global bug index).  Bug i's key is the state of
+                SeedSequence(seed, spawn_key=(i,)), i.e. the i-th child
+                of SeedSequence(seed).spawn.  Time is cut into blocks;
+                block b uses Philox counter (0, 0, b + 1, 0), and counter
+                slot 0 is reserved for initial conditions.
+
+With BugStreams every bug's noise depends only on (seed, bug index,
+step), never on n_bugs or on how the ensemble is split.  An ensemble
+sharded over any number of processes (bug_offset = first global index of
+the shard) therefore reproduces the per-bug outputs of the single run
+bit for bit; statistics computed from the concatenated per-bug values
+are then identical too.
+"""
+
+import numpy as np
+
+
+class SharedStream:
+    """Single-generator noise source (legacy draw order).
+
+    Parameters
+    ----------
+    seed : int or None
+    n_bugs : int
+    n_draws : int
+        Standard normals per bug per step.
+    block : int
+        Steps drawn per generator call.
+    n_steps : int or None
+        Total steps the engine will take, so the last block is not
+        over-drawn.
+
+    Initial-condition draws (uniform) must come before the first
+    normals, as they do in every engine: normals are drawn ahead.
+    """
+
+    def __init__(self, seed, n_bugs, n_draws, block=256, n_steps=None):
+        self.rng = np.random.default_rng(seed)
+        self.n_bugs = n_bugs
+        self.n_draws = n_draws
+        self.block = block
+        self.n_steps = n_steps
+        self.step = 0
+        self._buffer = np.empty((0, n_draws, n_bugs))
+        self._next = 0
+
+    def uniform(self, low, high):
+        """One uniform variate per bug (initial conditions)."""
+        return self.rng.uniform(low, high, self.n_bugs)
+
+    def _draw(self, n):
+        return self.rng.standard_normal((n, self.n_draws, self.n_bugs))
+
+    def normals(self):
+        """Standard normals for one step, shape (n_draws, n_bugs)."""
+        if self._next == len(self._buffer):
+            n = self.block
+            if self.n_steps is not None:
+                n = max(1, min(n, self.n_steps - self.step))
+            self._buffer = self._draw(n)
+            self._next = 0
+        self._next += 1
+        self.step += 1
+        return self._buffer[self._next - 1]
+
+    def state_dict(self):
+        """Generator state and held-back normals, for checkpointing."""
+        return {'rng': self.rng.bit_generator.state, 'step': self.step,
+                'buffer': self._buffer.copy(), 'next': self._next}
+
+    def load_state_dict(self, state):
+        """Restore a state_dict(): the next draws continue exactly."""
+        self.rng.bit_generator.state = state['rng']
+        self.step = state['step']
+        self._buffer = state['buffer'].copy()
+        self._next = state['next']
+
+    def normals_block(self, n):
+        """Standard normals for the next n steps, shape (n, n_draws,
+        n_bugs), as a fresh array."""
+        held = self._buffer[self._next:self._next + n]
+        self._next += len(held)
+        self.step += n
+        if len(held) == n:
+            return held.copy()
+        return np.concatenate([held, self._draw(n - len(held))])
+
+
+class BugStreams:
+    """Per-bug counter-based streams keyed by (seed, bug index, block).
+
+    Parameters
+    ----------
+    seed : int
+        Root seed shared by all shards of an ensemble.
+    n_bugs : int
+        Number of bugs in this shard.
+    n_draws : int
+        Standard normals per bug per step.
+    block : int
+        Steps generated per counter block.
+    bug_offset : int
+        Global index of this shard's first bug.
+    """
+
+    def __init__(self, seed, n_bugs, n_draws, block=256, bug_offset=0):
+        if seed is None:
+            raise ValueError("BugStreams needs an explicit seed")
+        self.seed = seed
+        self.n_bugs = n_bugs
+        self.n_draws = n_draws
+        self.block = block
+        self.bug_offset = bug_offset
+        self.keys = [
+            np.random.SeedSequence(seed, spawn_key=(bug_offset + i,))
+            .generate_state(2, dtype=np.uint64)
+            for i in range(n_bugs)
+        ]
+        self.step = 0
+        self._block_index = -1
+        self._buffer = None
+
+    def _generator(self, key, slot):
+        counter = np.array([0, 0, slot, 0], dtype=np.uint64)
+        return np.random.Generator(np.random.Philox(key=key, counter=counter))
+
+    def uniform(self, low, high):
+        """One uniform variate per bug, from the initial-condition slot."""
+        return np.array([self._generator(k, 0).uniform(low, high)
+                         for k in self.keys])
+
+    def _fill(self, b):
+        buf = np.empty((self.n_bugs, self.block, self.n_draws))
+        for i, key in enumerate(self.keys):
+            buf[i] = self._generator(key, b + 1).standard_normal(
+                (self.block, self.n_draws))
+        # (block, n_draws, n_bugs): one contiguous slab per step
+        self._buffer = np.ascontiguousarray(buf.transpose(1, 2, 0))
+        self._block_index = b
+
+    def normals(self):
+        """Standard normals for the next step, shape (n_draws, n_bugs)."""
+        b, j = divmod(self.step, self.block)
+        if b != self._block_index:
+            self._fill(b)
+        self.step += 1
+        return self._buffer[j]
+
+    def normals_block(self, n):
+        """Standard normals for the next n steps, shape (n, n_draws,
+        n_bugs), as a fresh array."""
+        out = np.empty((n, self.n_draws, self.n_bugs))
+        j = 0
+        while j < n:
+            b, i = divmod(self.step, self.block)
+            if b != self._block_index:
+                self._fill(b)
+            m = min(self.block - i, n - j)
+            out[j:j + m] = self._buffer[i:i + m]
+            self.step += m
+            j += m
+        return out
+
+    def seek(self, step):
+        """Position the streams so the next draw is for `step`."""
+        self.step = step
+
+    def state_dict(self):
+        """Stream position, for checkpointing (the keys follow from the
+        seed and the buffer from the position)."""
+        return {'step': self.step}
+
+    def load_state_dict(self, state):
+        self.seek(state['step'])
+
+
+def make_streams(seed, n_bugs, n_draws, per_bug=False, bug_offset=0,
+                 block=256, n_steps=None):
+    """Noise source for an engine: BugStreams if per_bug else SharedStream."""
+    if per_bug:
+        return BugStreams(seed, n_bugs, n_draws, block=block,
+                          bug_offset=bug_offset)
+    if bug_offset:
+        raise ValueError("bug_offset requires per-bug streams")
+    return SharedStream(seed, n_bugs, n_draws, block=block, n_steps=n_steps)
+
+
+def shards(n_bugs, n_shards):
+    """Split n_bugs into contiguous shards.
+
+    Returns a list of (bug_offset, n) pairs covering range(n_bugs).
+    """
+    bounds = np.linspace(0, n_bugs, n_shards + 1).astype(int)
+    return [(int(a), int(b - a)) for a, b in zip(bounds[:-1], bounds[1:])
+            if b > a]
@@ -0,0 +1,470 @@
+"""
+Gaussian-process emulator of fast_ensemble's mean heading error.
+
+Every fast_ensemble (and fast_ensemble_grid) result in a ResultCache is
+a noisy sample of the mean heading error as a function of the compass
+and steering parameters
+
+    contrast, sigma_theta, kappa, n_cry, sigma_sensor, mean_yield
+
+at fixed run conditions (duration, dt, goal, speed, sigma_xy, scheme,
+compass_dt).  Surrogate.from_cache collects the samples of one set of
+run conditions and fits a GP in the log of the parameters that vary
+among them:
+
+    y(u) ~ GP(ȳ, σ_f² exp(−½ Σ_d (u_d − u'_d)² / ℓ_d²)),
+    noise variance s² / n_bugs per sample,
+
+with ℓ, σ_f and s chosen by maximising the marginal likelihood
+(analytic gradients, Adam steps; no scipy).  Grid entries contribute one
+sample per cell.  Runs with a compass_map (calibration.py) are left
+out: their noise does not follow the Gaussian compass model.
+
+A prediction is a kernel row against the training inputs and one
+product with the stored K⁻¹: about 0.1 ms per query (or per batch of
+a few) for ~500 samples, against seconds for the ensemble itself.
+A query is flagged out of support, and should go to the real engine,
+when it
+
+  * sets a parameter that was constant in the training data to another
+    value (the GP knows nothing about that direction),
+  * falls outside the training range of a fitted parameter (by more
+    than `margin` in log10), or
+  * has predictive std above max_std (°).
+
+design() draws a Latin hypercube in log space; populate() runs
+fast_ensemble on it with the cache active, so the next from_cache has
+a well-spread training set.
+
+Usage:
+    python surrogate.py --cache results.db --populate 200
+    python surrogate.py --cache results.db \
+        --query contrast=0.05 sigma_theta=0.4 n_cry=50
+    python surrogate.py --cache results.db --holdout 0.2
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import cache
+
+INPUTS = ('contrast', 'sigma_theta', 'kappa', 'n_cry', 'sigma_sensor',
+          'mean_yield')
+CONDITIONS = ('duration', 'dt', 'goal', 'speed', 'sigma_xy', 'scheme',
+              'compass_dt')
+# Parameter defaults of fast_ensemble the cache records explicitly
+_DEFAULTS = {'mean_yield': 0.5}
+
+
+# ── Training data ─────────────────────────────────────────────────
+
+def _point(args, name):
+    value = args.get(name)
+    return _DEFAULTS.get(name) if value is None else value
+
+
+def _hashable(value):
+    """Cached args hold arrays as lists; conditions key a dict."""
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
+
+
+def _conditions(args):
+    return tuple(_hashable(args.get(name)) for name in CONDITIONS)
+
+
+def _samples(engine, args, value):
+    """(conditions, x, y, n_bugs) of each sample in one cache entry.
+
+    A grid entry gives one sample per cell, with that cell's conditions
+    (fast_ensemble_grid broadcasts goal, speed and sigma_xy too).
+    """
+    if engine == 'fast_ensemble':
+        yield (_conditions(args), [_point(args, name) for name in INPUTS],
+               float(value[0]), args['n_bugs'])
+        return
+    bug_error = np.asarray(value['bug_error_deg'])
+    shape = bug_error.shape[:-1]
+
+    def cells(name):
+        return np.broadcast_to(np.asarray(_point(args, name), dtype=float),
+                               shape).ravel()
+    X = np.column_stack([cells(name) for name in INPUTS])
+    per_cell = [cells(name).tolist() if isinstance(args.get(name), list)
+                else [args.get(name)] * X.shape[0] for name in CONDITIONS]
+    flat = bug_error.reshape(-1, bug_error.shape[-1])
+    for conditions, x, errors in zip(zip(*per_cell), X, flat):
+        yield conditions, x, errors.mean(), len(errors)
+
+
+def training_data(store, conditions=None):
+    """Samples of the mean heading error from cached engine results.
+
+    Parameters
+    ----------
+    store : cache.ResultCache
+    conditions : dict or None
+        Run conditions to select (missing keys: the most common value).
+        None selects the most common set of conditions.
+
+    Returns
+    -------
+    X : (n, len(INPUTS)) parameter values
+    y : (n,) mean heading error (°)
+    n_bugs : (n,) ensemble size of each sample
+    conditions : dict, the run conditions used
+    """
+    samples = []
+    for engine in ('fast_ensemble', 'fast_ensemble_grid'):
+        for _, args, value in store.entries(engine):
+            if args.get('backend', 'numpy') != 'numpy':
+                continue
+            # Calibrated compass noise is not a function of INPUTS
+            if args.get('compass_map') is not None:
+                continue
+            samples.extend(_samples(engine, args, value))
+    if not samples:
+        raise ValueError(f"no fast_ensemble results in {store.path}")
+
+    counts = {}
+    for key, _, _, _ in samples:
+        counts[key] = counts.get(key, 0) + 1
+    common = dict(zip(CONDITIONS, max(counts, key=counts.get)))
+    wanted = dict(common, **(conditions or {}))
+    wanted_key = tuple(_hashable(wanted[name]) for name in CONDITIONS)
+
+    X, y, n_bugs = [], [], []
+    for key, x, value, n in samples:
+        if key != wanted_key:
+            continue
+        X.append(x)
+        y.append(value)
+        n_bugs.append(n)
+    return np.array(X, dtype=float), np.array(y), np.array(n_bugs), wanted
+
+
+# ── Gaussian process ──────────────────────────────────────────────
+
+def _scaled_diff(a, b, scale):
+    return (a[:, None, :] - b[None, :, :]) / scale
+
+
+class Surrogate:
+    """GP emulator of mean heading error (°).
+
+    Parameters
+    ----------
+    X : (n, len(INPUTS)) training parameters
+    y : (n,) mean heading errors (°)
+    n_bugs : (n,) ensemble sizes (noise ∝ 1/n_bugs)
+    conditions : dict
+        Run conditions of the training data.
+    max_std : float
+        Predictive std (°) above which a query is out of support.
+    margin : float
+        Allowed extrapolation beyond the training range (log10 units).
+    """
+
+    def __init__(self, X, y, n_bugs, conditions=None, max_std=2.0,
+                 margin=0.05):
+        X = np.asarray(X, dtype=float)
+        if len(X) < 2:
+            raise ValueError("need at least two training samples")
+        self.conditions = dict(conditions or {})
+        self.max_std = max_std
+        self.margin = margin
+        logs = np.log10(X)
+        self.varying = np.ptp(logs, axis=0) > 1e-12
+        self.fixed = {name: X[0, d] for d, name in enumerate(INPUTS)
+                      if not self.varying[d]}
+        self._fixed_values = X[0, ~self.varying]
+        self.names = [n for n, v in zip(INPUTS, self.varying) if v]
+        u = logs[:, self.varying]
+        self.lo, self.hi = u.min(axis=0), u.max(axis=0)
+        self.centre = 0.5 * (self.lo + self.hi)
+        self.span = np.where(self.hi > self.lo, self.hi - self.lo, 1.0)
+        self.u = (u - self.centre) / self.span
+        self.y_mean = float(np.mean(y))
+        self.y = np.asarray(y, dtype=float) - self.y_mean
+        self.inv_n = 1.0 / np.asarray(n_bugs, dtype=float)
+        d = self.u.shape[1]
+        # log ℓ (per input), log σ_f, log s
+        self.theta = np.concatenate([np.full(d, np.log(0.3)),
+                                     [np.log(np.std(self.y) + 1e-3)],
+                                     [np.log(10.0)]])
+        self._factor()
+
+    @classmethod
+    def from_cache(cls, store, conditions=None, **kwargs):
+        """Fit to the fast_ensemble results in a ResultCache (or path)."""
+        if isinstance(store, str):
+            store = cache.ResultCache(store)
+        X, y, n_bugs, cond = training_data(store, conditions)
+        model = cls(X, y, n_bugs, conditions=cond, **kwargs)
+        model.fit()
+        return model
+
+    # ── Fit ───────────────────────────────────────────────────────
+
+    def _kernel_parts(self, theta):
+        d = self.u.shape[1]
+        ell, sf2 = np.exp(theta[:d]), np.exp(2 * theta[d])
+        diff = _scaled_diff(self.u, self.u, ell)
+        K_se = sf2 * np.exp(-0.5 * np.sum(diff**2, axis=-1))
+        noise = np.exp(2 * theta[d + 1]) * self.inv_n + 1e-8 * sf2
+        return K_se, diff, noise
+
+    def log_marginal(self, theta=None):
+        """Log marginal likelihood and its gradient in theta."""
+        theta = self.theta if theta is None else theta
+        d = self.u.shape[1]
+        K_se, diff, noise = self._kernel_parts(theta)
+        K = K_se + np.diag(noise)
+        L = np.linalg.cholesky(K)
+        alpha = np.linalg.solve(L.T, np.linalg.solve(L, self.y))
+        lml = (-0.5 * self.y @ alpha - np.sum(np.log(np.diag(L)))
+               - 0.5 * len(self.y) * np.log(2 * np.pi))
+        K_inv = np.linalg.solve(L.T, np.linalg.solve(L, np.eye(len(K))))
+        W = np.outer(alpha, alpha) - K_inv
+        grad = np.empty_like(theta)
+        for k in range(d):
+            grad[k] = 0.5 * np.sum(W * K_se * diff[..., k]**2)
+        grad[d] = np.sum(W * K_se)
+        grad[d + 1] = np.sum(np.diag(W) * np.exp(2 * theta[d + 1])
+                             * self.inv_n)
+        return lml, grad
+
+    def fit(self, n_iter=200, lr=0.05):
+        """Maximise the marginal likelihood over (ℓ, σ_f, s) by Adam."""
+        m = np.zeros_like(self.theta)
+        v = np.zeros_like(self.theta)
+        theta = self.theta.copy()
+        best = (-np.inf, theta.copy())
+        for i in range(1, n_iter + 1):
+            try:
+                lml, grad = self.log_marginal(theta)
+            except np.linalg.LinAlgError:
+                break
+            if lml > best[0]:
+                best = (lml, theta.copy())
+            m = 0.9 * m + 0.1 * grad
+            v = 0.999 * v + 0.001 * grad**2
+            theta = theta + lr * (m / (1 - 0.9**i)) / (
+                np.sqrt(v / (1 - 0.999**i)) + 1e-8)
+            theta = np.clip(theta, -7.0, 7.0)
+        self.theta = best[1]
+        self._factor()
+        return best[0]
+
+    def _factor(self):
+        d = self.u.shape[1]
+        K_se, _, noise = self._kernel_parts(self.theta)
+        L = np.linalg.cholesky(K_se + np.diag(noise))
+        self._alpha = np.linalg.solve(L.T, np.linalg.solve(L, self.y))
+        self._K_inv = np.linalg.solve(L.T, np.linalg.solve(L, np.eye(len(L))))
+        self._ell = np.exp(self.theta[:d])
+        self._sf2 = np.exp(2 * self.theta[d])
+        self.noise_scale = float(np.exp(self.theta[d + 1]))
+
+    # ── Prediction ────────────────────────────────────────────────
+
+    def _features(self, params):
+        """(n, n_varying) normalised inputs and the out-of-support mask."""
+        values = np.broadcast_arrays(*(
+            np.asarray(_point(params, name), dtype=float) for name in INPUTS))
+        values = np.reshape(values, (len(INPUTS), -1))
+        fixed = ~self.varying
+        outside = np.any(np.abs(values[fixed].T - self._fixed_values)
+                         > 1e-9 * np.abs(self._fixed_values), axis=1)
+        u = np.log10(values[self.varying].T)
+        outside |= np.any((u < self.lo - self.margin)
+                          | (u > self.hi + self.margin), axis=1)
+        return (u - self.centre) / self.span, outside
+
+    def predict(self, **params):
+        """Predicted mean heading error (°) for parameter values.
+
+        Parameters that were fixed in the training data default to that
+        value, mean_yield to 0.5; the others are required.  Array values
+        broadcast.
+
+        Returns
+        -------
+        mean, std : ndarray, flattened over the broadcast shape
+        in_support : ndarray of bool
+        """
+        for name in params:
+            if name not in INPUTS:
+                raise ValueError(f"unknown parameter {name!r}; "
+                                 f"expected one of {INPUTS}")
+        missing = [n for n in self.names
+                   if n not in params and n not in _DEFAULTS]
+        if missing:
+            raise ValueError(f"missing parameter(s) {missing}: they vary "
+                             f"in the training data")
+        params = dict(self.fixed, **params)
+        u, outside = self._features(params)
+        diff = _scaled_diff(u, self.u, self._ell)
+        k = self._sf2 * np.exp(-0.5 * np.sum(diff**2, axis=-1))
+        mean = self.y_mean + k @ self._alpha
+        quad = np.sum((k @ self._K_inv) * k, axis=1)
+        std = np.sqrt(np.maximum(self._sf2 - quad, 0.0))
+        return mean, std, ~outside & (std <= self.max_std)
+
+    def query(self, simulate=True, n_bugs=200, seed=0, **params):
+        """Predict one point; run fast_ensemble instead when the point is
+        out of support (and simulate is True).
+
+        Returns
+        -------
+        dict with keys 'mean_error_deg', 'std', 'in_support', 'simulated'
+        """
+        mean, std, ok = self.predict(**params)
+        if ok[0] or not simulate:
+            return {'mean_error_deg': float(mean[0]), 'std': float(std[0]),
+                    'in_support': bool(ok[0]), 'simulated': False}
+        from analysis import fast_ensemble
+        full = dict(self.fixed, **params)
+        err, _ = fast_ensemble(n_bugs=n_bugs, seed=seed, **self.conditions,
+                               **{name: full.get(name, _DEFAULTS.get(name))
+                                  for name in INPUTS})
+        return {'mean_error_deg': float(err), 'std': float('nan'),
+                'in_support': False, 'simulated': True}
+
+    def summary(self):
+        return {'n_train': len(self.y), 'inputs': self.names,
+                'fixed': self.fixed, 'conditions': self.conditions,
+                'length_scales_log10': dict(zip(
+                    self.names, (self._ell * self.span).tolist())),
+                'signal_std': float(np.sqrt(self._sf2)),
+                'noise_per_bug': self.noise_scale}
+
+
+# ── Designed samples ──────────────────────────────────────────────
+
+# log-uniform design bounds
+BOUNDS = {'contrast': (0.003, 1.0), 'sigma_theta': (0.01, 3.0),
+          'kappa': (0.5, 8.0), 'n_cry': (10, 5000),
+          'sigma_sensor': (0.005, 0.1)}
+
+
+def design(n, bounds=None, seed=0):
+    """Latin hypercube of n points, log-uniform within bounds.
+
+    bounds maps any of the BOUNDS keys (contrast, sigma_theta, kappa,
+    n_cry, sigma_sensor) to (lo, hi); keys left out keep their BOUNDS
+    range, so every point sets all five.  lo == hi holds one fixed.
+
+    Returns a dict {name: (n,) array}.
+    """
+    unknown = set(bounds or {}) - set(BOUNDS)
+    if unknown:
+        raise ValueError(f"no design bounds for {sorted(unknown)}; "
+                         f"expected keys of {sorted(BOUNDS)}")
+    bounds = dict(BOUNDS, **(bounds or {}))
+    rng = np.random.default_rng(seed)
+    out = {}
+    for name, (lo, hi) in bounds.items():
+        strata = (rng.permutation(n) + rng.uniform(size=n)) / n
+        out[name] = 10 ** (np.log10(lo) + strata * np.log10(hi / lo))
+    out['n_cry'] = np.round(out['n_cry']).astype(int)
+    return out
+
+
+def populate(n, duration=200, dt=0.02, n_bugs=200, bounds=None, seed=0,
+             verbose=True):
+    """Run fast_ensemble at a design() sample (cache must be active)."""
+    if cache.active() is None:
+        raise RuntimeError("activate a cache first (cache.activate)")
+    from analysis import fast_ensemble
+    points = design(n, bounds, seed)
+    t0 = time.time()
+    for i in range(n):
+        fast_ensemble(n_bugs=n_bugs, duration=duration, dt=dt,
+                      **{name: points[name][i] for name in points})
+        if verbose and (i + 1) % max(1, n // 10) == 0:
+            print(f'  [populate] {i + 1}/{n} ({time.time() - t0:.0f} s)')
+    return points
+
+
+def holdout_error(store, fraction=0.2, seed=0, conditions=None, **kwargs):
+    """Fit on a random part of the cached samples, score on the rest.
+
+    Returns (rms error (°), mean predicted std (°), fraction of held-out
+    points within 2 predicted std, n held out).
+    """
+    X, y, n_bugs, cond = training_data(store, conditions)
+    rng = np.random.default_rng(seed)
+    test = rng.permutation(len(y))[:int(fraction * len(y))]
+    train = np.setdiff1d(np.arange(len(y)), test)
+    model = Surrogate(X[train], y[train], n_bugs[train], cond, **kwargs)
+    model.fit()
+    mean, std, _ = model.predict(**{name: X[test, d]
+                                    for d, name in enumerate(INPUTS)
+                                    if name in model.names})
+    err = mean - y[test]
+    total_std = np.sqrt(std**2 + model.noise_scale**2 / n_bugs[test])
+    return (float(np.sqrt(np.mean(err**2))), float(np.mean(std)),
+            float(np.mean(np.abs(err) <= 2 * total_std)), len(test))
+
+
+# ── CLI ───────────────────────────────────────────────────────────
+
+def _parse_query(items):
+    params = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        params[name] = float(value)
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='GP emulator of fast_ensemble from cached results')
+    parser.add_argument('--cache', type=str, required=True, metavar='DB')
+    parser.add_argument('--populate', type=int, default=0, metavar='N',
+                        help='First run fast_ensemble at N designed points')
+    parser.add_argument('--query', nargs='+', default=None,
+                        metavar='NAME=VALUE',
+                        help=f'Predict at a point ({", ".join(INPUTS)})')
+    parser.add_argument('--holdout', type=float, default=0.0,
+                        metavar='FRACTION',
+                        help='Report error on a held-out fraction')
+    parser.add_argument('--no-simulate', action='store_true',
+                        help='Do not run out-of-support queries')
+    args = parser.parse_args()
+
+    store = cache.activate(args.cache)
+    if args.populate:
+        populate(args.populate)
+
+    t0 = time.time()
+    model = Surrogate.from_cache(store)
+    print(f'Fitted on {len(model.y)} samples in {time.time() - t0:.1f} s:')
+    print(json.dumps(model.summary(), indent=1, default=str))
+
+    if args.holdout:
+        rms, std, cover, n = holdout_error(store, args.holdout)
+        print(f'Held out {n}: rms error {rms:.2f}°, mean predicted std '
+              f'{std:.2f}°, {cover:.0%} within 2σ')
+
+    if args.query:
+        params = _parse_query(args.query)
+        model.predict(**params)
+        t0 = time.perf_counter()
+        for _ in range(1000):
+            model.predict(**params)
+        us = 1e3 * (time.perf_counter() - t0)
+        res = model.query(simulate=not args.no_simulate, **params)
+        tag = ('simulated (out of support)' if res['simulated'] else
+               'in support' if res['in_support'] else 'OUT OF SUPPORT')
+        print(f'{params}: {res["mean_error_deg"]:.2f}° ± {res["std"]:.2f}° '
+              f'[{tag}]  ({us:.0f} µs per prediction)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Parallel, resumable parameter sweeps.
+
+A sweep applies a task function to a list of cells, each cell being the
+keyword arguments of one evaluation.  Cells run on a process pool in
+chunks; every finished cell is appended to a JSON-lines checkpoint keyed
+by a hash of (task, its code, cell), so an interrupted sweep resumes
+where it stopped and identical cells — within a sweep or across sweeps
+sharing a checkpoint — are computed once.  The code is the task's
+cache._code_fingerprint: after an edit to the task or the engines it
+runs, old records are ignored and the cells computed afresh.
+
+Tasks must be module-level functions (picklable) taking the cell dict
+and returning something JSON-serialisable (numbers, lists, dicts).
+Fresh results are normalised to plain JSON types, so a resumed sweep
+returns exactly what the uninterrupted one would have.
+
+Usage:
+    cells, shape = grid(contrast=[0.01, 0.15], sigma_theta=[0.1, 0.3])
+    values = run_sweep(task, cells, workers=4, checkpoint='ckpt.jsonl')
+    values = np.reshape(values, shape)
+"""
+
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from cache import _code_fingerprint
+
+
+def _jsonable(obj):
+    """Convert numpy scalars/arrays (recursively) to plain Python."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return _jsonable(obj.tolist())
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def grid(**axes):
+    """Cartesian product of parameter axes.
+
+    Returns
+    -------
+    cells : list of dict
+        One cell per grid point, last axis varying fastest.
+    shape : tuple of int
+        Grid shape, for reshaping the results.
+    """
+    names = list(axes)
+    values = [list(axes[n]) for n in names]
+    cells = [dict(zip(names, combo)) for combo in itertools.product(*values)]
+    return cells, tuple(len(v) for v in values)
+
+
+def cell_key(task, cell, code=None):
+    """Stable hash of (task, code, cell) used as the checkpoint key.
+
+    code is the task's _code_fingerprint (computed if None).
+    """
+    if code is None:
+        code = _code_fingerprint(task)
+    payload = json.dumps([task.__module__, task.__qualname__, code,
+                          _jsonable(cell)], sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of completed cells.
+
+    Parameters
+    ----------
+    path : str
+        File to append to; created (with parent directories) on demand.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue      # torn final line from an interrupt
+                    self.done[rec['key']] = rec['result']
+
+    def add(self, records):
+        """Append [(key, cell, result), ...] and flush to disk."""
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(self.path, 'a') as f:
+            for key, cell, result in records:
+                self.done[key] = result
+                f.write(json.dumps({'key': key, 'cell': _jsonable(cell),
+                                    'result': result}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _run_chunk(task, cells):
+    return [_jsonable(task(cell)) for cell in cells]
+
+
+def run_sweep(task, cells, workers=1, chunksize=None, checkpoint=None,
+              label='sweep', verbose=True):
+    """Evaluate task(cell) for every cell.
+
+    Parameters
+    ----------
+    task : callable
+        Module-level function of one cell dict.
+    cells : list of dict
+    workers : int or None
+        Process count.  1 runs in-process; None uses os.cpu_count().
+    chunksize : int or None
+        Cells per submitted job.  Default: about four chunks per worker.
+    checkpoint : str or None
+        JSON-lines file recording completed cells.
+    label : str
+        Prefix for progress messages.
+
+    Returns
+    -------
+    list
+        Results in cell order.
+    """
+    workers = workers or os.cpu_count() or 1
+    store = Checkpoint(checkpoint) if checkpoint else None
+    done = dict(store.done) if store else {}
+
+    code = _code_fingerprint(task)
+    keys = [cell_key(task, c, code) for c in cells]
+    pending = {}
+    for key, cell in zip(keys, cells):
+        if key not in done and key not in pending:
+            pending[key] = cell
+    n_total = len(pending)
+    n_resumed = sum(k in done for k in set(keys))
+    if verbose and n_resumed:
+        print(f'  [{label}] resuming: {n_resumed} cells from checkpoint')
+
+    items = list(pending.items())
+    if chunksize is None:
+        chunksize = max(1, len(items) // (4 * workers))
+    chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+
+    def record(chunk, results, n_done):
+        recs = [(k, c, r) for (k, c), r in zip(chunk, results)]
+        for k, _, r in recs:
+            done[k] = r
+        if store:
+            store.add(recs)
+        if verbose:
+            print(f'  [{label}] {n_done}/{n_total} cells')
+
+    n_done = 0
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            results = _run_chunk(task, [c for _, c in chunk])
+            n_done += len(chunk)
+            record(chunk, results, n_done)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_chunk, task, [c for _, c in chunk]):
+                       chunk for chunk in chunks}
+            for fut in as_completed(futures):
+                chunk = futures[fut]
+                n_done += len(chunk)
+                record(chunk, fut.result(), n_done)
+
+    return [done[k] for k in keys]
@@ -0,0 +1,288 @@
+"""
+On-disk trajectory store for large ensembles.
+
+The engines keep only the current ensemble state, and Bug.history holds
+one bug's trajectory in Python lists.  When the trajectories themselves
+are needed (path-integration diagnostics, anomaly path deviation), a
+TrajectoryStore keeps them on disk as float32 .npy files, chunked by
+bug and by time, described by a JSON index:
+
+    <path>/index.json
+    <path>/<key>/b<bug chunk>_t<time chunk>.npy    (time_chunk, bug_chunk)
+
+Each chunk file is a plain .npy array, so it is memory-mapped on read.
+A reader slicing some bugs over some time window opens only the chunks
+it overlaps.  10⁵ bugs × 10⁴ steps is 4 GB per quantity, held on disk.
+
+Writing:
+
+  TrajectoryWriter  an accumulator (accumulators.py): pass it to an
+                    engine in accumulators=[...] and every step's x, y,
+                    theta (any StepState quantity) streams into the
+                    store, one time chunk open at a time.  The index
+                    is updated at each chunk boundary and after the
+                    last record, so the store is complete as soon as
+                    the engine returns.  Rows start as NaN, so
+                    quantities an engine does not provide stay NaN.
+                    It survives engine checkpoints (checkpointing.py):
+                    a resumed run republishes the saved index, reopens
+                    its chunks and continues writing, and rerunning a
+                    finished run leaves the store complete.
+  save_histories    Bug.run histories of a full-model ensemble, padded
+                    with NaN after bugs that left the landscape.
+
+Record k of a store is the state at time t0 + k·stride·dt: for the
+engines t0 = dt (the state after the first step); for Bug histories
+t0 = 0 (the initial state).
+
+Usage:
+    writer = TrajectoryWriter('runs/pi', keys=('x', 'y', 'theta'), every=5)
+    pi_homing_ensemble(..., accumulators=[writer])
+    store = TrajectoryStore('runs/pi')      # all records, no result() call
+    xy = store.read('x', bugs=slice(0, 100), steps=slice(1000, 2000))
+    store.times(slice(1000, 2000))
+"""
+
+import json
+import os
+
+import numpy as np
+
+from accumulators import Accumulator, _value
+
+
+INDEX = 'index.json'
+DTYPE = 'float32'
+
+
+def _chunk_path(path, key, bug_chunk, time_chunk):
+    return os.path.join(path, key, f'b{bug_chunk:05d}_t{time_chunk:05d}.npy')
+
+
+def _write_index(path, index):
+    tmp = os.path.join(path, INDEX + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp, os.path.join(path, INDEX))
+
+
+def _new_index(n_bugs, n_records, keys, dt, stride, t0, bug_chunk,
+               time_chunk):
+    return {'n_bugs': int(n_bugs), 'n_records': int(n_records),
+            'n_written': 0, 'keys': list(keys), 'dtype': DTYPE,
+            'dt': float(dt), 'stride': int(stride), 't0': float(t0),
+            'bug_chunk': int(min(bug_chunk, n_bugs)),
+            'time_chunk': int(time_chunk)}
+
+
+def _chunk_shape(index, bc, tc):
+    """(rows, bugs) of chunk (bc, tc); edge chunks are short."""
+    b, t = index['bug_chunk'], index['time_chunk']
+    return (min(t, index['n_records'] - tc * t),
+            min(b, index['n_bugs'] - bc * b))
+
+
+def _create_chunk(path, key, index, bc, tc):
+    mm = np.lib.format.open_memmap(
+        _chunk_path(path, key, bc, tc), mode='w+', dtype=DTYPE,
+        shape=_chunk_shape(index, bc, tc))
+    mm[:] = np.nan
+    return mm
+
+
+# ── Writing ───────────────────────────────────────────────────────
+
+class TrajectoryWriter(Accumulator):
+    """Accumulator that streams per-bug trajectories into a store.
+
+    Parameters
+    ----------
+    path : str
+        Store directory (created).  An existing store there is replaced.
+    keys : tuple
+        StepState quantities to record ('x', 'y', 'theta', 'error',
+        'delta_phi', 'distance', or callables with a name in `names`).
+    every : int
+        Record every n-th step.
+    bug_chunk, time_chunk : int
+        Chunk size in bugs and in records.  The default chunk is 16 MB.
+    names : tuple or None
+        File names for the keys (needed for callable keys).
+    """
+
+    def __init__(self, path, keys=('x', 'y', 'theta'), every=1,
+                 bug_chunk=8192, time_chunk=512, names=None, name=None):
+        super().__init__(None, name or 'trajectories')
+        self.path = path
+        self.keys = tuple(keys)
+        self.names = tuple(names) if names else tuple(
+            k if isinstance(k, str) else k.__name__ for k in self.keys)
+        self.every = every
+        self.bug_chunk = bug_chunk
+        self.time_chunk = time_chunk
+        self._open = {}
+
+    def start(self, n_bugs, n_steps, dt):
+        super().start(n_bugs, n_steps, dt)
+        n_records = -(-n_steps // self.every)
+        self.index = _new_index(n_bugs, n_records, self.names, dt,
+                                self.every, dt, self.bug_chunk,
+                                self.time_chunk)
+        for key in self.names:
+            os.makedirs(os.path.join(self.path, key), exist_ok=True)
+        _write_index(self.path, self.index)
+        self.n_updates = 0
+        self.n_written = 0
+        # Chunks this run created; others found on disk are stale
+        self._created = set()
+        self._open = {}
+        self._open_chunk = -1
+
+    def _flush(self):
+        for mm in self._open.values():
+            mm.flush()
+        self._open = {}
+        self._open_chunk = -1
+        self.index['n_written'] = self.n_written
+        _write_index(self.path, self.index)
+
+    def _open_time_chunk(self, tc):
+        self._flush()
+        n_bc = -(-self.n_bugs // self.index['bug_chunk'])
+        for key in self.names:
+            for bc in range(n_bc):
+                if (key, bc, tc) in self._created:
+                    mm = np.load(_chunk_path(self.path, key, bc, tc),
+                                 mmap_mode='r+')
+                else:
+                    mm = _create_chunk(self.path, key, self.index, bc, tc)
+                    self._created.add((key, bc, tc))
+                self._open[key, bc] = mm
+        self._open_chunk = tc
+
+    def update(self, state):
+        self.n_updates += 1
+        if (self.n_updates - 1) % self.every:
+            return
+        tc, row = divmod(self.n_written, self.time_chunk)
+        if tc != self._open_chunk:
+            self._open_time_chunk(tc)
+        b = self.index['bug_chunk']
+        for key, name in zip(self.keys, self.names):
+            v = _value(state, key)
+            if v is None:
+                continue
+            v = np.broadcast_to(v, (self.n_bugs,))
+            for bc in range(-(-self.n_bugs // b)):
+                self._open[name, bc][row] = v[bc * b:(bc + 1) * b]
+        self.n_written += 1
+        if self.n_written == self.index['n_records']:
+            self._flush()       # the run is over: publish every record
+
+    def result(self):
+        self._flush()
+        return {'path': self.path, 'n_records': self.n_written,
+                'n_bugs': self.n_bugs, 'keys': list(self.names)}
+
+    # Checkpoints pickle the accumulators: flush, and reopen on resume
+    def __getstate__(self):
+        if self._open:
+            self._flush()
+        state = dict(self.__dict__)
+        state['_open'] = {}
+        state['_open_chunk'] = -1
+        return state
+
+    def __setstate__(self, state):
+        # Engines call start(), which publishes an empty index, before
+        # restoring their accumulators: republish the saved one
+        self.__dict__.update(state)
+        if 'index' in state:
+            _write_index(self.path, self.index)
+
+
+def save_histories(path, histories, dt, keys=('x', 'y', 'heading',
+                                              'estimated_heading'),
+                   bug_chunk=8192, time_chunk=512):
+    """Store Bug.run histories (one dict of arrays per bug).
+
+    Bugs that stopped early (left the landscape) are NaN afterwards.
+    Record 0 is the initial state (t0 = 0).
+    """
+    n_bugs = len(histories)
+    n_records = max(len(h[keys[0]]) for h in histories)
+    index = _new_index(n_bugs, n_records, keys, dt, 1, 0.0, bug_chunk,
+                       time_chunk)
+    b, t = index['bug_chunk'], index['time_chunk']
+    for key in keys:
+        os.makedirs(os.path.join(path, key), exist_ok=True)
+        for bc in range(-(-n_bugs // b)):
+            block = np.full((n_records, min(b, n_bugs - bc * b)), np.nan,
+                            dtype=DTYPE)
+            for j, h in enumerate(histories[bc * b:(bc + 1) * b]):
+                v = np.asarray(h[key])
+                block[:len(v), j] = v
+            for tc in range(-(-n_records // t)):
+                np.save(_chunk_path(path, key, bc, tc),
+                        block[tc * t:(tc + 1) * t])
+    index['n_written'] = n_records
+    _write_index(path, index)
+    return TrajectoryStore(path)
+
+
+# ── Reading ───────────────────────────────────────────────────────
+
+class TrajectoryStore:
+    """Read access to a trajectory store.
+
+    Only the records written so far (n_records; an interrupted run
+    leaves fewer than planned) are visible.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, INDEX)) as f:
+            self.index = json.load(f)
+        self.n_bugs = self.index['n_bugs']
+        self.n_records = self.index['n_written']
+        self.keys = tuple(self.index['keys'])
+
+    def __repr__(self):
+        return (f'TrajectoryStore({self.path!r}: {self.n_bugs} bugs × '
+                f'{self.n_records} records of {", ".join(self.keys)})')
+
+    def times(self, steps=None):
+        """Times (s) of the selected records."""
+        k = np.arange(self.n_records)[_selector(steps)]
+        i = self.index
+        return i['t0'] + k * i['stride'] * i['dt']
+
+    def read(self, key, bugs=None, steps=None):
+        """key over the selected records and bugs.
+
+        bugs and steps are slices, index arrays or None (all).
+        Returns a float32 array of shape (records, bugs).
+        """
+        if key not in self.keys:
+            raise KeyError(f"{key!r} not in store (has {self.keys})")
+        rec = np.arange(self.n_records)[_selector(steps)]
+        bug = np.arange(self.n_bugs)[_selector(bugs)]
+        out = np.empty((rec.size, bug.size), dtype=DTYPE)
+        b, t = self.index['bug_chunk'], self.index['time_chunk']
+        for tc in np.unique(rec // t):
+            ti = np.flatnonzero(rec // t == tc)
+            for bc in np.unique(bug // b):
+                bi = np.flatnonzero(bug // b == bc)
+                mm = np.load(_chunk_path(self.path, key, bc, tc),
+                             mmap_mode='r')
+                out[np.ix_(ti, bi)] = mm[np.ix_(rec[ti] - tc * t,
+                                                bug[bi] - bc * b)]
+        return out
+
+    def trajectory(self, bug, steps=None):
+        """{key: (records,) array} of one bug."""
+        return {key: self.read(key, [bug], steps)[:, 0] for key in self.keys}
+
+
+def _selector(sel):
+    return slice(None) if sel is None else sel